@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Authors:
+#     Santiago Dueñas <sduenas@bitergia.com>
+#
+
+from ..backend import Summary
+from ..errors import BackendError
+
+
+async def fetch_async(backend, category, filter_classified=False, **kwargs):
+    """Fetch items from the repository asynchronously.
+
+    Asynchronous version of `Backend.fetch`. It returns an asynchronous
+    generator of items, so several backends (or several requests
+    of the same backend) can be waiting for data at the same time
+    on the same event loop.
+
+    Only those backends that implement `fetch_items_async` and
+    `_init_async_client` support this function.
+
+    :param backend: backend which fetches the items
+    :param category: the category of the items fetched
+    :param filter_classified: remove classified fields from the resulting items
+    :param kwargs: a list of other parameters (e.g., from_date, offset, etc.
+    specific for each backend)
+
+    :returns: an asynchronous generator of items
+
+    :raises BackendError: either when the category is not valid or
+        'filter_classified' and 'archive' are active at the same time.
+    """
+    backend._summary = Summary()
+
+    if category not in backend.categories:
+        cause = "%s category not valid for %s" % (category, backend.__class__.__name__)
+        raise BackendError(cause=cause)
+
+    if filter_classified and backend.archive:
+        cause = "classified fields filtering is not compatible with archiving items"
+        raise BackendError(cause=cause)
+
+    if backend.archive:
+        backend.archive.init_metadata(backend.origin, backend.__class__.__name__, backend.version,
+                                      category, kwargs)
+
+    backend.client = backend._init_async_client()
+
+    try:
+        async for item in backend.fetch_items_async(category, **kwargs):
+            if filter_classified:
+                item = backend.filter_classified_data(item)
+
+            metadata_item = backend.metadata(item, filter_classified=filter_classified)
+            backend.summary.update(metadata_item)
+
+            yield metadata_item
+    except BaseException:
+        if backend.archive:
+            backend._flush_archive()
+        raise
+    else:
+        if backend.archive:
+            backend.archive.flush()
+    finally:
+        await backend.client.close()
@@ -0,0 +1,336 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Authors:
+#     Santiago Dueñas <sduenas@bitergia.com>
+#
+
+import asyncio
+import collections
+import email.utils
+import logging
+import time
+
+import requests
+import requests.structures
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from ..client import HttpClient, RateLimitHandler
+from ..errors import HttpClientError
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncHttpClient:
+    """Abstract class for asynchronous HTTP clients.
+
+    Asyncio version of `HttpClient`. Sub-classes can use the coroutine
+    `fetch` to obtain data from the data source. Up to `max_concurrency`
+    requests are sent at the same time, so several coroutines can share
+    the same client.
+
+    Requests are retried the same way `HttpClient` does: on connection
+    errors and on the status codes of `status_forcelist`, waiting an
+    exponential backoff time between retries, or the time set in the
+    `Retry-After` header for the status codes of `retry_after_status`.
+    Responses are returned as `requests.Response` objects and they are
+    stored in, or retrieved from, the archive like `HttpClient` does.
+
+    This client requires the `aiohttp` package; a `HttpClientError`
+    is raised when it is not installed.
+
+    :param base_url: base URL of the data source
+    :param max_retries: number of max retries to a data source
+        before raising a RetryError exception
+    :param sleep_time: time (in seconds) to sleep in case
+        of connection problems
+    :param extra_headers: extra headers sent on every request
+    :param extra_status_forcelist: extra status codes to retry on
+    :param extra_retry_after_status: extra status codes on which
+        the `Retry-After` header is respected
+    :param archive: archive to store/retrieve responses
+    :param from_archive: it tells whether to write/read the archive
+    :param max_concurrency: maximum number of requests sent at
+        the same time
+    """
+    version = '0.1.0'
+
+    DEFAULT_SLEEP_TIME = HttpClient.DEFAULT_SLEEP_TIME
+    MAX_RETRIES = HttpClient.MAX_RETRIES
+    MAX_BACKOFF_TIME = 120
+    DEFAULT_MAX_CONCURRENCY = 10
+
+    DEFAULT_RETRY_AFTER_STATUS_CODES = HttpClient.DEFAULT_RETRY_AFTER_STATUS_CODES
+    DEFAULT_STATUS_FORCE_LIST = HttpClient.DEFAULT_STATUS_FORCE_LIST
+
+    DEFAULT_HEADERS = HttpClient.DEFAULT_HEADERS
+
+    GET = HttpClient.GET
+    POST = HttpClient.POST
+
+    def __init__(self, base_url, max_retries=MAX_RETRIES, sleep_time=DEFAULT_SLEEP_TIME,
+                 extra_headers=None, extra_status_forcelist=None, extra_retry_after_status=None,
+                 archive=None, from_archive=False, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+
+        if not aiohttp:
+            raise HttpClientError(cause="aiohttp package is required to use asynchronous clients")
+
+        self.base_url = base_url
+
+        self.headers = dict(self.DEFAULT_HEADERS)
+        if extra_headers:
+            self.headers.update(extra_headers)
+
+        self.status_forcelist = list(self.DEFAULT_STATUS_FORCE_LIST)
+        if extra_status_forcelist:
+            self.status_forcelist.extend(extra_status_forcelist)
+
+        self.retry_after_status = list(self.DEFAULT_RETRY_AFTER_STATUS_CODES)
+        if extra_retry_after_status:
+            self.retry_after_status.extend(extra_retry_after_status)
+
+        self.max_retries = max_retries
+        self.sleep_time = sleep_time
+        self.max_concurrency = max_concurrency
+
+        self.archive = archive
+        self.from_archive = from_archive
+
+        self.session = None
+        self._semaphore = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def fetch(self, url, payload=None, headers=None, method=GET, verify=True, auth=None):
+        """Fetch the data from a given URL.
+
+        :param url: link to the resource
+        :param payload: payload of the request
+        :param headers: headers of the request
+        :param method: type of request call (GET or POST)
+        :param verify: verifying the SSL certificate
+        :param auth: (user, password) tuple used for basic authentication
+
+        :returns a response object
+        """
+        if self.from_archive:
+            response = self._fetch_from_archive(url, payload, headers)
+        else:
+            response = await self._fetch_from_remote(url, payload, headers, method, verify, auth)
+
+        return response
+
+    async def close(self):
+        """Close the http session."""
+
+        if self.session:
+            await self.session.close()
+            self.session = None
+
+    @staticmethod
+    def sanitize_for_archive(url, headers, payload):
+        """Sanitize the URL, headers and payload of a HTTP request before storing/retrieving items.
+
+        See `HttpClient.sanitize_for_archive`.
+        """
+        return url, headers, payload
+
+    def _fetch_from_archive(self, url, payload, headers):
+
+        url, headers, payload = self.sanitize_for_archive(url, headers, payload)
+        response = self.archive.retrieve(url, payload, headers)
+
+        if not isinstance(response, requests.Response):
+            raise response
+
+        return response
+
+    async def _fetch_from_remote(self, url, payload, headers, method, verify, auth):
+
+        if not self._semaphore:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async with self._semaphore:
+            response = await self._send(url, payload, headers, method, verify, auth)
+
+        try:
+            response.raise_for_status()
+        except Exception as e:
+            if self.archive:
+                url, headers, payload = self.sanitize_for_archive(url, headers, payload)
+                self.archive.store(url, payload, headers, e)
+            raise e
+
+        if self.archive:
+            url, headers, payload = self.sanitize_for_archive(url, headers, payload)
+            self.archive.store(url, payload, headers, response)
+        return response
+
+    async def _send(self, url, payload, headers, method, verify, auth):
+        """Send a request retrying it when needed"""
+
+        retries = 0
+
+        while True:
+            try:
+                response = await self._request(url, payload, headers, method, verify, auth)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if retries >= self.max_retries:
+                    raise requests.exceptions.ConnectionError(str(e))
+                retries += 1
+                await asyncio.sleep(self._backoff_time(retries))
+                continue
+
+            retry_after = response.headers.get('Retry-After', None)
+
+            if response.status_code in self.status_forcelist:
+                pass
+            elif retry_after and response.status_code in self.retry_after_status:
+                pass
+            else:
+                return response
+
+            if retries >= self.max_retries:
+                msg = "Max retries exceeded with url: %s (too many %s error responses)"
+                raise requests.exceptions.RetryError(msg % (url, response.status_code))
+
+            retries += 1
+
+            if retry_after and response.status_code in self.retry_after_status:
+                seconds = self._retry_after_time(retry_after)
+            else:
+                seconds = self._backoff_time(retries)
+
+            logger.debug("Retrying %s (%s) in %s secs", url, response.status_code, seconds)
+            await asyncio.sleep(seconds)
+
+    async def _request(self, url, payload, headers, method, verify, auth):
+        """Send a request and build its response"""
+
+        if not self.session:
+            self.session = self._create_http_session()
+
+        kwargs = {
+            'headers': headers,
+            'ssl': None if verify else False,
+            'auth': aiohttp.BasicAuth(*auth) if auth else None
+        }
+
+        if method == self.GET:
+            kwargs['params'] = payload
+        else:
+            kwargs['data'] = payload
+
+        async with self.session.request(method, url, **kwargs) as r:
+            content = await r.read()
+
+            response = requests.Response()
+            response.status_code = r.status
+            response.reason = r.reason
+            response.url = str(r.url)
+            response.headers = requests.structures.CaseInsensitiveDict()
+            for header in r.headers.keys():
+                response.headers[header] = ', '.join(r.headers.getall(header))
+            response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+            response._content = content
+            response._content_consumed = True
+
+        return response
+
+    def _create_http_session(self):
+        """Create a http session."""
+
+        return aiohttp.ClientSession(headers=self.headers)
+
+    def _backoff_time(self, retries):
+        """Seconds to wait before sending a request again"""
+
+        if retries <= 1:
+            return 0
+
+        return min(self.sleep_time * (2 ** (retries - 1)), self.MAX_BACKOFF_TIME)
+
+    @staticmethod
+    def _retry_after_time(retry_after):
+        """Seconds to wait set in a `Retry-After` header"""
+
+        try:
+            seconds = int(retry_after)
+        except ValueError:
+            retry_date = email.utils.parsedate_to_datetime(retry_after)
+            seconds = retry_date.timestamp() - time.time()
+
+        return max(seconds, 0)
+
+
+class AsyncRateLimitHandler(RateLimitHandler):
+    """Class to handle rate limit for asynchronous HTTP clients.
+
+    Like `RateLimitHandler` but the fetching process sleeps without
+    blocking other coroutines.
+    """
+    async def sleep_for_rate_limit(self):
+        """The fetching process sleeps until the rate limit is restored or
+           raises a RateLimitError exception if sleep_for_rate flag is disabled.
+        """
+        seconds_to_reset = self._rate_limit_sleep_time()
+
+        if seconds_to_reset is not None:
+            await asyncio.sleep(seconds_to_reset)
+
+
+async def schedule_ahead(coros, size):
+    """Schedule the coroutines of an iterable ahead of time.
+
+    Asynchronous generator which wraps the coroutines of `coros`
+    in tasks and returns them in the same order. Up to `size`
+    tasks are scheduled before they are requested, so they run
+    concurrently while the previous ones are awaited. The tasks
+    that were not requested are cancelled when the generator
+    is closed.
+
+    :param coros: iterable of coroutines
+    :param size: maximum number of tasks scheduled in advance
+
+    :returns: an asynchronous generator of tasks
+    """
+    coros = iter(coros)
+    tasks = collections.deque()
+
+    try:
+        while True:
+            while len(tasks) <= size:
+                coro = next(coros, None)
+                if coro is None:
+                    break
+                tasks.append(asyncio.ensure_future(coro))
+
+            if not tasks:
+                break
+
+            yield tasks.popleft()
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Authors:
+#     Santiago Dueñas <sduenas@bitergia.com>
+#
+
+import json
+import logging
+
+import requests
+
+from grimoirelab_toolkit.uris import urijoin
+
+from ..backends.core.jenkins import DETAIL_DEPTH, SLEEP_TIME, JenkinsClient
+from .client import AsyncHttpClient, schedule_ahead
+
+logger = logging.getLogger(__name__)
+
+
+async def fetch_builds(backend):
+    """Fetch the builds of a Jenkins backend asynchronously.
+
+    Asynchronous version of `Jenkins.fetch_items`. The builds of
+    up to `max_concurrency` jobs (see `AsyncHttpClient`) are
+    requested at the same time; builds are returned in the same
+    order `Jenkins.fetch_items` does.
+
+    :param backend: `Jenkins` backend with an initialized
+        asynchronous client
+
+    :returns: an asynchronous generator of builds
+    """
+    client = backend.client
+
+    logger.info("Looking for projects at url '%s'", backend.url)
+
+    nbuilds = 0  # number of builds processed
+    njobs = 0  # number of jobs processed
+
+    projects = json.loads(await client.get_jobs())
+    jobs = projects['jobs']
+
+    requests_builds = (client.get_builds(job['name']) for job in jobs)
+    tasks = schedule_ahead(requests_builds, client.max_concurrency)
+    pending_jobs = iter(jobs)
+
+    try:
+        async for task in tasks:
+            job = next(pending_jobs)
+
+            logger.debug("Adding builds from %s (%i/%i)",
+                         job['url'], njobs, len(jobs))
+
+            try:
+                raw_builds = await task
+            except requests.exceptions.HTTPError as e:
+                backend._skip_job(job, e)
+                continue
+
+            builds = backend._parse_job_builds(job, raw_builds)
+            if builds is None:
+                continue
+
+            for build in builds:
+                yield build
+                nbuilds += 1
+
+            njobs += 1
+    finally:
+        await tasks.aclose()
+
+    logger.info("Total number of jobs: %i/%i", njobs, len(jobs))
+    logger.info("Total number of builds: %i", nbuilds)
+
+
+class JenkinsAsyncClient(AsyncHttpClient):
+    """Jenkins API asynchronous client.
+
+    Asynchronous version of `JenkinsClient`. Responses are stored
+    in the archive with the same keys `JenkinsClient` uses, so
+    they can be read by any of them.
+
+    :param url: URL of jenkins node: https://build.opnfv.org/ci
+    :param user: Jenkins user
+    :param api_token: Jenkins auth token to access the API
+    :param blacklist_jobs: exclude the jobs of this list while fetching
+    :param detail_depth: set the detail level of the data returned by the API
+    :param sleep_time: time (in seconds) to sleep in case
+        of connection problems
+    :param archive: an archive to store/read fetched data
+    :param from_archive: it tells whether to write/read the archive
+    :param max_concurrency: maximum number of requests sent at
+        the same time
+
+    :raises HTTPError: when an error occurs doing the request
+    """
+    EXTRA_STATUS_FORCELIST = JenkinsClient.EXTRA_STATUS_FORCELIST
+
+    def __init__(self, url, user=None, api_token=None, blacklist_jobs=None,
+                 detail_depth=DETAIL_DEPTH, sleep_time=SLEEP_TIME,
+                 archive=None, from_archive=False,
+                 max_concurrency=AsyncHttpClient.DEFAULT_MAX_CONCURRENCY):
+        super().__init__(url, sleep_time=sleep_time, extra_status_forcelist=self.EXTRA_STATUS_FORCELIST,
+                         archive=archive, from_archive=from_archive,
+                         max_concurrency=max_concurrency)
+
+        self.auth = None
+        if user and api_token:
+            self.auth = (user, api_token)
+
+        self.blacklist_jobs = blacklist_jobs
+        self.detail_depth = detail_depth
+
+    async def get_jobs(self):
+        """ Retrieve all jobs"""
+
+        url_jenkins = urijoin(self.base_url, "api", "json")
+
+        response = await self.fetch(url_jenkins, auth=self.auth)
+        return response.text
+
+    async def get_builds(self, job_name):
+        """ Retrieve all builds from a job"""
+
+        if self.blacklist_jobs and job_name in self.blacklist_jobs:
+            logger.warning("Not getting blacklisted job: %s", job_name)
+            return
+
+        payload = {'depth': self.detail_depth}
+        url_build = urijoin(self.base_url, "job", job_name, "api", "json")
+
+        response = await self.fetch(url_build, payload=payload, auth=self.auth)
+        return response.text
@@ -20,19 +20,28 @@
 #     Santiago Dueñas <sduenas@bitergia.com>
 #
 
+import copyreg
 import hashlib
+import io
 import json
 import logging
 import os
 import pickle
 import sqlite3
+import threading
+import time
 import uuid
+import zlib
+
+import requests
+import requests.structures
 
 from grimoirelab_toolkit.datetime import (datetime_utcnow,
                                           datetime_to_utc,
                                           str_to_datetime)
 
 from .errors import ArchiveError, ArchiveManagerError
+from .utils import sqlite_execute
 
 
 logger = logging.getLogger(__name__)
@@ -55,7 +64,27 @@ class Archive:
     initialized calling to `init_metadata` method after creating
     a new archive.
 
+    By default, every raw item is committed to the archive file
+    as soon as it is stored. To reduce the cost of writing to disk,
+    items can be written in batches setting `batch_size` to the
+    number of items committed at once and/or `batch_interval` to
+    the maximum number of seconds between commits. In batch mode,
+    the archive uses write-ahead logging (WAL) journaling. Pending
+    items are written calling `flush`.
+
+    When a `catalog` is set, the metadata of the archive will be
+    indexed there once it is initialized.
+
+    The same archive object can be shared by several threads.
+
+    Since version 2 of the archive format, raw items are stored
+    compressed and only those fields of HTTP responses needed to
+    replay them (i.e, URL, status, headers and body) are kept.
+    Items stored using the former format can still be retrieved.
+
     :param archive_path: path where this archive is stored
+    :param batch_size: number of stored items committed at once
+    :param batch_interval: maximum number of seconds between commits
 
     :raises ArchiveError: when the archive does not exist or is invalid
     """
@@ -63,6 +92,10 @@ class Archive:
     ARCHIVE_TABLE = "archive"
     METADATA_TABLE = "metadata"
 
+    # Magic number of the raw items stored using the format version 2
+    FORMAT_MAGIC = b'\x00PCVL\x02'
+    COMPRESSION_LEVEL = 6
+
     # Table structure
     ARCHIVE_CREATE_STMT = "CREATE TABLE " + ARCHIVE_TABLE + " ( " \
                           "id INTEGER PRIMARY KEY AUTOINCREMENT, " \
@@ -80,7 +113,7 @@ class Archive:
                            "backend_params BLOB, " \
                            "created_on TEXT)"
 
-    def __init__(self, archive_path):
+    def __init__(self, archive_path, batch_size=1, batch_interval=None):
         if not os.path.exists(archive_path):
             raise ArchiveError(cause="archive %s does not exist" % (archive_path))
 
@@ -92,15 +125,46 @@ class Archive:
         self.backend_params = None
         self.created_on = None
 
-        self._db = sqlite3.connect(self.archive_path)
+        self.batch_size = max(batch_size, 1)
+        self.batch_interval = batch_interval
+        self.catalog = None
+        self._pending = 0
+        self._last_commit_ts = time.time()
+
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(self.archive_path, check_same_thread=False)
 
         self._verify_archive()
         self._load_metadata()
 
+        if self.batch_size > 1 or self.batch_interval:
+            self._enable_wal()
+
     def __del__(self):
-        conn = getattr(self, '_db', None)
-        if conn:
-            conn.close()
+        if getattr(self, '_db', None):
+            try:
+                self.close()
+            except ArchiveError as e:
+                logger.warning("Pending items of archive %s were not written; cause: %s",
+                               self.archive_path, str(e))
+
+    def close(self):
+        """Write the pending stored items and close the archive file.
+
+        The archive can not be used once it is closed.
+
+        :raises ArchiveError: when an error occurs committing the items;
+            the file is closed anyway
+        """
+        with self._lock:
+            if not self._db:
+                return
+
+            try:
+                self.flush()
+            finally:
+                self._db.close()
+                self._db = None
 
     def init_metadata(self, origin, backend_name, backend_version,
                       category, backend_params):
@@ -126,15 +190,16 @@ class Archive:
                     backend_params_dumped, created_on_dumped,)
 
         try:
-            cursor = self._db.cursor()
-            insert_stmt = "INSERT INTO " + self.METADATA_TABLE + " "\
-                          "(origin, backend_name, backend_version, " \
-                          "category, backend_params, created_on) " \
-                          "VALUES (?, ?, ?, ?, ?, ?)"
-            cursor.execute(insert_stmt, metadata)
-
-            self._db.commit()
-            cursor.close()
+            with self._lock:
+                cursor = self._db.cursor()
+                insert_stmt = "INSERT INTO " + self.METADATA_TABLE + " "\
+                              "(origin, backend_name, backend_version, " \
+                              "category, backend_params, created_on) " \
+                              "VALUES (?, ?, ?, ?, ?, ?)"
+                cursor.execute(insert_stmt, metadata)
+
+                self._db.commit()
+                cursor.close()
         except sqlite3.DatabaseError as e:
             msg = "metadata initialization error; cause: %s" % str(e)
             raise ArchiveError(cause=msg)
@@ -149,6 +214,9 @@ class Archive:
         logger.debug("Metadata of archive %s initialized to %s",
                      self.archive_path, metadata)
 
+        if self.catalog:
+            self.catalog.add(self)
+
     def store(self, uri, payload, headers, data):
         """Store a raw item in this archive.
 
@@ -164,31 +232,57 @@ class Archive:
         :raises ArchiveError: when an error occurs storing the given data
         """
         hashcode = self.make_hashcode(uri, payload, headers)
-        payload_dump = pickle.dumps(payload, 0)
-        headers_dump = pickle.dumps(headers, 0)
-        data_dump = pickle.dumps(data, 0)
+        payload_dump = pickle.dumps(payload, pickle.HIGHEST_PROTOCOL)
+        headers_dump = pickle.dumps(headers, pickle.HIGHEST_PROTOCOL)
+        data_dump = self.dump_data(data)
 
         logger.debug("Archiving %s with %s %s %s in %s",
                      hashcode, uri, payload, headers, self.archive_path)
 
-        try:
-            cursor = self._db.cursor()
-            insert_stmt = "INSERT INTO " + self.ARCHIVE_TABLE + " (" \
-                          "id, hashcode, uri, payload, headers, data) " \
-                          "VALUES(?,?,?,?,?,?)"
-            cursor.execute(insert_stmt, (None, hashcode, uri,
-                                         payload_dump, headers_dump, data_dump))
-            self._db.commit()
-            cursor.close()
-        except sqlite3.IntegrityError as e:
-            msg = "data storage error; cause: duplicated entry %s" % hashcode
-            raise ArchiveError(cause=msg)
-        except sqlite3.DatabaseError as e:
-            msg = "data storage error; cause: %s" % str(e)
-            raise ArchiveError(cause=msg)
+        with self._lock:
+            try:
+                cursor = self._db.cursor()
+                insert_stmt = "INSERT INTO " + self.ARCHIVE_TABLE + " (" \
+                              "id, hashcode, uri, payload, headers, data) " \
+                              "VALUES(?,?,?,?,?,?)"
+                cursor.execute(insert_stmt, (None, hashcode, uri,
+                                             payload_dump, headers_dump, data_dump))
+                cursor.close()
+            except sqlite3.IntegrityError as e:
+                msg = "data storage error; cause: duplicated entry %s" % hashcode
+                raise ArchiveError(cause=msg)
+            except sqlite3.DatabaseError as e:
+                msg = "data storage error; cause: %s" % str(e)
+                raise ArchiveError(cause=msg)
+
+            self._pending += 1
+
+            if self._pending >= self.batch_size or self._batch_interval_expired():
+                self.flush()
 
         logger.debug("%s data archived in %s", hashcode, self.archive_path)
 
+    def flush(self):
+        """Write the pending stored items to the archive file.
+
+        :raises ArchiveError: when an error occurs committing the items
+        """
+        with self._lock:
+            if not self._pending:
+                return
+
+            try:
+                self._db.commit()
+            except sqlite3.DatabaseError as e:
+                msg = "data storage error; cause: %s" % str(e)
+                raise ArchiveError(cause=msg)
+
+            logger.debug("%s pending entries committed in %s",
+                         self._pending, self.archive_path)
+
+            self._pending = 0
+            self._last_commit_ts = time.time()
+
     def retrieve(self, uri, payload, headers):
         """Retrieve a raw item from the archive.
 
@@ -208,22 +302,23 @@ class Archive:
         logger.debug("Retrieving entry %s with %s %s %s in %s",
                      hashcode, uri, payload, headers, self.archive_path)
 
-        self._db.row_factory = sqlite3.Row
-
         try:
-            cursor = self._db.cursor()
-            select_stmt = "SELECT data " \
-                          "FROM " + self.ARCHIVE_TABLE + " " \
-                          "WHERE hashcode = ?"
-            cursor.execute(select_stmt, (hashcode,))
-            row = cursor.fetchone()
-            cursor.close()
+            with self._lock:
+                self._db.row_factory = sqlite3.Row
+
+                cursor = self._db.cursor()
+                select_stmt = "SELECT data " \
+                              "FROM " + self.ARCHIVE_TABLE + " " \
+                              "WHERE hashcode = ?"
+                cursor.execute(select_stmt, (hashcode,))
+                row = cursor.fetchone()
+                cursor.close()
         except sqlite3.DatabaseError as e:
             msg = "data retrieval error; cause: %s" % str(e)
             raise ArchiveError(cause=msg)
 
         if row:
-            found = pickle.loads(row['data'])
+            found = self.load_data(row['data'])
         else:
             msg = "entry %s not found in archive %s" % (hashcode, self.archive_path)
             raise ArchiveError(cause=msg)
@@ -231,13 +326,15 @@ class Archive:
         return found
 
     @classmethod
-    def create(cls, archive_path):
+    def create(cls, archive_path, batch_size=1, batch_interval=None):
         """Create a brand new archive.
 
          Call this method to create a new and empty archive. It will initialize
          the storage file in the path defined by `archive_path`.
 
         :param archive_path: absolute path where the archive file will be created
+        :param batch_size: number of stored items committed at once
+        :param batch_interval: maximum number of seconds between commits
 
         :raises ArchiveError: when the archive file already exists
         """
@@ -256,11 +353,52 @@ class Archive:
         conn.close()
 
         logger.debug("Creating archive %s", archive_path)
-        archive = cls(archive_path)
+        archive = cls(archive_path, batch_size=batch_size,
+                      batch_interval=batch_interval)
         logger.debug("Achive %s was created", archive_path)
 
         return archive
 
+    @classmethod
+    def dump_data(cls, data):
+        """Serialize and compress a raw item.
+
+        The item is pickled using the highest protocol available. HTTP
+        responses, also those included in other objects like exceptions,
+        are reduced to their URL, status, reason, encoding, headers and
+        body. The result is compressed with zlib and prefixed with the
+        format magic number.
+
+        :param data: raw item to serialize
+
+        :returns: a bytes object
+        """
+        fd = io.BytesIO()
+        pickler = pickle.Pickler(fd, pickle.HIGHEST_PROTOCOL)
+        pickler.dispatch_table = copyreg.dispatch_table.copy()
+        pickler.dispatch_table[requests.Response] = _reduce_response
+        pickler.dump(data)
+
+        return cls.FORMAT_MAGIC + zlib.compress(fd.getvalue(), cls.COMPRESSION_LEVEL)
+
+    @classmethod
+    def load_data(cls, data_dump):
+        """Decompress and deserialize a raw item.
+
+        Items stored with the current format or with the former
+        one (plain pickled objects) are supported.
+
+        :param data_dump: serialized raw item
+
+        :returns: the raw item
+        """
+        data_dump = bytes(data_dump)
+
+        if data_dump.startswith(cls.FORMAT_MAGIC):
+            data_dump = zlib.decompress(data_dump[len(cls.FORMAT_MAGIC):])
+
+        return pickle.loads(data_dump)
+
     @staticmethod
     def make_hashcode(uri, payload, headers):
         """Generate a SHA1 based on the given arguments.
@@ -281,6 +419,26 @@ class Archive:
         hashcode = hashlib.sha1(content.encode('utf-8'))
         return hashcode.hexdigest()
 
+    def _batch_interval_expired(self):
+        """Check whether the maximum time between commits has passed"""
+
+        if not self.batch_interval:
+            return False
+
+        return (time.time() - self._last_commit_ts) >= self.batch_interval
+
+    def _enable_wal(self):
+        """Set write-ahead logging journaling on the archive file"""
+
+        try:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+        except sqlite3.DatabaseError as e:
+            msg = "invalid archive file; cause: %s" % str(e)
+            raise ArchiveError(cause=msg)
+
+        logger.debug("WAL journaling enabled on archive %s", self.archive_path)
+
     def _verify_archive(self):
         """Check whether the archive is valid or not.
 
@@ -344,6 +502,180 @@ class Archive:
         return row[0]
 
 
+def _reduce_response(response):
+    """Reduce a HTTP response to the fields needed to replay it"""
+
+    state = (
+        response.url,
+        response.status_code,
+        response.reason,
+        response.encoding,
+        dict(response.headers),
+        response.content
+    )
+    return _build_response, state
+
+
+def _build_response(url, status_code, reason, encoding, headers, content):
+    """Build a HTTP response from its archived fields"""
+
+    response = requests.Response()
+    response.url = url
+    response.status_code = status_code
+    response.reason = reason
+    response.encoding = encoding
+    response.headers = requests.structures.CaseInsensitiveDict(headers)
+    response._content = content
+    response._content_consumed = True
+
+    return response
+
+
+class ArchiveCatalog:
+    """Index of the archives stored under a directory.
+
+    The catalog keeps, in a SQLite database, the metadata of the
+    archives stored under the directory where the catalog file is
+    located. This allows to search archives without opening each
+    one of them. Paths to the archives are stored relative to that
+    directory.
+
+    :param catalog_path: path to the catalog file
+    """
+    CATALOG_TABLE = "catalog"
+
+    # Table structure
+    CATALOG_CREATE_STMT = "CREATE TABLE IF NOT EXISTS " + CATALOG_TABLE + " ( " \
+                          "archive_path TEXT PRIMARY KEY, " \
+                          "origin TEXT, " \
+                          "backend_name TEXT, " \
+                          "backend_version TEXT, " \
+                          "category TEXT, " \
+                          "created_on REAL)"
+
+    CATALOG_INDEX_STMT = "CREATE INDEX IF NOT EXISTS " + CATALOG_TABLE + "_search_idx " \
+                         "ON " + CATALOG_TABLE + " (origin, backend_name, category, created_on)"
+
+    TIMEOUT = 60
+    INSERT_BATCH_SIZE = 1000
+
+    def __init__(self, catalog_path):
+        self.catalog_path = catalog_path
+        self.dirpath = os.path.dirname(catalog_path)
+
+    def exists(self):
+        """Check whether the catalog file exists"""
+
+        return os.path.exists(self.catalog_path)
+
+    def create(self):
+        """Create the catalog tables, if they do not exist.
+
+        :raises ArchiveManagerError: when an error occurs creating the catalog
+        """
+        self._execute([(self.CATALOG_CREATE_STMT, ()),
+                       (self.CATALOG_INDEX_STMT, ())])
+
+        logger.debug("Archive catalog %s created", self.catalog_path)
+
+    def add(self, archive):
+        """Add or update the entry of an archive.
+
+        :param archive: `Archive` object to index
+
+        :raises ArchiveManagerError: when an error occurs updating the catalog
+        """
+        self.add_many([archive])
+
+    def add_many(self, archives):
+        """Add or update the entries of a list of archives.
+
+        Archives can be given by any iterable. Only the metadata of
+        each archive is kept and the entries are written in batches
+        of `INSERT_BATCH_SIZE`, so the archives can be closed as soon
+        as the next one is requested.
+
+        :param archives: iterable of `Archive` objects to index
+
+        :returns: number of archives indexed
+
+        :raises ArchiveManagerError: when an error occurs updating the catalog
+        """
+        insert_stmt = "INSERT OR REPLACE INTO " + self.CATALOG_TABLE + " " \
+                      "(archive_path, origin, backend_name, backend_version, " \
+                      "category, created_on) " \
+                      "VALUES (?, ?, ?, ?, ?, ?)"
+
+        nentries = 0
+        stmts = []
+
+        for archive in archives:
+            created_on = archive.created_on.timestamp() if archive.created_on else None
+            entry = (self._relpath(archive.archive_path), archive.origin,
+                     archive.backend_name, archive.backend_version,
+                     archive.category, created_on)
+            stmts.append((insert_stmt, entry))
+
+            if len(stmts) >= self.INSERT_BATCH_SIZE:
+                self._execute(stmts)
+                nentries += len(stmts)
+                stmts = []
+
+        if stmts:
+            self._execute(stmts)
+            nentries += len(stmts)
+
+        return nentries
+
+    def remove(self, archive_path):
+        """Remove the entry of an archive.
+
+        :param archive_path: path to the archive
+
+        :raises ArchiveManagerError: when an error occurs updating the catalog
+        """
+        delete_stmt = "DELETE FROM " + self.CATALOG_TABLE + " WHERE archive_path = ?"
+        self._execute([(delete_stmt, (self._relpath(archive_path),))])
+
+    def clear(self):
+        """Remove every entry of the catalog.
+
+        :raises ArchiveManagerError: when an error occurs updating the catalog
+        """
+        self._execute([("DELETE FROM " + self.CATALOG_TABLE, ())])
+
+    def search(self, origin, backend_name, category, archived_after):
+        """Search archives in the catalog.
+
+        :param origin: data origin
+        :param backend_name: backed used to fetch data
+        :param category: type of the items fetched by the backend
+        :param archived_after: get archives created on or after this date
+
+        :returns: a list of (archive path, creation timestamp) tuples
+            sorted by creation date
+
+        :raises ArchiveManagerError: when an error occurs querying the catalog
+        """
+        select_stmt = "SELECT archive_path, created_on " \
+                      "FROM " + self.CATALOG_TABLE + " " \
+                      "WHERE origin = ? AND backend_name = ? " \
+                      "AND category = ? AND created_on >= ? " \
+                      "ORDER BY created_on, archive_path"
+        params = (origin, backend_name, category, archived_after.timestamp())
+
+        rows = self._execute([(select_stmt, params)])
+
+        return [(os.path.join(self.dirpath, path), ts) for path, ts in rows]
+
+    def _relpath(self, archive_path):
+        return os.path.relpath(archive_path, self.dirpath)
+
+    def _execute(self, stmts):
+        return sqlite_execute(self.catalog_path, stmts, self.TIMEOUT,
+                              "catalog", ArchiveManagerError)
+
+
 class ArchiveManager:
     """Manager for handling archives in Perceval.
 
@@ -353,17 +685,42 @@ class ArchiveManager:
     be the name of the subdirectory; the remaining bytes, the archive
     name.
 
+    Archives created by the manager write the stored items in
+    batches of `batch_size` items or every `batch_interval` seconds,
+    whatever comes first.
+
+    The manager indexes the metadata of its archives in a catalog,
+    stored in the root of `dirpath`, which is used to search them.
+    When the catalog does not exist, it will be built from the
+    archives found under `dirpath`. Call `rebuild_catalog` to
+    index again the whole directory.
+
     :param: dirpath: path where the archives are stored
+    :param: batch_size: number of stored items committed at once
+    :param: batch_interval: maximum number of seconds between commits
     """
 
     STORAGE_EXT = '.sqlite3'
+    WAL_EXTS = ['-wal', '-shm']
+    CATALOG_NAME = 'catalog.db'
 
-    def __init__(self, dirpath):
+    DEFAULT_BATCH_SIZE = 100
+    DEFAULT_BATCH_INTERVAL = 5
+
+    def __init__(self, dirpath, batch_size=DEFAULT_BATCH_SIZE,
+                 batch_interval=DEFAULT_BATCH_INTERVAL):
         self.dirpath = dirpath
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
 
         if not os.path.exists(self.dirpath):
             os.makedirs(self.dirpath)
 
+        self.catalog = ArchiveCatalog(os.path.join(self.dirpath, self.CATALOG_NAME))
+
+        if not self.catalog.exists():
+            self.rebuild_catalog()
+
     def create_archive(self):
         """Create a new archive.
 
@@ -386,17 +743,21 @@ class ArchiveManager:
             os.makedirs(archive_dir)
 
         try:
-            archive = Archive.create(archive_path)
+            archive = Archive.create(archive_path,
+                                     batch_size=self.batch_size,
+                                     batch_interval=self.batch_interval)
         except ArchiveError as e:
             raise ArchiveManagerError(cause=str(e))
 
+        archive.catalog = self.catalog
+
         return archive
 
     def remove_archive(self, archive_path):
         """Remove an archive.
 
         This method deletes from the filesystem the archive stored
-        in `archive_path`.
+        in `archive_path`, together with its WAL journal files, if any.
 
         :param archive_path: path to the archive
 
@@ -410,6 +771,51 @@ class ArchiveManager:
 
         os.remove(archive_path)
 
+        for ext in self.WAL_EXTS:
+            if os.path.exists(archive_path + ext):
+                os.remove(archive_path + ext)
+
+        self.catalog.remove(archive_path)
+
+    def rebuild_catalog(self):
+        """Rebuild the catalog of archives.
+
+        The method removes the entries of the catalog and indexes
+        again every valid archive found under the base path.
+
+        :returns: number of archives indexed
+
+        :raises ArchiveManagerError: when an error occurs updating
+            the catalog
+        """
+        logger.debug("Rebuilding catalog of archives in %s", self.dirpath)
+
+        def read_archives():
+            # Archives are closed once their metadata is indexed
+            # so file descriptors are not exhausted
+            for archive_path in self._search_files():
+                try:
+                    archive = Archive(archive_path)
+                except ArchiveError as e:
+                    logger.warning("Ignoring %s archive due to: %s", archive_path, str(e))
+                    continue
+
+                try:
+                    if archive.origin is not None:
+                        yield archive
+                finally:
+                    archive.close()
+
+        self.catalog.create()
+        self.catalog.clear()
+
+        nindexed = self.catalog.add_many(read_archives())
+
+        logger.debug("Catalog of archives in %s rebuilt; %s archives indexed",
+                     self.dirpath, nindexed)
+
+        return nindexed
+
     def search(self, origin, backend_name, category, archived_after):
         """Search archives.
 
@@ -437,28 +843,30 @@ class ArchiveManager:
         return archives
 
     def _search_archives(self, origin, backend_name, category, archived_after):
-        """Search archives using filters."""
+        """Search archives in the catalog using filters."""
 
-        for archive_path in self._search_files():
-            try:
-                archive = Archive(archive_path)
-            except ArchiveError:
-                continue
+        entries = self.catalog.search(origin, backend_name,
+                                      category, archived_after)
 
-            match = archive.origin == origin and \
-                archive.backend_name == backend_name and \
-                archive.category == category and \
-                archive.created_on >= archived_after
-
-            if not match:
+        for archive_path, created_on in entries:
+            # Archives removed by other means are dropped from the catalog
+            if not os.path.exists(archive_path):
+                logger.debug("Archive %s not found; removed from catalog", archive_path)
+                self.catalog.remove(archive_path)
                 continue
 
-            yield archive_path, archive.created_on
+            yield archive_path, created_on
 
     def _search_files(self):
         """Retrieve the file paths stored under the base path."""
 
         for root, _, files in os.walk(self.dirpath):
             for filename in files:
+                # Skip WAL journal files of the archives and the catalog
+                if any(filename.endswith(ext) for ext in self.WAL_EXTS):
+                    continue
+                if root == self.dirpath and filename.startswith(self.CATALOG_NAME):
+                    continue
+
                 location = os.path.join(root, filename)
                 yield location
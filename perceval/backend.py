@@ -23,18 +23,21 @@ import argparse
 import collections
 import hashlib
 import importlib
-import json
 import logging
+import multiprocessing
 import os
 import pkgutil
+import queue
 import sys
+import time
 
 from grimoirelab_toolkit.introspect import find_signature_parameters
-from grimoirelab_toolkit.datetime import (datetime_utcnow,
-                                          str_to_datetime,
+from grimoirelab_toolkit.datetime import (str_to_datetime,
                                           unixtime_to_datetime)
 from .archive import Archive, ArchiveManager
+from .cache import UsersCache, ValidatorsCache
 from .errors import ArchiveError, BackendError, BackendCommandArgumentParserError
+from .output import ItemsWriter
 from ._version import __version__
 
 
@@ -43,9 +46,16 @@ logger = logging.getLogger(__name__)
 
 ARCHIVES_DEFAULT_PATH = '~/.perceval/archives/'
 DEFAULT_SEARCH_FIELD = 'item_id'
+DEFAULT_JOBS_QUEUE_SIZE = 1000
+JOBS_POLL_TIME = 1
 
 OriginUniqueField = collections.namedtuple('OriginUniqueField', 'name type')
 
+FetchJob = collections.namedtuple('FetchJob',
+                                  'backend_class backend_args category '
+                                  'filter_classified manager fetch_archive archived_after')
+FetchJob.__new__.__defaults__ = (False, None, False, None)
+
 
 class Backend:
     """Abstract class for backends.
@@ -114,6 +124,10 @@ class Backend:
     metadata information, while the corresponding value is a list that
     stores the "path" of the search field value within the item.
 
+    Backends that use a `HttpClient` can send conditional requests,
+    storing the validators of the responses in the `ValidatorStore`
+    set to the `validators` attribute.
+
     :param origin: identifier of the repository
     :param tag: tag items using this label
     :param archive: archive to store/retrieve data
@@ -133,7 +147,9 @@ class Backend:
         self.tag = tag if tag else origin
         self.archive = archive or None
         self.blacklist_ids = blacklist_ids or None
+        self.validators = None
         self._summary = None
+        self._compiled_fields = {}
 
     @property
     def origin(self):
@@ -172,6 +188,9 @@ class Backend:
     def fetch_items(self, category, **kwargs):
         raise NotImplementedError
 
+    def fetch_items_async(self, category, **kwargs):
+        raise NotImplementedError
+
     def fetch(self, category, filter_classified=False, **kwargs):
         """Fetch items from the repository.
 
@@ -212,14 +231,50 @@ class Backend:
 
         self.client = self._init_client()
 
-        for item in self.fetch_items(category, **kwargs):
-            if filter_classified:
-                item = self.filter_classified_data(item)
+        if self.validators is not None and hasattr(self.client, 'validators'):
+            self.client.validators = self.validators
 
-            metadata_item = self.metadata(item, filter_classified=filter_classified)
-            self.summary.update(metadata_item)
+        try:
+            for item in self.fetch_items(category, **kwargs):
+                if filter_classified:
+                    item = self.filter_classified_data(item)
 
-            yield metadata_item
+                metadata_item = self.metadata(item, filter_classified=filter_classified)
+                self.summary.update(metadata_item)
+
+                yield metadata_item
+        except BaseException:
+            # Write any raw item pending in the archive, also when
+            # the generator is closed or an error is raised
+            if self.archive:
+                self._flush_archive()
+            raise
+
+        if self.archive:
+            self.archive.flush()
+
+    def fetch_async(self, category, filter_classified=False, **kwargs):
+        """Fetch items from the repository asynchronously.
+
+        Asynchronous version of `fetch`. It returns an asynchronous
+        generator of items, so several backends (or several requests
+        of the same backend) can be waiting for data at the same time
+        on the same event loop. See `perceval.aio.backend.fetch_async`.
+
+        Only those backends that implement `fetch_items_async` and
+        `_init_async_client` support this method. It requires
+        Python >= 3.6 and the `aiohttp` package.
+
+        :param category: the category of the items fetched
+        :param filter_classified: remove classified fields from the resulting items
+        :param kwargs: a list of other parameters (e.g., from_date, offset, etc.
+        specific for each backend)
+
+        :returns: an asynchronous generator of items
+        """
+        from .aio.backend import fetch_async
+
+        return fetch_async(self, category, filter_classified=filter_classified, **kwargs)
 
     def fetch_from_archive(self):
         """Fetch the questions from an archive.
@@ -253,18 +308,22 @@ class Backend:
 
         :returns: the same item but with confidential data filtered
         """
-        item_uuid = uuid(self.origin, self.metadata_id(item))
+        debug = logger.isEnabledFor(logging.DEBUG)
+        item_uuid = uuid(self.origin, self.metadata_id(item)) if debug else None
 
-        logger.debug("Filtering classified data for item %s", item_uuid)
+        if debug:
+            logger.debug("Filtering classified data for item %s", item_uuid)
 
-        for cf in self.CLASSIFIED_FIELDS:
+        for cf in self._compile_fields('CLASSIFIED_FIELDS'):
             try:
                 _remove_key_from_nested_dictlist(item, cf)
             except KeyError:
-                logger.debug("Classified field '%s' not found for item %s; field ignored",
-                             '.'.join(cf), item_uuid)
+                if debug:
+                    logger.debug("Classified field '%s' not found for item %s; field ignored",
+                                 '.'.join(cf), item_uuid)
 
-        logger.debug("Classified data filtered for item %s", item_uuid)
+        if debug:
+            logger.debug("Classified data filtered for item %s", item_uuid)
 
         return item
 
@@ -278,29 +337,34 @@ class Backend:
 
         :returns: a dict of search fields
         """
-        item_uuid = uuid(self.origin, self.metadata_id(item))
+        debug = logger.isEnabledFor(logging.DEBUG)
+        item_id = self.metadata_id(item)
+        item_uuid = uuid(self.origin, item_id) if debug else None
 
-        logger.debug("Adding search fields to item %s", item_uuid)
+        if debug:
+            logger.debug("Adding search fields to item %s", item_uuid)
+            logger.debug("Adding default `item_id` search field to item %s", item_uuid)
 
-        logger.debug("Adding default `item_id` search field to item %s", item_uuid)
         search_fields = {
-            DEFAULT_SEARCH_FIELD: self.metadata_id(item)
+            DEFAULT_SEARCH_FIELD: item_id
         }
 
-        logger.debug("Adding extra search fields to item %s", item_uuid)
-        for sf in self.EXTRA_SEARCH_FIELDS:
+        if debug:
+            logger.debug("Adding extra search fields to item %s", item_uuid)
+
+        for sf, search_field in self._compile_fields('EXTRA_SEARCH_FIELDS'):
             try:
-                search_field = self.EXTRA_SEARCH_FIELDS[sf]
                 field_value = _find_value_from_nested_dict(item, search_field)
                 search_fields[sf] = field_value
             except KeyError:
                 logger.warning("Extra search field '%s' not found for item %s; field ignored",
-                               sf, item_uuid)
+                               sf, item_uuid or uuid(self.origin, item_id))
             except IndexError:
                 logger.warning("Extra search field '%s' is empty %s; field ignored",
-                               sf, item_uuid)
+                               sf, item_uuid or uuid(self.origin, item_id))
 
-        logger.debug("Search fields added for item %s", item_uuid)
+        if debug:
+            logger.debug("Search fields added for item %s", item_uuid)
 
         return search_fields
 
@@ -314,13 +378,15 @@ class Backend:
         :param item: an item fetched by a backend
         :param filter_classified: sets if classified fields were filtered
         """
+        origin = self.origin
+
         item = {
             'backend_name': self.__class__.__name__,
             'backend_version': self.version,
             'perceval_version': __version__,
-            'timestamp': datetime_utcnow().timestamp(),
-            'origin': self.origin,
-            'uuid': uuid(self.origin, self.metadata_id(item)),
+            'timestamp': time.time(),
+            'origin': origin,
+            'uuid': uuid(origin, self.metadata_id(item)),
             'updated_on': self.metadata_updated_on(item),
             'classified_fields_filtered': self.classified_fields if filter_classified else None,
             'category': self.metadata_category(item),
@@ -354,6 +420,41 @@ class Backend:
     def _init_client(self, from_archive=False):
         raise NotImplementedError
 
+    def _init_async_client(self, from_archive=False):
+        raise NotImplementedError
+
+    def _flush_archive(self):
+        """Write the raw items pending in the archive after a failure.
+
+        Errors writing the archive are logged and ignored, so they
+        do not replace the error that stopped the fetch process.
+        """
+        try:
+            self.archive.flush()
+        except ArchiveError as e:
+            logger.error("Pending raw items not written to %s archive; %s",
+                         self.archive.archive_path, str(e))
+
+    def _compile_fields(self, name):
+        """Return the paths of the fields set in the attribute `name`.
+
+        Paths of `CLASSIFIED_FIELDS` and `EXTRA_SEARCH_FIELDS` are
+        converted to tuples the first time they are requested, so
+        they are not processed again for every item. They are
+        compiled again when the attribute is replaced.
+        """
+        fields = getattr(self, name)
+        source, compiled = self._compiled_fields.get(name, (None, None))
+
+        if source is not fields:
+            if isinstance(fields, dict):
+                compiled = tuple((key, tuple(path)) for key, path in fields.items())
+            else:
+                compiled = tuple(tuple(path) for path in fields)
+            self._compiled_fields[name] = (fields, compiled)
+
+        return compiled
+
     def _skip_item(self, item):
         if not self.origin_unique_field:
             return False
@@ -370,28 +471,27 @@ def _find_value_from_nested_dict(nested_dict, path_to_field):
     if len(path_to_field) == 0:
         raise IndexError
 
-    key = path_to_field[0]
+    last = len(path_to_field) - 1
 
-    if len(path_to_field) == 1:
-        value = nested_dict[key] if nested_dict else None
-        return value
-    else:
-        return _find_value_from_nested_dict(nested_dict[key], path_to_field[1:])
+    for key in path_to_field[:last]:
+        nested_dict = nested_dict[key]
 
+    return nested_dict[path_to_field[last]] if nested_dict else None
 
-def _remove_key_from_nested_dictlist(nested_dictlist, path_to_field):
-    if len(path_to_field) == 0:
+
+def _remove_key_from_nested_dictlist(nested_dictlist, path_to_field, pos=0):
+    if pos >= len(path_to_field):
         return
 
     if isinstance(nested_dictlist, list):
         for item in nested_dictlist:
-            _remove_key_from_nested_dictlist(item, path_to_field)
+            _remove_key_from_nested_dictlist(item, path_to_field, pos)
     else:
-        key = path_to_field[0]
-        if len(path_to_field) == 1:
+        key = path_to_field[pos]
+        if pos == len(path_to_field) - 1:
             nested_dictlist.pop(key)
         else:
-            _remove_key_from_nested_dictlist(nested_dictlist[key], path_to_field[1:])
+            _remove_key_from_nested_dictlist(nested_dictlist[key], path_to_field, pos + 1)
 
 
 class BackendCommandArgumentParser:
@@ -410,6 +510,8 @@ class BackendCommandArgumentParser:
     :param token_auth: set token/key authentication arguments
     :param archive: set archiving arguments
     :param aliases: define aliases for parsed arguments
+    :param blacklist: set blacklist argument
+    :param users_cache: set users cache arguments
 
     :raises AttributeArror: when both `from_date` and `offset` are set
         to `True`
@@ -417,7 +519,7 @@ class BackendCommandArgumentParser:
 
     def __init__(self, backend, from_date=False, to_date=False, offset=False,
                  basic_auth=False, token_auth=False, archive=False,
-                 aliases=None, blacklist=False):
+                 aliases=None, blacklist=False, users_cache=False):
         self._from_date = from_date
         self._to_date = to_date
         self._archive = archive
@@ -434,6 +536,8 @@ class BackendCommandArgumentParser:
         group.add_argument('--filter-classified', dest='filter_classified',
                            action='store_true',
                            help="filter classified fields, if any, from fetched items")
+        group.add_argument('--http-cache-path', dest='http_cache_path', default=None,
+                           help="file path to the HTTP validators cache used to send conditional requests")
 
         if (from_date or to_date) and offset:
             raise AttributeError("date and offset parameters are incompatible")
@@ -468,6 +572,9 @@ class BackendCommandArgumentParser:
         if archive:
             self._set_archive_arguments()
 
+        if users_cache:
+            self._set_users_cache_arguments()
+
         self._set_output_arguments()
 
     def parse(self, *args):
@@ -534,6 +641,19 @@ class BackendCommandArgumentParser:
         group.add_argument('--archived-since', dest='archived_since', default='1970-01-01',
                            help="retrieve items archived since the given date")
 
+    def _set_users_cache_arguments(self):
+        """Activate users cache arguments parsing"""
+
+        group = self.parser.add_argument_group('users cache arguments')
+        group.add_argument('--users-cache-path', dest='users_cache_path', default=None,
+                           help="file path to the persistent users cache")
+        group.add_argument('--users-cache-ttl', dest='users_cache_ttl',
+                           type=int, default=UsersCache.DEFAULT_TTL,
+                           help="seconds a cached user is valid")
+        group.add_argument('--users-cache-max-size', dest='users_cache_max_size',
+                           type=int, default=UsersCache.DEFAULT_MAX_SIZE,
+                           help="maximum number of cached users")
+
     def _set_output_arguments(self):
         """Activate output arguments parsing"""
 
@@ -543,6 +663,15 @@ class BackendCommandArgumentParser:
                            help="output file")
         group.add_argument('--json-line', dest='json_line', action='store_true',
                            help="produce a JSON line for each output item")
+        group.add_argument('--no-sort-keys', dest='no_sort_keys', action='store_true',
+                           help="do not sort the keys of the output items")
+        group.add_argument('--output-buffer-size', dest='output_buffer_size',
+                           type=int, default=ItemsWriter.DEFAULT_BUFFER_SIZE,
+                           help="number of characters buffered before writing them to the output")
+        group.add_argument('--threaded-output', dest='threaded_output', action='store_true',
+                           help="encode and write the output items in a background thread")
+        group.add_argument('--fast-json', dest='fast_json', action='store_true',
+                           help="encode JSON lines with orjson, when it is installed")
 
 
 class BackendCommand:
@@ -570,10 +699,18 @@ class BackendCommand:
 
         self._pre_init()
         self._initialize_archive()
+        self._initialize_users_cache()
+        self._initialize_http_cache()
         self._post_init()
 
         self.outfile = self.parsed_args.outfile
         self.json_line = self.parsed_args.json_line
+        self.writer = ItemsWriter(self.outfile,
+                                  json_line=self.json_line,
+                                  sort_keys=not self.parsed_args.no_sort_keys,
+                                  buffer_size=self.parsed_args.output_buffer_size,
+                                  threaded=self.parsed_args.threaded_output,
+                                  fast_json=self.parsed_args.fast_json)
 
     def run(self):
         """Fetch and write items.
@@ -586,32 +723,68 @@ class BackendCommand:
         the initialization of the instance, the items will be retrieved
         using the archive manager.
         """
-        backend_args = vars(self.parsed_args)
-        category = backend_args.pop('category', None)
-        filter_classified = backend_args.pop('filter_classified', False)
-        fetch_archive = self.archive_manager and self.parsed_args.fetch_archive
-        archived_since = backend_args.pop('archived_since', None)
+        job = self.fetch_job()
 
-        with BackendItemsGenerator(self.BACKEND, backend_args, category,
-                                   filter_classified=filter_classified,
-                                   manager=self.archive_manager,
-                                   fetch_archive=fetch_archive,
-                                   archived_after=archived_since) as big:
+        with BackendItemsGenerator(job.backend_class, job.backend_args, job.category,
+                                   filter_classified=job.filter_classified,
+                                   manager=job.manager,
+                                   fetch_archive=job.fetch_archive,
+                                   archived_after=job.archived_after) as big:
             try:
-                for item in big.items:
-                    if self.json_line:
-                        obj = json.dumps(item, separators=(',', ':'), sort_keys=True)
-                    else:
-                        obj = json.dumps(item, indent=4, sort_keys=True)
-                    self.outfile.write(obj)
-                    self.outfile.write('\n')
+                try:
+                    for item in big.items:
+                        self._write_item(item)
+                finally:
+                    self._flush_output()
 
                 self._log_summary(big.summary)
+
+                if big.backend.validators is not None:
+                    logger.info("Conditional requests: %s not modified, %s modified",
+                                big.backend.validators.hits, big.backend.validators.misses)
             except IOError as e:
                 raise RuntimeError(str(e))
             except Exception as e:
                 raise RuntimeError(str(e))
 
+    def fetch_job(self):
+        """Build the fetch job defined by the parsed arguments.
+
+        The job can be run by `BackendItemsGenerator` or, together
+        with other jobs, by `BackendJobsGenerator`. Output arguments
+        are not included in the arguments of the job.
+
+        :returns: a `FetchJob` object
+        """
+        backend_args = dict(vars(self.parsed_args))
+        backend_args.pop('outfile', None)
+        backend_args.pop('json_line', None)
+        backend_args.pop('no_sort_keys', None)
+        backend_args.pop('output_buffer_size', None)
+        backend_args.pop('threaded_output', None)
+        backend_args.pop('fast_json', None)
+
+        category = backend_args.pop('category', None)
+        filter_classified = backend_args.pop('filter_classified', False)
+        fetch_archive = self.archive_manager and self.parsed_args.fetch_archive
+        archived_since = backend_args.pop('archived_since', None)
+
+        return FetchJob(self.BACKEND, backend_args, category,
+                        filter_classified=filter_classified,
+                        manager=self.archive_manager,
+                        fetch_archive=fetch_archive,
+                        archived_after=archived_since)
+
+    def _write_item(self, item):
+        """Write an item to the output as a JSON object."""
+
+        self.writer.write(item)
+
+    def _flush_output(self):
+        """Write the pending items to the output."""
+
+        self.writer.flush()
+
     def _pre_init(self):
         """Override to execute before backend is initialized."""
         pass
@@ -637,6 +810,24 @@ class BackendCommand:
 
         self.archive_manager = manager
 
+    def _initialize_users_cache(self):
+        """Initialize the users cache based on the parsed parameters."""
+
+        if not getattr(self.parsed_args, 'users_cache_path', None):
+            return
+
+        self.parsed_args.users_cache = UsersCache(self.parsed_args.users_cache_path,
+                                                  ttl=self.parsed_args.users_cache_ttl,
+                                                  max_size=self.parsed_args.users_cache_max_size)
+
+    def _initialize_http_cache(self):
+        """Initialize the HTTP validators cache based on the parsed parameters."""
+
+        if not getattr(self.parsed_args, 'http_cache_path', None):
+            return
+
+        self.parsed_args.validators = ValidatorsCache(self.parsed_args.http_cache_path)
+
     def _log_summary(self, summary):
         """Write a formatted summary to the log."""
 
@@ -695,7 +886,9 @@ class BackendItemsGenerator:
     This object can also be used as a context manager.
 
     :param backend_class: backend class to fetch items
-    :param backend_args: dict of arguments needed to fetch the items
+    :param backend_args: dict of arguments needed to fetch the items;
+        the `ValidatorStore` under the `validators` key, if any, is
+        set to the backend
     :param category: category of the items to retrieve
        If None, it will use the default backend category
     :param filter_classified: remove classified fields from the
@@ -715,6 +908,7 @@ class BackendItemsGenerator:
             archive = manager.create_archive() if manager else None
             init_args['archive'] = archive
             self.backend = backend_class(**init_args)
+            self.backend.validators = backend_args.get('validators', None)
             items = self.__fetch(backend_args, category,
                                  filter_classified=filter_classified,
                                  manager=manager)
@@ -795,16 +989,175 @@ class BackendItemsGenerator:
                                    archived_after)
 
         for filepath in filepaths:
-            self.backend.archive = Archive(filepath)
-            items = self.backend.fetch_from_archive()
-
             try:
+                self.backend.archive = Archive(filepath)
+                items = self.backend.fetch_from_archive()
+
                 for item in items:
                     yield item
             except ArchiveError as e:
                 logger.warning("Ignoring %s archive due to: %s", filepath, str(e))
 
 
+class BackendJobsGenerator:
+    """BackendJobsGenerator class.
+
+    This class runs a set of fetch jobs in a pool of processes and
+    provides, through the `items` attribute, a generator which
+    multiplexes the items of every job in a single stream. Each
+    element of the stream is a tuple with the index of the job in
+    the given list and one of its items. Items of the same job are
+    returned in the same order they were fetched but items of
+    different jobs can be interleaved.
+
+    Jobs are `FetchJob` objects or tuples with the same fields; at
+    least, the backend class, the dict of arguments and the category.
+    Backend classes, arguments and items must be picklable.
+
+    Each job runs in its own process and no more than `workers`
+    processes run at the same time. These processes are not daemonic,
+    so jobs can start their own pools of processes (e.g., Git or
+    MBox backends with several workers).
+
+    Once a job finishes, its summary is available in the `summaries`
+    dict, using the index of the job as key. When a job fails, the
+    error is logged and stored in the `errors` dict; the rest of
+    the jobs keep running. A job also fails when its process dies
+    without reporting the end of the job (e.g., killed by the
+    system).
+
+    This object can also be used as a context manager.
+
+    :param jobs: list of jobs to run
+    :param workers: number of processes of the pool; by default,
+        the number of CPUs of the machine
+    :param queue_size: maximum number of items waiting to be
+        consumed before the workers block
+    """
+    ITEM = 'item'
+    SUMMARY = 'summary'
+    ERROR = 'error'
+
+    def __init__(self, jobs, workers=None, queue_size=DEFAULT_JOBS_QUEUE_SIZE):
+        self.jobs = [FetchJob(*job) for job in jobs]
+        self.workers = workers
+        self.summaries = {}
+        self.errors = {}
+        self._processes = {}
+
+        self.items = self.__run(queue_size)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.items = None
+        self.__stop_processes()
+
+    def __run(self, queue_size):
+        """Run the jobs and yield their items as they arrive."""
+
+        if not self.jobs:
+            return
+
+        nworkers = min(self.workers or multiprocessing.cpu_count(), len(self.jobs))
+        results = multiprocessing.Queue(maxsize=queue_size)
+
+        logger.debug("%s fetch jobs sent to a pool of %s workers",
+                     len(self.jobs), nworkers)
+
+        waiting = collections.deque(range(len(self.jobs)))
+        pending = len(self.jobs)
+
+        # Jobs whose process was found dead on the last check
+        dead = set()
+
+        try:
+            while pending:
+                while waiting and len(self._processes) < nworkers:
+                    job_id = waiting.popleft()
+                    try:
+                        self.__start_process(job_id, results)
+                    except Exception as e:
+                        # Errors raised before the job starts, such
+                        # as pickling errors, never reach the worker
+                        self.__job_failed(job_id, str(e))
+                        pending -= 1
+
+                if not pending:
+                    break
+
+                try:
+                    job_id, msg_type, value = results.get(timeout=JOBS_POLL_TIME)
+                except queue.Empty:
+                    # A dead process writes all its messages before it
+                    # exits, so a dead job that did not report its end
+                    # before the queue got empty will never do it
+                    for job_id in dead:
+                        cause = "worker process exited with code %s" % self._processes[job_id].exitcode
+                        self.__job_failed(job_id, cause)
+                        self.__join_process(job_id)
+                        pending -= 1
+                    dead = {job_id for job_id, process in self._processes.items()
+                            if not process.is_alive()}
+                    continue
+
+                if msg_type == self.ITEM:
+                    yield job_id, value
+                    continue
+
+                if msg_type == self.SUMMARY:
+                    self.summaries[job_id] = value
+                else:
+                    self.__job_failed(job_id, value)
+
+                self.__join_process(job_id)
+                dead.discard(job_id)
+                pending -= 1
+        finally:
+            self.__stop_processes()
+
+    def __start_process(self, job_id, results):
+        process = multiprocessing.Process(target=_run_fetch_job,
+                                          args=(job_id, self.jobs[job_id], results))
+        process.start()
+        self._processes[job_id] = process
+
+    def __join_process(self, job_id):
+        process = self._processes.pop(job_id)
+        process.join()
+
+    def __job_failed(self, job_id, cause):
+        logger.error("Fetch job %s (%s) failed; cause: %s",
+                     job_id, self.jobs[job_id].backend_class.__name__, cause)
+        self.errors[job_id] = cause
+
+    def __stop_processes(self):
+        for process in self._processes.values():
+            process.terminate()
+        for process in self._processes.values():
+            process.join()
+        self._processes = {}
+
+
+def _run_fetch_job(job_id, job, results):
+    """Run a fetch job sending its items and summary to the queue."""
+
+    try:
+        with BackendItemsGenerator(job.backend_class, job.backend_args, job.category,
+                                   filter_classified=job.filter_classified,
+                                   manager=job.manager,
+                                   fetch_archive=job.fetch_archive,
+                                   archived_after=job.archived_after) as big:
+            for item in big.items:
+                results.put((job_id, BackendJobsGenerator.ITEM, item))
+            summary = big.summary
+    except Exception as e:
+        results.put((job_id, BackendJobsGenerator.ERROR, str(e)))
+    else:
+        results.put((job_id, BackendJobsGenerator.SUMMARY, summary))
+
+
 class Summary:
     """Summary class for fetch executions.
 
@@ -934,6 +1287,63 @@ def fetch(backend_class, backend_args, category, filter_classified=False,
         raise e
 
 
+def fetch_many(jobs, workers=None):
+    """Fetch items from several origins in parallel.
+
+    Generator to get the items of a list of fetch jobs, running
+    them in a pool of `workers` processes. Each job is a `FetchJob`
+    or a tuple with, at least, the backend class, the dict of
+    arguments and the category of the items to retrieve.
+
+    The generator returns tuples with the index of the job and one
+    of its items. Items of the same job keep their order. Jobs that
+    fail are logged and ignored; use `BackendJobsGenerator` to
+    access the summaries and the errors of each job.
+
+    :param jobs: list of jobs to run
+    :param workers: number of processes used to run the jobs
+
+    :returns: a generator of (job index, item) tuples
+    """
+    with BackendJobsGenerator(jobs, workers=workers) as bjg:
+        for job_id, item in bjg.items:
+            yield job_id, item
+
+
+def run_commands(commands, workers=None):
+    """Run several backend commands in parallel.
+
+    The fetch jobs of the given `BackendCommand` objects are run
+    in a pool of `workers` processes. Each item is written to the
+    output of the command that defined its job and, once a job
+    finishes, its summary is written to the log.
+
+    :param commands: list of `BackendCommand` objects
+    :param workers: number of processes used to run the commands
+
+    :returns: the number of failed commands
+    """
+    jobs = [cmd.fetch_job() for cmd in commands]
+
+    with BackendJobsGenerator(jobs, workers=workers) as bjg:
+        try:
+            try:
+                for job_id, item in bjg.items:
+                    commands[job_id]._write_item(item)
+            finally:
+                for cmd in commands:
+                    cmd._flush_output()
+        except IOError as e:
+            raise RuntimeError(str(e))
+
+        for job_id in sorted(bjg.summaries):
+            summary = bjg.summaries[job_id]
+            if summary:
+                commands[job_id]._log_summary(summary)
+
+        return len(bjg.errors)
+
+
 def fetch_from_archive(backend_class, backend_args, manager,
                        category, archived_after):
     """Fetch items from an archive manager.
@@ -963,10 +1373,10 @@ def fetch_from_archive(backend_class, backend_args, manager,
                                archived_after)
 
     for filepath in filepaths:
-        backend.archive = Archive(filepath)
-        items = backend.fetch_from_archive()
-
         try:
+            backend.archive = Archive(filepath)
+            items = backend.fetch_from_archive()
+
             for item in items:
                 yield item
         except ArchiveError as e:
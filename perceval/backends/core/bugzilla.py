@@ -33,9 +33,9 @@ from grimoirelab_toolkit.datetime import str_to_datetime
 from ...backend import (Backend,
                         BackendCommand,
                         BackendCommandArgumentParser)
-from ...client import HttpClient
+from ...client import HttpClient, read_ahead
 from ...errors import BackendError, ParseError
-from ...utils import DEFAULT_DATETIME, xml_to_dict
+from ...utils import DEFAULT_DATETIME, workers_mapper, xml_to_dicts
 
 CATEGORY_BUG = "bug"
 MAX_BUGS = 200  # Maximum number of bugs per query
@@ -58,8 +58,13 @@ class Bugzilla(Backend):
     :param max_bugs: maximum number of bugs requested on the same query
     :param tag: label used to mark the data
     :param archive: archive to store/retrieve items
+    :param workers: number of threads used to fetch the activity
+        of the bugs of each query concurrently; bugs are returned
+        in the same order either way
+    :param read_ahead: number of pages of the bug list requested
+        in advance
     """
-    version = '0.11.0'
+    version = '0.12.0'
 
     CATEGORIES = [CATEGORY_BUG]
     EXTRA_SEARCH_FIELDS = {
@@ -69,7 +74,7 @@ class Bugzilla(Backend):
 
     def __init__(self, url, user=None, password=None,
                  max_bugs=MAX_BUGS, max_bugs_csv=MAX_BUGS_CSV,
-                 tag=None, archive=None):
+                 tag=None, archive=None, workers=1, read_ahead=0):
         origin = url
 
         super().__init__(origin, tag=tag, archive=archive)
@@ -79,6 +84,8 @@ class Bugzilla(Backend):
         self.max_bugs_csv = max_bugs_csv
         self.client = None
         self.max_bugs = max(1, max_bugs)
+        self.workers = max(1, workers)
+        self.read_ahead = read_ahead
 
     def fetch(self, category=CATEGORY_BUG, from_date=DEFAULT_DATETIME):
         """Fetch the bugs from the repository.
@@ -86,6 +93,13 @@ class Bugzilla(Backend):
         The method retrieves, from a Bugzilla repository, the bugs
         updated since the given date.
 
+        Bugzilla does not support pagination, so each page of the
+        bug list is requested from the last update date of the
+        previous page plus one second. A bug updated while the bugs
+        are fetched can be listed again on a later page and returned
+        twice; requesting the pages in advance (see `read_ahead`)
+        narrows that window but does not close it.
+
         :param category: the category of items to fetch
         :param from_date: obtain bugs updated since this date
 
@@ -113,23 +127,24 @@ class Bugzilla(Backend):
         logger.info("Looking for bugs: '%s' updated from '%s'",
                     self.url, str(from_date))
 
-        buglist = [bug for bug in self.__fetch_buglist(from_date)]
+        pages = read_ahead(self.__fetch_buglist_pages(from_date), self.read_ahead)
 
         nbugs = 0
-        tbugs = len(buglist)
+        tbugs = 0
 
-        for i in range(0, tbugs, self.max_bugs):
-            chunk = buglist[i:i + self.max_bugs]
-            bugs_ids = [b['bug_id'] for b in chunk]
+        try:
+            with workers_mapper(self.workers) as mapper:
+                for bugs_ids, nlisted in self.__chunk_buglist(pages):
+                    tbugs += len(bugs_ids)
+                    logger.info("Fetching bugs: %s/%s listed so far", tbugs, nlisted)
 
-            logger.info("Fetching bugs: %s/%s", i, tbugs)
-            bugs = self.__fetch_and_parse_bugs_details(bugs_ids)
+                    bugs = self.__fetch_and_parse_bugs_details(bugs_ids)
 
-            for bug in bugs:
-                bug_id = bug['bug_id'][0]['__text__']
-                bug['activity'] = self.__fetch_and_parse_bug_activity(bug_id)
-                nbugs += 1
-                yield bug
+                    for bug in mapper(self.__add_bug_activity, bugs):
+                        nbugs += 1
+                        yield bug
+        finally:
+            pages.close()
 
         logger.info("Fetch process completed: %s/%s bugs fetched",
                     nbugs, tbugs)
@@ -209,7 +224,10 @@ class Bugzilla(Backend):
         the information related to a parsed bug.
 
         If the given XML is invalid or does not contains any bug, the
-        method will raise a ParseError exception.
+        method will raise a ParseError exception. The XML is parsed
+        while the bugs are generated, so the bugs found before an
+        invalid part of the stream are returned before that exception
+        is raised.
 
         :param raw_xml: XML string to parse
 
@@ -218,15 +236,16 @@ class Bugzilla(Backend):
         :raises ParseError: raised when an error occurs parsing
             the given XML stream
         """
-        bugs = xml_to_dict(raw_xml)
+        nbugs = 0
+
+        for bug in xml_to_dicts(raw_xml, 'bug'):
+            nbugs += 1
+            yield bug
 
-        if 'bug' not in bugs:
+        if not nbugs:
             cause = "No bugs found. XML stream seems to be invalid."
             raise ParseError(cause=cause)
 
-        for bug in bugs['bug']:
-            yield bug
-
     @staticmethod
     def parse_bug_activity(raw_html):
         """Parse a Bugzilla bug activity HTML stream.
@@ -311,21 +330,46 @@ class Bugzilla(Backend):
                               max_bugs_csv=self.max_bugs_csv,
                               archive=self.archive, from_archive=from_archive)
 
-    def __fetch_buglist(self, from_date):
+    def __add_bug_activity(self, bug):
+        bug_id = bug['bug_id'][0]['__text__']
+        bug['activity'] = self.__fetch_and_parse_bug_activity(bug_id)
+        return bug
+
+    def __chunk_buglist(self, pages):
+        """Split the pages of the bug list into lists of `max_bugs` ids.
+
+        Each list is returned together with the number of bugs listed
+        on the pages read so far.
+        """
+        bugs_ids = []
+        nlisted = 0
+
+        for buglist in pages:
+            nlisted += len(buglist)
+
+            for bug in buglist:
+                bugs_ids.append(bug['bug_id'])
+
+                if len(bugs_ids) == self.max_bugs:
+                    yield bugs_ids, nlisted
+                    bugs_ids = []
+
+        if bugs_ids:
+            yield bugs_ids, nlisted
+
+    def __fetch_buglist_pages(self, from_date):
         buglist = self.__fetch_and_parse_buglist_page(from_date)
 
         while buglist:
-            bug = buglist.pop(0)
-            last_date = bug['changeddate']
-            yield bug
+            yield buglist
 
             # Bugzilla does not support pagination. Due to this,
             # the next list of bugs is requested adding one second
             # to the last date obtained.
-            if not buglist:
-                from_date = str_to_datetime(last_date)
-                from_date += datetime.timedelta(seconds=1)
-                buglist = self.__fetch_and_parse_buglist_page(from_date)
+            last_date = buglist[-1]['changeddate']
+            from_date = str_to_datetime(last_date)
+            from_date += datetime.timedelta(seconds=1)
+            buglist = self.__fetch_and_parse_buglist_page(from_date)
 
     def __fetch_and_parse_buglist_page(self, from_date):
         logger.debug("Fetching and parsing buglist page from %s", str(from_date))
@@ -367,6 +411,12 @@ class BugzillaCommand(BackendCommand):
         group.add_argument('--max-bugs-csv', dest='max_bugs_csv',
                            type=int, default=MAX_BUGS_CSV,
                            help="Maximum number of bugs requested on CSV queries")
+        group.add_argument('--workers', dest='workers',
+                           type=int, default=1,
+                           help="Number of threads used to fetch the activity of the bugs")
+        group.add_argument('--read-ahead', dest='read_ahead',
+                           type=int, default=0,
+                           help="Number of pages of the bug list requested in advance")
 
         # Required arguments
         parser.parser.add_argument('url',
@@ -19,15 +19,24 @@
 #     Santiago Dueñas <sduenas@bitergia.com>
 #
 
+import bz2
 import collections
+import concurrent.futures
+import functools
+import gzip
 import io
 import logging
+import lzma
+import mmap
 import os
 import re
 import subprocess
 import threading
+import zipfile
 
 import dulwich.client
+import dulwich.objects
+import dulwich.pack
 import dulwich.repo
 
 from grimoirelab_toolkit.datetime import datetime_to_utc, str_to_datetime
@@ -35,11 +44,21 @@ from grimoirelab_toolkit.datetime import datetime_to_utc, str_to_datetime
 from ...backend import (Backend,
                         BackendCommand,
                         BackendCommandArgumentParser)
-from ...errors import RepositoryError, ParseError
-from ...utils import DEFAULT_DATETIME, DEFAULT_LAST_DATETIME
+from ...cache import CommitsCache
+from ...errors import CacheError, RepositoryError, ParseError
+from ...utils import (DEFAULT_DATETIME,
+                      DEFAULT_LAST_DATETIME,
+                      bounded_map,
+                      check_compressed_file_type,
+                      partial_result_items)
 
 CATEGORY_COMMIT = 'commit'
 
+PARSER_CHUNK_SIZE = 500
+LOG_FILE_BUFFER_SIZE = 1024 * 1024
+COMMITS_CACHE_SUFFIX = '.commits.db'
+DEFAULT_UPDATE_WORKERS = 4
+
 logger = logging.getLogger(__name__)
 
 
@@ -63,7 +82,7 @@ class Git(Backend):
     :raises RepositoryError: raised when there was an error cloning or
         updating the repository.
     """
-    version = '0.12.0'
+    version = '0.18.0'
 
     CATEGORIES = [CATEGORY_COMMIT]
 
@@ -75,7 +94,9 @@ class Git(Backend):
         self.gitpath = gitpath
 
     def fetch(self, category=CATEGORY_COMMIT, from_date=DEFAULT_DATETIME, to_date=DEFAULT_LAST_DATETIME,
-              branches=None, latest_items=False, no_update=False):
+              branches=None, latest_items=False, no_update=False, workers=1,
+              git_jobs=1, partial_clone=False, commits_cache=False, reference_path=None,
+              light=False):
         """Fetch commits.
 
         The method retrieves from a Git repository or a log file
@@ -96,6 +117,40 @@ class Git(Backend):
         The parameter `no_update` returns all commits without performing
         an update of the repository before.
 
+        When `workers` is greater than one, the log is split in chunks
+        of commits which are parsed by a pool of processes. Commits are
+        returned in the same order anyway.
+
+        When `git_jobs` is greater than one, the log of the repository
+        is read running that number of git processes at the same time.
+        Each process reads a batch of the commits listed by rev-list.
+
+        When `partial_clone` is set and the repository was not cloned
+        yet, it is cloned without the contents of the files. Git will
+        download them when the stats of the commits are read.
+
+        When `commits_cache` is set, parsed commits are stored in a
+        cache next to `gitpath`. Later fetches only read and parse the
+        log of the commits not found in that cache; the rest of them
+        are taken from the cache. The list of commits to fetch and
+        their refs are still obtained from the repository. The
+        cache is not used with `latest_items` and, when it is
+        enabled, `workers` and `git_jobs` are ignored.
+
+        When `reference_path` is given and the repository was not
+        cloned yet, the objects stored in that local repository are
+        shared with the new clone instead of copying them. This is
+        useful to fetch forks of a repository already cloned.
+
+        When `light` is set, commits are read from the repository without
+        the data about their files (actions and stats), so the list of
+        files of each commit is empty. Detecting renamed and copied
+        files and calculating the stats of the files are the most
+        expensive operations of the log, so this mode is much faster
+        when only the authorship and dates of the commits are needed.
+        The commits cache is not used in this mode and log files are
+        parsed as they are.
+
         Take into account that `from_date` and `branches` are ignored
         when the commits are fetched from a Git log file or when
         `latest_items` flag is set.
@@ -111,6 +166,15 @@ class Git(Backend):
         :param latest_items: sync with the repository to fetch only the
             newest commits
         :param no_update: if enabled, don't update the repo with the latest changes
+        :param workers: number of processes used to parse the log
+        :param git_jobs: number of git processes used to read the log
+        :param partial_clone: clone the repository without the contents
+            of the files
+        :param commits_cache: store the parsed commits in a cache and
+            reuse them on later fetches
+        :param reference_path: path to a local repository to share
+            objects with when the repository is cloned
+        :param light: fetch commits without the data of their files
 
         :returns: a generator of commits
         """
@@ -124,7 +188,13 @@ class Git(Backend):
             'to_date': to_date,
             'branches': branches,
             'latest_items': latest_items,
-            'no_update': no_update
+            'no_update': no_update,
+            'workers': workers,
+            'git_jobs': git_jobs,
+            'partial_clone': partial_clone,
+            'commits_cache': commits_cache,
+            'reference_path': reference_path,
+            'light': light
         }
         items = super().fetch(category, **kwargs)
 
@@ -143,15 +213,23 @@ class Git(Backend):
         branches = kwargs['branches']
         latest_items = kwargs['latest_items']
         no_update = kwargs['no_update']
+        workers = kwargs['workers']
+        git_jobs = kwargs['git_jobs']
+        partial_clone = kwargs['partial_clone']
+        commits_cache = kwargs['commits_cache']
+        reference_path = kwargs['reference_path']
+        light = kwargs['light']
 
         ncommits = 0
 
         try:
             if os.path.isfile(self.gitpath):
-                commits = self.__fetch_from_log()
+                commits = self.__fetch_from_log(workers)
             else:
                 commits = self.__fetch_from_repo(from_date, to_date, branches,
-                                                 latest_items, no_update)
+                                                 latest_items, no_update, workers,
+                                                 git_jobs, partial_clone, commits_cache,
+                                                 reference_path, light)
 
             for commit in commits:
                 yield commit
@@ -211,13 +289,18 @@ class Git(Backend):
         return CATEGORY_COMMIT
 
     @staticmethod
-    def parse_git_log_from_file(filepath):
+    def parse_git_log_from_file(filepath, workers=1):
         """Parse a Git log file.
 
         The method parses the Git log file and returns an iterator of
         dictionaries. Each one of this, contains a commit.
 
+        Log files compressed with gzip, bz2, xz or zip are decompressed
+        on the fly while they are parsed, so they are never written
+        uncompressed to disk. Zip files must only contain the log.
+
         :param filepath: path to the log file
+        :param workers: number of processes used to parse the log
 
         :returns: a generator of parsed commits
 
@@ -226,27 +309,31 @@ class Git(Backend):
         :raises OSError: raised when an error occurs reading the
             given file
         """
-        with open(filepath, 'r', errors='surrogateescape',
-                  newline=os.linesep) as f:
-            parser = GitParser(f)
+        with _open_git_log_file(filepath) as f:
+            parser = Git.__create_git_parser(f, workers)
 
             for commit in parser.parse():
                 yield commit
 
     @staticmethod
-    def parse_git_log_from_iter(iterator):
+    def parse_git_log_from_iter(iterator, workers=1, light=False):
         """Parse a Git log obtained from an iterator.
 
         The method parses the Git log fetched from an iterator, where
         each item is a line of the log. It returns and iterator of
         dictionaries. Each dictionary contains a commit.
 
+        When `light` is set, the log must not include data about the
+        files of the commits, like the logs read in light mode.
+
         :param iterator: iterator of Git log lines
+        :param workers: number of processes used to parse the log
+        :param light: parse a log without data about files
 
         :raises ParseError: raised when the format of the Git log
             is invalid
         """
-        parser = GitParser(iterator)
+        parser = Git.__create_git_parser(iterator, workers, light=light)
 
         for commit in parser.parse():
             yield commit
@@ -254,26 +341,37 @@ class Git(Backend):
     def _init_client(self, from_archive=False):
         pass
 
-    def __fetch_from_log(self):
+    @staticmethod
+    def __create_git_parser(stream, workers, light=False):
+        if workers > 1:
+            return GitParallelParser(stream, workers=workers, light=light)
+        else:
+            return GitParser(stream, light=light)
+
+    def __fetch_from_log(self, workers=1):
         logger.info("Fetching commits: '%s' git repository from log file %s",
                     self.uri, self.gitpath)
-        return self.parse_git_log_from_file(self.gitpath)
+        return self.parse_git_log_from_file(self.gitpath, workers=workers)
 
-    def __fetch_from_repo(self, from_date, to_date, branches, latest_items=False, no_update=False):
+    def __fetch_from_repo(self, from_date, to_date, branches, latest_items=False, no_update=False,
+                          workers=1, git_jobs=1, partial_clone=False, commits_cache=False,
+                          reference_path=None, light=False):
         # When no latest items are set or the repository has not
         # been cloned use the default mode
         default_mode = not latest_items or not os.path.exists(self.gitpath)
 
-        repo = self.__create_git_repository()
+        repo = self.__create_git_repository(partial_clone, reference_path)
 
         if default_mode:
-            commits = self.__fetch_commits_from_repo(repo, from_date, to_date, branches, no_update)
+            commits = self.__fetch_commits_from_repo(repo, from_date, to_date, branches, no_update,
+                                                     workers, git_jobs, commits_cache, light)
         else:
-            commits = self.__fetch_newest_commits_from_repo(repo)
+            commits = self.__fetch_newest_commits_from_repo(repo, workers, light)
 
         return commits
 
-    def __fetch_commits_from_repo(self, repo, from_date, to_date, branches, no_update):
+    def __fetch_commits_from_repo(self, repo, from_date, to_date, branches, no_update,
+                                  workers=1, git_jobs=1, commits_cache=False, light=False):
         if branches is None:
             branches_text = "all"
         elif len(branches) == 0:
@@ -299,10 +397,54 @@ class Git(Backend):
         if not no_update:
             repo.update()
 
-        gitlog = repo.log(from_date, to_date, branches)
-        return self.parse_git_log_from_iter(gitlog)
+        if commits_cache and not light:
+            return self.__fetch_commits_using_cache(repo, from_date, to_date, branches)
+
+        gitlog = repo.log(from_date, to_date, branches, jobs=git_jobs, light=light)
+        return self.parse_git_log_from_iter(gitlog, workers=workers, light=light)
+
+    def __fetch_commits_using_cache(self, repo, from_date, to_date, branches):
+        cache_path = self.gitpath.rstrip(os.sep) + COMMITS_CACHE_SUFFIX
+        cache = CommitsCache(cache_path)
+
+        refs = repo.decorations(branches=branches)
+        hashes = repo.rev_list(branches=branches,
+                               from_date=from_date, to_date=to_date,
+                               reverse=True)
+
+        ncached = 0
+
+        for batch in _chunks(hashes, GitRepository.LOG_BATCH_SIZE):
+            try:
+                commits = cache.get(self.uri, batch)
+            except CacheError as e:
+                logger.warning("Unable to read commits from cache; %s", str(e))
+                commits = {}
 
-    def __fetch_newest_commits_from_repo(self, repo):
+            ncached += len(commits)
+            missing = [commit for commit in batch if commit not in commits]
+
+            if missing:
+                gitlog = repo.log_commits(missing)
+                parsed = [commit for commit in self.parse_git_log_from_iter(gitlog)]
+
+                try:
+                    cache.set(self.uri, parsed)
+                except CacheError as e:
+                    logger.warning("Unable to write commits to cache; %s", str(e))
+
+                commits.update((commit['commit'], commit) for commit in parsed)
+
+            # Refs change over time so they are not taken from the cache
+            for commit_id in batch:
+                commit = commits[commit_id]
+                commit['refs'] = refs.get(commit_id, [])
+                yield commit
+
+        logger.debug("%s commits of %s read from cache %s",
+                     ncached, self.uri, cache_path)
+
+    def __fetch_newest_commits_from_repo(self, repo, workers=1, light=False):
         logger.info("Fetching latest commits: '%s' git repository",
                     self.uri)
 
@@ -310,12 +452,13 @@ class Git(Backend):
         if not hashes:
             return []
 
-        gitshow = repo.show(hashes)
-        return self.parse_git_log_from_iter(gitshow)
+        gitshow = repo.show(hashes, light=light)
+        return self.parse_git_log_from_iter(gitshow, workers=workers, light=light)
 
-    def __create_git_repository(self):
+    def __create_git_repository(self, partial_clone=False, reference_path=None):
         if not os.path.exists(self.gitpath):
-            repo = GitRepository.clone(self.uri, self.gitpath)
+            repo = GitRepository.clone(self.uri, self.gitpath, partial=partial_clone,
+                                       reference=reference_path)
         elif os.path.isdir(self.gitpath):
             repo = GitRepository(self.uri, self.gitpath)
         return repo
@@ -353,6 +496,23 @@ class GitCommand(BackendCommand):
         group.add_argument('--branches', dest='branches',
                            nargs='+', type=str, default=None,
                            help="Fetch commits only from these branches")
+        group.add_argument('--workers', dest='workers',
+                           default=1, type=int,
+                           help="number of processes used to parse the log")
+        group.add_argument('--git-jobs', dest='git_jobs',
+                           default=1, type=int,
+                           help="number of git processes used to read the log")
+        group.add_argument('--partial-clone', dest='partial_clone',
+                           action='store_true',
+                           help="Clone the repository without the contents of the files")
+        group.add_argument('--commits-cache', dest='commits_cache',
+                           action='store_true',
+                           help="Reuse the commits parsed on previous executions")
+        group.add_argument('--reference-path', dest='reference_path',
+                           help="Path to a local repository to share objects with when cloning")
+        group.add_argument('--light', dest='light',
+                           action='store_true',
+                           help="Fetch commits without the data of their files")
 
         # Mutual exclusive parameters
         exgroup = group.add_mutually_exclusive_group()
@@ -464,7 +624,13 @@ class GitParser:
         git log --raw --numstat --pretty=fuller --decorate=full \
                 --parents -M -C -c --remotes=origin --all
 
+    When `light` is set, the parser expects a log without actions
+    and stats, so it looks for the next commit right after the
+    message, without checking whether the lines contain data about
+    files.
+
     :param stream: a file object which stores the log
+    :param light: parse a log without data about files
     """
     COMMIT_PATTERN = r"""^commit[ \t](?P<commit>[a-f0-9]{40})
                      (?:[ \t](?P<parents>[a-f0-9][a-f0-9 \t]+))?
@@ -504,8 +670,9 @@ class GitParser:
     # Git trailers
     TRAILERS = ['Signed-off-by']
 
-    def __init__(self, stream):
+    def __init__(self, stream, light=False):
         self.stream = stream
+        self.light = light
         self.nline = 0
         self.state = self.INIT
 
@@ -607,7 +774,7 @@ class GitParser:
     def _handle_message(self, line):
         m = self.GIT_NEXT_STATE_REGEXP.match(line)
         if m:
-            self.state = self.FILE
+            self.state = self.COMMIT if self.light else self.FILE
             return True
 
         m = self.GIT_MESSAGE_REGEXP.match(line)
@@ -726,6 +893,201 @@ class GitParser:
             return f
 
 
+class GitParallelParser:
+    """Git log parser that uses a pool of processes.
+
+    The Git log stream is split in chunks of `chunk_size` commits.
+    Each chunk is parsed with a `GitParser` in one of the processes
+    of the pool, so up to `workers` chunks are parsed at the same
+    time. Commits are returned in the same order they were found
+    in the log.
+
+    The log is split before each commit line that follows an empty
+    line or starts the log, so parsing the chunks gives the same
+    results as parsing the whole stream with `GitParser`.
+
+    :param stream: a file object which stores the log
+    :param workers: number of processes used to parse the log
+    :param chunk_size: number of commits of each chunk
+    :param light: parse a log without data about files
+    """
+    def __init__(self, stream, workers=2, chunk_size=PARSER_CHUNK_SIZE, light=False):
+        self.stream = stream
+        self.workers = max(workers, 1)
+        self.chunk_size = max(chunk_size, 1)
+        self.light = light
+
+    def parse(self):
+        """Parse the Git log stream."""
+
+        parse_chunk = functools.partial(_parse_git_log_chunk, light=self.light)
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self.workers) as executor:
+            # Keep a bounded number of chunks in memory
+            results = bounded_map(executor, parse_chunk, self._split(), 2 * self.workers)
+
+            try:
+                for result in results:
+                    yield from partial_result_items(result)
+            finally:
+                results.close()
+
+    def _split(self):
+        """Split the stream in chunks of commits.
+
+        :returns: a generator of tuples with the number of lines
+            read before the chunk and the lines of the chunk
+        """
+        chunk = []
+        ncommits = 0
+        nline = 0
+        prev_line = ''
+
+        for line in self.stream:
+            if not prev_line.rstrip('\n') and GitParser.GIT_COMMIT_REGEXP.match(line.rstrip('\n')):
+                if ncommits == self.chunk_size:
+                    yield nline - len(chunk), chunk
+                    chunk = []
+                    ncommits = 0
+                ncommits += 1
+
+            chunk.append(line)
+            nline += 1
+            prev_line = line
+
+        if chunk:
+            yield nline - len(chunk), chunk
+
+
+def _parse_git_log_chunk(chunk, light=False):
+    """Parse a chunk of a Git log in a worker process.
+
+    `chunk` is a tuple with the number of lines read before the
+    chunk and its lines. The commits parsed before an error are
+    returned together with that error, if any, so they are not lost.
+    """
+    nline, lines = chunk
+
+    parser = GitParser(lines, light=light)
+    parser.nline = nline
+
+    commits = []
+
+    try:
+        for commit in parser.parse():
+            commits.append(commit)
+    except ParseError as e:
+        return commits, e
+
+    return commits, None
+
+
+def _open_git_log_file(filepath):
+    """Open a Git log file, decompressing it on the fly if needed."""
+
+    compressed = check_compressed_file_type(filepath)
+
+    if compressed == 'gz':
+        stream = gzip.open(filepath, mode='rb')
+    elif compressed == 'bz2':
+        stream = bz2.open(filepath, mode='rb')
+    elif compressed == 'xz':
+        stream = lzma.open(filepath, mode='rb')
+    elif compressed == 'zip':
+        with zipfile.ZipFile(filepath) as _zip:
+            stream = _zip.open(_zip.infolist()[0].filename)
+    else:
+        stream = open(filepath, mode='rb', buffering=0)
+
+    stream = io.BufferedReader(stream, buffer_size=LOG_FILE_BUFFER_SIZE)
+
+    return io.TextIOWrapper(stream, errors='surrogateescape',
+                            newline=os.linesep)
+
+
+def update_repositories(repositories, workers=DEFAULT_UPDATE_WORKERS):
+    """Update a set of repositories at the same time.
+
+    The repositories are updated with a pool of `workers` threads,
+    so several `git fetch` commands run concurrently. Errors found
+    updating a repository are logged and returned; they do not stop
+    the update of the rest of repositories.
+
+    :param repositories: list of `GitRepository` objects
+    :param workers: maximum number of repositories updated
+        at the same time
+
+    :returns: a list with the error found updating each repository
+        or `None` when it was updated, in the same order they were given
+    """
+    def update(repo):
+        try:
+            repo.update()
+        except RepositoryError as e:
+            logger.warning("Unable to update Git %s repository (%s); %s",
+                           repo.uri, repo.dirpath, str(e))
+            return e
+        return None
+
+    workers = max(workers, 1)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        errors = list(executor.map(update, repositories))
+
+    nerrors = len([error for error in errors if error])
+    logger.info("%s Git repositories updated; %s errors",
+                len(errors) - nerrors, nerrors)
+
+    return errors
+
+
+def _read_pack_object_header(data, offset):
+    """Read the header of an object stored in a pack.
+
+    It returns the type of the object and, for deltified objects,
+    the offset (OFS_DELTA) or the binary SHA (REF_DELTA) of its base.
+    """
+    start = offset
+    byte = data[offset]
+    type_num = (byte >> 4) & 0x07
+
+    # Skip the size of the object
+    while byte & 0x80:
+        offset += 1
+        byte = data[offset]
+    offset += 1
+
+    if type_num == dulwich.pack.OFS_DELTA:
+        byte = data[offset]
+        delta_offset = byte & 0x7f
+        while byte & 0x80:
+            offset += 1
+            byte = data[offset]
+            delta_offset = ((delta_offset + 1) << 7) + (byte & 0x7f)
+        base = start - delta_offset
+    elif type_num == dulwich.pack.REF_DELTA:
+        base = bytes(data[offset:offset + 20])
+    else:
+        base = None
+
+    return type_num, base
+
+
+def _chunks(iterable, size):
+    """Split an iterable in lists of `size` elements"""
+
+    chunk = []
+
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
 class EmptyRepositoryError(RepositoryError):
     """Exception raised when a repository is empty"""
 
@@ -778,6 +1140,15 @@ class GitRepository:
         '-c',  # show merge info
     ]
 
+    GIT_LIGHT_OUTPUT_OPTS = [
+        '--no-patch',  # do not show any data about files
+        '--pretty=fuller',  # pretty output
+        '--decorate=full',  # show full refs
+        '--parents',  # show parents information
+    ]
+
+    LOG_BATCH_SIZE = 1000
+
     def __init__(self, uri, dirpath):
         gitdir = os.path.join(dirpath, 'HEAD')
 
@@ -803,21 +1174,54 @@ class GitRepository:
         }
 
     @classmethod
-    def clone(cls, uri, dirpath):
+    def clone(cls, uri, dirpath, partial=False, reference=None):
         """Clone a Git repository.
 
         Make a bare copy of the repository stored in `uri` into `dirpath`.
         The repository would be either local or remote.
 
+        When `partial` is set, the repository is cloned without the
+        contents of the files (blobs). Commits and trees are enough to
+        read the metadata of the commits, so cloning takes less time
+        and disk space. Git downloads the missing blobs from origin
+        when they are needed, as it happens when the log includes the
+        stats of the files or renamed files have to be detected.
+        A commit-graph file is written after cloning and fetching
+        objects, to speed up walking the history.
+
+        Partial clones require a server which supports object filters.
+        Local repositories are cloned using 'file://' URIs; otherwise,
+        git ignores the filter and makes a full copy.
+
+        When `reference` is given, the objects available in that local
+        repository are not copied; they are shared using the alternates
+        mechanism of git. This saves disk space and time when cloning
+        forks of the same project. Take into account that objects
+        removed from the reference repository will be missing in the
+        clone, so the reference should not be pruned. When the reference
+        does not exist, the repository is cloned as usual.
+
         :param uri: URI of the repository
         :param dirtpath: directory where the repository will be cloned
+        :param partial: clone the repository without the contents
+            of the files
+        :param reference: path to a local repository to share objects with
 
         :returns: a `GitRepository` class having cloned the repository
 
         :raises RepositoryError: when an error occurs cloning the given
             repository
         """
-        cmd = ['git', 'clone', '--bare', uri, dirpath]
+        cmd = ['git', 'clone', '--bare']
+
+        if partial:
+            cmd.extend(['--filter=blob:none',
+                        '--config', 'fetch.writeCommitGraph=true'])
+
+        if reference:
+            cmd.extend(['--reference-if-able', reference])
+
+        cmd.extend([uri, dirpath])
         env = {
             'LANG': 'C',
             'HOME': os.getenv('HOME', '')
@@ -828,7 +1232,12 @@ class GitRepository:
         logger.debug("Git %s repository cloned into %s",
                      uri, dirpath)
 
-        return cls(uri, dirpath)
+        repo = cls(uri, dirpath)
+
+        if partial:
+            repo.write_commit_graph()
+
+        return repo
 
     def count_objects(self):
         """Count the objects of a repository.
@@ -860,6 +1269,21 @@ class GitRepository:
 
         return nobjs
 
+    def write_commit_graph(self):
+        """Write the commit-graph file of the repository.
+
+        The commit-graph file stores the structure of the history,
+        so git commands which walk it, like `log` or `rev-list`, do
+        not need to parse every commit object.
+
+        :raises RepositoryError: when an error occurs writing the file
+        """
+        cmd_graph = ['git', 'commit-graph', 'write', '--reachable']
+        self._exec(cmd_graph, cwd=self.dirpath, env=self.gitenv)
+
+        logger.debug("Git %s repository commit-graph written into %s",
+                     self.uri, self.dirpath)
+
     def is_detached(self):
         """Check if the repo is in a detached state.
 
@@ -887,12 +1311,22 @@ class GitRepository:
 
         Returns `True` when the repository is empty. Under the hood,
         it checks the number of objects on the repository. When
-        this number is 0, the repositoy is empty.
+        this number is 0, the repositoy is empty, unless it shares
+        the objects of other repositories (alternates).
 
         :raises RepositoryError: when an error occurs accessing the
             repository
         """
-        return self.count_objects() == 0
+        if self.count_objects() > 0:
+            return False
+
+        alternates = os.path.join(self.dirpath, 'objects', 'info', 'alternates')
+
+        try:
+            with open(alternates, 'r') as f:
+                return not f.read().strip()
+        except FileNotFoundError:
+            return True
 
     def update(self):
         """Update repository from its remote.
@@ -943,7 +1377,7 @@ class GitRepository:
 
         return commits
 
-    def rev_list(self, branches=None):
+    def rev_list(self, branches=None, from_date=None, to_date=None, reverse=False):
         """Read the list commits from the repository
 
         The list of branches is a list of strings, with the names of the
@@ -956,7 +1390,15 @@ class GitRepository:
 
             git rev-list --topo-order
 
+        When `from_date` or `to_date` are given, only the commits
+        between those dates are listed. When `reverse` is set, the
+        commits are listed in the same order `log` returns them.
+
         :param branches: names of branches to fetch from (default: None)
+        :param from_date: list commits newer than a specific
+            date (inclusive)
+        :param to_date: list commits older than a specific date
+        :param reverse: list the commits in reverse order
 
         :raises EmptyRepositoryError: when the repository is empty and
             the action cannot be performed
@@ -969,6 +1411,17 @@ class GitRepository:
 
         cmd_rev_list = ['git', 'rev-list', '--topo-order']
 
+        if reverse:
+            cmd_rev_list.append('--reverse')
+
+        if from_date:
+            dt = from_date.strftime("%Y-%m-%d %H:%M:%S %z")
+            cmd_rev_list.append('--since=' + dt)
+
+        if to_date:
+            dt = to_date.strftime("%Y-%m-%d %H:%M:%S %z")
+            cmd_rev_list.append('--until=' + dt)
+
         if branches is None:
             cmd_rev_list.extend(['--branches', '--tags', '--remotes=origin'])
         elif len(branches) == 0:
@@ -983,7 +1436,8 @@ class GitRepository:
         logger.debug("Git rev-list fetched from %s repository (%s)",
                      self.uri, self.dirpath)
 
-    def log(self, from_date=None, to_date=None, branches=None, encoding='utf-8'):
+    def log(self, from_date=None, to_date=None, branches=None, encoding='utf-8', jobs=1,
+            light=False):
         """Read the commit log from the repository.
 
         The method returns the Git log of the repository using the
@@ -1001,10 +1455,22 @@ class GitRepository:
         is fetched. If the list of branches is None, all commits
         for all branches will be fetched.
 
+        When `jobs` is greater than one, the commits are listed with
+        `rev_list` and split in batches of `LOG_BATCH_SIZE` commits.
+        Up to `jobs` git processes read the log of these batches at
+        the same time. The output is the same of a single git log
+        command.
+
+        When `light` is set, the options to show the actions and stats
+        of the files (`--raw --numstat -M -C -c`) are replaced by
+        `--no-patch`, so the log only includes the commits data.
+
         :param from_date: fetch commits newer than a specific
             date (inclusive)
         :param branches: names of branches to fetch from (default: None)
         :param encoding: encode the log using this format
+        :param jobs: number of git processes run at the same time
+        :param light: do not include data about the files of the commits
 
         :returns: a generator where each item is a line from the log
 
@@ -1017,8 +1483,13 @@ class GitRepository:
                            self.uri)
             raise EmptyRepositoryError(repository=self.uri)
 
+        if jobs > 1:
+            yield from self._log_in_batches(from_date, to_date, branches,
+                                            jobs, encoding=encoding, light=light)
+            return
+
         cmd_log = ['git', 'log', '--reverse', '--topo-order']
-        cmd_log.extend(self.GIT_PRETTY_OUTPUT_OPTS)
+        cmd_log.extend(self._output_opts(light))
 
         if from_date:
             dt = from_date.strftime("%Y-%m-%d %H:%M:%S %z")
@@ -1042,7 +1513,7 @@ class GitRepository:
         logger.debug("Git log fetched from %s repository (%s)",
                      self.uri, self.dirpath)
 
-    def show(self, commits=None, encoding='utf-8'):
+    def show(self, commits=None, encoding='utf-8', light=False):
         """Show the data of a set of commits.
 
         The method returns the output of Git show command for a
@@ -1055,8 +1526,12 @@ class GitRepository:
         data about the last commit, like the default behaviour of
         `git show`.
 
+        When `light` is set, the output does not include data about
+        the files of the commits.
+
         :param commits: list of commits to show data
         :param encoding: encode the output using this format
+        :param light: do not include data about the files of the commits
 
         :returns: a generator where each item is a line from the show output
 
@@ -1073,7 +1548,7 @@ class GitRepository:
             commits = []
 
         cmd_show = ['git', 'show']
-        cmd_show.extend(self.GIT_PRETTY_OUTPUT_OPTS)
+        cmd_show.extend(self._output_opts(light))
         cmd_show.extend(commits)
 
         for line in self._exec_nb(cmd_show, cwd=self.dirpath, env=self.gitenv):
@@ -1082,6 +1557,123 @@ class GitRepository:
         logger.debug("Git show fetched from %s repository (%s)",
                      self.uri, self.dirpath)
 
+    def log_commits(self, commits, encoding='utf-8', light=False):
+        """Read the log of a list of commits.
+
+        The method returns the log of the given commits, in the same
+        order, using the same options of `log`. Commits are sent to
+        git through its standard input, so the list can be as large
+        as needed.
+
+        :param commits: list of commits to read
+        :param encoding: encode the log using this format
+        :param light: do not include data about the files of the commits
+
+        :returns: a generator where each item is a line from the log
+
+        :raises EmptyRepositoryError: when the repository is empty and
+            the action cannot be performed
+        :raises RepositoryError: when an error occurs fetching the log
+        """
+        if self.is_empty():
+            logger.warning("Git %s repository is empty; unable to get the log",
+                           self.uri)
+            raise EmptyRepositoryError(repository=self.uri)
+
+        if not commits:
+            return
+
+        for line in self._log_commits(commits, encoding=encoding, light=light):
+            yield line
+
+    def decorations(self, branches=None):
+        """Get the refs which point to each commit.
+
+        The method returns the refs of the commits, as they are shown
+        in the log, for the commits reachable from the given list of
+        branches. If the list of branches is empty, no commit is
+        checked. If the list of branches is None, commits of all
+        branches will be checked.
+
+        :param branches: names of branches to check (default: None)
+
+        :returns: a dict with the list of refs of each decorated commit
+
+        :raises EmptyRepositoryError: when the repository is empty and
+            the action cannot be performed
+        :raises RepositoryError: when an error occurs running the command
+        """
+        if self.is_empty():
+            logger.warning("Git %s repository is empty; unable to get the refs",
+                           self.uri)
+            raise EmptyRepositoryError(repository=self.uri)
+
+        if branches is not None and len(branches) == 0:
+            return {}
+
+        cmd_log = ['git', 'log', '--simplify-by-decoration',
+                   '--decorate=full', '--format=%H %D']
+
+        if branches is None:
+            cmd_log.extend(['--branches', '--tags', '--remotes=origin'])
+        else:
+            cmd_log.extend(['refs/heads/' + branch for branch in branches])
+
+        outs = self._exec(cmd_log, cwd=self.dirpath, env=self.gitenv)
+        outs = outs.decode('utf-8', errors='surrogateescape')
+
+        refs = {}
+        for line in outs.splitlines():
+            commit, _, decoration = line.partition(' ')
+            if decoration:
+                refs[commit] = [ref.strip() for ref in decoration.split(',')]
+
+        return refs
+
+    def _log_in_batches(self, from_date, to_date, branches, jobs, encoding='utf-8', light=False):
+        """Read the log running several git processes at the same time."""
+
+        commits = self.rev_list(branches=branches,
+                                from_date=from_date, to_date=to_date,
+                                reverse=True)
+
+        log_commits = functools.partial(self._log_commits, encoding=encoding, light=light)
+        nbatches = 0
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+            logs = bounded_map(executor, log_commits,
+                               _chunks(commits, self.LOG_BATCH_SIZE), 2 * jobs)
+
+            try:
+                for lines in logs:
+                    # Commits of different batches are separated
+                    # by an empty line like in a single log
+                    if nbatches > 0:
+                        yield '\n'
+                    yield from lines
+                    nbatches += 1
+            finally:
+                logs.close()
+
+        logger.debug("Git log fetched from %s repository (%s) in %s batches",
+                     self.uri, self.dirpath, nbatches)
+
+    def _log_commits(self, commits, encoding='utf-8', light=False):
+        """Read the log of a list of commits, in the given order."""
+
+        cmd_log = ['git', 'log', '--no-walk=unsorted', '--stdin']
+        cmd_log.extend(self._output_opts(light))
+
+        data = '\n'.join(commits) + '\n'
+        outs = self._exec(cmd_log, cwd=self.dirpath, env=self.gitenv,
+                          input_data=data.encode(encoding), encoding=encoding)
+
+        return [line.decode(encoding, errors='surrogateescape')
+                for line in io.BytesIO(outs)]
+
+    def _output_opts(self, light=False):
+        return self.GIT_LIGHT_OUTPUT_OPTS if light else self.GIT_PRETTY_OUTPUT_OPTS
+
     def _fetch_pack(self):
         """Fetch changes and store them in a pack."""
 
@@ -1119,19 +1711,61 @@ class GitRepository:
         return (pack_name, refs)
 
     def _read_commits_from_pack(self, packet_name):
-        """Read the commits of a pack."""
+        """Read the commits of a pack.
 
-        filepath = 'objects/pack/pack-' + packet_name
-
-        cmd_verify_pack = ['git', 'verify-pack', '-v', filepath]
-
-        outs = self._exec(cmd_verify_pack, cwd=self.dirpath, env=self.gitenv)
-        outs = outs.decode('utf-8', errors='surrogateescape').rstrip()
+        Objects are listed from the index of the pack and their types
+        are read from the headers of the objects, so they do not need
+        to be decompressed. Deltified objects have the type of the
+        base object of their delta chain.
+        """
+        filepath = os.path.join(self.dirpath, 'objects', 'pack', 'pack-' + packet_name)
 
-        lines = [line.split(' ') for line in outs.split('\n')]
+        index = dulwich.pack.load_pack_index(filepath + '.idx')
+        try:
+            entries = sorted((offset, sha) for sha, offset, _ in index.iterentries())
+        finally:
+            index.close()
+
+        offsets = {sha: offset for offset, sha in entries}
+        types = {}
+
+        def object_type(offset):
+            chain = []
+
+            while offset not in types:
+                type_num, base = _read_pack_object_header(data, offset)
+
+                if type_num == dulwich.pack.OFS_DELTA:
+                    chain.append(offset)
+                    offset = base
+                elif type_num == dulwich.pack.REF_DELTA:
+                    chain.append(offset)
+                    try:
+                        offset = offsets[base]
+                    except KeyError:
+                        cause = "unable to read pack '%s'; reason: delta base object %s not found in the pack" \
+                            % (packet_name, dulwich.pack.sha_to_hex(base).decode('ascii'))
+                        raise RepositoryError(cause=cause)
+                else:
+                    types[offset] = type_num
+
+            # Only the types of the delta chains are kept
+            type_num = types[offset]
+            for delta in chain:
+                types[delta] = type_num
+
+            return type_num
+
+        with open(filepath + '.pack', 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                commits = [dulwich.pack.sha_to_hex(sha).decode('ascii')
+                           for offset, sha in entries
+                           if object_type(offset) == dulwich.objects.Commit.type_num]
+            finally:
+                data.close()
 
         # Commits usually come in the pack ordered from newest to oldest
-        commits = [parts[0] for parts in lines if parts[1] == 'commit']
         commits.reverse()
 
         return commits
@@ -1296,12 +1930,13 @@ class GitRepository:
 
     @staticmethod
     def _exec(cmd, cwd=None, env=None, ignored_error_codes=None,
-              encoding='utf-8'):
+              encoding='utf-8', input_data=None):
         """Run a command.
 
         Execute `cmd` command in the directory set by `cwd`. Environment
         variables can be set using the `env` dictionary. The output
-        data is returned as encoded bytes.
+        data is returned as encoded bytes. When `input_data` is given,
+        these bytes are sent to the standard input of the command.
 
         Commands which their returning status codes are non-zero will
         be treated as failed. Error codes considered as valid can be
@@ -1318,10 +1953,12 @@ class GitRepository:
                      ' '.join(cmd), cwd, str(env))
 
         try:
-            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE,
+            stdin = subprocess.PIPE if input_data is not None else None
+            proc = subprocess.Popen(cmd, stdin=stdin,
+                                    stdout=subprocess.PIPE,
                                     stderr=subprocess.PIPE,
                                     cwd=cwd, env=env)
-            (outs, errs) = proc.communicate()
+            (outs, errs) = proc.communicate(input_data)
         except OSError as e:
             raise RepositoryError(cause=str(e))
 
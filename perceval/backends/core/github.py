@@ -21,8 +21,11 @@
 #     Alberto Martín <alberto.martin@bitergia.com>
 #
 
+import collections
+import functools
 import json
 import logging
+import threading
 
 import requests
 from grimoirelab_toolkit.datetime import (datetime_to_utc,
@@ -34,8 +37,9 @@ from ...backend import (Backend,
                         BackendCommand,
                         BackendCommandArgumentParser,
                         DEFAULT_SEARCH_FIELD)
-from ...client import HttpClient, RateLimitHandler
-from ...utils import DEFAULT_DATETIME, DEFAULT_LAST_DATETIME
+from ...cache import init_users_cache
+from ...client import HttpClient, RateLimitHandler, read_ahead
+from ...utils import DEFAULT_DATETIME, DEFAULT_LAST_DATETIME, workers_mapper
 
 CATEGORY_ISSUE = "issue"
 CATEGORY_PULL_REQUEST = "pull_request"
@@ -94,8 +98,16 @@ class GitHub(Backend):
         pull requests) per query
     :param sleep_time: time to sleep in case
         of connection problems
+    :param workers: number of threads used to fetch the data
+        (e.g., comments, reactions, reviews) of the items of
+        each page concurrently; items are returned in the same
+        order either way
+    :param users_cache: persistent cache (`UsersCache`) where the data
+        of the users is kept between executions
+    :param read_ahead: number of pages of issues requested in advance
+        while the current one is processed; disabled when it is 0
     """
-    version = '0.24.0'
+    version = '0.27.0'
 
     CATEGORIES = [CATEGORY_ISSUE, CATEGORY_PULL_REQUEST, CATEGORY_REPO]
 
@@ -117,7 +129,8 @@ class GitHub(Backend):
                  tag=None, archive=None,
                  sleep_for_rate=False, min_rate_to_sleep=MIN_RATE_LIMIT,
                  max_retries=MAX_RETRIES, sleep_time=DEFAULT_SLEEP_TIME,
-                 max_items=MAX_CATEGORY_ITEMS_PER_PAGE):
+                 max_items=MAX_CATEGORY_ITEMS_PER_PAGE, workers=1,
+                 users_cache=None, read_ahead=0):
         if api_token is None:
             api_token = []
         origin = base_url if base_url else GITHUB_URL
@@ -135,6 +148,9 @@ class GitHub(Backend):
         self.max_retries = max_retries
         self.sleep_time = sleep_time
         self.max_items = max_items
+        self.workers = max(workers, 1)
+        self.users_cache = users_cache
+        self.read_ahead = read_ahead
 
         self.client = None
         self.exclude_user_data = False
@@ -205,6 +221,9 @@ class GitHub(Backend):
         from_date = kwargs['from_date']
         to_date = kwargs['to_date']
 
+        self._users = init_users_cache(self.users_cache, self,
+                                       self.base_url or GITHUB_URL)
+
         if category == CATEGORY_ISSUE:
             items = self.__fetch_issues(from_date, to_date)
         elif category == CATEGORY_PULL_REQUEST:
@@ -287,65 +306,97 @@ class GitHub(Backend):
     def __fetch_issues(self, from_date, to_date):
         """Fetch the issues"""
 
-        issues_groups = self.client.issues(from_date=from_date)
+        issues_groups = read_ahead(self.client.issues(from_date=from_date), self.read_ahead)
 
-        for raw_issues in issues_groups:
-            issues = json.loads(raw_issues)
-            for issue in issues:
+        with workers_mapper(self.workers) as mapper:
+            for raw_issues in issues_groups:
+                issues = []
+                completed = False
+
+                for issue in json.loads(raw_issues):
+                    if str_to_datetime(issue['updated_at']) > to_date:
+                        completed = True
+                        break
+                    issues.append(issue)
 
-                if str_to_datetime(issue['updated_at']) > to_date:
+                for issue in mapper(self.__fill_issue, issues):
+                    yield issue
+
+                if completed:
                     return
 
-                self.__init_extra_issue_fields(issue)
-                for field in TARGET_ISSUE_FIELDS:
+    def __fetch_pull_requests(self, from_date, to_date):
+        """Fetch the pull requests"""
 
-                    if not issue[field]:
-                        continue
+        issues_groups = read_ahead(self.client.issues(from_date=from_date), self.read_ahead)
 
-                    if field == 'user':
-                        issue[field + '_data'] = self.__get_user(issue[field]['login'])
-                    elif field == 'assignee':
-                        issue[field + '_data'] = self.__get_issue_assignee(issue[field])
-                    elif field == 'assignees':
-                        issue[field + '_data'] = self.__get_issue_assignees(issue[field])
-                    elif field == 'comments':
-                        issue[field + '_data'] = self.__get_issue_comments(issue['number'])
-                    elif field == 'reactions':
-                        issue[field + '_data'] = \
-                            self.__get_issue_reactions(issue['number'], issue['reactions']['total_count'])
+        with workers_mapper(self.workers) as mapper:
+            for raw_issues in issues_groups:
+                pull_numbers = [issue['number'] for issue in json.loads(raw_issues)
+                                if 'pull_request' in issue]
 
-                yield issue
+                fetch_pull = functools.partial(self.__fetch_pull, to_date=to_date)
 
-    def __fetch_pull_requests(self, from_date, to_date):
-        """Fetch the pull requests"""
+                for pull in mapper(fetch_pull, pull_numbers):
+                    if str_to_datetime(pull['updated_at']) > to_date:
+                        return
+                    yield pull
 
-        raw_pulls = self.client.pulls(from_date=from_date)
-        for raw_pull in raw_pulls:
-            pull = json.loads(raw_pull)
+    def __fill_issue(self, issue):
+        """Add the data of the target fields to an issue"""
 
-            if str_to_datetime(pull['updated_at']) > to_date:
-                return
+        self.__init_extra_issue_fields(issue)
+        for field in TARGET_ISSUE_FIELDS:
 
-            self.__init_extra_pull_fields(pull)
+            if not issue[field]:
+                continue
 
-            pull['reviews_data'] = self.__get_pull_reviews(pull['number'])
+            if field == 'user':
+                issue[field + '_data'] = self.__get_user(issue[field]['login'])
+            elif field == 'assignee':
+                issue[field + '_data'] = self.__get_issue_assignee(issue[field])
+            elif field == 'assignees':
+                issue[field + '_data'] = self.__get_issue_assignees(issue[field])
+            elif field == 'comments':
+                issue[field + '_data'] = self.__get_issue_comments(issue['number'])
+            elif field == 'reactions':
+                issue[field + '_data'] = \
+                    self.__get_issue_reactions(issue['number'], issue['reactions']['total_count'])
 
-            for field in TARGET_PULL_FIELDS:
-                if not pull[field]:
-                    continue
+        return issue
+
+    def __fetch_pull(self, pull_number, to_date):
+        """Fetch a pull request and the data of its target fields.
+
+        Pull requests updated after `to_date` are returned as
+        they are, without adding any extra data.
+        """
+        raw_pull = self.client.pull(pull_number)
+        pull = json.loads(raw_pull)
+
+        if str_to_datetime(pull['updated_at']) > to_date:
+            return pull
 
-                if field == 'user':
-                    pull[field + '_data'] = self.__get_user(pull[field]['login'])
-                elif field == 'merged_by':
-                    pull[field + '_data'] = self.__get_user(pull[field]['login'])
-                elif field == 'review_comments':
-                    pull[field + '_data'] = self.__get_pull_review_comments(pull['number'])
-                elif field == 'requested_reviewers':
-                    pull[field + '_data'] = self.__get_pull_requested_reviewers(pull['number'])
-                elif field == 'commits':
-                    pull[field + '_data'] = self.__get_pull_commits(pull['number'])
+        self.__init_extra_pull_fields(pull)
 
-            yield pull
+        pull['reviews_data'] = self.__get_pull_reviews(pull['number'])
+
+        for field in TARGET_PULL_FIELDS:
+            if not pull[field]:
+                continue
+
+            if field == 'user':
+                pull[field + '_data'] = self.__get_user(pull[field]['login'])
+            elif field == 'merged_by':
+                pull[field + '_data'] = self.__get_user(pull[field]['login'])
+            elif field == 'review_comments':
+                pull[field + '_data'] = self.__get_pull_review_comments(pull['number'])
+            elif field == 'requested_reviewers':
+                pull[field + '_data'] = self.__get_pull_requested_reviewers(pull['number'])
+            elif field == 'commits':
+                pull[field + '_data'] = self.__get_pull_commits(pull['number'])
+
+        return pull
 
     def __fetch_repo_info(self):
         """Get repo info about stars, watchers and forks"""
@@ -527,12 +578,17 @@ class GitHub(Backend):
         if not login or self.exclude_user_data:
             return None
 
+        if login in self._users:
+            return self._users[login]
+
         user_raw = self.client.user(login)
         user = json.loads(user_raw)
         user_orgs_raw = \
             self.client.user_orgs(login)
         user['organizations'] = json.loads(user_orgs_raw)
 
+        self._users[login] = user
+
         return user
 
     def __init_extra_issue_fields(self, issue):
@@ -580,6 +636,7 @@ class GitHubClient(HttpClient, RateLimitHandler):
 
     _users = {}       # users cache
     _users_orgs = {}  # users orgs cache
+    _users_locks = collections.defaultdict(threading.Lock)  # locks by login
 
     def __init__(self, owner, repository, tokens,
                  base_url=None, sleep_for_rate=False, min_rate_to_sleep=MIN_RATE_LIMIT,
@@ -592,6 +649,7 @@ class GitHubClient(HttpClient, RateLimitHandler):
         self.current_token = None
         self.last_rate_limit_checked = None
         self.max_items = max_items
+        self._rate_limit_lock = threading.RLock()
 
         if base_url:
             base_url = urijoin(base_url, 'api', 'v3')
@@ -695,11 +753,16 @@ class GitHubClient(HttpClient, RateLimitHandler):
                 if "pull_request" not in issue:
                     continue
 
-                pull_number = issue["number"]
-                path = urijoin(self.base_url, 'repos', self.owner, self.repository, "pulls", pull_number)
-                r = self.fetch(path)
-                pull = r.text
-                yield pull
+                yield self.pull(issue["number"])
+
+    def pull(self, pull_number):
+        """Get a pull request"""
+
+        path = urijoin(self.base_url, 'repos', self.owner, self.repository, "pulls", pull_number)
+        r = self.fetch(path)
+        pull = r.text
+
+        return pull
 
     def repo(self):
         """Get repository data"""
@@ -770,13 +833,18 @@ class GitHubClient(HttpClient, RateLimitHandler):
         if login in self._users:
             return self._users[login]
 
-        url_user = urijoin(self.base_url, 'users', login)
+        # Avoid requesting the same user from several threads
+        with self._users_locks[login]:
+            if login in self._users:
+                return self._users[login]
 
-        logger.debug("Getting info for %s" % url_user)
+            url_user = urijoin(self.base_url, 'users', login)
 
-        r = self.fetch(url_user)
-        user = r.text
-        self._users[login] = user
+            logger.debug("Getting info for %s" % url_user)
+
+            r = self.fetch(url_user)
+            user = r.text
+            self._users[login] = user
 
         return user
 
@@ -785,19 +853,23 @@ class GitHubClient(HttpClient, RateLimitHandler):
         if login in self._users_orgs:
             return self._users_orgs[login]
 
-        url = urijoin(self.base_url, 'users', login, 'orgs')
-        try:
-            r = self.fetch(url)
-            orgs = r.text
-        except requests.exceptions.HTTPError as error:
-            # 404 not found is wrongly received sometimes
-            if error.response.status_code == 404:
-                logger.error("Can't get github login orgs: %s", error)
-                orgs = '[]'
-            else:
-                raise error
+        with self._users_locks[login]:
+            if login in self._users_orgs:
+                return self._users_orgs[login]
+
+            url = urijoin(self.base_url, 'users', login, 'orgs')
+            try:
+                r = self.fetch(url)
+                orgs = r.text
+            except requests.exceptions.HTTPError as error:
+                # 404 not found is wrongly received sometimes
+                if error.response.status_code == 404:
+                    logger.error("Can't get github login orgs: %s", error)
+                    orgs = '[]'
+                else:
+                    raise error
 
-        self._users_orgs[login] = orgs
+            self._users_orgs[login] = orgs
 
         return orgs
 
@@ -813,15 +885,18 @@ class GitHubClient(HttpClient, RateLimitHandler):
         :returns a response object
         """
         if not self.from_archive:
-            self.sleep_for_rate_limit()
+            # Requests sent from other threads wait while sleeping
+            with self._rate_limit_lock:
+                self.sleep_for_rate_limit()
 
         response = super().fetch(url, payload, headers, method, stream, verify)
 
         if not self.from_archive:
-            if self._need_check_tokens():
-                self._choose_best_api_token()
-            else:
-                self.update_rate_limit(response)
+            with self._rate_limit_lock:
+                if self._need_check_tokens():
+                    self._choose_best_api_token()
+                else:
+                    self.update_rate_limit(response)
 
         return response
 
@@ -864,7 +939,7 @@ class GitHubClient(HttpClient, RateLimitHandler):
         self.session.headers.update({'Authorization': 'token ' + token})
         remaining = 0
         try:
-            headers = super().fetch(rate_url).headers
+            headers = self._fetch_rate_limit(rate_url).headers
             if self.rate_limit_header in headers:
                 remaining = int(headers[self.rate_limit_header])
         except requests.exceptions.HTTPError as error:
@@ -875,15 +950,8 @@ class GitHubClient(HttpClient, RateLimitHandler):
         """Return array of all tokens remaining API points"""
 
         remainings = [0] * self.n_tokens
-        # Turn off archiving when checking rates, because that would cause
-        # archive key conflict (the same URLs giving different responses)
-        arch = self.archive
-        self.archive = None
         for idx, token in enumerate(self.tokens):
-            # Pass flag to skip disabling archiving because this function doies it
             remainings[idx] = self._get_token_rate_limit(token)
-        # Restore archiving to whatever state it was
-        self.archive = arch
         logger.debug("Remaining API points: {}".format(remainings))
         return remainings
 
@@ -938,12 +1006,7 @@ class GitHubClient(HttpClient, RateLimitHandler):
 
         url = urijoin(self.base_url, "rate_limit")
         try:
-            # Turn off archiving when checking rates, because that would cause
-            # archive key conflict (the same URLs giving different responses)
-            arch = self.archive
-            self.archive = None
-            response = super().fetch(url)
-            self.archive = arch
+            response = self._fetch_rate_limit(url)
             self.update_rate_limit(response)
             self.last_rate_limit_checked = self.rate_limit
         except requests.exceptions.HTTPError as error:
@@ -952,6 +1015,17 @@ class GitHubClient(HttpClient, RateLimitHandler):
             else:
                 raise error
 
+    def _fetch_rate_limit(self, url):
+        """Fetch rate limit data skipping the archive.
+
+        Rate limit responses are never archived because that would cause
+        archive key conflicts (the same URLs giving different responses).
+        The archive is not turned off meanwhile, so the requests sent
+        from other threads are still stored. The request does not go
+        through the rate limit checks of `fetch`, which call this method.
+        """
+        return super().fetch(url, archived=False)
+
     def _set_extra_headers(self):
         """Set extra headers for session"""
 
@@ -973,7 +1047,8 @@ class GitHubCommand(BackendCommand):
                                               from_date=True,
                                               to_date=True,
                                               token_auth=False,
-                                              archive=True)
+                                              archive=True,
+                                              users_cache=True)
         # GitHub options
         group = parser.parser.add_argument_group('GitHub arguments')
         group.add_argument('--enterprise-url', dest='base_url',
@@ -1000,6 +1075,12 @@ class GitHubCommand(BackendCommand):
         group.add_argument('--sleep-time', dest='sleep_time',
                            default=DEFAULT_SLEEP_TIME, type=int,
                            help="sleeping time between API call retries")
+        group.add_argument('--workers', dest='workers',
+                           default=1, type=int,
+                           help="number of threads used to fetch the data of the items")
+        group.add_argument('--read-ahead', dest='read_ahead',
+                           default=0, type=int,
+                           help="number of pages requested in advance")
 
         # Positional arguments
         parser.parser.add_argument('owner',
@@ -37,7 +37,7 @@ from ...backend import (Backend,
                         BackendCommandArgumentParser,
                         OriginUniqueField,
                         DEFAULT_SEARCH_FIELD)
-from ...client import HttpClient, RateLimitHandler
+from ...client import HttpClient, RateLimitHandler, read_ahead
 from ...utils import DEFAULT_DATETIME
 from ...errors import BackendError
 
@@ -89,8 +89,11 @@ class GitLab(Backend):
     :param blacklist_ids: ids of items that must not be retrieved
     :param extra_retry_after_status: retry HTTP requests after status (default 500 and 502). These status complete
         the ones (413, 429, 503) defined in the HttpClient class
+    :param read_ahead: number of pages of issues or merge requests
+        requested in advance while the current one is processed;
+        disabled when it is 0
     """
-    version = '0.11.0'
+    version = '0.12.0'
 
     CATEGORIES = [CATEGORY_ISSUE, CATEGORY_MERGE_REQUEST]
     ORIGIN_UNIQUE_FIELD = OriginUniqueField(name='iid', type=int)
@@ -99,7 +102,7 @@ class GitLab(Backend):
                  is_oauth_token=False, base_url=None, tag=None, archive=None,
                  sleep_for_rate=False, min_rate_to_sleep=MIN_RATE_LIMIT,
                  max_retries=MAX_RETRIES, sleep_time=DEFAULT_SLEEP_TIME,
-                 blacklist_ids=None, extra_retry_after_status=None):
+                 blacklist_ids=None, extra_retry_after_status=None, read_ahead=0):
         origin = base_url if base_url else GITLAB_URL
         origin = urijoin(origin, owner, repository)
 
@@ -120,6 +123,7 @@ class GitLab(Backend):
         self.client = None
         self.extra_retry_after_status = DEFAULT_RETRY_AFTER_STATUS_CODES if not extra_retry_after_status \
             else extra_retry_after_status
+        self.read_ahead = read_ahead
         self._users = {}  # internal users cache
 
     def search_fields(self, item):
@@ -254,7 +258,7 @@ class GitLab(Backend):
     def __fetch_issues(self, from_date):
         """Fetch the issues"""
 
-        issues_groups = self.client.issues(from_date=from_date)
+        issues_groups = read_ahead(self.client.issues(from_date=from_date), self.read_ahead)
 
         for raw_issues in issues_groups:
             issues = json.loads(raw_issues)
@@ -311,7 +315,7 @@ class GitLab(Backend):
                 fetch_completed = True
 
     def __fetch_merge_requests_data(self, from_date):
-        merges_groups = self.client.merges(from_date=from_date)
+        merges_groups = read_ahead(self.client.merges(from_date=from_date), self.read_ahead)
 
         for raw_merges in merges_groups:
             merges = json.loads(raw_merges)
@@ -760,6 +764,9 @@ class GitLabCommand(BackendCommand):
         group.add_argument('--extra-retry-status', dest='extra_retry_after_status',
                            default=DEFAULT_RETRY_AFTER_STATUS_CODES, nargs="+", type=int,
                            help="retry HTTP requests after status")
+        group.add_argument('--read-ahead', dest='read_ahead',
+                           default=0, type=int,
+                           help="number of pages requested in advance")
 
         # Positional arguments
         parser.parser.add_argument('owner',
@@ -65,7 +65,7 @@ class Groupsio(MBox):
     :param tag: label used to mark the data
     :param archive: archive to store/retrieve items
     """
-    version = '0.3.0'
+    version = '0.4.0'
 
     CATEGORIES = [CATEGORY_MESSAGE]
 
@@ -95,7 +95,7 @@ class Groupsio(MBox):
 
         return search_fields
 
-    def fetch(self, category=CATEGORY_MESSAGE, from_date=DEFAULT_DATETIME):
+    def fetch(self, category=CATEGORY_MESSAGE, from_date=DEFAULT_DATETIME, workers=1):
         """Fetch the messages from a Groups.io group.
 
         The method fetches the mbox files from a remote Groups.io group
@@ -103,10 +103,11 @@ class Groupsio(MBox):
 
         :param category: the category of items to fetch
         :param from_date: obtain messages since this date
+        :param workers: number of processes used to parse the mboxes
 
         :returns: a generator of messages
         """
-        items = super().fetch(category, from_date)
+        items = super().fetch(category, from_date, workers=workers)
 
         return items
 
@@ -119,6 +120,7 @@ class Groupsio(MBox):
         :returns: a generator of items
         """
         from_date = kwargs['from_date']
+        workers = kwargs['workers']
 
         logger.info("Looking for messages from '%s' since %s",
                     self.uri, str(from_date))
@@ -127,7 +129,7 @@ class Groupsio(MBox):
                                       self.email, self.password, self.verify)
         mailing_list.fetch()
 
-        messages = self._fetch_and_parse_messages(mailing_list, from_date)
+        messages = self._fetch_and_parse_messages(mailing_list, from_date, workers=workers)
 
         for message in messages:
             yield message
@@ -320,6 +322,9 @@ class GroupsioCommand(BackendCommand):
 
         # Optional arguments
         group = parser.parser.add_argument_group('Groupsio arguments')
+        group.add_argument('--workers', dest='workers',
+                           default=1, type=int,
+                           help="number of processes used to parse the mboxes")
         group.add_argument('--mboxes-path', dest='mboxes_path',
                            help="Path where mbox files will be stored")
         group.add_argument('--no-verify', dest='verify',
@@ -53,7 +53,7 @@ class HyperKitty(MBox):
     :param tag: label used to mark the data
     :param archive: archive to store/retrieve items
     """
-    version = '0.5.0'
+    version = '0.6.0'
 
     CATEGORIES = [CATEGORY_MESSAGE]
 
@@ -61,7 +61,7 @@ class HyperKitty(MBox):
         super().__init__(url, dirpath, tag=tag, archive=archive)
         self.url = url
 
-    def fetch(self, category=CATEGORY_MESSAGE, from_date=DEFAULT_DATETIME):
+    def fetch(self, category=CATEGORY_MESSAGE, from_date=DEFAULT_DATETIME, workers=1):
         """Fetch the messages from the HyperKitty mailing list archiver.
 
         The method fetches the mbox files from a remote HyperKitty
@@ -75,10 +75,11 @@ class HyperKitty(MBox):
 
         :param category: the category of items to fetch
         :param from_date: obtain messages since this date
+        :param workers: number of processes used to parse the mboxes
 
         :returns: a generator of messages
         """
-        items = super().fetch(category, from_date)
+        items = super().fetch(category, from_date, workers=workers)
 
         return items
 
@@ -91,6 +92,7 @@ class HyperKitty(MBox):
         :returns: a generator of items
         """
         from_date = kwargs['from_date']
+        workers = kwargs['workers']
 
         logger.info("Looking for messages from '%s' since %s",
                     self.url, str(from_date))
@@ -98,7 +100,7 @@ class HyperKitty(MBox):
         mailing_list = HyperKittyList(self.url, self.dirpath)
         mailing_list.fetch(from_date=from_date)
 
-        messages = self._fetch_and_parse_messages(mailing_list, from_date)
+        messages = self._fetch_and_parse_messages(mailing_list, from_date, workers=workers)
 
         for message in messages:
             yield message
@@ -272,6 +274,9 @@ class HyperKittyCommand(BackendCommand):
 
         # Optional arguments
         group = parser.parser.add_argument_group('HyperKitty arguments')
+        group.add_argument('--workers', dest='workers',
+                           default=1, type=int,
+                           help="number of processes used to parse the mboxes")
         group.add_argument('--mboxes-path', dest='mboxes_path',
                            help="Path where mbox files will be stored")
 
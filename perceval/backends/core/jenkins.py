@@ -58,7 +58,7 @@ class Jenkins(Backend):
     :param archive: collect builds already retrieved from an archive
     :param blacklist_ids: exclude the jobs ID of this list while fetching
     """
-    version = '0.14.1'
+    version = '0.15.0'
 
     CATEGORIES = [CATEGORY_BUILD]
     EXTRA_SEARCH_FIELDS = {
@@ -124,28 +124,13 @@ class Jenkins(Backend):
             try:
                 raw_builds = self.client.get_builds(job['name'])
             except requests.exceptions.HTTPError as e:
-                if e.response.status_code == 500:
-                    logger.warning(e)
-                    logger.warning("Unable to fetch builds from job %s; skipping",
-                                   job['url'])
-                    self.summary.skipped += 1
-                    continue
-                else:
-                    raise e
-
-            if not raw_builds:
-                self.summary.skipped += 1
+                self._skip_job(job, e)
                 continue
 
-            try:
-                builds = json.loads(raw_builds)
-            except ValueError:
-                logger.warning("Unable to parse builds from job %s; skipping",
-                               job['url'])
-                self.summary.skipped += 1
+            builds = self._parse_job_builds(job, raw_builds)
+            if builds is None:
                 continue
 
-            builds = builds['builds']
             for build in builds:
                 yield build
                 nbuilds += 1
@@ -155,6 +140,21 @@ class Jenkins(Backend):
         logger.info("Total number of jobs: %i/%i", njobs, len(jobs))
         logger.info("Total number of builds: %i", nbuilds)
 
+    def fetch_items_async(self, category, **kwargs):
+        """Fetch the contents asynchronously.
+
+        The builds of several jobs are requested at the same time.
+        See `perceval.aio.jenkins.fetch_builds`.
+
+        :param category: the category of items to fetch
+        :param kwargs: backend arguments
+
+        :returns: an asynchronous generator of items
+        """
+        from ...aio.jenkins import fetch_builds
+
+        return fetch_builds(self)
+
     @classmethod
     def has_archiving(cls):
         """Returns whether it supports archiving items on the fetch process.
@@ -206,6 +206,46 @@ class Jenkins(Backend):
                              self.blacklist_ids, self.detail_depth, self.sleep_time,
                              archive=self.archive, from_archive=from_archive)
 
+    def _init_async_client(self, from_archive=False):
+        """Init asynchronous client"""
+
+        from ...aio.jenkins import JenkinsAsyncClient
+
+        return JenkinsAsyncClient(self.url, self.user, self.api_token,
+                                  self.blacklist_ids, self.detail_depth, self.sleep_time,
+                                  archive=self.archive, from_archive=from_archive)
+
+    def _skip_job(self, job, error):
+        """Skip a job whose builds could not be fetched.
+
+        Only server errors (500) are skipped; any other
+        HTTP error is raised again.
+        """
+        if error.response.status_code != 500:
+            raise error
+
+        logger.warning(error)
+        logger.warning("Unable to fetch builds from job %s; skipping",
+                       job['url'])
+        self.summary.skipped += 1
+
+    def _parse_job_builds(self, job, raw_builds):
+        """Parse the builds of a job; returns `None` when the job is skipped"""
+
+        if not raw_builds:
+            self.summary.skipped += 1
+            return None
+
+        try:
+            builds = json.loads(raw_builds)
+        except ValueError:
+            logger.warning("Unable to parse builds from job %s; skipping",
+                           job['url'])
+            self.summary.skipped += 1
+            return None
+
+        return builds['builds']
+
 
 class JenkinsClient(HttpClient):
     """Jenkins API client.
@@ -33,7 +33,7 @@ from grimoirelab_toolkit.uris import urijoin
 from ...backend import (Backend,
                         BackendCommand,
                         BackendCommandArgumentParser)
-from ...client import HttpClient
+from ...client import HttpClient, read_ahead
 from ...utils import DEFAULT_DATETIME
 
 CATEGORY_ISSUE = "issue"
@@ -94,8 +94,10 @@ class Jira(Backend):
     :param max_results: max number of results per query
     :param tag: label used to mark the data
     :param archive: archive to store/retrieve items
+    :param read_ahead: number of pages of issues requested in advance
+        while the current one is processed; disabled when it is 0
     """
-    version = '0.13.0'
+    version = '0.14.0'
 
     CATEGORIES = [CATEGORY_ISSUE]
     EXTRA_SEARCH_FIELDS = {
@@ -109,7 +111,7 @@ class Jira(Backend):
                  user=None, password=None,
                  verify=True, cert=None,
                  max_results=MAX_RESULTS, tag=None,
-                 archive=None):
+                 archive=None, read_ahead=0):
         origin = url
 
         super().__init__(origin, tag=tag, archive=archive)
@@ -120,6 +122,7 @@ class Jira(Backend):
         self.verify = verify
         self.cert = cert
         self.max_results = max_results
+        self.read_ahead = read_ahead
         self.client = None
 
     def fetch(self, category=CATEGORY_ISSUE, from_date=DEFAULT_DATETIME):
@@ -156,7 +159,7 @@ class Jira(Backend):
         logger.info("Looking for issues at site '%s', in project '%s' and updated from '%s'",
                     self.url, self.project, str(from_date))
 
-        whole_pages = self.client.get_issues(from_date)
+        whole_pages = read_ahead(self.client.get_issues(from_date), self.read_ahead)
 
         fields = json.loads(self.client.get_fields())
         custom_fields = filter_custom_fields(fields)
@@ -433,6 +436,9 @@ class JiraCommand(BackendCommand):
         group.add_argument('--max-results', dest='max_results',
                            type=int, default=MAX_RESULTS,
                            help="Maximum number of results requested in the same query")
+        group.add_argument('--read-ahead', dest='read_ahead',
+                           type=int, default=0,
+                           help="Number of pages requested in advance")
 
         # Required arguments
         parser.parser.add_argument('url',
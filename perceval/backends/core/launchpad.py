@@ -31,7 +31,7 @@ from ...backend import (Backend,
                         BackendCommand,
                         BackendCommandArgumentParser,
                         DEFAULT_SEARCH_FIELD)
-from ...client import HttpClient
+from ...client import HttpClient, read_ahead
 from ...utils import DEFAULT_DATETIME
 
 CATEGORY_ISSUE = "issue"
@@ -58,14 +58,16 @@ class Launchpad(Backend):
         of connection problems
     :param tag: label used to mark the data
     :param archive: archive to store/retrieve items
+    :param read_ahead: number of pages of issues requested in advance
+        while the current one is processed; disabled when it is 0
     """
-    version = '0.7.0'
+    version = '0.8.0'
 
     CATEGORIES = [CATEGORY_ISSUE]
 
     def __init__(self, distribution, package=None,
                  items_per_page=ITEMS_PER_PAGE, sleep_time=SLEEP_TIME,
-                 tag=None, archive=None):
+                 tag=None, archive=None, read_ahead=0):
 
         origin = urijoin(LAUNCHPAD_URL, distribution)
 
@@ -74,6 +76,7 @@ class Launchpad(Backend):
         self.package = package
         self.items_per_page = items_per_page
         self.sleep_time = sleep_time
+        self.read_ahead = read_ahead
 
         self.client = None
         self._users = {}  # internal users cache
@@ -212,7 +215,7 @@ class Launchpad(Backend):
     def _fetch_issues(self, from_date):
         """Fetch the issues from a project (distribution/package)"""
 
-        issues_groups = self.client.issues(start=from_date)
+        issues_groups = read_ahead(self.client.issues(start=from_date), self.read_ahead)
 
         for raw_issues in issues_groups:
 
@@ -486,6 +489,9 @@ class LaunchpadCommand(BackendCommand):
                            help="Items per page")
         group.add_argument('--sleep-time', dest='sleep_time',
                            help="Sleep time in case of connection lost")
+        group.add_argument('--read-ahead', dest='read_ahead',
+                           default=0, type=int,
+                           help="Pages requested in advance")
 
         # Required arguments
         parser.parser.add_argument('distribution',
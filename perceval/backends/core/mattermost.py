@@ -28,7 +28,8 @@ from grimoirelab_toolkit.uris import urijoin
 from ...backend import (Backend,
                         BackendCommand,
                         BackendCommandArgumentParser)
-from ...client import HttpClient, RateLimitHandler
+from ...cache import init_users_cache
+from ...client import HttpClient, RateLimitHandler, read_ahead
 from ...utils import DEFAULT_DATETIME
 
 
@@ -68,8 +69,12 @@ class Mattermost(Backend):
          it will be reset
     :param sleep_time: time (in seconds) to sleep in case
         of connection problems
+    :param users_cache: persistent cache (`UsersCache`) where the data
+        of the users is kept between executions
+    :param read_ahead: number of pages of posts requested in advance
+        while the current one is processed; disabled when it is 0
     """
-    version = '0.3.0'
+    version = '0.5.0'
 
     CATEGORIES = [CATEGORY_POST]
     EXTRA_SEARCH_FIELDS = {
@@ -80,7 +85,7 @@ class Mattermost(Backend):
     def __init__(self, url, channel, api_token, max_items=MAX_ITEMS,
                  tag=None, archive=None,
                  sleep_for_rate=False, min_rate_to_sleep=MIN_RATE_LIMIT,
-                 sleep_time=DEFAULT_SLEEP_TIME):
+                 sleep_time=DEFAULT_SLEEP_TIME, users_cache=None, read_ahead=0):
         origin = urijoin(url, channel)
 
         super().__init__(origin, tag=tag, archive=archive)
@@ -91,6 +96,8 @@ class Mattermost(Backend):
         self.sleep_for_rate = sleep_for_rate
         self.min_rate_to_sleep = min_rate_to_sleep
         self.sleep_time = sleep_time
+        self.users_cache = users_cache
+        self.read_ahead = read_ahead
         self.client = None
 
         self._users = {}
@@ -126,11 +133,12 @@ class Mattermost(Backend):
         """
         from_date = kwargs['from_date']
 
+        self._users = init_users_cache(self.users_cache, self, self.url)
+
         logger.info("Fetching messages of '%s' - '%s' channel from %s",
                     self.url, self.channel, str(from_date))
 
         fetching = True
-        page = 0
         nposts = 0
 
         channel_info_raw = self.client.channel(self.channel)
@@ -139,12 +147,10 @@ class Mattermost(Backend):
         # Convert timestamp to integer for comparing
         since = int(from_date.timestamp() * 1000)
 
-        while fetching:
-            raw_posts = self.client.posts(self.channel, page=page)
-
-            posts_before = nposts
+        pages = read_ahead(self._fetch_posts(), self.read_ahead)
 
-            for post in self._parse_posts(raw_posts):
+        for posts in pages:
+            for post in posts:
                 if post['update_at'] < since:
                     fetching = False
                     break
@@ -158,12 +164,8 @@ class Mattermost(Backend):
                 yield post
                 nposts += 1
 
-            if fetching:
-                # If no new posts were fetched; stop the process
-                if posts_before == nposts:
-                    fetching = False
-                else:
-                    page += 1
+            if not fetching:
+                break
 
         logger.info("Fetch process completed: %s posts fetched", nposts)
 
@@ -238,6 +240,24 @@ class Mattermost(Backend):
                                 sleep_time=self.sleep_time,
                                 archive=self.archive, from_archive=from_archive)
 
+    def _fetch_posts(self):
+        """Fetch the posts of the channel, page by page.
+
+        Pages are requested until an empty one is found.
+        """
+        page = 0
+
+        while True:
+            raw_posts = self.client.posts(self.channel, page=page)
+            posts = list(self._parse_posts(raw_posts))
+
+            # If no new posts were fetched; stop the process
+            if not posts:
+                break
+
+            yield posts
+            page += 1
+
     def _parse_posts(self, raw_posts):
         """Parse posts and returns in order."""
 
@@ -413,7 +433,8 @@ class MattermostCommand(BackendCommand):
         parser = BackendCommandArgumentParser(cls.BACKEND,
                                               from_date=True,
                                               token_auth=True,
-                                              archive=True)
+                                              archive=True,
+                                              users_cache=True)
 
         # Mattermost options
         group = parser.parser.add_argument_group('Mattermost arguments')
@@ -429,6 +450,9 @@ class MattermostCommand(BackendCommand):
         group.add_argument('--sleep-time', dest='sleep_time',
                            default=DEFAULT_SLEEP_TIME, type=int,
                            help="minimun sleeping time to avoid too many request exception")
+        group.add_argument('--read-ahead', dest='read_ahead',
+                           default=0, type=int,
+                           help="number of pages requested in advance")
 
         # Required arguments
         parser.parser.add_argument('url',
@@ -22,13 +22,20 @@
 # Note: some ot this code was taken from the MailingListStats project
 #
 
+import concurrent.futures
+import contextlib
+import email.parser
+import functools
+import itertools
 import logging
 import mailbox
+import mmap
 import os
-import tempfile
+import re
 
 import gzip
 import bz2
+import lzma
 import zipfile
 
 from grimoirelab_toolkit.datetime import (InvalidDateError,
@@ -38,12 +45,22 @@ from grimoirelab_toolkit.datetime import (InvalidDateError,
 from ...backend import (Backend,
                         BackendCommand,
                         BackendCommandArgumentParser)
+from ...cache import MBoxIndex
+from ...errors import CacheError
 from ...utils import (DEFAULT_DATETIME,
+                      bounded_map,
                       check_compressed_file_type,
-                      message_to_dict)
+                      message_headers_to_dict,
+                      message_to_dict,
+                      partial_result_items)
 
 CATEGORY_MESSAGE = "message"
 
+MESSAGES_INDEX_SUFFIX = '.index.db'
+
+# Same pattern used by `email.feedparser` to find header lines
+HEADER_LINE_PATTERN = re.compile(rb'(From |[\041-\071\073-\176]*:|[\t ])')
+
 logger = logging.getLogger(__name__)
 
 
@@ -61,7 +78,7 @@ class MBox(Backend):
     :param tag: label used to mark the data
     :param archive: archive to store/retrieve items
     """
-    version = '0.12.0'
+    version = '0.16.0'
 
     CATEGORIES = [CATEGORY_MESSAGE]
 
@@ -75,21 +92,40 @@ class MBox(Backend):
         self.uri = uri
         self.dirpath = dirpath
 
-    def fetch(self, category=CATEGORY_MESSAGE, from_date=DEFAULT_DATETIME):
+    def fetch(self, category=CATEGORY_MESSAGE, from_date=DEFAULT_DATETIME,
+              messages_index=False, workers=1):
         """Fetch the messages from a set of mbox files.
 
         The method retrieves, from mbox files, the messages stored in
         these containers.
 
+        When `messages_index` is set, the position, the identifier and
+        the date of the messages found on uncompressed mbox files are
+        stored in an index next to the mboxes path (with the suffix
+        `.index.db`). On later executions, only the messages sent since
+        `from_date` are read from the files already indexed, and the
+        files which grew are only scanned from their last message.
+        Files which changed in any other way are indexed again.
+
+        When `workers` is greater than one, the mbox files are parsed
+        on a pool of processes. Messages are returned in the same
+        order, one mbox file after another.
+
         :param category: the category of items to fetch
         :param from_date: obtain messages since this date
+        :param messages_index: use a persistent index of the messages
+        :param workers: number of processes used to parse the mboxes
 
         :returns: a generator of messages
         """
         if not from_date:
             from_date = DEFAULT_DATETIME
 
-        kwargs = {'from_date': from_date}
+        kwargs = {
+            'from_date': from_date,
+            'messages_index': messages_index,
+            'workers': workers
+        }
         items = super().fetch(category, **kwargs)
 
         return items
@@ -103,13 +139,17 @@ class MBox(Backend):
         :returns: a generator of items
         """
         from_date = kwargs['from_date']
+        messages_index = kwargs['messages_index']
+        workers = kwargs['workers']
 
         logger.info("Looking for messages from '%s' on '%s' since %s",
                     self.uri, self.dirpath, str(from_date))
 
         mailing_list = MailingList(self.uri, self.dirpath)
 
-        messages = self._fetch_and_parse_messages(mailing_list, from_date)
+        messages = self._fetch_and_parse_messages(mailing_list, from_date,
+                                                  messages_index=messages_index,
+                                                  workers=workers)
 
         for message in messages:
             yield message
@@ -176,44 +216,56 @@ class MBox(Backend):
         :returns : generator of messages; each message is stored in a
             dictionary of type `requests.structures.CaseInsensitiveDict`
         """
-        mbox = _MBox(filepath, create=False)
+        mbox = MBoxArchive(filepath)
+
+        for message in MBox._parse_mbox_archive(mbox):
+            yield message
+
+    @staticmethod
+    def _parse_mbox_archive(mbox):
+        """Parse the messages of a `MBoxArchive` object."""
 
-        for msg in mbox:
+        for msg in mbox.messages():
             message = message_to_dict(msg)
             yield message
 
     def _init_client(self, from_archive=False):
         pass
 
-    def _fetch_and_parse_messages(self, mailing_list, from_date):
+    def _fetch_and_parse_messages(self, mailing_list, from_date, messages_index=False,
+                                  workers=1):
         """Fetch and parse the messages from a mailing list"""
 
         from_date = datetime_to_utc(from_date)
 
         nmsgs, imsgs, tmsgs = (0, 0, 0)
 
-        for mbox in mailing_list.mboxes:
-            tmp_path = None
+        index = self._open_messages_index(mailing_list) if messages_index else None
+        mboxes = self._parse_mbox_archives(mailing_list.mboxes, from_date,
+                                           index=index, workers=workers)
 
+        for mbox, messages in mboxes:
             try:
-                tmp_path = self._copy_mbox(mbox)
-
-                for message in self.parse_mbox(tmp_path):
+                for fields, message in messages:
                     tmsgs += 1
 
-                    if not self._validate_message(message):
+                    if not self._validate_message(fields):
                         imsgs += 1
                         continue
 
                     # Ignore those messages sent before the given date
-                    dt = str_to_datetime(message[MBox.DATE_FIELD])
+                    dt = str_to_datetime(fields[MBox.DATE_FIELD])
 
                     if dt < from_date:
                         logger.debug("Message %s sent before %s; skipped",
-                                     message['unixfrom'], str(from_date))
+                                     fields['unixfrom'], str(from_date))
                         tmsgs -= 1
                         continue
 
+                    # Only the messages returned are fully parsed
+                    if isinstance(message, _RawMessage):
+                        message = message.to_dict()
+
                     # Convert 'CaseInsensitiveDict' to dict
                     message = self._casedict_to_dict(message)
 
@@ -223,27 +275,153 @@ class MBox(Backend):
                     yield message
             except (OSError, EOFError) as e:
                 logger.warning("Ignoring %s mbox due to: %s", mbox.filepath, str(e))
-            except Exception as e:
-                if tmp_path and os.path.exists(tmp_path):
-                    os.remove(tmp_path)
-                raise e
-            finally:
-                if tmp_path and os.path.exists(tmp_path):
-                    os.remove(tmp_path)
 
         logger.info("Done. %s/%s messages fetched; %s ignored",
                     nmsgs, tmsgs, imsgs)
 
-    def _copy_mbox(self, mbox):
-        """Copy the contents of a mbox to a temporary file"""
+    def _parse_mbox_archives(self, mboxes, from_date, index=None, workers=1):
+        """Parse a list of mbox archives, in order.
+
+        It returns tuples with each archive and an iterator of its
+        messages. Each message is returned together with the fields
+        needed to validate it, so the rest of the message is only
+        parsed when it is going to be returned by the backend.
+
+        When `workers` is greater than one, the archives are parsed
+        in a pool of processes while the messages of the previous
+        ones are returned. Archives read using the index are always
+        parsed in this process.
+        """
+        def is_indexed(mbox):
+            return index and not mbox.is_compressed()
+
+        def parse_mbox_archive(mbox):
+            if is_indexed(mbox):
+                return self._parse_indexed_mbox_archive(mbox, index, from_date)
+            else:
+                return self._read_mbox_archive(mbox)
+
+        if workers <= 1:
+            for mbox in mboxes:
+                yield mbox, parse_mbox_archive(mbox)
+            return
+
+        # Archives read using the index are not sent to the workers
+        archives, jobs = itertools.tee(mboxes)
+        jobs = (None if is_indexed(mbox) else mbox for mbox in jobs)
+        parse_job = functools.partial(_parse_mbox_archive_messages, from_date=from_date)
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            results = bounded_map(executor, parse_job, jobs, 2 * workers)
+
+            try:
+                for mbox, result in zip(archives, results):
+                    if result is None:
+                        yield mbox, parse_mbox_archive(mbox)
+                    else:
+                        yield mbox, partial_result_items(result)
+            finally:
+                results.close()
+
+    @classmethod
+    def _read_mbox_archive(cls, mbox):
+        """Read the raw messages of an archive and their fields"""
+
+        for raw in mbox.raw_messages():
+            yield cls._message_fields(raw), raw
+
+    @classmethod
+    def _message_fields(cls, raw):
+        """Decode the headers needed to validate a raw message"""
+
+        return raw.headers([cls.MESSAGE_ID_FIELD, cls.DATE_FIELD])
+
+    def _open_messages_index(self, mailing_list):
+        """Open the index of the messages of a mailing list"""
+
+        index_path = mailing_list.dirpath.rstrip(os.sep) + MESSAGES_INDEX_SUFFIX
+
+        try:
+            return MBoxIndex(index_path)
+        except CacheError as e:
+            logger.warning("Messages index not available; cause: %s", str(e))
+            return None
+
+    def _parse_indexed_mbox_archive(self, mbox, index, from_date):
+        """Parse the messages of a plain mbox using an index.
+
+        The messages already indexed are only read when they were
+        sent since `from_date`. The rest of the file, if any, is
+        scanned and its messages are added to the index.
+        """
+        stat = os.stat(mbox.filepath)
+        size, mtime = stat.st_size, stat.st_mtime_ns
+
+        try:
+            state = index.mbox(mbox.filepath)
+        except CacheError as e:
+            logger.warning("Messages index not available for %s; cause: %s",
+                           mbox.filepath, str(e))
+            yield from self._read_mbox_archive(mbox)
+            return
+
+        if state and state[0] == size and state[1] == mtime:
+            scan_offset = None
+        elif state and state[0] < size and mbox.is_message_start(state[2]):
+            scan_offset = state[2]
+        else:
+            state, scan_offset = None, 0
+
+        if state:
+            indexed = index.messages(mbox.filepath, from_date=from_date.timestamp(),
+                                     to_offset=scan_offset)
+            positions = [(offset, offset + length) for offset, length, _, _ in indexed]
+
+            logger.debug("%s messages of %s read from the index",
+                         len(positions), mbox.filepath)
+
+            for raw in mbox.read(positions):
+                yield self._message_fields(raw), raw
 
-        tmp_path = tempfile.mktemp(prefix='perceval_')
+        if scan_offset is None:
+            return
 
-        with mbox.container as f_in:
-            with open(tmp_path, mode='wb') as f_out:
-                for l in f_in:
-                    f_out.write(l)
-        return tmp_path
+        entries = []
+        last_offset = scan_offset
+
+        for start, stop, raw in mbox.scan(offset=scan_offset):
+            fields = self._message_fields(raw)
+            last_offset = start
+
+            entry = self._message_id_and_date(fields)
+            if entry:
+                entries.append((start, stop - start) + entry)
+
+            yield fields, raw
+
+        try:
+            index.update(mbox.filepath, size, mtime, last_offset, entries,
+                         from_offset=scan_offset)
+        except CacheError as e:
+            logger.warning("Messages index of %s not updated; cause: %s",
+                           mbox.filepath, str(e))
+
+    @classmethod
+    def _message_id_and_date(cls, message):
+        """Get the identifier and the date of a valid message"""
+
+        message_id = message.get(cls.MESSAGE_ID_FIELD, None)
+        date = message.get(cls.DATE_FIELD, None)
+
+        if not message_id or not date:
+            return None
+
+        try:
+            dt = str_to_datetime(date)
+        except InvalidDateError:
+            return None
+
+        return message_id, dt.timestamp()
 
     def _validate_message(self, message):
         """Check if the given message has the mandatory fields"""
@@ -296,32 +474,6 @@ class MBox(Backend):
         return msg
 
 
-class _MBox(mailbox.mbox):
-    """Wrapper of `mailbox.mbox` to catch unhandled errors"""
-
-    def get_message(self, key):
-        """Return a Message representation or raise a KeyError."""
-
-        start, stop = self._lookup(key)
-        self._file.seek(start)
-        from_line = self._file.readline().replace(mailbox.linesep, b'')
-        string = self._file.read(stop - self._file.tell())
-        msg = self._message_factory(string.replace(mailbox.linesep, b'\n'))
-
-        try:
-            msg.set_from(from_line[5:].decode('ascii'))
-            return msg
-        except UnicodeDecodeError:
-            pass
-
-        try:
-            msg.set_from(from_line[5:].decode('utf-8'))
-        except UnicodeDecodeError:
-            msg.set_from(from_line[5:].decode('iso-8859-1'))
-
-        return msg
-
-
 class MBoxCommand(BackendCommand):
     """Class to run MBox backend from the command line."""
 
@@ -334,6 +486,15 @@ class MBoxCommand(BackendCommand):
         parser = BackendCommandArgumentParser(cls.BACKEND,
                                               from_date=True)
 
+        # MBox options
+        group = parser.parser.add_argument_group('MBox arguments')
+        group.add_argument('--messages-index', dest='messages_index',
+                           action='store_true',
+                           help="Use a persistent index of the messages to read only the new ones")
+        group.add_argument('--workers', dest='workers',
+                           default=1, type=int,
+                           help="number of processes used to parse the mboxes")
+
         # Required arguments
         parser.parser.add_argument('uri',
                                    help="URI of the mboxes, usually the URL to their mailing list")
@@ -347,7 +508,7 @@ class MBoxArchive(object):
     """Class to access a mbox archive.
 
     MBOX archives can be stored into plain or compressed files
-    (gzip, bz2 or zip).
+    (gzip, bz2, xz or zip).
 
     :param filepath: path to the mbox file
     """
@@ -368,6 +529,8 @@ class MBoxArchive(object):
             return bz2.open(self.filepath, mode='rb')
         elif self.compressed_type == 'gz':
             return gzip.open(self.filepath, mode='rb')
+        elif self.compressed_type == 'xz':
+            return lzma.open(self.filepath, mode='rb')
         elif self.compressed_type == "zip":
             _zip = zipfile.ZipFile(self.filepath)
             if len(_zip.infolist()) > 1:
@@ -381,6 +544,307 @@ class MBoxArchive(object):
     def is_compressed(self):
         return self._compressed is not None
 
+    def messages(self):
+        """Read the messages stored in the archive.
+
+        Messages are split on the lines starting with `From `, in
+        the same way `mailbox.mbox` does. Plain files are memory
+        mapped and scanned in place, while compressed files are
+        read line by line while they are decompressed, so no
+        temporary copies of the archive are made.
+
+        :returns: a generator of `mailbox.mboxMessage` objects
+        """
+        for raw in self.raw_messages():
+            yield raw.message()
+
+    def raw_messages(self):
+        """Read the messages stored in the archive without parsing them.
+
+        Each message is returned as raw data which can be parsed
+        later, either completely or only its headers.
+
+        :returns: a generator of raw messages
+        """
+        if self.is_compressed():
+            with self.container as f:
+                for from_line, data in _split_mbox_stream(f):
+                    yield _RawMessage(from_line, data)
+        else:
+            for _, _, raw in self.scan():
+                yield raw
+
+    def scan(self, offset=0):
+        """Read the messages of a plain archive from a position.
+
+        :param offset: byte offset where the scan starts; it should
+            be the start of a message
+
+        :returns: a generator of tuples with the start and stop
+            offsets and the raw data of each message
+        """
+        with self._mmap() as buf:
+            if buf is None:
+                return
+
+            for start, stop in _split_mbox_buffer(buf, offset=offset):
+                yield start, stop, _read_raw_message(buf, start, stop)
+
+    def read(self, positions):
+        """Read the messages of a plain archive stored at some positions.
+
+        :param positions: list of tuples with the start and stop
+            offsets of the messages
+
+        :returns: a generator of raw messages
+        """
+        if not positions:
+            return
+
+        with self._mmap() as buf:
+            for start, stop in positions:
+                yield _read_raw_message(buf, start, stop)
+
+    def is_message_start(self, offset):
+        """Check whether a message of a plain archive starts on an offset."""
+
+        with open(self.filepath, mode='rb') as f:
+            if offset > 0:
+                f.seek(offset - len(mailbox.linesep))
+                if f.read(len(mailbox.linesep)) != mailbox.linesep:
+                    return False
+            return f.read(5) == b'From '
+
+    @contextlib.contextmanager
+    def _mmap(self):
+        with open(self.filepath, mode='rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                yield None
+                return
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                yield buf
+
+
+class _RawMessage:
+    """Raw data of a message stored in a mbox archive.
+
+    Messages are parsed on demand. Their headers can be decoded
+    without parsing the body, which is much cheaper for those
+    messages that are going to be discarded.
+
+    :param from_line: `From ` line of the message, without its
+        line separator
+    :param data: raw data of the message
+    """
+    __slots__ = ['from_line', 'data']
+
+    def __init__(self, from_line, data):
+        self.from_line = from_line
+        self.data = data
+
+    def headers(self, names=None):
+        """Decode the headers of the message.
+
+        :param names: list of names of the headers to decode;
+            all the headers are decoded when it is `None`
+
+        :returns: dictionary of type `requests.structures.CaseInsensitiveDict`
+        """
+        sep = mailbox.linesep
+
+        # Headers end on the first empty line
+        eoh = self.data.find(sep + sep)
+        header = self.data if eoh < 0 else self.data[:eoh + len(sep)]
+        header = header.replace(sep, b'\n')
+
+        if names is not None:
+            header = _select_header_lines(header, names)
+
+        parser = email.parser.BytesHeaderParser(_class=mailbox.mboxMessage)
+        msg = parser.parsebytes(header)
+        msg.set_from(_decode_from_line(self.from_line))
+
+        return message_headers_to_dict(msg, headers=names)
+
+    def message(self):
+        """Parse the whole message.
+
+        :returns: a `mailbox.mboxMessage` object
+        """
+        return _create_mbox_message(self.from_line, self.data)
+
+    def to_dict(self):
+        """Parse the whole message and convert it into a dictionary.
+
+        :returns: dictionary of type `requests.structures.CaseInsensitiveDict`
+        """
+        return message_to_dict(self.message())
+
+
+def _select_header_lines(header, names):
+    """Select the lines of some headers from a block of headers.
+
+    Lines are selected following the rules of `email.feedparser`,
+    so parsing them returns the same values for those headers
+    than parsing the whole block.
+    """
+    names = {name.lower().encode('ascii') for name in names}
+    lines = []
+    selected = False
+
+    for line in header.splitlines(keepends=True):
+        if not HEADER_LINE_PATTERN.match(line):
+            break
+
+        # Continuation lines belong to the previous header
+        if line[:1] in (b' ', b'\t'):
+            if selected:
+                lines.append(line)
+            continue
+
+        selected = not line.startswith(b'From ') and \
+            line[:line.find(b':')].lower() in names
+
+        if selected:
+            lines.append(line)
+
+    return b''.join(lines)
+
+
+def _parse_mbox_archive_messages(mbox, from_date):
+    """Parse the messages of an archive in a worker process.
+
+    Only the messages which might be returned by the backend,
+    those with an identifier and sent since `from_date`, are
+    fully parsed. Read errors are returned together with the
+    messages parsed before them, so they can be handled like
+    in a sequential run. When `mbox` is `None`, nothing is parsed
+    and `None` is returned.
+    """
+    if mbox is None:
+        return None
+
+    from_ts = from_date.timestamp()
+    messages = []
+
+    try:
+        for raw in mbox.raw_messages():
+            fields = MBox._message_fields(raw)
+            entry = MBox._message_id_and_date(fields)
+
+            message = raw.to_dict() if entry and entry[1] >= from_ts else None
+            messages.append((fields, message))
+    except (OSError, EOFError) as e:
+        return messages, e
+
+    return messages, None
+
+
+def _split_mbox_buffer(buf, offset=0):
+    """Split the messages of a mbox stored in a buffer.
+
+    Returns tuples with the start and stop offsets of each
+    message, starting on the first message found from `offset`.
+    """
+    sep = mailbox.linesep
+    size = len(buf)
+
+    if buf[offset:offset + 5] == b'From ' and \
+            (offset == 0 or buf[offset - len(sep):offset] == sep):
+        start = offset
+    else:
+        start = buf.find(sep + b'From ', max(offset - len(sep), 0))
+        if start < 0:
+            return
+        start += len(sep)
+
+    while start >= 0:
+        next_start = buf.find(sep + b'From ', start)
+
+        if next_start < 0:
+            stop = size
+            next_start = -1
+        else:
+            next_start += len(sep)
+            stop = next_start
+
+        # An empty line before the next message belongs
+        # to the separator and not to this message
+        if buf[stop - 2 * len(sep):stop] == sep + sep and stop - 2 * len(sep) >= start:
+            stop -= len(sep)
+
+        yield start, stop
+
+        start = next_start
+
+
+def _read_raw_message(buf, start, stop):
+    """Read the message stored between two offsets of a buffer"""
+
+    sep = mailbox.linesep
+
+    eol = buf.find(sep, start, stop)
+    if eol < 0:
+        from_line, data = buf[start:stop], b''
+    else:
+        from_line, data = buf[start:eol], buf[eol + len(sep):stop]
+
+    return _RawMessage(from_line, data)
+
+
+def _split_mbox_stream(stream):
+    """Split the messages of a mbox read from a binary stream.
+
+    Returns tuples with the `From ` line, without its line
+    separator, and the raw data of each message.
+    """
+    sep = mailbox.linesep
+    from_line = None
+    lines = []
+
+    for line in stream:
+        if line.startswith(b'From '):
+            if from_line is not None:
+                if lines and lines[-1] == sep:
+                    lines.pop()
+                yield from_line, b''.join(lines)
+            from_line = line.replace(sep, b'')
+            lines = []
+        elif from_line is not None:
+            lines.append(line)
+
+    if from_line is not None:
+        if lines and lines[-1] == sep:
+            lines.pop()
+        yield from_line, b''.join(lines)
+
+
+def _create_mbox_message(from_line, data):
+    """Create a `mailbox.mboxMessage` from its raw data"""
+
+    msg = mailbox.mboxMessage(data.replace(mailbox.linesep, b'\n'))
+    msg.set_from(_decode_from_line(from_line))
+
+    return msg
+
+
+def _decode_from_line(from_line):
+    """Decode the `From ` line of a message.
+
+    The line is decoded trying several encodings to avoid
+    unhandled errors with non ASCII lines.
+    """
+    from_line = from_line[5:]
+
+    for encoding in ['ascii', 'utf-8']:
+        try:
+            return from_line.decode(encoding)
+        except UnicodeDecodeError:
+            pass
+
+    return from_line.decode('iso-8859-1')
+
 
 class MailingList(object):
     """Manage mailing lists archives.
@@ -27,6 +27,7 @@ from grimoirelab_toolkit.datetime import datetime_to_utc
 from ...backend import (Backend,
                         BackendCommand,
                         BackendCommandArgumentParser)
+from ...cache import init_users_cache
 from ...client import HttpClient
 from ...errors import BaseError
 from ...utils import DEFAULT_DATETIME
@@ -55,13 +56,16 @@ class Phabricator(Backend):
         before raising a RetryError exception
     :param sleep_time: time (in seconds) to sleep in case
         of connection problems
+    :param users_cache: persistent cache (`UsersCache`) where the data
+        of the users is kept between executions
     """
-    version = '0.12.0'
+    version = '0.13.0'
 
     CATEGORIES = [CATEGORY_TASK]
 
     def __init__(self, url, api_token, tag=None, archive=None,
-                 max_retries=MAX_RETRIES, sleep_time=DEFAULT_SLEEP_TIME):
+                 max_retries=MAX_RETRIES, sleep_time=DEFAULT_SLEEP_TIME,
+                 users_cache=None):
         origin = url
 
         super().__init__(origin, tag=tag, archive=archive)
@@ -71,6 +75,7 @@ class Phabricator(Backend):
 
         self.max_retries = max_retries
         self.sleep_time = sleep_time
+        self.users_cache = users_cache
 
         self._users = {}
         self._projects = {}
@@ -105,6 +110,8 @@ class Phabricator(Backend):
         """
         from_date = kwargs['from_date']
 
+        self._users = init_users_cache(self.users_cache, self, self.url)
+
         logger.info("Fetching tasks of '%s' from %s", self.url, str(from_date))
 
         ntasks = 0
@@ -618,7 +625,8 @@ class PhabricatorCommand(BackendCommand):
         parser = BackendCommandArgumentParser(cls.BACKEND,
                                               from_date=True,
                                               token_auth=True,
-                                              archive=True)
+                                              archive=True,
+                                              users_cache=True)
 
         # Phabricator options
         group = parser.parser.add_argument_group('Phabricator arguments')
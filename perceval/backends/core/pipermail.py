@@ -63,7 +63,7 @@ class Pipermail(MBox):
     :param tag: label used to mark the data
     :param archive: archive to store/retrieve items
     """
-    version = '0.10.0'
+    version = '0.11.0'
 
     CATEGORIES = [CATEGORY_MESSAGE]
 
@@ -72,7 +72,7 @@ class Pipermail(MBox):
         self.url = url
         self.verify = verify
 
-    def fetch(self, category=CATEGORY_MESSAGE, from_date=DEFAULT_DATETIME):
+    def fetch(self, category=CATEGORY_MESSAGE, from_date=DEFAULT_DATETIME, workers=1):
         """Fetch the messages from the Pipermail archiver.
 
         The method fetches the mbox files from a remote Pipermail
@@ -80,10 +80,11 @@ class Pipermail(MBox):
 
         :param category: the category of items to fetch
         :param from_date: obtain messages since this date
+        :param workers: number of processes used to parse the mboxes
 
         :returns: a generator of messages
         """
-        items = super().fetch(category, from_date)
+        items = super().fetch(category, from_date, workers=workers)
 
         return items
 
@@ -96,6 +97,7 @@ class Pipermail(MBox):
         :returns: a generator of items
         """
         from_date = kwargs['from_date']
+        workers = kwargs['workers']
 
         logger.info("Looking for messages from '%s' since %s",
                     self.url, str(from_date))
@@ -103,7 +105,7 @@ class Pipermail(MBox):
         mailing_list = PipermailList(self.url, self.dirpath, self.verify)
         mailing_list.fetch(from_date=from_date)
 
-        messages = self._fetch_and_parse_messages(mailing_list, from_date)
+        messages = self._fetch_and_parse_messages(mailing_list, from_date, workers=workers)
 
         for message in messages:
             yield message
@@ -152,6 +154,9 @@ class PipermailCommand(BackendCommand):
 
         # Optional arguments
         group = parser.parser.add_argument_group('Pipermail arguments')
+        group.add_argument('--workers', dest='workers',
+                           default=1, type=int,
+                           help="number of processes used to parse the mboxes")
         group.add_argument('--mboxes-path', dest='mboxes_path',
                            help="Path where mbox files will be stored")
         group.add_argument('--no-verify', dest='verify',
@@ -30,6 +30,7 @@ from grimoirelab_toolkit.uris import urijoin
 from ...backend import (Backend,
                         BackendCommand,
                         BackendCommandArgumentParser)
+from ...cache import init_users_cache
 from ...client import HttpClient
 from ...utils import DEFAULT_DATETIME
 
@@ -55,8 +56,10 @@ class Redmine(Backend):
     :param max_issues:  maximum number of issues requested on the same query
     :param tag: label used to mark the data
     :param archive: archive to store/retrieve items
+    :param users_cache: persistent cache (`UsersCache`) where the data
+        of the users is kept between executions
     """
-    version = '0.10.0'
+    version = '0.11.0'
 
     CATEGORIES = [CATEGORY_ISSUE]
     EXTRA_SEARCH_FIELDS = {
@@ -65,13 +68,14 @@ class Redmine(Backend):
     }
 
     def __init__(self, url, api_token=None, max_issues=MAX_ISSUES,
-                 tag=None, archive=None):
+                 tag=None, archive=None, users_cache=None):
         origin = url
 
         super().__init__(origin, tag=tag, archive=archive)
         self.url = url
         self.api_token = api_token
         self.max_issues = max_issues
+        self.users_cache = users_cache
         self.client = None
 
         self._users = {}
@@ -107,6 +111,8 @@ class Redmine(Backend):
         """
         from_date = kwargs['from_date']
 
+        self._users = init_users_cache(self.users_cache, self, self.url)
+
         logger.info("Fetching issues of '%s' from %s",
                     self.url, str(from_date))
 
@@ -297,7 +303,8 @@ class RedmineCommand(BackendCommand):
         parser = BackendCommandArgumentParser(cls.BACKEND,
                                               from_date=True,
                                               token_auth=True,
-                                              archive=True)
+                                              archive=True,
+                                              users_cache=True)
 
         # Redmine options
         group = parser.parser.add_argument_group('Redmine arguments')
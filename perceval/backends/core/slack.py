@@ -28,7 +28,8 @@ from grimoirelab_toolkit.uris import urijoin
 from ...backend import (Backend,
                         BackendCommand,
                         BackendCommandArgumentParser)
-from ...client import HttpClient
+from ...cache import init_users_cache
+from ...client import HttpClient, read_ahead
 from ...errors import BaseError
 from ...utils import DEFAULT_DATETIME
 
@@ -56,8 +57,12 @@ class Slack(Backend):
     :param max_items: maximum number of message requested on the same query
     :param tag: label used to mark the data
     :param archive: archive to store/retrieve items
+    :param users_cache: persistent cache (`UsersCache`) where the data
+        of the users is kept between executions
+    :param read_ahead: number of pages of messages requested in advance
+        while the current one is processed; disabled when it is 0
     """
-    version = '0.8.0'
+    version = '0.10.0'
 
     CATEGORIES = [CATEGORY_MESSAGE]
     EXTRA_SEARCH_FIELDS = {
@@ -66,13 +71,15 @@ class Slack(Backend):
     }
 
     def __init__(self, channel, api_token, max_items=MAX_ITEMS,
-                 tag=None, archive=None):
+                 tag=None, archive=None, users_cache=None, read_ahead=0):
         origin = urijoin(SLACK_URL, channel)
 
         super().__init__(origin, tag=tag, archive=archive)
         self.channel = channel
         self.api_token = api_token
         self.max_items = max_items
+        self.users_cache = users_cache
+        self.read_ahead = read_ahead
         self.client = None
 
         self._users = {}
@@ -110,6 +117,8 @@ class Slack(Backend):
         from_date = kwargs['from_date']
         latest = kwargs['latest']
 
+        self._users = init_users_cache(self.users_cache, self, SLACK_URL)
+
         logger.info("Fetching messages of '%s' channel from %s",
                     self.channel, str(from_date))
 
@@ -125,14 +134,11 @@ class Slack(Backend):
 
         oldest = datetime_to_utc(from_date).timestamp()
 
-        fetching = True
         nmsgs = 0
 
-        while fetching:
-            raw_history = self.client.history(self.channel,
-                                              oldest=oldest, latest=latest)
-            messages, fetching = self.parse_history(raw_history)
+        history = read_ahead(self.__fetch_history(oldest, latest), self.read_ahead)
 
+        for messages in history:
             for message in messages:
                 # Fetch user data
                 user_id = None
@@ -149,9 +155,6 @@ class Slack(Backend):
 
                 nmsgs += 1
 
-                if fetching:
-                    latest = float(message['ts'])
-
         logger.info("Fetch process completed: %s message fetched", nmsgs)
 
     @classmethod
@@ -263,6 +266,24 @@ class Slack(Backend):
 
         return SlackClient(self.api_token, self.max_items, self.archive, from_archive)
 
+    def __fetch_history(self, oldest, latest):
+        """Fetch the history of the channel, page by page.
+
+        The next page is requested from the timestamp of the
+        last message of the current one.
+        """
+        fetching = True
+
+        while fetching:
+            raw_history = self.client.history(self.channel,
+                                              oldest=oldest, latest=latest)
+            messages, fetching = self.parse_history(raw_history)
+
+            if fetching and messages:
+                latest = float(messages[-1]['ts'])
+
+            yield messages
+
     def __get_or_fetch_user(self, user_id):
         if user_id in self._users:
             return self._users[user_id]
@@ -464,7 +485,8 @@ class SlackCommand(BackendCommand):
         parser = BackendCommandArgumentParser(cls.BACKEND,
                                               from_date=True,
                                               token_auth=True,
-                                              archive=True)
+                                              archive=True,
+                                              users_cache=True)
 
         # Backend token is required
         action = parser.parser._option_string_actions['--api-token']
@@ -475,6 +497,9 @@ class SlackCommand(BackendCommand):
         group.add_argument('--max-items', dest='max_items',
                            type=int, default=MAX_ITEMS,
                            help="Maximum number of items requested on the same query")
+        group.add_argument('--read-ahead', dest='read_ahead',
+                           type=int, default=0,
+                           help="Number of pages requested in advance")
 
         # Required arguments
         parser.parser.add_argument('channel',
@@ -0,0 +1,673 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""Persistent caches and indexes stored in SQLite databases.
+
+The database of a cache is opened on each operation and closed
+right after it, so the same cache file can be shared by several
+threads and processes.
+"""
+
+import logging
+import os
+import pickle
+import threading
+import time
+
+from .archive import Archive
+from .client import ValidatorEntry, ValidatorStore
+from .errors import CacheError
+from .utils import sqlite_execute
+
+
+logger = logging.getLogger(__name__)
+
+
+class _SQLiteStore:
+    """Base class of the stores kept in a SQLite database.
+
+    The directory of the database file and the tables created by
+    the statements of `CREATE_STMTS` are created when they do not
+    exist. Errors are reported using `NAME` to identify the store.
+
+    :param cache_path: path to the database file
+
+    :raises CacheError: when an error occurs creating the database
+    """
+    NAME = "cache"
+    CREATE_STMTS = []
+    TIMEOUT = 60
+
+    def __init__(self, cache_path):
+        self.cache_path = cache_path
+
+        dirpath = os.path.dirname(cache_path)
+        if dirpath and not os.path.exists(dirpath):
+            os.makedirs(dirpath, exist_ok=True)
+
+        self._execute([(stmt, ()) for stmt in self.CREATE_STMTS])
+
+    def _execute(self, stmts):
+        return sqlite_execute(self.cache_path, stmts, self.TIMEOUT, self.NAME, CacheError)
+
+
+class _LRUStore(_SQLiteStore):
+    """Base class of the SQLite stores which evict the least recently used entries.
+
+    Entries are stored in the table `TABLE`, identified by the columns
+    of `KEY_COLUMNS`, and the last time they were used is kept in its
+    `accessed_on` column.
+
+    Entries are evicted in batches. The size of the table is checked
+    on the first insertion and, after that, once every `max_size / 10`
+    insertions (up to `EVICT_INTERVAL`), removing the least recently
+    used entries when there are more than `max_size`. Thus, the table
+    can hold up to 10% more entries than `max_size` between checks.
+
+    Reading an entry does not update its access time right away; times
+    are kept in memory and written together with the next insertion
+    or when `ACCESS_BATCH_SIZE` of them are pending.
+
+    :param cache_path: path to the database file
+    :param max_size: maximum number of entries to keep; `None`
+        disables eviction
+
+    :raises CacheError: when an error occurs creating the database
+    """
+    TABLE = None
+    KEY_COLUMNS = []
+
+    EVICT_INTERVAL = 1000
+    ACCESS_BATCH_SIZE = 100
+
+    def __init__(self, cache_path, max_size):
+        self.max_size = max_size
+        self._inserts = 0
+        self._accesses = {}
+        self._lock = threading.Lock()
+
+        super().__init__(cache_path)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _touch(self, key):
+        """Set the access time of an entry to the current time.
+
+        :raises CacheError: when an error occurs writing pending times
+        """
+        with self._lock:
+            self._accesses[key] = time.time()
+
+            if len(self._accesses) < self.ACCESS_BATCH_SIZE:
+                return
+
+            stmts = self._pop_accesses()
+
+        self._execute(stmts)
+
+    def _insert(self, insert_stmt, entry):
+        """Insert an entry, evicting the least recently used when needed.
+
+        :raises CacheError: when an error occurs updating the database
+        """
+        with self._lock:
+            stmts = self._pop_accesses()
+            stmts.append((insert_stmt, entry))
+
+            if self.max_size is not None:
+                interval = max(1, min(self.EVICT_INTERVAL, self.max_size // 10))
+
+                if self._inserts % interval == 0:
+                    evict_stmt = "DELETE FROM " + self.TABLE + " " \
+                                 "WHERE rowid IN (" \
+                                 "SELECT rowid FROM " + self.TABLE + " " \
+                                 "ORDER BY accessed_on " \
+                                 "LIMIT max(0, (SELECT COUNT(*) FROM " + self.TABLE + ") - ?))"
+                    stmts.append((evict_stmt, (self.max_size,)))
+
+            self._inserts += 1
+
+        self._execute(stmts)
+
+    def _clear(self):
+        """Remove every entry of the table"""
+
+        with self._lock:
+            self._accesses = {}
+
+        self._execute([("DELETE FROM " + self.TABLE, ())])
+
+    def _pop_accesses(self):
+        """Return the statements to write the pending access times"""
+
+        where = " AND ".join([column + " = ?" for column in self.KEY_COLUMNS])
+        update_stmt = "UPDATE " + self.TABLE + " SET accessed_on = ? WHERE " + where
+
+        stmts = [(update_stmt, (accessed_on,) + key)
+                 for key, accessed_on in self._accesses.items()]
+        self._accesses = {}
+
+        return stmts
+
+
+class UsersCache(_LRUStore):
+    """Persistent cache of users data.
+
+    This class stores, in a SQLite database, the data of the users
+    (or identities) retrieved by the backends, so they are not
+    requested again on later executions. Entries are identified by
+    the name of the backend, the URL of the data source and the
+    login (or id) of the user.
+
+    Entries expire `ttl` seconds after they were stored. When the
+    cache holds more than `max_size` entries, those least recently
+    used are removed in batches, as `_LRUStore` describes. Set any
+    of them to `None` to disable expiration or eviction.
+
+    :param cache_path: path to the cache file
+    :param ttl: seconds an entry is valid
+    :param max_size: maximum number of entries to keep
+
+    :raises CacheError: when an error occurs creating the cache
+    """
+    USERS_TABLE = "users"
+
+    # Table structure
+    USERS_CREATE_STMT = "CREATE TABLE IF NOT EXISTS " + USERS_TABLE + " ( " \
+                        "backend_name TEXT, " \
+                        "base_url TEXT, " \
+                        "login TEXT, " \
+                        "data BLOB, " \
+                        "updated_on REAL, " \
+                        "accessed_on REAL, " \
+                        "PRIMARY KEY (backend_name, base_url, login))"
+
+    USERS_INDEX_STMT = "CREATE INDEX IF NOT EXISTS " + USERS_TABLE + "_lru_idx " \
+                       "ON " + USERS_TABLE + " (accessed_on)"
+
+    NAME = "users cache"
+    CREATE_STMTS = [USERS_CREATE_STMT, USERS_INDEX_STMT]
+
+    TABLE = USERS_TABLE
+    KEY_COLUMNS = ['backend_name', 'base_url', 'login']
+
+    DEFAULT_TTL = 7 * 24 * 60 * 60
+    DEFAULT_MAX_SIZE = 100000
+
+    def __init__(self, cache_path, ttl=DEFAULT_TTL, max_size=DEFAULT_MAX_SIZE):
+        self.ttl = ttl
+
+        super().__init__(cache_path, max_size)
+
+    def get(self, backend_name, base_url, login):
+        """Get the data of a user.
+
+        :param backend_name: name of the backend
+        :param base_url: URL of the data source
+        :param login: login or identifier of the user
+
+        :returns: the data stored for the user
+
+        :raises KeyError: when the user is not stored or its entry expired
+        :raises CacheError: when an error occurs reading the cache
+        """
+        select_stmt = "SELECT data, updated_on " \
+                      "FROM " + self.USERS_TABLE + " " \
+                      "WHERE backend_name = ? AND base_url = ? AND login = ?"
+        delete_stmt = "DELETE FROM " + self.USERS_TABLE + " " \
+                      "WHERE backend_name = ? AND base_url = ? AND login = ?"
+
+        key = (backend_name, base_url, str(login))
+
+        rows = self._execute([(select_stmt, key)])
+
+        if not rows:
+            raise KeyError(login)
+
+        data, updated_on = rows[0]
+
+        if self.ttl is not None and time.time() - updated_on > self.ttl:
+            logger.debug("User %s of %s expired in cache %s", login, base_url, self.cache_path)
+            self._execute([(delete_stmt, key)])
+            raise KeyError(login)
+
+        self._touch(key)
+
+        return pickle.loads(data)
+
+    def set(self, backend_name, base_url, login, data):
+        """Add or update the data of a user.
+
+        When the cache is full, the least recently used entries
+        are removed.
+
+        :param backend_name: name of the backend
+        :param base_url: URL of the data source
+        :param login: login or identifier of the user
+        :param data: data of the user
+
+        :raises CacheError: when an error occurs updating the cache
+        """
+        insert_stmt = "INSERT OR REPLACE INTO " + self.USERS_TABLE + " " \
+                      "(backend_name, base_url, login, data, updated_on, accessed_on) " \
+                      "VALUES (?, ?, ?, ?, ?, ?)"
+
+        now = time.time()
+        entry = (backend_name, base_url, str(login),
+                 pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL),
+                 now, now)
+
+        self._insert(insert_stmt, entry)
+
+    def purge(self):
+        """Remove the expired entries.
+
+        :returns: number of entries removed
+
+        :raises CacheError: when an error occurs updating the cache
+        """
+        if self.ttl is None:
+            return 0
+
+        delete_stmt = "DELETE FROM " + self.USERS_TABLE + " WHERE updated_on < ?"
+        count_stmt = "SELECT changes()"
+
+        rows = self._execute([(delete_stmt, (time.time() - self.ttl,)),
+                              (count_stmt, ())])
+        return rows[0][0]
+
+    def clear(self):
+        """Remove every entry of the cache.
+
+        :raises CacheError: when an error occurs updating the cache
+        """
+        self._clear()
+
+    def users(self, backend_name, base_url):
+        """Get the users of a data source.
+
+        :param backend_name: name of the backend
+        :param base_url: URL of the data source
+
+        :returns: a `CachedUsers` object
+        """
+        return CachedUsers(self, backend_name, base_url)
+
+
+class CachedUsers(dict):
+    """Dictionary of users backed by a `UsersCache`.
+
+    Users are kept in memory, like in a regular dictionary. When a
+    user is not found in memory it is looked up in the persistent
+    cache and, when a new user is set, it is written to the
+    persistent cache too. Errors accessing the persistent cache are
+    logged and ignored, so they do not stop the fetching process.
+
+    :param cache: `UsersCache` object
+    :param backend_name: name of the backend
+    :param base_url: URL of the data source
+    """
+    def __init__(self, cache, backend_name, base_url):
+        super().__init__()
+        self.cache = cache
+        self.backend_name = backend_name
+        self.base_url = base_url
+
+    def __contains__(self, login):
+        if super().__contains__(login):
+            return True
+
+        try:
+            data = self.cache.get(self.backend_name, self.base_url, login)
+        except KeyError:
+            return False
+        except CacheError as e:
+            logger.warning("Unable to read user %s from cache; %s", login, str(e))
+            return False
+
+        super().__setitem__(login, data)
+
+        return True
+
+    def __setitem__(self, login, data):
+        super().__setitem__(login, data)
+
+        try:
+            self.cache.set(self.backend_name, self.base_url, login, data)
+        except CacheError as e:
+            logger.warning("Unable to write user %s to cache; %s", login, str(e))
+
+
+class ValidatorsCache(_LRUStore, ValidatorStore):
+    """Persistent store of HTTP validators.
+
+    Like `ValidatorStore` but validators and responses are kept
+    in a SQLite database, so they can be used on later executions
+    and shared by several processes. Responses are stored in the
+    same format used by the archives. The least recently used
+    entries are removed in batches, as `_LRUStore` describes.
+
+    :param cache_path: path to the cache file
+    :param max_size: maximum number of responses to keep
+
+    :raises CacheError: when an error occurs creating the cache
+    """
+    VALIDATORS_TABLE = "validators"
+
+    # Table structure
+    VALIDATORS_CREATE_STMT = "CREATE TABLE IF NOT EXISTS " + VALIDATORS_TABLE + " ( " \
+                             "key TEXT PRIMARY KEY, " \
+                             "etag TEXT, " \
+                             "last_modified TEXT, " \
+                             "response BLOB, " \
+                             "accessed_on REAL)"
+
+    VALIDATORS_INDEX_STMT = "CREATE INDEX IF NOT EXISTS " + VALIDATORS_TABLE + "_lru_idx " \
+                            "ON " + VALIDATORS_TABLE + " (accessed_on)"
+
+    NAME = "validators cache"
+    CREATE_STMTS = [VALIDATORS_CREATE_STMT, VALIDATORS_INDEX_STMT]
+
+    TABLE = VALIDATORS_TABLE
+    KEY_COLUMNS = ['key']
+
+    def __init__(self, cache_path, max_size=ValidatorStore.DEFAULT_MAX_SIZE):
+        ValidatorStore.__init__(self, max_size=max_size)
+        _LRUStore.__init__(self, cache_path, max_size)
+
+    def get(self, key):
+        """Get the validators entry of a key; `None` when not found.
+
+        Errors reading the cache are logged and the entry is
+        considered as not found.
+        """
+        select_stmt = "SELECT etag, last_modified, response " \
+                      "FROM " + self.VALIDATORS_TABLE + " WHERE key = ?"
+
+        try:
+            rows = self._execute([(select_stmt, (key,))])
+            if not rows:
+                return None
+            self._touch((key,))
+        except CacheError as e:
+            logger.warning("Unable to read validators of %s from cache; %s", key, str(e))
+            return None
+
+        etag, last_modified, response = rows[0]
+
+        return ValidatorEntry(etag, last_modified, Archive.load_data(response))
+
+    def set(self, key, entry):
+        """Add or update the validators entry of a key.
+
+        Errors writing the cache are logged and ignored.
+        """
+        insert_stmt = "INSERT OR REPLACE INTO " + self.VALIDATORS_TABLE + " " \
+                      "(key, etag, last_modified, response, accessed_on) " \
+                      "VALUES (?, ?, ?, ?, ?)"
+
+        row = (key, entry.etag, entry.last_modified,
+               Archive.dump_data(entry.response), time.time())
+
+        try:
+            self._insert(insert_stmt, row)
+        except CacheError as e:
+            logger.warning("Unable to write validators of %s to cache; %s", key, str(e))
+
+    def clear(self):
+        """Remove every entry of the cache.
+
+        :raises CacheError: when an error occurs updating the cache
+        """
+        self._clear()
+
+
+class CommitsCache(_SQLiteStore):
+    """Persistent cache of parsed commits.
+
+    This class stores, in a SQLite database, the commits parsed
+    from the log of a repository, so they do not have to be read
+    and parsed again on later executions. Entries are identified
+    by the origin of the data and the hash of the commit.
+
+    Commits never change once they are created, so entries do not
+    expire.
+
+    :param cache_path: path to the cache file
+
+    :raises CacheError: when an error occurs creating the cache
+    """
+    COMMITS_TABLE = "commits"
+
+    # Table structure
+    COMMITS_CREATE_STMT = "CREATE TABLE IF NOT EXISTS " + COMMITS_TABLE + " ( " \
+                          "origin TEXT, " \
+                          "commit_id TEXT, " \
+                          "data BLOB, " \
+                          "PRIMARY KEY (origin, commit_id))"
+
+    NAME = "commits cache"
+    CREATE_STMTS = [COMMITS_CREATE_STMT]
+
+    # Keep the number of parameters of a query under SQLite limits
+    MAX_QUERY_COMMITS = 500
+
+    def get(self, origin, commits):
+        """Get a set of commits.
+
+        :param origin: origin of the commits
+        :param commits: list of hashes of the commits
+
+        :returns: a dictionary with the data of the commits found
+            in the cache, indexed by their hashes
+
+        :raises CacheError: when an error occurs reading the cache
+        """
+        found = {}
+
+        for i in range(0, len(commits), self.MAX_QUERY_COMMITS):
+            hashes = commits[i:i + self.MAX_QUERY_COMMITS]
+            select_stmt = "SELECT commit_id, data " \
+                          "FROM " + self.COMMITS_TABLE + " " \
+                          "WHERE origin = ? AND commit_id IN (" + ", ".join(['?'] * len(hashes)) + ")"
+
+            rows = self._execute([(select_stmt, [origin] + hashes)])
+
+            for commit_id, data in rows:
+                found[commit_id] = pickle.loads(data)
+
+        return found
+
+    def set(self, origin, commits):
+        """Add or update a set of commits.
+
+        :param origin: origin of the commits
+        :param commits: list of parsed commits
+
+        :raises CacheError: when an error occurs updating the cache
+        """
+        insert_stmt = "INSERT OR REPLACE INTO " + self.COMMITS_TABLE + " " \
+                      "(origin, commit_id, data) VALUES (?, ?, ?)"
+
+        stmts = [(insert_stmt, (origin, commit['commit'],
+                                pickle.dumps(commit, protocol=pickle.HIGHEST_PROTOCOL)))
+                 for commit in commits]
+
+        if stmts:
+            self._execute(stmts)
+
+    def clear(self):
+        """Remove every entry of the cache.
+
+        :raises CacheError: when an error occurs updating the cache
+        """
+        self._execute([("DELETE FROM " + self.COMMITS_TABLE, ())])
+
+
+class MBoxIndex(_SQLiteStore):
+    """Persistent index of the messages stored in mbox files.
+
+    This class stores, in a SQLite database, the position, the
+    identifier and the date of the messages of a set of mbox files,
+    so later executions only have to read the messages sent after
+    a given date. The size, the modification time and the offset of
+    the last message of each file are also stored, so files which
+    grew can be scanned only from their last known message.
+
+    :param cache_path: path to the index file
+
+    :raises CacheError: when an error occurs creating the index
+    """
+    MBOXES_TABLE = "mboxes"
+    MESSAGES_TABLE = "messages"
+
+    # Tables structure
+    MBOXES_CREATE_STMT = "CREATE TABLE IF NOT EXISTS " + MBOXES_TABLE + " ( " \
+                         "filepath TEXT, " \
+                         "size INTEGER, " \
+                         "mtime INTEGER, " \
+                         "last_offset INTEGER, " \
+                         "PRIMARY KEY (filepath))"
+    MESSAGES_CREATE_STMT = "CREATE TABLE IF NOT EXISTS " + MESSAGES_TABLE + " ( " \
+                           "filepath TEXT, " \
+                           "offset INTEGER, " \
+                           "length INTEGER, " \
+                           "message_id TEXT, " \
+                           "date REAL, " \
+                           "PRIMARY KEY (filepath, offset))"
+
+    NAME = "mbox index"
+    CREATE_STMTS = [MBOXES_CREATE_STMT, MESSAGES_CREATE_STMT]
+
+    def mbox(self, filepath):
+        """Get the state of a mbox file when it was indexed.
+
+        :param filepath: path to the mbox file
+
+        :returns: a tuple with the size, the modification time (in
+            nanoseconds) and the offset of the last message of the
+            file; `None` when the file is not indexed
+
+        :raises CacheError: when an error occurs reading the index
+        """
+        select_stmt = "SELECT size, mtime, last_offset " \
+                      "FROM " + self.MBOXES_TABLE + " " \
+                      "WHERE filepath = ?"
+
+        rows = self._execute([(select_stmt, (filepath,))])
+
+        return tuple(rows[0]) if rows else None
+
+    def messages(self, filepath, from_date=None, to_offset=None):
+        """Get the indexed messages of a mbox file.
+
+        Messages are returned sorted by their position in the file.
+
+        :param filepath: path to the mbox file
+        :param from_date: only return messages sent since this
+            UNIX timestamp (inclusive)
+        :param to_offset: only return messages stored before this
+            byte offset
+
+        :returns: a list of tuples with the offset, the length, the
+            identifier and the date of each message
+
+        :raises CacheError: when an error occurs reading the index
+        """
+        select_stmt = "SELECT offset, length, message_id, date " \
+                      "FROM " + self.MESSAGES_TABLE + " " \
+                      "WHERE filepath = ?"
+        params = [filepath]
+
+        if from_date is not None:
+            select_stmt += " AND date >= ?"
+            params.append(from_date)
+        if to_offset is not None:
+            select_stmt += " AND offset < ?"
+            params.append(to_offset)
+
+        select_stmt += " ORDER BY offset"
+
+        rows = self._execute([(select_stmt, params)])
+
+        return [tuple(row) for row in rows]
+
+    def update(self, filepath, size, mtime, last_offset, messages, from_offset=0):
+        """Update the index of a mbox file.
+
+        The messages indexed from `from_offset` onwards are replaced
+        by the given ones.
+
+        :param filepath: path to the mbox file
+        :param size: size of the file
+        :param mtime: modification time of the file, in nanoseconds
+        :param last_offset: offset of the last message of the file
+        :param messages: list of tuples with the offset, the length,
+            the identifier and the date of each message
+        :param from_offset: offset of the first scanned message
+
+        :raises CacheError: when an error occurs updating the index
+        """
+        delete_stmt = "DELETE FROM " + self.MESSAGES_TABLE + " " \
+                      "WHERE filepath = ? AND offset >= ?"
+        insert_stmt = "INSERT OR REPLACE INTO " + self.MESSAGES_TABLE + " " \
+                      "(filepath, offset, length, message_id, date) VALUES (?, ?, ?, ?, ?)"
+        mbox_stmt = "INSERT OR REPLACE INTO " + self.MBOXES_TABLE + " " \
+                    "(filepath, size, mtime, last_offset) VALUES (?, ?, ?, ?)"
+
+        stmts = [(delete_stmt, (filepath, from_offset))]
+        stmts.extend([(insert_stmt, (filepath,) + tuple(message)) for message in messages])
+        stmts.append((mbox_stmt, (filepath, size, mtime, last_offset)))
+
+        self._execute(stmts)
+
+    def remove(self, filepath):
+        """Remove a mbox file and its messages from the index.
+
+        :param filepath: path to the mbox file
+
+        :raises CacheError: when an error occurs updating the index
+        """
+        self._execute([("DELETE FROM " + self.MESSAGES_TABLE + " WHERE filepath = ?", (filepath,)),
+                       ("DELETE FROM " + self.MBOXES_TABLE + " WHERE filepath = ?", (filepath,))])
+
+
+def init_users_cache(users_cache, backend, base_url):
+    """Get the users cache of a backend.
+
+    The persistent cache is only used when the backend does not
+    store or read its data from an archive. Otherwise, the requests
+    to get those users cached would be missing in the archive.
+
+    :param users_cache: `UsersCache` object or `None`
+    :param backend: backend object
+    :param base_url: URL of the data source
+
+    :returns: a dictionary to cache the users of the backend
+    """
+    if not users_cache or backend.archive:
+        return {}
+
+    return users_cache.users(backend.__class__.__name__, base_url)
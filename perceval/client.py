@@ -19,10 +19,16 @@
 #     Valerio Cosentino <valcos@bitergia.com>
 #
 
+import collections
+import hashlib
 import logging
+import queue
+import threading
 import time
 
 import requests
+import requests.sessions
+import requests.structures
 import urllib3.util
 
 from .errors import RateLimitError
@@ -30,6 +36,8 @@ from ._version import __version__
 
 logger = logging.getLogger(__name__)
 
+READ_AHEAD_POLL_TIME = 0.1
+
 
 class HttpClient:
     """Abstract class for HTTP clients.
@@ -51,8 +59,18 @@ class HttpClient:
         before raising a RetryError exception
     :param sleep_time: time (in seconds) to sleep in case
         of connection problems
+    :param extra_headers: extra headers sent on every request
+    :param extra_status_forcelist: extra status codes to retry on
+    :param extra_retry_after_status: extra status codes on which
+        the `Retry-After` header is respected
+    :param archive: archive to store/retrieve responses
+    :param from_archive: it tells whether to write/read the archive
+    :param validators: `ValidatorStore` object; when it is set,
+        GET requests are sent as conditional requests and, when the
+        server replies with a 304 (Not Modified), the stored response
+        is returned instead
     """
-    version = '0.2.0'
+    version = '0.3.0'
 
     DEFAULT_SLEEP_TIME = 1
 
@@ -77,7 +95,7 @@ class HttpClient:
 
     def __init__(self, base_url, max_retries=MAX_RETRIES, sleep_time=DEFAULT_SLEEP_TIME,
                  extra_headers=None, extra_status_forcelist=None, extra_retry_after_status=None,
-                 archive=None, from_archive=False):
+                 archive=None, from_archive=False, validators=None):
 
         self.base_url = base_url
 
@@ -107,13 +125,15 @@ class HttpClient:
 
         self.archive = archive
         self.from_archive = from_archive
+        self.validators = validators
 
         self._create_http_session()
 
     def __del__(self):
         self._close_http_session()
 
-    def fetch(self, url, payload=None, headers=None, method=GET, stream=False, verify=True, auth=None):
+    def fetch(self, url, payload=None, headers=None, method=GET, stream=False, verify=True, auth=None,
+              archived=True):
         """Fetch the data from a given URL.
 
         :param url: link to the resource
@@ -123,13 +143,16 @@ class HttpClient:
         :param stream: defer downloading the response body until the response content is available
         :param verify: verifying the SSL certificate
         :param auth: auth of the request
+        :param archived: when it is not set, the response is always fetched
+            from the remote server and it is not stored in the archive
 
         :returns a response object
         """
-        if self.from_archive:
+        if self.from_archive and archived:
             response = self._fetch_from_archive(url, payload, headers)
         else:
-            response = self._fetch_from_remote(url, payload, headers, method, stream, verify, auth)
+            response = self._fetch_from_remote(url, payload, headers, method, stream, verify, auth,
+                                               archived=archived)
 
         return response
 
@@ -157,24 +180,42 @@ class HttpClient:
 
         return response
 
-    def _fetch_from_remote(self, url, payload, headers, method, stream, verify, auth):
+    def _fetch_from_remote(self, url, payload, headers, method, stream, verify, auth, archived=True):
+
+        conditional = self.validators is not None and method == self.GET and not stream
+
+        if conditional:
+            session_headers = requests.sessions.merge_setting(headers, self.session.headers,
+                                                              dict_class=requests.structures.CaseInsensitiveDict)
+            key = self.validators.make_key(url, payload, headers=session_headers,
+                                           auth=auth or self.session.auth)
+            entry = self.validators.get(key)
+            request_headers = self.validators.conditional_headers(entry, headers)
+        else:
+            request_headers = headers
 
         if method == self.GET:
-            response = self.session.get(url, params=payload, headers=headers, stream=stream, verify=verify, auth=auth)
+            response = self.session.get(url, params=payload, headers=request_headers,
+                                        stream=stream, verify=verify, auth=auth)
         else:
             response = self.session.post(url, data=payload, headers=headers, stream=stream, verify=verify, auth=auth)
 
+        if conditional:
+            response = self.validators.update(key, entry, response)
+
+        archive = self.archive if archived else None
+
         try:
             response.raise_for_status()
         except Exception as e:
-            if self.archive:
+            if archive:
                 url, headers, payload = self.sanitize_for_archive(url, headers, payload)
-                self.archive.store(url, payload, headers, e)
+                archive.store(url, payload, headers, e)
             raise e
 
-        if self.archive:
+        if archive:
             url, headers, payload = self.sanitize_for_archive(url, headers, payload)
-            self.archive.store(url, payload, headers, response)
+            archive.store(url, payload, headers, response)
         return response
 
     def _create_http_session(self):
@@ -207,6 +248,162 @@ class HttpClient:
             self.session.keep_alive = False
 
 
+ValidatorEntry = collections.namedtuple('ValidatorEntry', 'etag last_modified response')
+
+
+class ValidatorStore:
+    """Store of HTTP validators.
+
+    This class keeps in memory, for each request, the validators (`ETag`
+    and `Last-Modified` headers) of the last response received and
+    the response itself. They are used by `HttpClient` to send
+    conditional requests. When the server replies with a 304 status
+    (Not Modified), the stored response is returned instead, updated
+    with the headers of the new one (e.g, rate limit headers).
+
+    The number of conditional requests that were answered with a 304
+    (`hits`) or not (`misses`) are counted. When the store holds more
+    than `max_size` responses, those least recently used are removed.
+
+    :param max_size: maximum number of responses to keep
+    """
+    DEFAULT_MAX_SIZE = 10000
+
+    # Headers of 304 responses that must not replace the stored ones
+    IGNORED_HEADERS = ['content-length', 'content-encoding', 'transfer-encoding']
+
+    # Request headers that do not change the response of a request
+    IGNORED_KEY_HEADERS = ['connection', 'user-agent']
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def make_key(cls, url, payload, headers=None, auth=None):
+        """Return the key of a request.
+
+        The key is the URL of the request, payload included. When
+        headers or credentials are sent, as they may change the
+        response of the server, a digest of them is appended to
+        the URL.
+
+        :param url: URL of the request
+        :param payload: payload of the request
+        :param headers: headers of the request
+        :param auth: credentials of the request
+        """
+        request = requests.Request(HttpClient.GET, url, params=payload,
+                                   headers=headers, auth=auth).prepare()
+
+        fields = sorted('%s: %s' % (name.lower(), value)
+                        for name, value in request.headers.items()
+                        if name.lower() not in cls.IGNORED_KEY_HEADERS)
+
+        if not fields:
+            return request.url
+
+        digest = hashlib.sha1('\n'.join(fields).encode('utf-8')).hexdigest()
+
+        return request.url + ' ' + digest
+
+    def get(self, key):
+        """Get the validators entry of a key; `None` when not found"""
+
+        with self._lock:
+            entry = self._entries.get(key, None)
+            if entry:
+                self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key, entry):
+        """Add or update the validators entry of a key"""
+
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+
+            while self.max_size is not None and len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def conditional_headers(self, entry, headers):
+        """Return the headers of a conditional request.
+
+        :param entry: validators entry of the request; it can be `None`
+        :param headers: headers of the request
+        """
+        if not entry:
+            return headers
+
+        headers = dict(headers) if headers else {}
+
+        if entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+
+        return headers
+
+    def update(self, key, entry, response):
+        """Update the store with the response of a request.
+
+        :param key: key of the request
+        :param entry: validators entry sent on the request; it can be `None`
+        :param response: response received
+
+        :returns: the stored response when `response` is a 304,
+            the given response otherwise
+        """
+        if entry and response.status_code == 304:
+            with self._lock:
+                self.hits += 1
+            logger.debug("%s not modified; using stored response", key)
+            return self._revalidate(entry.response, response)
+
+        with self._lock:
+            self.misses += 1
+
+        etag = response.headers.get('ETag', None)
+        last_modified = response.headers.get('Last-Modified', None)
+
+        if response.status_code == 200 and (etag or last_modified):
+            self.set(key, ValidatorEntry(etag, last_modified, response))
+
+        return response
+
+    def _revalidate(self, stored, response):
+        """Build the response of a revalidated request"""
+
+        revalidated = requests.Response()
+        revalidated.status_code = stored.status_code
+        revalidated.reason = stored.reason
+        revalidated.url = stored.url
+        revalidated.encoding = stored.encoding
+        revalidated.request = response.request
+        revalidated.elapsed = response.elapsed
+        revalidated.headers = requests.structures.CaseInsensitiveDict(stored.headers)
+        revalidated._content = stored.content
+        revalidated._content_consumed = True
+
+        for header, value in response.headers.items():
+            if header.lower() not in self.IGNORED_HEADERS:
+                revalidated.headers[header] = value
+
+        return revalidated
+
+
 class RateLimitHandler:
     """Class to handle rate limit for HTTP clients.
 
@@ -251,19 +448,33 @@ class RateLimitHandler:
         """The fetching process sleeps until the rate limit is restored or
            raises a RateLimitError exception if sleep_for_rate flag is disabled.
         """
-        if self.rate_limit is not None and self.rate_limit <= self.min_rate_to_sleep:
-            seconds_to_reset = self.calculate_time_to_reset()
+        seconds_to_reset = self._rate_limit_sleep_time()
+
+        if seconds_to_reset is not None:
+            time.sleep(seconds_to_reset)
 
-            if seconds_to_reset < 0:
-                logger.warning("Value of sleep for rate limit is negative, reset it to 0")
-                seconds_to_reset = 0
+    def _rate_limit_sleep_time(self):
+        """Return the seconds to sleep until the rate limit is restored.
+
+        It returns `None` when the rate limit was not exhausted and
+        raises a RateLimitError exception if sleep_for_rate flag is
+        disabled.
+        """
+        if self.rate_limit is None or self.rate_limit > self.min_rate_to_sleep:
+            return None
 
-            cause = "Rate limit exhausted."
-            if self.sleep_for_rate:
-                logger.info("%s Waiting %i secs for rate limit reset.", cause, seconds_to_reset)
-                time.sleep(seconds_to_reset)
-            else:
-                raise RateLimitError(cause=cause, seconds_to_reset=seconds_to_reset)
+        seconds_to_reset = self.calculate_time_to_reset()
+
+        if seconds_to_reset < 0:
+            logger.warning("Value of sleep for rate limit is negative, reset it to 0")
+            seconds_to_reset = 0
+
+        cause = "Rate limit exhausted."
+        if self.sleep_for_rate:
+            logger.info("%s Waiting %i secs for rate limit reset.", cause, seconds_to_reset)
+            return seconds_to_reset
+        else:
+            raise RateLimitError(cause=cause, seconds_to_reset=seconds_to_reset)
 
     def calculate_time_to_reset(self):
         """Calculate the seconds to reset the token requests."""
@@ -287,3 +498,70 @@ class RateLimitHandler:
             logger.debug("Rate limit reset: %s", self.calculate_time_to_reset())
         else:
             self.rate_limit_reset_ts = None
+
+
+def read_ahead(iterable, size=1):
+    """Iterate over an iterable reading ahead its next items.
+
+    The items of `iterable` (e.g., the pages returned by a paginated
+    client method) are requested by a background thread and kept in
+    a buffer of up to `size` items, so the next pages are fetched
+    while the current one is processed. Items are returned in the
+    same order and the exceptions raised by `iterable` are raised
+    when the item that failed is requested.
+
+    The next item is only requested once there is room for it in
+    the buffer, so no more than `size` unconsumed items are ever
+    requested. Closing this generator stops the background thread.
+    When `size` is lower than 1, `iterable` is iterated as it is.
+
+    :param iterable: iterable to read ahead
+    :param size: maximum number of items read in advance
+
+    :returns: a generator of the items of `iterable`
+    """
+    if size < 1:
+        yield from iterable
+        return
+
+    buffer = queue.Queue()
+    slots = threading.Semaphore(size)
+    stopped = threading.Event()
+
+    def wait_slot():
+        while not stopped.is_set():
+            if slots.acquire(timeout=READ_AHEAD_POLL_TIME):
+                return True
+        return False
+
+    def produce():
+        items = iter(iterable)
+        try:
+            while wait_slot():
+                try:
+                    item = next(items)
+                except StopIteration:
+                    buffer.put((None, None, True))
+                    return
+                buffer.put((item, None, False))
+        except Exception as e:
+            buffer.put((None, e, True))
+        finally:
+            if hasattr(items, 'close'):
+                items.close()
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+
+    try:
+        while True:
+            item, error, done = buffer.get()
+            if error:
+                raise error
+            if done:
+                break
+            slots.release()
+            yield item
+    finally:
+        stopped.set()
+        producer.join()
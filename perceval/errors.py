@@ -29,11 +29,15 @@ class BaseError(Exception):
 
     def __init__(self, **kwargs):
         super().__init__()
+        self.kwargs = kwargs
         self.msg = self.message % kwargs
 
     def __str__(self):
         return self.msg
 
+    def __reduce__(self):
+        return _build_error, (self.__class__, self.kwargs)
+
 
 class ArchiveError(BaseError):
     """Generic error for archive objects"""
@@ -53,6 +57,12 @@ class BackendError(BaseError):
     message = "%(cause)s"
 
 
+class CacheError(BaseError):
+    """Generic error for cache objects"""
+
+    message = "%(cause)s"
+
+
 class HttpClientError(BaseError):
     """Generic error for HTTP Cient"""
 
@@ -89,3 +99,9 @@ class BackendCommandArgumentParserError(BaseError):
     """Generic error for BackendCommandArgumentParser"""
 
     message = "%(cause)s"
+
+
+def _build_error(cls, kwargs):
+    """Build an error from its arguments; used when it is unpickled"""
+
+    return cls(**kwargs)
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import json
+import logging
+import queue
+import re
+import threading
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+logger = logging.getLogger(__name__)
+
+ESCAPE_ASCII_PATTERN = re.compile('[^\x00-\x7e]')
+
+
+class ItemsWriter:
+    """Write items to an output as JSON objects.
+
+    Items are encoded as JSON documents, one after the other and
+    separated by a new line, and written to `outfile`. When
+    `json_line` is set, each item is written in a single line;
+    otherwise, items are indented. Keys are sorted unless
+    `sort_keys` is disabled.
+
+    When `fast_json` is set and the `orjson` package is installed,
+    JSON lines are encoded with `orjson`. Its output is escaped to
+    ASCII, like the standard `json` module does, but some values
+    are written differently: NaN and Infinity are written as `null`
+    and floats may use a different notation (e.g., `0.0000204`
+    instead of `2.04e-05`). Items it cannot encode and indented items are
+    encoded with the standard `json` module.
+
+    Encoded items are kept in a buffer of up to `buffer_size`
+    characters before writing them to the output. When `threaded`
+    is set, items are encoded and written by a background thread,
+    so fetching and writing can overlap; up to `queue_size` items
+    wait to be written in that case.
+
+    Call `flush` to make sure every item was written to the output.
+    Errors found while encoding or writing the items in the
+    background are raised on the next call to `write` or `flush`.
+
+    :param outfile: file object where the items are written
+    :param json_line: write each item in a single line
+    :param sort_keys: sort the keys of the JSON objects
+    :param buffer_size: number of characters buffered before
+        writing them to the output
+    :param threaded: encode and write the items in a background thread
+    :param queue_size: maximum number of items waiting to be written
+        by the background thread
+    :param fast_json: encode JSON lines with `orjson`, when available
+    """
+    DEFAULT_BUFFER_SIZE = 1024 * 1024
+    DEFAULT_QUEUE_SIZE = 1000
+
+    def __init__(self, outfile, json_line=False, sort_keys=True,
+                 buffer_size=DEFAULT_BUFFER_SIZE, threaded=False,
+                 queue_size=DEFAULT_QUEUE_SIZE, fast_json=False):
+        self.outfile = outfile
+        self.json_line = json_line
+        self.sort_keys = sort_keys
+        self.buffer_size = buffer_size
+        self.threaded = threaded
+        self.queue_size = queue_size
+        self.fast_json = fast_json
+
+        self._buffer = []
+        self._buffered = 0
+        self._queue = None
+        self._worker = None
+        self._error = None
+
+        self._orjson_opts = None
+
+        if fast_json and not orjson:
+            logger.warning("orjson package is not installed; items will be encoded with json")
+        elif fast_json and json_line:
+            self._orjson_opts = orjson.OPT_NON_STR_KEYS
+            if sort_keys:
+                self._orjson_opts |= orjson.OPT_SORT_KEYS
+
+    def write(self, item):
+        """Write an item to the output.
+
+        :param item: item to write
+
+        :raises IOError: when the item cannot be written
+        """
+        if not self.threaded:
+            self._write(item)
+            return
+
+        self._raise_error()
+
+        if not self._worker:
+            self._queue = queue.Queue(maxsize=self.queue_size)
+            self._worker = threading.Thread(target=self._run_worker, daemon=True)
+            self._worker.start()
+
+        self._queue.put(item)
+
+    def flush(self):
+        """Write the pending items to the output.
+
+        The background thread, if any, is stopped once every item
+        in its queue is written. It will be started again when a
+        new item is written.
+
+        :raises IOError: when the items cannot be written
+        """
+        if self._worker:
+            self._queue.put(None)
+            self._worker.join()
+            self._worker = None
+            self._queue = None
+
+        self._raise_error()
+        self._flush_buffer()
+        self.outfile.flush()
+
+    def encode(self, item):
+        """Encode an item as a JSON document.
+
+        :param item: item to encode
+
+        :returns: a string with the JSON document
+        """
+        if self._orjson_opts is not None:
+            try:
+                obj = orjson.dumps(item, option=self._orjson_opts).decode('utf-8')
+            except orjson.JSONEncodeError as e:
+                logger.debug("Item cannot be encoded by orjson (%s); using json", str(e))
+            else:
+                return ESCAPE_ASCII_PATTERN.sub(_escape_char, obj)
+
+        if self.json_line:
+            return json.dumps(item, separators=(',', ':'), sort_keys=self.sort_keys)
+        else:
+            return json.dumps(item, indent=4, sort_keys=self.sort_keys)
+
+    def _write(self, item):
+        obj = self.encode(item)
+
+        self._buffer.append(obj)
+        self._buffer.append('\n')
+        self._buffered += len(obj) + 1
+
+        if self._buffered >= self.buffer_size:
+            self._flush_buffer()
+
+    def _flush_buffer(self):
+        if not self._buffer:
+            return
+
+        data = ''.join(self._buffer)
+        self._buffer = []
+        self._buffered = 0
+        self.outfile.write(data)
+
+    def _run_worker(self):
+        """Encode and write the items of the queue"""
+
+        while True:
+            item = self._queue.get()
+
+            if item is None:
+                break
+
+            # Keep consuming the queue after an error
+            # so the writer does not block forever
+            if self._error:
+                continue
+
+            try:
+                self._write(item)
+            except Exception as e:
+                self._error = e
+
+    def _raise_error(self):
+        if self._error:
+            error = self._error
+            self._error = None
+            raise error
+
+
+def _escape_char(match):
+    """Escape a non-ASCII character the way `json` does"""
+
+    code = ord(match.group())
+
+    if code <= 0xffff:
+        return '\\u%04x' % code
+
+    code -= 0x10000
+    return '\\u%04x\\u%04x' % (0xd800 | (code >> 10), 0xdc00 | (code & 0x3ff))
@@ -20,12 +20,15 @@
 #     Germán Poo-Caamaño <gpoo@gnome.org>
 #
 
+import collections
+import concurrent.futures
+import contextlib
 import datetime
 import email
 import logging
 import mailbox
 import re
-import sys
+import sqlite3
 
 import xml.etree.ElementTree
 
@@ -45,22 +48,28 @@ DEFAULT_DATETIME = datetime.datetime(1970, 1, 1, 0, 0, 0,
 DEFAULT_LAST_DATETIME = datetime.datetime(2100, 1, 1, 0, 0, 0,
                                           tzinfo=dateutil.tz.tzutc())
 
+ILLEGAL_XML_CHARS_PATTERN = re.compile(r'[\x00-\x08\x0B-\x1F\x7F-\x84\x86-\x9F]')
+XML_CHUNK_SIZE = 64 * 1024
+
 
 def check_compressed_file_type(filepath):
     """Check if filename is a compressed file supported by the tool.
 
     This function uses magic numbers (first four bytes) to determine
-    the type of the file. Supported types are 'gz' and 'bz2'. When
-    the filetype is not supported, the function returns `None`.
+    the type of the file. Supported types are 'gz', 'bz2', 'xz' and
+    'zip'. When the filetype is not supported, the function returns
+    `None`.
 
     :param filepath: path to the file
 
-    :returns: 'gz' or 'bz2'; `None` if the type is not supported
+    :returns: 'gz', 'bz2', 'xz' or 'zip'; `None` if the type is not
+        supported
     """
     def compressed_file_type(content):
         magic_dict = {
             b'\x1f\x8b\x08': 'gz',
             b'\x42\x5a\x68': 'bz2',
+            b'\xfd\x37\x7a\x58': 'xz',
             b'PK\x03\x04': 'zip'
         }
 
@@ -101,6 +110,148 @@ def months_range(from_date, to_date):
         pos = x
 
 
+@contextlib.contextmanager
+def workers_mapper(workers):
+    """Return a function to map a set of items using several workers.
+
+    When more than one worker is set, the items are processed
+    concurrently by a pool of threads. Otherwise, they are
+    processed one by one with the built-in `map`. Results are
+    always returned in the order of the items.
+
+    :param workers: number of threads
+    """
+    if workers == 1:
+        yield map
+        return
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        yield executor.map
+
+
+def bounded_map(executor, fn, iterable, ahead):
+    """Map a function over the items of an iterable with an executor.
+
+    Unlike `Executor.map`, which submits a call for every item
+    right away, the items are submitted as the results are
+    consumed, so no more than `ahead` calls are pending at any
+    time. Results are returned in the order of the items.
+    Closing the generator cancels the calls not started yet.
+
+    :param executor: `concurrent.futures` executor running the calls
+    :param fn: function to call with each item
+    :param iterable: items to process
+    :param ahead: maximum number of pending calls
+
+    :returns: a generator of the results
+    """
+    ahead = max(ahead, 1)
+    pending = collections.deque()
+
+    try:
+        for item in iterable:
+            pending.append(executor.submit(fn, item))
+
+            if len(pending) >= ahead:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def partial_result_items(result):
+    """Return the items of a partial result.
+
+    `result` is a tuple with the items processed by a worker and
+    the error that stopped it, if any. The items are returned
+    before that error is raised, so they are not lost.
+
+    :param result: tuple with a list of items and an error or `None`
+
+    :returns: a generator of the items
+    """
+    items, error = result
+
+    yield from items
+
+    if error:
+        raise error
+
+
+def sqlite_execute(db_path, stmts, timeout, name, error_class):
+    """Run a set of SQLite statements in a single transaction.
+
+    The database is opened before running the statements and
+    closed right after them. Database errors are reported raising
+    `error_class` exceptions, with `name` and the path of the
+    database in their message.
+
+    :param db_path: path to the database file
+    :param stmts: list of (statement, parameters) tuples
+    :param timeout: seconds to wait while the database is locked
+    :param name: name of the database
+    :param error_class: class of the exceptions to raise
+
+    :returns: the rows fetched by the last statement
+    """
+    try:
+        conn = sqlite3.connect(db_path, timeout=timeout)
+        try:
+            cursor = conn.cursor()
+            for stmt, params in stmts:
+                cursor.execute(stmt, params)
+            rows = cursor.fetchall()
+            conn.commit()
+            cursor.close()
+        finally:
+            conn.close()
+    except sqlite3.DatabaseError as e:
+        msg = "%s %s error; cause: %s" % (name, db_path, str(e))
+        raise error_class(cause=msg)
+
+    return rows
+
+
+def message_headers_to_dict(msg, headers=None):
+    """Convert the headers of an email message into a dictionary.
+
+    This function transforms the headers of an `email.message.Message`
+    object into a dictionary, in the same way `message_to_dict` does,
+    but without decoding the body of the message. When `headers` is
+    given, only those headers are decoded. It is useful to check
+    some fields of a message before converting it completely.
+
+    :param msg: email message of type `email.message.Message`
+    :param headers: list of names of the headers to decode; all
+        the headers are decoded when it is `None`
+
+    :returns : dictionary of type `requests.structures.CaseInsensitiveDict`
+
+    :raises ParseError: when an error occurs decoding the headers
+    """
+    message = requests.structures.CaseInsensitiveDict()
+
+    if isinstance(msg, mailbox.mboxMessage):
+        message['unixfrom'] = msg.get_from()
+    else:
+        message['unixfrom'] = None
+
+    if headers is not None:
+        headers = {header.lower() for header in headers}
+
+    try:
+        for header, value in msg.items():
+            if headers is None or header.lower() in headers:
+                message[header] = _decode_header(value)
+    except UnicodeError as e:
+        raise ParseError(cause=str(e))
+
+    return message
+
+
 def message_to_dict(msg):
     """Convert an email message into a dictionary.
 
@@ -121,27 +272,6 @@ def message_to_dict(msg):
     :raises ParseError: when an error occurs transforming the message
         to a dictionary
     """
-    def parse_headers(msg):
-        headers = {}
-
-        for header, value in msg.items():
-            hv = []
-
-            for text, charset in email.header.decode_header(value):
-                if type(text) == bytes:
-                    charset = charset if charset else 'utf-8'
-                    try:
-                        text = text.decode(charset, errors='surrogateescape')
-                    except (UnicodeError, LookupError):
-                        # Try again with a 7bit encoding
-                        text = text.decode('ascii', errors='surrogateescape')
-                hv.append(text)
-
-            v = ' '.join(hv)
-            headers[header] = v if v else None
-
-        return headers
-
     def parse_payload(msg):
         body = {}
 
@@ -171,16 +301,9 @@ def message_to_dict(msg):
         return payload
 
     # The function starts here
-    message = requests.structures.CaseInsensitiveDict()
-
-    if isinstance(msg, mailbox.mboxMessage):
-        message['unixfrom'] = msg.get_from()
-    else:
-        message['unixfrom'] = None
+    message = message_headers_to_dict(msg)
 
     try:
-        for k, v in parse_headers(msg).items():
-            message[k] = v
         message['body'] = parse_payload(msg)
     except UnicodeError as e:
         raise ParseError(cause=str(e))
@@ -188,6 +311,26 @@ def message_to_dict(msg):
     return message
 
 
+def _decode_header(value):
+    """Decode the value of a header of an email message"""
+
+    hv = []
+
+    for text, charset in email.header.decode_header(value):
+        if type(text) == bytes:
+            charset = charset if charset else 'utf-8'
+            try:
+                text = text.decode(charset, errors='surrogateescape')
+            except (UnicodeError, LookupError):
+                # Try again with a 7bit encoding
+                text = text.decode('ascii', errors='surrogateescape')
+        hv.append(text)
+
+    v = ' '.join(hv)
+
+    return v if v else None
+
+
 def remove_invalid_xml_chars(raw_xml):
     """Remove control and invalid characters from an xml stream.
 
@@ -201,23 +344,7 @@ def remove_invalid_xml_chars(raw_xml):
 
     :returns: a purged XML stream
     """
-    illegal_unichrs = [(0x00, 0x08), (0x0B, 0x1F),
-                       (0x7F, 0x84), (0x86, 0x9F)]
-
-    illegal_ranges = ['%s-%s' % (chr(low), chr(high))
-                      for (low, high) in illegal_unichrs
-                      if low < sys.maxunicode]
-
-    illegal_xml_re = re.compile('[%s]' % ''.join(illegal_ranges))
-
-    purged_xml = ''
-
-    for c in raw_xml:
-        if illegal_xml_re.search(c) is not None:
-            c = ' '
-        purged_xml += c
-
-    return purged_xml
+    return ILLEGAL_XML_CHARS_PATTERN.sub(' ', raw_xml)
 
 
 def xml_to_dict(raw_xml):
@@ -239,31 +366,86 @@ def xml_to_dict(raw_xml):
     :raises ParseError: raised when an error occurs parsing the given
         XML stream
     """
-    def node_to_dict(node):
-        d = {}
-        d.update(node.items())
+    purged_xml = remove_invalid_xml_chars(raw_xml)
 
-        text = getattr(node, 'text', None)
+    try:
+        tree = xml.etree.ElementTree.fromstring(purged_xml)
+    except xml.etree.ElementTree.ParseError as e:
+        cause = "XML stream %s" % (str(e))
+        raise ParseError(cause=cause)
 
-        if text is not None:
-            d['__text__'] = text
+    d = _xml_node_to_dict(tree)
 
-        childs = {}
-        for child in node:
-            childs.setdefault(child.tag, []).append(node_to_dict(child))
+    return d
 
-        d.update(childs.items())
 
-        return d
+def xml_to_dicts(raw_xml, tag):
+    """Convert the elements of a XML stream into dictionaries.
 
-    purged_xml = remove_invalid_xml_chars(raw_xml)
+    This function parses the XML stream incrementally, generating
+    a dictionary, with the same format `xml_to_dict` returns, for
+    each child of the root node named as `tag`, as soon as it is
+    parsed. The children are discarded once they are converted,
+    so the whole tree is never kept in memory.
+
+    :param raw_xml: XML stream
+    :param tag: name of the children of the root node to convert
+
+    :returns: a generator of dicts with the XML data
+
+    :raises ParseError: raised when an error occurs parsing the given
+        XML stream
+    """
+    parser = xml.etree.ElementTree.XMLPullParser(events=('start', 'end'))
+
+    root = None
+    depth = 0
+
+    def read_events():
+        nonlocal root, depth
+
+        for event, node in parser.read_events():
+            if event == 'start':
+                if root is None:
+                    root = node
+                depth += 1
+                continue
+
+            depth -= 1
+
+            if depth != 1:
+                continue
+            if node.tag == tag:
+                yield _xml_node_to_dict(node)
+            root.remove(node)
 
     try:
-        tree = xml.etree.ElementTree.fromstring(purged_xml)
+        for i in range(0, len(raw_xml), XML_CHUNK_SIZE):
+            chunk = raw_xml[i:i + XML_CHUNK_SIZE]
+            parser.feed(remove_invalid_xml_chars(chunk))
+            yield from read_events()
+        parser.close()
+        yield from read_events()
     except xml.etree.ElementTree.ParseError as e:
         cause = "XML stream %s" % (str(e))
         raise ParseError(cause=cause)
 
-    d = node_to_dict(tree)
+
+def _xml_node_to_dict(node):
+    """Convert a XML node and its children into a dictionary"""
+
+    d = {}
+    d.update(node.items())
+
+    text = getattr(node, 'text', None)
+
+    if text is not None:
+        d['__text__'] = text
+
+    childs = {}
+    for child in node:
+        childs.setdefault(child.tag, []).append(_xml_node_to_dict(child))
+
+    d.update(childs.items())
 
     return d
@@ -78,6 +78,7 @@ setup(name="perceval",
       keywords="development repositories analytics git github bugzilla jira jenkins",
       packages=[
           'perceval',
+          'perceval.aio',
           'perceval.backends',
           'perceval.backends.core'
       ],
@@ -101,6 +102,10 @@ setup(name="perceval",
           'urllib3>=1.22',
           'grimoirelab-toolkit>=0.1.4'
       ],
+      extras_require={
+          'async': ['aiohttp>=3.0'],
+          'fast-json': ['orjson>=3.0']
+      },
       scripts=[
           'bin/perceval'
       ],
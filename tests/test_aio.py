@@ -0,0 +1,518 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Authors:
+#     Santiago Dueñas <sduenas@bitergia.com>
+#
+
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+import unittest.mock
+
+import pkg_resources
+import requests
+
+try:
+    import aiohttp.test_utils
+    import aiohttp.web
+except ImportError:
+    aiohttp = None
+
+pkg_resources.declare_namespace('perceval.backends')
+
+from perceval.aio.client import (AsyncHttpClient,
+                                 AsyncRateLimitHandler,
+                                 schedule_ahead)
+from perceval.archive import Archive
+from perceval.backend import Backend, logger as backend_logger
+from perceval.backends.core.jenkins import Jenkins
+from perceval.errors import ArchiveError, BackendError, HttpClientError, RateLimitError
+from test_backend import MockedBackend
+
+
+CLIENT_API_URL = "https://gateway.marvel.com/v1/"
+
+
+def read_file(filename, mode='r'):
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), filename), mode) as f:
+        content = f.read()
+    return content
+
+
+class MockedBackendAsyncClient:
+    """Mocked asynchronous client for testing"""
+
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class AsyncMockedBackend(MockedBackend):
+    """Mocked backend for testing asynchronous fetching"""
+
+    async def fetch_items_async(self, category, **kwargs):
+        for item in self.fetch_items(category, **kwargs):
+            yield item
+
+    def _init_async_client(self, from_archive=False):
+        return MockedBackendAsyncClient()
+
+
+class ErrorAsyncMockedBackend(AsyncMockedBackend):
+    """Mocked backend which raises an exception while fetching items"""
+
+    async def fetch_items_async(self, category, **kwargs):
+        async for item in super().fetch_items_async(category, **kwargs):
+            yield item
+            raise BackendError(cause="Unhandled exception")
+
+
+class MockedAsyncClient(AsyncHttpClient, AsyncRateLimitHandler):
+
+    def __init__(self, base_url, sleep_for_rate=False, min_rate_to_sleep=AsyncRateLimitHandler.MIN_RATE_LIMIT,
+                 **kwargs):
+        super().__init__(base_url, **kwargs)
+        super().setup_rate_limit_handler(sleep_for_rate=sleep_for_rate,
+                                         min_rate_to_sleep=min_rate_to_sleep)
+
+    def calculate_time_to_reset(self):
+        return -1
+
+
+class AsyncHttpServer:
+    """Local HTTP server to test asynchronous clients"""
+
+    def __init__(self):
+        self.requests = {}
+        self.running = 0
+        self.max_running = 0
+
+    def app(self):
+        app = aiohttp.web.Application()
+        app.router.add_get('/ok', self.ok)
+        app.router.add_post('/ok', self.ok)
+        app.router.add_get('/slow', self.slow)
+        app.router.add_get('/flaky', self.flaky)
+        app.router.add_get('/retry-after', self.retry_after)
+        app.router.add_get('/error', self.error)
+        return app
+
+    def _count(self, request):
+        self.requests[request.path] = self.requests.get(request.path, 0) + 1
+        return self.requests[request.path]
+
+    async def ok(self, request):
+        self._count(request)
+        data = await request.text()
+        body = 'params: %s; data: %s' % (request.query_string, data)
+        return aiohttp.web.Response(text=body, headers={'X-RateLimit-Remaining': '20'})
+
+    async def slow(self, request):
+        self._count(request)
+        self.running += 1
+        self.max_running = max(self.running, self.max_running)
+        await asyncio.sleep(0.05)
+        self.running -= 1
+        return aiohttp.web.Response(text='slow')
+
+    async def flaky(self, request):
+        if self._count(request) < 3:
+            return aiohttp.web.Response(status=504)
+        return aiohttp.web.Response(text='recovered')
+
+    async def retry_after(self, request):
+        if self._count(request) < 2:
+            return aiohttp.web.Response(status=429, headers={'Retry-After': '1'})
+        return aiohttp.web.Response(text='done')
+
+    async def error(self, request):
+        self._count(request)
+        return aiohttp.web.Response(status=404)
+
+
+@unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+class TestAsyncHttpClient(unittest.IsolatedAsyncioTestCase):
+    """AsyncHttpClient tests"""
+
+    async def asyncSetUp(self):
+        self.test_path = tempfile.mkdtemp(prefix='perceval_')
+        self.handler = AsyncHttpServer()
+        self.server = aiohttp.test_utils.TestServer(self.handler.app())
+        await self.server.start_server()
+        self.base_url = str(self.server.make_url('/'))
+
+    async def asyncTearDown(self):
+        await self.server.close()
+        shutil.rmtree(self.test_path)
+
+    def test_init(self):
+        """Test whether the attributes are initialized"""
+
+        client = AsyncHttpClient(CLIENT_API_URL)
+
+        self.assertEqual(client.base_url, CLIENT_API_URL)
+        self.assertEqual(client.max_retries, AsyncHttpClient.MAX_RETRIES)
+        self.assertEqual(client.sleep_time, AsyncHttpClient.DEFAULT_SLEEP_TIME)
+        self.assertEqual(client.max_concurrency, AsyncHttpClient.DEFAULT_MAX_CONCURRENCY)
+        self.assertEqual(client.status_forcelist, AsyncHttpClient.DEFAULT_STATUS_FORCE_LIST)
+        self.assertEqual(client.retry_after_status, AsyncHttpClient.DEFAULT_RETRY_AFTER_STATUS_CODES)
+        self.assertDictEqual(client.headers, AsyncHttpClient.DEFAULT_HEADERS)
+        self.assertIsNone(client.archive)
+        self.assertFalse(client.from_archive)
+        self.assertIsNone(client.session)
+
+        client = AsyncHttpClient(CLIENT_API_URL, max_retries=1, sleep_time=0.1,
+                                 extra_headers={'X-Token': 'abc'},
+                                 extra_status_forcelist=[500],
+                                 extra_retry_after_status=[503],
+                                 max_concurrency=2)
+
+        self.assertEqual(client.max_retries, 1)
+        self.assertEqual(client.sleep_time, 0.1)
+        self.assertEqual(client.max_concurrency, 2)
+        self.assertIn(500, client.status_forcelist)
+        self.assertIn(503, client.retry_after_status)
+        self.assertEqual(client.headers['X-Token'], 'abc')
+
+    def test_init_no_aiohttp(self):
+        """Test whether an error is raised when aiohttp is not installed"""
+
+        with unittest.mock.patch('perceval.aio.client.aiohttp', None):
+            with self.assertRaisesRegex(HttpClientError, 'aiohttp package is required'):
+                AsyncHttpClient(CLIENT_API_URL)
+
+    async def test_fetch(self):
+        """Test whether responses are returned"""
+
+        async with AsyncHttpClient(self.base_url) as client:
+            response = await client.fetch(self.base_url + 'ok', payload={'a': 1})
+            self.assertIsInstance(response, requests.Response)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.text, 'params: a=1; data: ')
+            self.assertEqual(response.headers['x-ratelimit-remaining'], '20')
+
+            response = await client.fetch(self.base_url + 'ok', payload={'a': 1},
+                                          method=AsyncHttpClient.POST)
+            self.assertEqual(response.text, 'params: ; data: a=1')
+
+        self.assertIsNone(client.session)
+
+    async def test_fetch_concurrency(self):
+        """Test whether the number of concurrent requests is bounded"""
+
+        async with AsyncHttpClient(self.base_url, max_concurrency=2) as client:
+            responses = await asyncio.gather(*[client.fetch(self.base_url + 'slow') for _ in range(6)])
+
+        self.assertEqual([r.text for r in responses], ['slow'] * 6)
+        self.assertEqual(self.handler.max_running, 2)
+
+    async def test_retries(self):
+        """Test whether requests are retried on the status of the forcelist"""
+
+        async with AsyncHttpClient(self.base_url, sleep_time=0.01) as client:
+            response = await client.fetch(self.base_url + 'flaky')
+
+        self.assertEqual(response.text, 'recovered')
+        self.assertEqual(self.handler.requests['/flaky'], 3)
+
+        self.handler.requests['/flaky'] = 0
+
+        async with AsyncHttpClient(self.base_url, sleep_time=0.01, max_retries=1) as client:
+            with self.assertRaises(requests.exceptions.RetryError):
+                await client.fetch(self.base_url + 'flaky')
+
+    async def test_retry_after(self):
+        """Test whether the Retry-After header is respected"""
+
+        async with AsyncHttpClient(self.base_url, sleep_time=0.01) as client:
+            before = time.time()
+            response = await client.fetch(self.base_url + 'retry-after')
+            after = time.time()
+
+        self.assertEqual(response.text, 'done')
+        self.assertEqual(self.handler.requests['/retry-after'], 2)
+        self.assertGreaterEqual(after - before, 1)
+
+    async def test_connection_error(self):
+        """Test whether a connection error is raised after the retries"""
+
+        url = self.base_url + 'ok'
+        await self.server.close()
+
+        async with AsyncHttpClient(self.base_url, sleep_time=0.01, max_retries=1) as client:
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                await client.fetch(url)
+
+    async def test_http_error(self):
+        """Test whether HTTP errors are raised"""
+
+        async with AsyncHttpClient(self.base_url) as client:
+            with self.assertRaises(requests.exceptions.HTTPError):
+                await client.fetch(self.base_url + 'error')
+
+    async def test_archive(self):
+        """Test whether responses are stored and retrieved from the archive"""
+
+        archive = Archive.create(os.path.join(self.test_path, 'myarchive'))
+
+        async with AsyncHttpClient(self.base_url, archive=archive) as client:
+            await client.fetch(self.base_url + 'ok', payload={'a': 1})
+            with self.assertRaises(requests.exceptions.HTTPError):
+                await client.fetch(self.base_url + 'error')
+        archive.flush()
+
+        client = AsyncHttpClient(self.base_url, archive=archive, from_archive=True)
+
+        response = await client.fetch(self.base_url + 'ok', payload={'a': 1})
+        self.assertEqual(response.text, 'params: a=1; data: ')
+
+        with self.assertRaises(requests.exceptions.HTTPError):
+            await client.fetch(self.base_url + 'error')
+
+        self.assertEqual(self.handler.requests['/ok'], 1)
+        self.assertEqual(self.handler.requests['/error'], 1)
+        self.assertIsNone(client.session)
+
+    async def test_rate_limit(self):
+        """Test whether the rate limit is handled"""
+
+        async with MockedAsyncClient(self.base_url, min_rate_to_sleep=50) as client:
+            response = await client.fetch(self.base_url + 'ok')
+            client.update_rate_limit(response)
+            self.assertEqual(client.rate_limit, 20)
+
+            with self.assertRaises(RateLimitError):
+                await client.sleep_for_rate_limit()
+
+            client.sleep_for_rate = True
+            await client.sleep_for_rate_limit()
+
+
+class TestScheduleAhead(unittest.IsolatedAsyncioTestCase):
+    """Unit tests for schedule_ahead"""
+
+    async def test_schedule_ahead(self):
+        """Test whether tasks are returned in order and scheduled in advance"""
+
+        started = []
+
+        async def job(x):
+            started.append(x)
+            await asyncio.sleep(0.01 * (5 - x))
+            return x
+
+        results = []
+        tasks = schedule_ahead((job(x) for x in range(5)), 2)
+
+        async for task in tasks:
+            results.append(await task)
+            self.assertLessEqual(len(started), len(results) + 2)
+
+        self.assertListEqual(results, list(range(5)))
+        self.assertListEqual(started, list(range(5)))
+
+    async def test_cancel(self):
+        """Test whether the tasks not requested are cancelled on close"""
+
+        async def job(x):
+            await asyncio.sleep(0.01)
+            return x
+
+        tasks = schedule_ahead((job(x) for x in range(5)), 2)
+        task = await tasks.__anext__()
+        self.assertEqual(await task, 0)
+
+        await tasks.aclose()
+        await asyncio.sleep(0)
+
+        # Two more tasks were scheduled and cancelled
+        pending = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        self.assertListEqual(pending, [])
+
+
+class TestFetchAsync(unittest.IsolatedAsyncioTestCase):
+    """Unit tests for fetch_async"""
+
+    def setUp(self):
+        self.test_path = tempfile.mkdtemp(prefix='perceval_')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_path)
+
+    async def test_fetch_async(self):
+        """Test whether items are fetched asynchronously"""
+
+        archive = Archive.create(os.path.join(self.test_path, 'myarchive'))
+        b = AsyncMockedBackend('test', archive=archive)
+
+        items = [item async for item in b.fetch_async(MockedBackend.DEFAULT_CATEGORY)]
+
+        self.assertEqual(len(items), 5)
+        self.assertEqual([item['data']['item'] for item in items], list(range(5)))
+        self.assertEqual([item['search_fields']['item_id'] for item in items],
+                         [str(x) for x in range(5)])
+        self.assertEqual(b.summary.fetched, 5)
+        self.assertTrue(b.client.closed)
+
+        items = [item for item in b.fetch_from_archive()]
+        self.assertEqual(len(items), 5)
+
+    async def test_fetch_async_flush_archive_error(self):
+        """Test whether errors writing the archive do not replace the fetch error"""
+
+        archive_path = os.path.join(self.test_path, 'myarchive')
+        archive = Archive.create(archive_path, batch_size=100)
+        b = ErrorAsyncMockedBackend('test', archive=archive)
+
+        error = ArchiveError(cause="disk full")
+
+        with unittest.mock.patch.object(archive, 'flush', side_effect=error):
+            with self.assertLogs(backend_logger, level='ERROR') as cm:
+                with self.assertRaisesRegex(BackendError, "Unhandled exception"):
+                    _ = [item async for item in b.fetch_async(MockedBackend.DEFAULT_CATEGORY)]
+
+        self.assertEqual(cm.output[0],
+                         'ERROR:perceval.backend:Pending raw items not written to %s archive; '
+                         'disk full' % archive_path)
+        self.assertTrue(b.client.closed)
+
+        # When every item was fetched, the error is raised
+        archive = Archive.create(os.path.join(self.test_path, 'myarchive2'), batch_size=100)
+        b = AsyncMockedBackend('test', archive=archive)
+
+        with unittest.mock.patch.object(archive, 'flush', side_effect=error):
+            with self.assertRaisesRegex(ArchiveError, "disk full"):
+                _ = [item async for item in b.fetch_async(MockedBackend.DEFAULT_CATEGORY)]
+
+        self.assertTrue(b.client.closed)
+
+    async def test_fetch_async_wrong_category(self):
+        """Check that an error is thrown if the category is not valid"""
+
+        b = AsyncMockedBackend('test')
+
+        with self.assertRaises(BackendError):
+            _ = [item async for item in b.fetch_async(category="acme")]
+
+    async def test_fetch_async_not_implemented(self):
+        """Test whether an NotImplementedError exception is thrown"""
+
+        b = Backend('test')
+        b.CATEGORIES = [MockedBackend.DEFAULT_CATEGORY]
+
+        with self.assertRaises(NotImplementedError):
+            _ = [item async for item in b.fetch_async(MockedBackend.DEFAULT_CATEGORY)]
+
+        with self.assertRaises(NotImplementedError):
+            b.fetch_items_async(MockedBackend.DEFAULT_CATEGORY)
+
+
+class JenkinsServer:
+    """Local HTTP server which mocks a Jenkins site"""
+
+    def __init__(self):
+        self.jobs = read_file('data/jenkins/jenkins_jobs.json')
+        self.builds = read_file('data/jenkins/jenkins_job_builds.json')
+        self.running = 0
+        self.max_running = 0
+
+    def app(self):
+        app = aiohttp.web.Application()
+        app.router.add_get('/ci/api/json', self.get_jobs)
+        app.router.add_get('/ci/job/{name}/api/json', self.get_builds)
+        return app
+
+    async def get_jobs(self, request):
+        return aiohttp.web.Response(text=self.jobs)
+
+    async def get_builds(self, request):
+        self.running += 1
+        self.max_running = max(self.running, self.max_running)
+        await asyncio.sleep(0.05)
+        self.running -= 1
+
+        name = request.match_info['name']
+
+        if name == '500-error-job':
+            return aiohttp.web.Response(status=500, text='500 Internal Server Error')
+        elif name == 'invalid-json-job':
+            return aiohttp.web.Response(text='{')
+        else:
+            return aiohttp.web.Response(text=self.builds)
+
+
+@unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+class TestJenkinsFetchAsync(unittest.IsolatedAsyncioTestCase):
+    """Unit tests for fetching Jenkins builds asynchronously"""
+
+    async def asyncSetUp(self):
+        self.test_path = tempfile.mkdtemp(prefix='perceval_')
+        self.handler = JenkinsServer()
+        self.server = aiohttp.test_utils.TestServer(self.handler.app())
+        await self.server.start_server()
+        self.url = str(self.server.make_url('/ci'))
+
+    async def asyncTearDown(self):
+        await self.server.close()
+        shutil.rmtree(self.test_path)
+
+    async def test_fetch_async(self):
+        """Test whether builds are fetched concurrently"""
+
+        archive = Archive.create(os.path.join(self.test_path, 'myarchive'))
+        jenkins = Jenkins(self.url, archive=archive)
+
+        builds = []
+        async for build in jenkins.fetch_async('build'):
+            builds.append(build)
+
+        self.assertEqual(len(builds), 64)
+        self.assertEqual(jenkins.summary.fetched, 64)
+        self.assertEqual(jenkins.summary.skipped, 2)
+        self.assertEqual(self.handler.max_running, 4)
+
+        expected = json.loads(read_file('data/jenkins/jenkins_build.json'))
+        self.assertDictEqual(builds[0]['data'], expected['data'])
+
+        # Responses can be read by the synchronous client
+        archived = [build for build in jenkins.fetch_from_archive()]
+        self.assertListEqual([build['data'] for build in archived],
+                             [build['data'] for build in builds])
+
+    async def test_fetch_async_blacklist(self):
+        """Test whether blacklisted jobs are not requested"""
+
+        jenkins = Jenkins(self.url, blacklist_ids=['apex-build-master'])
+
+        builds = []
+        async for build in jenkins.fetch_async('build'):
+            builds.append(build)
+
+        self.assertEqual(len(builds), 32)
+        self.assertEqual(jenkins.summary.skipped, 3)
+
+
+if __name__ == "__main__":
+    unittest.main(warnings='ignore')
@@ -34,7 +34,7 @@ import requests
 
 from grimoirelab_toolkit.datetime import datetime_utcnow, datetime_to_utc
 
-from perceval.archive import Archive, ArchiveManager
+from perceval.archive import Archive, ArchiveCatalog, ArchiveManager
 from perceval.errors import ArchiveError, ArchiveManagerError
 
 
@@ -188,7 +188,7 @@ class TestArchive(unittest.TestCase):
         ds = data_stored[0]
         dr = data_requests[0]
         self.assertEqual(ds[0], '0fa4ce047340780f08efca92f22027514263521d')
-        self.assertEqual(pickle.loads(ds[1]).url, responses[0].url)
+        self.assertEqual(Archive.load_data(ds[1]).url, responses[0].url)
         self.assertEqual(ds[2], dr[0])
         self.assertEqual(pickle.loads(ds[3]), dr[1])
         self.assertEqual(pickle.loads(ds[4]), dr[2])
@@ -196,7 +196,7 @@ class TestArchive(unittest.TestCase):
         ds = data_stored[1]
         dr = data_requests[1]
         self.assertEqual(ds[0], '3879a6f12828b7ac3a88b7167333e86168f2f5d2')
-        self.assertEqual(pickle.loads(ds[1]).url, responses[1].url)
+        self.assertEqual(Archive.load_data(ds[1]).url, responses[1].url)
         self.assertEqual(ds[2], dr[0])
         self.assertEqual(pickle.loads(ds[3]), dr[1])
         self.assertEqual(pickle.loads(ds[4]), dr[2])
@@ -204,7 +204,7 @@ class TestArchive(unittest.TestCase):
         ds = data_stored[2]
         dr = data_requests[2]
         self.assertEqual(ds[0], 'ef38f574a0745b63a056e7befdb7a06e7cf1549b')
-        self.assertEqual(pickle.loads(ds[1]).url, responses[2].url)
+        self.assertEqual(Archive.load_data(ds[1]).url, responses[2].url)
         self.assertEqual(ds[2], dr[0])
         self.assertEqual(pickle.loads(ds[3]), dr[1])
         self.assertEqual(pickle.loads(ds[4]), dr[2])
@@ -232,6 +232,90 @@ class TestArchive(unittest.TestCase):
         with self.assertRaisesRegex(ArchiveError, "duplicated entry"):
             archive.store(url, payload, headers, response)
 
+    def test_store_batch(self):
+        """Test whether data is committed in batches"""
+
+        archive_path = os.path.join(self.test_path, 'myarchive')
+        archive = Archive.create(archive_path, batch_size=3)
+
+        self.assertEqual(archive.batch_size, 3)
+        self.assertEqual(archive.batch_interval, None)
+
+        archive.store("https://example.com/", {'page': 1}, {}, {'data': 1})
+        archive.store("https://example.com/", {'page': 2}, {}, {'data': 2})
+
+        # Items are not visible to other connections until they are committed
+        self.assertEqual(count_number_rows(archive_path, Archive.ARCHIVE_TABLE), 0)
+
+        # But they can be retrieved using the same archive
+        data = archive.retrieve("https://example.com/", {'page': 2}, {})
+        self.assertDictEqual(data, {'data': 2})
+
+        archive.store("https://example.com/", {'page': 3}, {}, {'data': 3})
+        self.assertEqual(count_number_rows(archive_path, Archive.ARCHIVE_TABLE), 3)
+
+        archive.store("https://example.com/", {'page': 4}, {}, {'data': 4})
+        self.assertEqual(count_number_rows(archive_path, Archive.ARCHIVE_TABLE), 3)
+
+        archive.flush()
+        self.assertEqual(count_number_rows(archive_path, Archive.ARCHIVE_TABLE), 4)
+
+        # Batch mode uses WAL journaling
+        db = sqlite3.connect(archive_path)
+        cursor = db.cursor()
+        cursor.execute("PRAGMA journal_mode")
+        self.assertEqual(cursor.fetchone()[0], 'wal')
+        cursor.close()
+        db.close()
+
+    @unittest.mock.patch('perceval.archive.time.time')
+    def test_store_batch_interval(self, mock_time):
+        """Test whether data is committed when the batch interval expires"""
+
+        mock_time.return_value = 100
+
+        archive_path = os.path.join(self.test_path, 'myarchive')
+        archive = Archive.create(archive_path, batch_size=100, batch_interval=5)
+
+        archive.store("https://example.com/", {'page': 1}, {}, {'data': 1})
+        self.assertEqual(count_number_rows(archive_path, Archive.ARCHIVE_TABLE), 0)
+
+        mock_time.return_value = 105
+        archive.store("https://example.com/", {'page': 2}, {}, {'data': 2})
+        self.assertEqual(count_number_rows(archive_path, Archive.ARCHIVE_TABLE), 2)
+
+        mock_time.return_value = 106
+        archive.store("https://example.com/", {'page': 3}, {}, {'data': 3})
+        self.assertEqual(count_number_rows(archive_path, Archive.ARCHIVE_TABLE), 2)
+
+    def test_store_batch_on_delete(self):
+        """Test whether pending data is committed when the archive is deleted"""
+
+        archive_path = os.path.join(self.test_path, 'myarchive')
+        archive = Archive.create(archive_path, batch_size=100)
+
+        archive.store("https://example.com/", {'page': 1}, {}, {'data': 1})
+        self.assertEqual(count_number_rows(archive_path, Archive.ARCHIVE_TABLE), 0)
+
+        del archive
+        self.assertEqual(count_number_rows(archive_path, Archive.ARCHIVE_TABLE), 1)
+
+    def test_close(self):
+        """Test whether pending data is committed when the archive is closed"""
+
+        archive_path = os.path.join(self.test_path, 'myarchive')
+        archive = Archive.create(archive_path, batch_size=100)
+
+        archive.store("https://example.com/", {'page': 1}, {}, {'data': 1})
+        self.assertEqual(count_number_rows(archive_path, Archive.ARCHIVE_TABLE), 0)
+
+        archive.close()
+        self.assertEqual(count_number_rows(archive_path, Archive.ARCHIVE_TABLE), 1)
+        self.assertIsNone(archive._db)
+
+        # Closing it again does nothing
+        archive.close()
+
     @httpretty.activate
     def test_retrieve(self):
         """Test whether data is properly retrieved from the archive"""
@@ -254,6 +338,98 @@ class TestArchive(unittest.TestCase):
 
         self.assertEqual(data.url, response.url)
 
+    @httpretty.activate
+    def test_store_format(self):
+        """Test whether data is stored compressed and reduced"""
+
+        url = "https://example.com/tasks"
+        payload = {'task_id': 10}
+        headers = {'Accept': 'application/json'}
+        body = '{"task": "my task", "description": "' + ('a' * 2000) + '"}'
+
+        httpretty.register_uri(httpretty.GET,
+                               url,
+                               body=body,
+                               status=200,
+                               adding_headers={'X-RateLimit-Remaining': '20'})
+        response = requests.get(url, params=payload, headers=headers)
+
+        archive_path = os.path.join(self.test_path, 'myarchive')
+        archive = Archive.create(archive_path)
+        archive.store(url, payload, headers, response)
+
+        db = sqlite3.connect(archive.archive_path)
+        cursor = db.cursor()
+        cursor.execute("SELECT data FROM archive")
+        data_dump = cursor.fetchone()[0]
+        cursor.close()
+
+        self.assertTrue(data_dump.startswith(Archive.FORMAT_MAGIC))
+        self.assertLess(len(data_dump), len(pickle.dumps(response, 0)))
+        self.assertLess(len(data_dump), len(body))
+
+        data = Archive.load_data(data_dump)
+        self.assertIsInstance(data, requests.Response)
+        self.assertEqual(data.url, response.url)
+        self.assertEqual(data.status_code, 200)
+        self.assertEqual(data.reason, response.reason)
+        self.assertEqual(data.headers['x-ratelimit-remaining'], '20')
+        self.assertEqual(data.content, response.content)
+        self.assertEqual(data.text, body)
+        self.assertDictEqual(data.json(), response.json())
+
+    @httpretty.activate
+    def test_retrieve_error(self):
+        """Test whether HTTP errors are properly retrieved from the archive"""
+
+        url = "https://example.com/tasks"
+
+        httpretty.register_uri(httpretty.GET,
+                               url,
+                               body='Not found',
+                               status=404)
+        response = requests.get(url)
+
+        with self.assertRaises(requests.exceptions.HTTPError) as cm:
+            response.raise_for_status()
+
+        archive_path = os.path.join(self.test_path, 'myarchive')
+        archive = Archive.create(archive_path)
+        archive.store(url, None, None, cm.exception)
+
+        data = archive.retrieve(url, None, None)
+
+        self.assertIsInstance(data, requests.exceptions.HTTPError)
+        self.assertEqual(str(data), str(cm.exception))
+        self.assertEqual(data.response.status_code, 404)
+        self.assertEqual(data.response.text, 'Not found')
+
+    def test_retrieve_former_format(self):
+        """Test whether data stored with the former format is retrieved"""
+
+        archive_path = os.path.join(self.test_path, 'myarchive')
+        archive = Archive.create(archive_path)
+
+        url = "https://example.com/tasks"
+        payload = {'task_id': 10}
+        headers = {'Accept': 'application/json'}
+        data = {'task': 'my task'}
+
+        hashcode = Archive.make_hashcode(url, payload, headers)
+
+        db = sqlite3.connect(archive.archive_path)
+        cursor = db.cursor()
+        cursor.execute("INSERT INTO archive (id, hashcode, uri, payload, headers, data) "
+                       "VALUES(?,?,?,?,?,?)",
+                       (None, hashcode, url, pickle.dumps(payload, 0),
+                        pickle.dumps(headers, 0), pickle.dumps(data, 0)))
+        db.commit()
+        cursor.close()
+        db.close()
+
+        found = archive.retrieve(url, payload, headers)
+        self.assertDictEqual(found, data)
+
     def test_retrieve_missing(self):
         """Test whether the retrieval of non archived data throws an error
 
@@ -352,6 +528,38 @@ class TestArchiveManager(unittest.TestCase):
         manager.remove_archive(archive.archive_path)
         self.assertEqual(os.path.exists(archive.archive_path), False)
 
+    def test_create_archive_batch(self):
+        """Test if archives are created using the batch parameters of the manager"""
+
+        archive_mng_path = os.path.join(self.test_path, ARCHIVE_TEST_DIR)
+
+        manager = ArchiveManager(archive_mng_path)
+        archive = manager.create_archive()
+        self.assertEqual(archive.batch_size, ArchiveManager.DEFAULT_BATCH_SIZE)
+        self.assertEqual(archive.batch_interval, ArchiveManager.DEFAULT_BATCH_INTERVAL)
+
+        manager = ArchiveManager(archive_mng_path, batch_size=1, batch_interval=None)
+        archive = manager.create_archive()
+        self.assertEqual(archive.batch_size, 1)
+        self.assertEqual(archive.batch_interval, None)
+
+    def test_remove_archive_wal_files(self):
+        """Test if WAL journal files are removed together with the archive"""
+
+        archive_mng_path = os.path.join(self.test_path, ARCHIVE_TEST_DIR)
+        manager = ArchiveManager(archive_mng_path)
+
+        archive = manager.create_archive()
+        archive.init_metadata('https://example.com', 'git', '0.8', 'commit', {})
+        archive.store("https://example.com/", {'page': 1}, {}, {'data': 1})
+
+        self.assertEqual(os.path.exists(archive.archive_path + '-wal'), True)
+
+        manager.remove_archive(archive.archive_path)
+        self.assertEqual(os.path.exists(archive.archive_path), False)
+        self.assertEqual(os.path.exists(archive.archive_path + '-wal'), False)
+        self.assertEqual(os.path.exists(archive.archive_path + '-shm'), False)
+
     def test_remove_archive_not_found(self):
         """Test if an exception is raised when the archive is not found"""
 
@@ -513,6 +721,164 @@ class TestArchiveManager(unittest.TestCase):
         archives = manager.search('https://example.com', 'bugzilla', 'commit', dt)
         self.assertListEqual(archives, [])
 
+    def test_search_removed_archive(self):
+        """Check if archives removed by other means are dropped from the catalog"""
+
+        archive_mng_path = os.path.join(self.test_path, ARCHIVE_TEST_DIR)
+        manager = ArchiveManager(archive_mng_path)
+
+        dt = datetime_utcnow()
+        filepaths = []
+
+        for _ in range(2):
+            archive = manager.create_archive()
+            archive.init_metadata('https://example.com', 'git', '0.8', 'commit', {})
+            filepaths.append(archive.archive_path)
+
+        os.remove(filepaths[0])
+
+        archives = manager.search('https://example.com', 'git', 'commit', dt)
+        self.assertListEqual(archives, [filepaths[1]])
+
+        entries = manager.catalog.search('https://example.com', 'git', 'commit', dt)
+        self.assertEqual(len(entries), 1)
+
+    def test_catalog(self):
+        """Test if the catalog is updated when archives are created and removed"""
+
+        archive_mng_path = os.path.join(self.test_path, ARCHIVE_TEST_DIR)
+        manager = ArchiveManager(archive_mng_path)
+
+        catalog_path = os.path.join(archive_mng_path, ArchiveManager.CATALOG_NAME)
+        self.assertIsInstance(manager.catalog, ArchiveCatalog)
+        self.assertEqual(manager.catalog.catalog_path, catalog_path)
+        self.assertEqual(os.path.exists(catalog_path), True)
+
+        # Archives without metadata are not indexed
+        archive = manager.create_archive()
+        self.assertEqual(count_number_rows(catalog_path, ArchiveCatalog.CATALOG_TABLE), 0)
+
+        archive.init_metadata('https://example.com', 'git', '0.8', 'commit', {})
+        self.assertEqual(count_number_rows(catalog_path, ArchiveCatalog.CATALOG_TABLE), 1)
+
+        conn = sqlite3.connect(catalog_path)
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM catalog")
+        entry = cursor.fetchone()
+        cursor.close()
+        conn.close()
+
+        expected_path = os.path.relpath(archive.archive_path, archive_mng_path)
+        self.assertEqual(entry[0], expected_path)
+        self.assertEqual(entry[1], 'https://example.com')
+        self.assertEqual(entry[2], 'git')
+        self.assertEqual(entry[3], '0.8')
+        self.assertEqual(entry[4], 'commit')
+        self.assertEqual(entry[5], archive.created_on.timestamp())
+
+        manager.remove_archive(archive.archive_path)
+        self.assertEqual(count_number_rows(catalog_path, ArchiveCatalog.CATALOG_TABLE), 0)
+
+    def test_rebuild_catalog(self):
+        """Test if the catalog is rebuilt from the archives of the directory"""
+
+        archive_mng_path = os.path.join(self.test_path, ARCHIVE_TEST_DIR)
+        manager = ArchiveManager(archive_mng_path)
+
+        dt = datetime_utcnow()
+
+        # Archives created without the manager are not indexed
+        archive_a = Archive.create(os.path.join(archive_mng_path, 'archive_a'))
+        archive_a.init_metadata('https://example.com', 'git', '0.8', 'commit', {})
+        archive_b = Archive.create(os.path.join(archive_mng_path, 'archive_b'))
+        archive_b.init_metadata('https://example.com', 'git', '0.8', 'commit', {})
+        _ = Archive.create(os.path.join(archive_mng_path, 'archive_c'))
+
+        with open(os.path.join(archive_mng_path, 'invalid_archive'), 'w') as fd:
+            fd.write("Invalid archive file")
+
+        archives = manager.search('https://example.com', 'git', 'commit', dt)
+        self.assertListEqual(archives, [])
+
+        with self.assertLogs('perceval.archive', level='WARNING') as cm:
+            nindexed = manager.rebuild_catalog()
+        self.assertEqual(nindexed, 2)
+        self.assertEqual(len(cm.output), 1)
+        self.assertIn('Ignoring %s archive' % os.path.join(archive_mng_path, 'invalid_archive'),
+                      cm.output[0])
+
+        archives = manager.search('https://example.com', 'git', 'commit', dt)
+        self.assertListEqual(archives, [archive_a.archive_path, archive_b.archive_path])
+
+    @unittest.mock.patch('perceval.archive.ArchiveCatalog.INSERT_BATCH_SIZE', 2)
+    def test_rebuild_catalog_batches(self):
+        """Test if archives are closed and indexed in batches when the catalog is rebuilt"""
+
+        archive_mng_path = os.path.join(self.test_path, ARCHIVE_TEST_DIR)
+        manager = ArchiveManager(archive_mng_path)
+
+        dt = datetime_utcnow()
+
+        for x in range(5):
+            archive = Archive.create(os.path.join(archive_mng_path, 'archive_%s' % x))
+            archive.init_metadata('https://example.com', 'git', '0.8', 'commit', {})
+            archive.close()
+
+        closed = []
+        close = Archive.close
+
+        def mock_close(archive):
+            closed.append(archive.archive_path)
+            close(archive)
+
+        with unittest.mock.patch('perceval.archive.Archive.close', mock_close):
+            with unittest.mock.patch.object(manager.catalog, '_execute',
+                                            wraps=manager.catalog._execute) as mock_execute:
+                nindexed = manager.rebuild_catalog()
+
+        self.assertEqual(nindexed, 5)
+        self.assertEqual(len(closed), 5)
+
+        # Tables creation, clear and 3 batches of entries
+        self.assertEqual(mock_execute.call_count, 5)
+
+        archives = manager.search('https://example.com', 'git', 'commit', dt)
+        self.assertEqual(len(archives), 5)
+
+    def test_catalog_existing_directory(self):
+        """Test if the catalog is built when the manager opens a directory without it"""
+
+        archive_mng_path = os.path.join(self.test_path, ARCHIVE_TEST_DIR)
+        manager = ArchiveManager(archive_mng_path)
+
+        dt = datetime_utcnow()
+
+        archive = manager.create_archive()
+        archive.init_metadata('https://example.com', 'git', '0.8', 'commit', {})
+
+        os.remove(manager.catalog.catalog_path)
+
+        manager = ArchiveManager(archive_mng_path)
+        self.assertEqual(manager.catalog.exists(), True)
+
+        archives = manager.search('https://example.com', 'git', 'commit', dt)
+        self.assertListEqual(archives, [archive.archive_path])
+
+    def test_catalog_error(self):
+        """Test if catalog errors are raised as ArchiveManagerError exceptions"""
+
+        archive_mng_path = os.path.join(self.test_path, ARCHIVE_TEST_DIR)
+        manager = ArchiveManager(archive_mng_path)
+
+        with open(manager.catalog.catalog_path, 'w') as fd:
+            fd.write("Invalid database file")
+
+        with self.assertRaisesRegex(ArchiveManagerError, "catalog .+ error; cause: "):
+            manager.search('https://example.com', 'git', 'commit', datetime_utcnow())
+
+        with self.assertRaisesRegex(ArchiveManagerError, "catalog .+ error; cause: "):
+            manager.catalog.clear()
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -21,6 +21,7 @@
 #
 
 import argparse
+import concurrent.futures
 import datetime
 import io
 import json
@@ -38,18 +39,25 @@ from grimoirelab_toolkit.datetime import (InvalidDateError,
                                           str_to_datetime)
 from perceval.backends.core import __version__
 from perceval.archive import Archive, ArchiveManager
+from perceval.cache import UsersCache, ValidatorsCache
+from perceval.client import HttpClient, ValidatorStore
 from perceval.backend import (Backend,
                               BackendCommandArgumentParser,
                               BackendCommand,
                               BackendItemsGenerator,
+                              BackendJobsGenerator,
+                              FetchJob,
                               OriginUniqueField,
                               Summary,
                               uuid,
                               fetch,
                               fetch_from_archive,
+                              fetch_many,
                               find_backends,
+                              run_commands,
                               logger as backend_logger)
 from perceval.errors import ArchiveError, BackendError, BackendCommandArgumentParserError
+from perceval.output import ItemsWriter
 from perceval.utils import DEFAULT_DATETIME
 from base import TestCaseBackendArchive
 import mocked_package
@@ -234,6 +242,26 @@ class ErrorCommandBackend(CommandBackend):
             raise BackendError(cause="Unhandled exception")
 
 
+class KilledCommandBackend(CommandBackend):
+    """Backend whose process dies while fetching items"""
+
+    def fetch_items(self, category, **kwargs):
+        for item in super().fetch_items(category, **kwargs):
+            yield item
+            os._exit(1)
+
+
+class PoolCommandBackend(CommandBackend):
+    """Backend which processes its items in a pool of processes"""
+
+    def fetch_items(self, category, **kwargs):
+        items = [item for item in super().fetch_items(category, **kwargs)]
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=2) as executor:
+            for item in executor.map(dict, items):
+                yield item
+
+
 class MockedBackendCommand(BackendCommand):
     """Mocked backend command class used for testing"""
 
@@ -254,7 +282,8 @@ class MockedBackendCommand(BackendCommand):
                                               from_date=True,
                                               basic_auth=True,
                                               token_auth=True,
-                                              archive=True)
+                                              archive=True,
+                                              users_cache=True)
         parser.parser.add_argument('origin')
         parser.parser.add_argument('--subtype', dest='subtype')
 
@@ -544,6 +573,26 @@ class TestBackend(unittest.TestCase):
         for pos, item in enumerate(b.fetch()):
             self.assertDictEqual(item['search_fields'], expected[pos])
 
+    def test_extra_search_fields_skipped_logging(self):
+        """Test whether the UUID of the item is logged when a search field is not found"""
+
+        b = MockedBackend('test')
+        b.EXTRA_SEARCH_FIELDS = {
+            'pos': ['unknown']
+        }
+
+        with self.assertLogs(backend_logger, level='WARNING') as cm:
+            items = [item for item in b.fetch()]
+
+        self.assertEqual(len(items), 5)
+        self.assertEqual(len(cm.output), 5)
+
+        for x in range(5):
+            expected_uuid = uuid('test', str(x))
+            self.assertEqual(cm.output[x],
+                             "WARNING:perceval.backend:Extra search field 'pos' not found "
+                             "for item %s; field ignored" % expected_uuid)
+
     def test_tag(self):
         """Test whether tag value is initializated"""
 
@@ -614,6 +663,35 @@ class TestBackend(unittest.TestCase):
         self.assertEqual(b.archive.origin, b.origin)
         self.assertEqual(b.archive.category, MockedBackend.DEFAULT_CATEGORY)
 
+    def test_fetch_validators(self):
+        """Test whether the validators store is set to the client"""
+
+        b = MockedBackend('test')
+        self.assertIsNone(b.validators)
+
+        # Validators are not set by default
+        client = HttpClient('http://example.com/')
+
+        with unittest.mock.patch.object(MockedBackend, '_init_client', return_value=client):
+            _ = [item for item in b.fetch()]
+
+        self.assertIsNone(client.validators)
+
+        validators = ValidatorStore()
+        b.validators = validators
+
+        with unittest.mock.patch.object(MockedBackend, '_init_client', return_value=client):
+            _ = [item for item in b.fetch()]
+
+        self.assertIs(client.validators, validators)
+
+        # Clients that do not support them are not modified
+        b = MockedBackend('test')
+        b.validators = validators
+        _ = [item for item in b.fetch()]
+
+        self.assertIsNone(b.client)
+
     def test_fetch_wrong_category(self):
         """Check that an error is thrown if the category is not valid"""
 
@@ -853,6 +931,65 @@ class TestBackendArchive(TestCaseBackendArchive):
         with self.assertRaises(ArchiveError):
             _ = [item for item in b.fetch_from_archive()]
 
+    def test_fetch_flush_archive(self):
+        """Test whether pending items are written to the archive after fetching"""
+
+        archive_path = os.path.join(self.test_path, 'batcharchive')
+        archive = Archive.create(archive_path, batch_size=100)
+        backend = MockedBackend('test', archive=archive)
+
+        items = backend.fetch()
+        _ = next(items)
+        self.assertEqual(self._count_archived_items(archive_path), 0)
+
+        # Items are written when the generator is closed
+        items.close()
+        self.assertEqual(self._count_archived_items(archive_path), 1)
+
+        archive_path = os.path.join(self.test_path, 'batcharchive2')
+        archive = Archive.create(archive_path, batch_size=100)
+        backend = MockedBackend('test', archive=archive)
+
+        _ = [item for item in backend.fetch()]
+        self.assertEqual(self._count_archived_items(archive_path), 5)
+
+    def test_fetch_flush_archive_error(self):
+        """Test whether errors writing the archive do not replace the fetch error"""
+
+        archive_path = os.path.join(self.test_path, 'batcharchive')
+        archive = Archive.create(archive_path, batch_size=100)
+        backend = ErrorCommandBackend('test', archive=archive)
+
+        error = ArchiveError(cause="disk full")
+
+        with unittest.mock.patch.object(archive, 'flush', side_effect=error):
+            with self.assertLogs(backend_logger, level='ERROR') as cm:
+                with self.assertRaisesRegex(BackendError, "Unhandled exception"):
+                    _ = [item for item in backend.fetch()]
+
+        self.assertEqual(cm.output[0],
+                         'ERROR:perceval.backend:Pending raw items not written to %s archive; '
+                         'disk full' % archive_path)
+
+        # When every item was fetched, the error is raised
+        archive_path = os.path.join(self.test_path, 'batcharchive2')
+        archive = Archive.create(archive_path, batch_size=100)
+        backend = MockedBackend('test', archive=archive)
+
+        with unittest.mock.patch.object(archive, 'flush', side_effect=error):
+            with self.assertRaisesRegex(ArchiveError, "disk full"):
+                _ = [item for item in backend.fetch()]
+
+    @staticmethod
+    def _count_archived_items(archive_path):
+        conn = sqlite3.connect(archive_path)
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM " + Archive.ARCHIVE_TABLE)
+        nrows = cursor.fetchone()[0]
+        cursor.close()
+        conn.close()
+        return nrows
+
     def test_fetch_client_not_implemented(self):
         """Test whether an NotImplementedError exception is thrown"""
 
@@ -889,6 +1026,38 @@ class TestBackendCommandArgumentParser(unittest.TestCase):
         self.assertIsInstance(parsed_args, argparse.Namespace)
         self.assertEqual(parsed_args.tag, 'test')
         self.assertEqual(parsed_args.filter_classified, True)
+        self.assertIsNone(parsed_args.http_cache_path)
+        self.assertEqual(parsed_args.json_line, False)
+        self.assertEqual(parsed_args.no_sort_keys, False)
+        self.assertEqual(parsed_args.output_buffer_size, ItemsWriter.DEFAULT_BUFFER_SIZE)
+        self.assertEqual(parsed_args.threaded_output, False)
+        self.assertEqual(parsed_args.fast_json, False)
+
+    def test_parse_output_args(self):
+        """Test if the output arguments are parsed"""
+
+        args = ['--json-line', '--no-sort-keys',
+                '--output-buffer-size', '1024',
+                '--threaded-output', '--fast-json']
+
+        parser = BackendCommandArgumentParser(MockedBackendCommand.BACKEND)
+        parsed_args = parser.parse(*args)
+
+        self.assertEqual(parsed_args.json_line, True)
+        self.assertEqual(parsed_args.no_sort_keys, True)
+        self.assertEqual(parsed_args.output_buffer_size, 1024)
+        self.assertEqual(parsed_args.threaded_output, True)
+        self.assertEqual(parsed_args.fast_json, True)
+
+    def test_parse_http_cache_args(self):
+        """Test if the HTTP cache argument is parsed"""
+
+        args = ['--http-cache-path', '/tmp/http.db']
+
+        parser = BackendCommandArgumentParser(MockedBackendCommand.BACKEND)
+        parsed_args = parser.parse(*args)
+
+        self.assertEqual(parsed_args.http_cache_path, '/tmp/http.db')
 
     def test_parse_default_filter_classified(self):
         """Test default value of filter-classified options"""
@@ -1052,6 +1221,26 @@ class TestBackendCommandArgumentParser(unittest.TestCase):
         self.assertEqual(parsed_args.no_archive, False)
         self.assertEqual(parsed_args.archived_since, expected_dt)
 
+    def test_parse_users_cache_args(self):
+        """Test if users cache arguments are parsed"""
+
+        parser = BackendCommandArgumentParser(MockedBackendCommand.BACKEND,
+                                              users_cache=True)
+        parsed_args = parser.parse()
+
+        self.assertIsNone(parsed_args.users_cache_path)
+        self.assertEqual(parsed_args.users_cache_ttl, UsersCache.DEFAULT_TTL)
+        self.assertEqual(parsed_args.users_cache_max_size, UsersCache.DEFAULT_MAX_SIZE)
+
+        args = ['--users-cache-path', '/tmp/users.db',
+                '--users-cache-ttl', '3600',
+                '--users-cache-max-size', '10']
+        parsed_args = parser.parse(*args)
+
+        self.assertEqual(parsed_args.users_cache_path, '/tmp/users.db')
+        self.assertEqual(parsed_args.users_cache_ttl, 3600)
+        self.assertEqual(parsed_args.users_cache_max_size, 10)
+
     def test_incompatible_fetch_archive_and_no_archive(self):
         """Test if fetch-archive and no-archive arguments are incompatible"""
 
@@ -1169,6 +1358,12 @@ class TestBackendCommand(unittest.TestCase):
         self.assertIsInstance(cmd.outfile, io.TextIOWrapper)
         self.assertEqual(cmd.outfile.name, self.fout_path)
 
+        self.assertIsInstance(cmd.writer, ItemsWriter)
+        self.assertEqual(cmd.writer.outfile, cmd.outfile)
+        self.assertEqual(cmd.writer.json_line, False)
+        self.assertEqual(cmd.writer.sort_keys, True)
+        self.assertEqual(cmd.writer.threaded, False)
+
         manager = cmd.archive_manager
         self.assertIsInstance(manager, ArchiveManager)
         self.assertEqual(manager.dirpath, self.test_path)
@@ -1207,6 +1402,51 @@ class TestBackendCommand(unittest.TestCase):
         cmd = MockedBackendCommand(*args)
         self.assertEqual(cmd.archive_manager, None)
 
+    def test_users_cache_on_init(self):
+        """Test if the users cache is set when the class is initialized"""
+
+        cache_path = os.path.join(self.test_path, 'users.db')
+
+        args = ['--users-cache-path', cache_path,
+                '--users-cache-ttl', '3600',
+                '--users-cache-max-size', '10',
+                'http://example.com/']
+
+        cmd = MockedBackendCommand(*args)
+
+        users_cache = cmd.parsed_args.users_cache
+        self.assertIsInstance(users_cache, UsersCache)
+        self.assertEqual(users_cache.cache_path, cache_path)
+        self.assertEqual(users_cache.ttl, 3600)
+        self.assertEqual(users_cache.max_size, 10)
+        self.assertTrue(os.path.exists(cache_path))
+
+        # No path is given, so the cache is not set
+        cmd = MockedBackendCommand('http://example.com/')
+        self.assertNotIn('users_cache', cmd.parsed_args)
+
+    def test_http_cache_on_init(self):
+        """Test if the HTTP validators cache is set when the class is initialized"""
+
+        cache_path = os.path.join(self.test_path, 'http.db')
+
+        cmd = MockedBackendCommand('--http-cache-path', cache_path, 'http://example.com/')
+
+        validators = cmd.parsed_args.validators
+        self.assertIsInstance(validators, ValidatorsCache)
+        self.assertEqual(validators.cache_path, cache_path)
+        self.assertTrue(os.path.exists(cache_path))
+
+        # The cache is set to the backend
+        job = cmd.fetch_job()
+
+        with BackendItemsGenerator(job.backend_class, job.backend_args, job.category) as big:
+            self.assertIs(big.backend.validators, validators)
+
+        # No path is given, so the cache is not set
+        cmd = MockedBackendCommand('http://example.com/')
+        self.assertNotIn('validators', cmd.parsed_args)
+
     def test_pre_init(self):
         """Test if pre_init method is called during initialization"""
 
@@ -1431,6 +1671,36 @@ class TestBackendCommand(unittest.TestCase):
             self.assertEqual(item['category'], MockedBackend.DEFAULT_CATEGORY)
             self.assertEqual(item['classified_fields_filtered'], None)
 
+    def test_run_threaded_output(self):
+        """Test run method writing the items in a background thread"""
+
+        args = ['--no-archive',
+                '--from-date', '2015-01-01', '--tag', 'test',
+                '--output', self.fout_path, 'http://example.com/',
+                '--json-line', '--no-sort-keys',
+                '--output-buffer-size', '10',
+                '--threaded-output']
+
+        cmd = MockedBackendCommand(*args)
+        cmd.run()
+
+        # Items are written once the command finishes
+        with open(self.fout_path) as fout:
+            items = [json.loads(line) for line in fout.readlines()]
+
+        cmd.outfile.close()
+
+        self.assertEqual(len(items), 5)
+
+        for x in range(5):
+            item = items[x]
+            expected_uuid = uuid('http://example.com/', str(x))
+
+            self.assertEqual(item['data']['item'], x)
+            self.assertEqual(item['origin'], 'http://example.com/')
+            self.assertEqual(item['uuid'], expected_uuid)
+            self.assertEqual(item['tag'], 'test')
+
     def test_filter_classified_fields(self):
         """Test if fields are filtered with filter-classified option is active"""
 
@@ -2370,6 +2640,218 @@ class TestFetchFromArchive(unittest.TestCase):
             self.assertEqual(item['classified_fields_filtered'], None)
 
 
+class TestBackendJobsGenerator(unittest.TestCase):
+    """Unit tests for BackendJobsGenerator"""
+
+    def setUp(self):
+        self.test_path = tempfile.mkdtemp(prefix='perceval_')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_path)
+
+    def test_items(self):
+        """Test whether the items of several jobs are returned"""
+
+        jobs = [
+            (CommandBackend, {'origin': 'http://example.com/%s' % x, 'tag': 'test'}, 'mock_item')
+            for x in range(3)
+        ]
+
+        with BackendJobsGenerator(jobs, workers=2) as bjg:
+            items = [item for item in bjg.items]
+            summaries = bjg.summaries
+            errors = bjg.errors
+
+        self.assertEqual(len(items), 15)
+        self.assertDictEqual(errors, {})
+
+        for job_id in range(3):
+            origin = 'http://example.com/%s' % job_id
+            job_items = [item for jid, item in items if jid == job_id]
+
+            # Items of the same job keep their order
+            self.assertEqual(len(job_items), 5)
+
+            for x in range(5):
+                item = job_items[x]
+                self.assertEqual(item['data']['item'], x)
+                self.assertEqual(item['origin'], origin)
+                self.assertEqual(item['uuid'], uuid(origin, str(x)))
+                self.assertEqual(item['tag'], 'test')
+
+            summary = summaries[job_id]
+            self.assertIsInstance(summary, Summary)
+            self.assertEqual(summary.fetched, 5)
+            self.assertEqual(summary.last_uuid, uuid(origin, '4'))
+
+    def test_job_error(self):
+        """Test whether a failed job does not stop the rest of jobs"""
+
+        manager = ArchiveManager(self.test_path)
+
+        jobs = [
+            FetchJob(ErrorCommandBackend, {'origin': 'http://example.com/'}, 'mock_item',
+                     manager=manager),
+            FetchJob(CommandBackend, {'origin': 'http://example.org/'}, 'mock_item',
+                     manager=manager)
+        ]
+
+        with BackendJobsGenerator(jobs, workers=2) as bjg:
+            items = [item for item in bjg.items]
+            summaries = bjg.summaries
+            errors = bjg.errors
+
+        # The first item of the failed job was produced before the error
+        self.assertEqual(len([item for jid, item in items if jid == 0]), 1)
+        self.assertEqual(len([item for jid, item in items if jid == 1]), 5)
+        self.assertDictEqual(errors, {0: 'Unhandled exception'})
+        self.assertListEqual(list(summaries.keys()), [1])
+
+        # The archive of the failed job was removed
+        filepaths = manager.search('http://example.com/', 'ErrorCommandBackend',
+                                   'mock_item', str_to_datetime('1970-01-01'))
+        self.assertListEqual(filepaths, [])
+
+        filepaths = manager.search('http://example.org/', 'CommandBackend',
+                                   'mock_item', str_to_datetime('1970-01-01'))
+        self.assertEqual(len(filepaths), 1)
+
+    def test_job_process_died(self):
+        """Test whether a job fails when its process dies"""
+
+        jobs = [
+            (KilledCommandBackend, {'origin': 'http://example.com/'}, 'mock_item'),
+            (CommandBackend, {'origin': 'http://example.org/'}, 'mock_item')
+        ]
+
+        with BackendJobsGenerator(jobs, workers=2) as bjg:
+            items = [item for item in bjg.items]
+            summaries = bjg.summaries
+            errors = bjg.errors
+
+        self.assertEqual(len([item for jid, item in items if jid == 1]), 5)
+        self.assertDictEqual(errors, {0: 'worker process exited with code 1'})
+        self.assertListEqual(list(summaries.keys()), [1])
+
+    def test_job_pool(self):
+        """Test whether jobs can run their own pools of processes"""
+
+        jobs = [
+            (PoolCommandBackend, {'origin': 'http://example.com/%s' % x}, 'mock_item')
+            for x in range(2)
+        ]
+
+        with BackendJobsGenerator(jobs, workers=2) as bjg:
+            items = [item for item in bjg.items]
+            errors = bjg.errors
+
+        self.assertDictEqual(errors, {})
+
+        for job_id in range(2):
+            job_items = [item for jid, item in items if jid == job_id]
+            self.assertListEqual([item['data']['item'] for item in job_items],
+                                 [0, 1, 2, 3, 4])
+
+    def test_fetch_archive(self):
+        """Test whether jobs fetch items from archives"""
+
+        manager = ArchiveManager(self.test_path)
+        args = {'origin': 'http://example.com/', 'tag': 'test'}
+
+        items = fetch(CommandBackend, args, 'mock_item', manager=manager)
+        self.assertEqual(len([item for item in items]), 5)
+
+        jobs = [
+            FetchJob(CommandBackend, args, 'mock_item', manager=manager,
+                     fetch_archive=True, archived_after=str_to_datetime('1970-01-01'))
+        ]
+
+        with BackendJobsGenerator(jobs) as bjg:
+            items = [item for _, item in bjg.items]
+
+        self.assertEqual(len(items), 5)
+
+        for x in range(5):
+            self.assertEqual(items[x]['data']['item'], x)
+            self.assertEqual(items[x]['data']['archive'], True)
+
+    def test_no_jobs(self):
+        """Test whether nothing is returned when there are no jobs"""
+
+        with BackendJobsGenerator([]) as bjg:
+            items = [item for item in bjg.items]
+
+        self.assertListEqual(items, [])
+        self.assertDictEqual(bjg.summaries, {})
+
+
+class TestFetchMany(unittest.TestCase):
+    """Unit tests for fetch_many function"""
+
+    def test_items(self):
+        """Test whether the items of several jobs are returned"""
+
+        jobs = [
+            (CommandBackend, {'origin': 'http://example.com/'}, 'mock_item'),
+            (CommandBackend, {'origin': 'http://example.org/'}, 'alt_item')
+        ]
+
+        items = [item for item in fetch_many(jobs, workers=2)]
+        self.assertEqual(len(items), 10)
+
+        items_a = [item for job_id, item in items if job_id == 0]
+        items_b = [item for job_id, item in items if job_id == 1]
+
+        for x in range(5):
+            self.assertEqual(items_a[x]['data']['item'], x)
+            self.assertEqual(items_a[x]['origin'], 'http://example.com/')
+            self.assertEqual(items_a[x]['category'], 'mock_item')
+            self.assertEqual(items_b[x]['data']['item'], x)
+            self.assertEqual(items_b[x]['origin'], 'http://example.org/')
+            self.assertEqual(items_b[x]['category'], 'alt_item')
+
+
+class TestRunCommands(unittest.TestCase):
+    """Unit tests for run_commands function"""
+
+    def setUp(self):
+        self.test_path = tempfile.mkdtemp(prefix='perceval_')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_path)
+
+    def test_run_commands(self):
+        """Test whether items of each command are written to its output"""
+
+        fout_paths = [os.path.join(self.test_path, 'out%s' % x) for x in range(2)]
+
+        cmds = [
+            MockedBackendCommand('--no-archive', '--json-line', '--tag', 'test',
+                                 '--output', fout_paths[x], 'http://example.com/%s' % x)
+            for x in range(2)
+        ]
+
+        with self.assertLogs('perceval.backend', level='INFO') as cm:
+            nfailed = run_commands(cmds, workers=2)
+
+        for cmd in cmds:
+            cmd.outfile.close()
+
+        self.assertEqual(nfailed, 0)
+        self.assertEqual(len([msg for msg in cm.output if 'Summary of results' in msg]), 2)
+
+        for x in range(2):
+            with open(fout_paths[x]) as fout:
+                items = [json.loads(line) for line in fout.readlines()]
+
+            self.assertEqual(len(items), 5)
+
+            for y in range(5):
+                self.assertEqual(items[y]['data']['item'], y)
+                self.assertEqual(items[y]['origin'], 'http://example.com/%s' % x)
+                self.assertEqual(items[y]['tag'], 'test')
+
+
 class TestFindBackends(unittest.TestCase):
     """Unit tests for find_backends function"""
 
@@ -25,6 +25,7 @@ import datetime
 import os
 import shutil
 import unittest
+import urllib.parse
 
 import httpretty
 import pkg_resources
@@ -35,7 +36,8 @@ pkg_resources.declare_namespace('perceval.backends')
 from perceval.backend import BackendCommandArgumentParser
 from perceval.errors import BackendError, ParseError
 from perceval.utils import DEFAULT_DATETIME
-from perceval.backends.core.bugzilla import (Bugzilla,
+from perceval.backends.core.bugzilla import (logger,
+                                             Bugzilla,
                                              BugzillaCommand,
                                              BugzillaClient)
 from base import TestCaseBackendArchive
@@ -68,6 +70,8 @@ class TestBugzillaBackend(unittest.TestCase):
         self.assertEqual(bg.origin, BUGZILLA_SERVER_URL)
         self.assertEqual(bg.tag, 'test')
         self.assertEqual(bg.max_bugs, 5)
+        self.assertEqual(bg.workers, 1)
+        self.assertEqual(bg.read_ahead, 0)
         self.assertIsNone(bg.client)
 
         # When tag is empty or None it will be set to
@@ -170,18 +174,6 @@ class TestBugzillaBackend(unittest.TestCase):
                 'order': ['changeddate'],
                 'chfieldfrom': ['1970-01-01 00:00:00']
             },
-            {
-                'ctype': ['csv'],
-                'limit': ['500'],
-                'order': ['changeddate'],
-                'chfieldfrom': ['2009-07-30 11:35:33']
-            },
-            {
-                'ctype': ['csv'],
-                'limit': ['500'],
-                'order': ['changeddate'],
-                'chfieldfrom': ['2015-08-12 18:32:11']
-            },
             {
                 'ctype': ['xml'],
                 'id': ['15', '18', '17', '20', '19'],
@@ -202,6 +194,18 @@ class TestBugzillaBackend(unittest.TestCase):
             {
                 'id': ['19']
             },
+            {
+                'ctype': ['csv'],
+                'limit': ['500'],
+                'order': ['changeddate'],
+                'chfieldfrom': ['2009-07-30 11:35:33']
+            },
+            {
+                'ctype': ['csv'],
+                'limit': ['500'],
+                'order': ['changeddate'],
+                'chfieldfrom': ['2015-08-12 18:32:11']
+            },
             {
                 'ctype': ['xml'],
                 'id': ['30', '888'],
@@ -220,6 +224,77 @@ class TestBugzillaBackend(unittest.TestCase):
         for i in range(len(expected)):
             self.assertDictEqual(requests[i].querystring, expected[i])
 
+    @httpretty.activate
+    def test_fetch_workers(self):
+        """Test whether bugs are returned in order when the activity is fetched concurrently"""
+
+        def fetch_bugs(workers, read_ahead=0):
+            requests = []
+            bodies_csv = [read_file('data/bugzilla/bugzilla_buglist.csv'),
+                          read_file('data/bugzilla/bugzilla_buglist_next.csv'),
+                          ""]
+            bodies_xml = [read_file('data/bugzilla/bugzilla_version.xml', mode='rb'),
+                          read_file('data/bugzilla/bugzilla_bugs_details.xml', mode='rb'),
+                          read_file('data/bugzilla/bugzilla_bugs_details_next.xml', mode='rb')]
+            body_activity = read_file('data/bugzilla/bugzilla_bug_activity.html', mode='rb')
+            body_activity_empty = read_file('data/bugzilla/bugzilla_bug_activity_empty.html', mode='rb')
+
+            def request_callback(method, uri, headers):
+                if uri.startswith(BUGZILLA_BUGLIST_URL):
+                    body = bodies_csv.pop(0)
+                elif uri.startswith(BUGZILLA_BUG_URL):
+                    body = bodies_xml.pop(0)
+                elif urllib.parse.parse_qs(urllib.parse.urlparse(uri).query)['id'][0] in ('18', '30'):
+                    body = body_activity
+                else:
+                    body = body_activity_empty
+
+                requests.append(uri)
+
+                return (200, headers, body)
+
+            httpretty.reset()
+            httpretty.register_uri(httpretty.GET,
+                                   BUGZILLA_BUGLIST_URL,
+                                   body=request_callback)
+            httpretty.register_uri(httpretty.GET,
+                                   BUGZILLA_BUG_URL,
+                                   body=request_callback)
+            httpretty.register_uri(httpretty.GET,
+                                   BUGZILLA_BUG_ACTIVITY_URL,
+                                   body=request_callback)
+
+            bg = Bugzilla(BUGZILLA_SERVER_URL,
+                          max_bugs=5, max_bugs_csv=500,
+                          workers=workers, read_ahead=read_ahead)
+            bugs = [bug['data'] for bug in bg.fetch()]
+
+            return bugs, requests
+
+        bugs, requests = fetch_bugs(1)
+        bugs_workers, requests_workers = fetch_bugs(4)
+
+        self.assertEqual(len(bugs_workers), 7)
+        self.assertListEqual(bugs_workers, bugs)
+        self.assertEqual(len(requests_workers), len(requests))
+
+        bug_ids = [bug['bug_id'][0]['__text__'] for bug in bugs_workers]
+        self.assertListEqual(bug_ids, ['15', '18', '17', '20', '19', '30', '888'])
+
+        nactivity = [len(bug['activity']) for bug in bugs_workers]
+        self.assertListEqual(nactivity, [0, 14, 0, 0, 0, 14, 0])
+
+        with self.assertLogs(logger, level='INFO') as cm:
+            bugs_ahead, requests_ahead = fetch_bugs(4, read_ahead=2)
+
+        self.assertListEqual(bugs_ahead, bugs)
+        self.assertEqual(len(requests_ahead), len(requests))
+
+        progress = [msg for msg in cm.output if 'Fetching bugs' in msg]
+        self.assertListEqual(progress,
+                             ['INFO:perceval.backends.core.bugzilla:Fetching bugs: 5/5 listed so far',
+                              'INFO:perceval.backends.core.bugzilla:Fetching bugs: 7/7 listed so far'])
+
     @httpretty.activate
     def test_search_fields(self):
         """Test whether the search_fields is properly set"""
@@ -750,6 +825,25 @@ class TestBugzillaBackendParsers(unittest.TestCase):
             bugs = Bugzilla.parse_bugs_details(raw_xml)
             _ = [bug for bug in bugs]
 
+    def test_parse_truncated_bug_details(self):
+        """Test whether the bugs found before an invalid part of the XML are returned"""
+
+        raw_xml = read_file('data/bugzilla/bugzilla_bugs_details.xml')
+
+        # Remove the stream after the second bug
+        end = raw_xml.index('</bug>', raw_xml.index('</bug>') + 1) + len('</bug>')
+        raw_xml = raw_xml[:end] + '\n<bug>\n<bug_id>17</bu'
+
+        bugs = Bugzilla.parse_bugs_details(raw_xml)
+        result = []
+
+        with self.assertRaises(ParseError):
+            for bug in bugs:
+                result.append(bug)
+
+        bug_ids = [bug['bug_id'][0]['__text__'] for bug in result]
+        self.assertListEqual(bug_ids, ['15', '18'])
+
     def test_parse_activity(self):
         """Test activity bug parsing"""
 
@@ -825,6 +919,8 @@ class TestBugzillaCommand(unittest.TestCase):
         args = ['--backend-user', 'jsmith@example.com',
                 '--backend-password', '1234',
                 '--max-bugs', '10', '--max-bugs-csv', '5',
+                '--workers', '4',
+                '--read-ahead', '2',
                 '--tag', 'test',
                 '--from-date', '1970-01-01',
                 '--no-archive',
@@ -835,6 +931,8 @@ class TestBugzillaCommand(unittest.TestCase):
         self.assertEqual(parsed_args.password, '1234')
         self.assertEqual(parsed_args.max_bugs, 10)
         self.assertEqual(parsed_args.max_bugs_csv, 5)
+        self.assertEqual(parsed_args.workers, 4)
+        self.assertEqual(parsed_args.read_ahead, 2)
         self.assertEqual(parsed_args.tag, 'test')
         self.assertEqual(parsed_args.no_archive, True)
         self.assertEqual(parsed_args.url, BUGZILLA_SERVER_URL)
@@ -0,0 +1,647 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import os
+import pickle
+import shutil
+import sqlite3
+import tempfile
+import unittest
+import unittest.mock
+
+import requests
+import requests.structures
+
+from perceval.archive import Archive
+from perceval.cache import (CachedUsers,
+                            CommitsCache,
+                            MBoxIndex,
+                            UsersCache,
+                            ValidatorsCache,
+                            init_users_cache)
+from perceval.client import ValidatorEntry
+from perceval.errors import CacheError
+
+
+def count_number_rows(db, table_name):
+    conn = sqlite3.connect(db)
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM " + table_name)
+    nrows = cursor.fetchone()[0]
+    cursor.close()
+    return nrows
+
+
+class MockedBackend:
+    """Mocked backend used to test the users cache"""
+
+    def __init__(self, archive=None):
+        self.archive = archive
+
+
+class TestUsersCache(unittest.TestCase):
+    """UsersCache tests"""
+
+    def setUp(self):
+        self.test_path = tempfile.mkdtemp(prefix='perceval_')
+        self.cache_path = os.path.join(self.test_path, 'cache', 'users.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_path)
+
+    def test_init(self):
+        """Test whether the cache is created"""
+
+        cache = UsersCache(self.cache_path, ttl=10, max_size=5)
+
+        self.assertEqual(cache.cache_path, self.cache_path)
+        self.assertEqual(cache.ttl, 10)
+        self.assertEqual(cache.max_size, 5)
+        self.assertTrue(os.path.exists(self.cache_path))
+        self.assertEqual(count_number_rows(self.cache_path, UsersCache.USERS_TABLE), 0)
+
+        # Opening it again keeps the data
+        cache.set('GitHub', 'https://github.com', 'jsmith', {'login': 'jsmith'})
+
+        cache = UsersCache(self.cache_path)
+        self.assertEqual(cache.ttl, UsersCache.DEFAULT_TTL)
+        self.assertEqual(cache.max_size, UsersCache.DEFAULT_MAX_SIZE)
+        self.assertEqual(count_number_rows(self.cache_path, UsersCache.USERS_TABLE), 1)
+
+    def test_set_get(self):
+        """Test whether users are stored and retrieved"""
+
+        cache = UsersCache(self.cache_path)
+
+        cache.set('GitHub', 'https://github.com', 'jsmith', {'login': 'jsmith'})
+        cache.set('GitHub', 'https://example.com', 'jsmith', {'login': 'jsmith', 'id': 2})
+        cache.set('Redmine', 'https://example.com', 3, None)
+
+        user = cache.get('GitHub', 'https://github.com', 'jsmith')
+        self.assertDictEqual(user, {'login': 'jsmith'})
+
+        user = cache.get('GitHub', 'https://example.com', 'jsmith')
+        self.assertDictEqual(user, {'login': 'jsmith', 'id': 2})
+
+        user = cache.get('Redmine', 'https://example.com', 3)
+        self.assertIsNone(user)
+
+        with self.assertRaises(KeyError):
+            cache.get('GitLab', 'https://github.com', 'jsmith')
+
+        # Update an entry
+        cache.set('GitHub', 'https://github.com', 'jsmith', {'login': 'jsmith', 'id': 1})
+
+        user = cache.get('GitHub', 'https://github.com', 'jsmith')
+        self.assertDictEqual(user, {'login': 'jsmith', 'id': 1})
+        self.assertEqual(count_number_rows(self.cache_path, UsersCache.USERS_TABLE), 3)
+
+    @unittest.mock.patch('perceval.cache.time.time')
+    def test_ttl(self, mock_time):
+        """Test whether expired entries are not returned"""
+
+        cache = UsersCache(self.cache_path, ttl=60)
+
+        mock_time.return_value = 1000
+        cache.set('GitHub', 'https://github.com', 'jsmith', {'login': 'jsmith'})
+
+        mock_time.return_value = 1060
+        user = cache.get('GitHub', 'https://github.com', 'jsmith')
+        self.assertDictEqual(user, {'login': 'jsmith'})
+
+        mock_time.return_value = 1061
+        with self.assertRaises(KeyError):
+            cache.get('GitHub', 'https://github.com', 'jsmith')
+
+        # The expired entry was removed
+        self.assertEqual(count_number_rows(self.cache_path, UsersCache.USERS_TABLE), 0)
+
+        # Entries never expire without a ttl
+        cache = UsersCache(self.cache_path, ttl=None)
+
+        mock_time.return_value = 1000
+        cache.set('GitHub', 'https://github.com', 'jsmith', {'login': 'jsmith'})
+
+        mock_time.return_value = 100000000
+        user = cache.get('GitHub', 'https://github.com', 'jsmith')
+        self.assertDictEqual(user, {'login': 'jsmith'})
+
+    @unittest.mock.patch('perceval.cache.time.time')
+    def test_lru_eviction(self, mock_time):
+        """Test whether the least recently used entries are removed"""
+
+        cache = UsersCache(self.cache_path, max_size=2)
+
+        mock_time.return_value = 1000
+        cache.set('GitHub', 'https://github.com', 'user1', 1)
+
+        mock_time.return_value = 1001
+        cache.set('GitHub', 'https://github.com', 'user2', 2)
+
+        # Accessing 'user1' makes 'user2' the least recently used
+        mock_time.return_value = 1002
+        cache.get('GitHub', 'https://github.com', 'user1')
+
+        mock_time.return_value = 1003
+        cache.set('GitHub', 'https://github.com', 'user3', 3)
+
+        self.assertEqual(count_number_rows(self.cache_path, UsersCache.USERS_TABLE), 2)
+        self.assertEqual(cache.get('GitHub', 'https://github.com', 'user1'), 1)
+        self.assertEqual(cache.get('GitHub', 'https://github.com', 'user3'), 3)
+
+        with self.assertRaises(KeyError):
+            cache.get('GitHub', 'https://github.com', 'user2')
+
+    @unittest.mock.patch('perceval.cache.time.time')
+    def test_lru_eviction_batches(self, mock_time):
+        """Test whether the size of the cache is checked every few insertions"""
+
+        cache = UsersCache(self.cache_path, max_size=100)
+
+        for i in range(110):
+            mock_time.return_value = 1000 + i
+            cache.set('GitHub', 'https://github.com', 'user%s' % i, i)
+
+        # The cache was checked when 'user100' was inserted
+        self.assertEqual(count_number_rows(self.cache_path, UsersCache.USERS_TABLE), 109)
+
+        mock_time.return_value = 1110
+        cache.set('GitHub', 'https://github.com', 'user110', 110)
+
+        self.assertEqual(count_number_rows(self.cache_path, UsersCache.USERS_TABLE), 100)
+
+        for i in range(11):
+            with self.assertRaises(KeyError):
+                cache.get('GitHub', 'https://github.com', 'user%s' % i)
+        self.assertEqual(cache.get('GitHub', 'https://github.com', 'user11'), 11)
+
+    @unittest.mock.patch('perceval.cache.time.time')
+    def test_access_times(self, mock_time):
+        """Test whether access times are written in batches"""
+
+        def read_access_times():
+            conn = sqlite3.connect(self.cache_path)
+            rows = conn.execute("SELECT login, accessed_on FROM " + UsersCache.USERS_TABLE).fetchall()
+            conn.close()
+            return dict(rows)
+
+        cache = UsersCache(self.cache_path)
+
+        mock_time.return_value = 1000
+        cache.set('GitHub', 'https://github.com', 'user1', 1)
+        cache.set('GitHub', 'https://github.com', 'user2', 2)
+
+        # Access times are not written when the users are read
+        mock_time.return_value = 1001
+        cache.get('GitHub', 'https://github.com', 'user1')
+        self.assertDictEqual(read_access_times(), {'user1': 1000, 'user2': 1000})
+
+        # They are written with the next insertion
+        mock_time.return_value = 1002
+        cache.set('GitHub', 'https://github.com', 'user3', 3)
+        self.assertDictEqual(read_access_times(), {'user1': 1001, 'user2': 1000, 'user3': 1002})
+
+        # or when there are too many pending
+        with unittest.mock.patch.object(UsersCache, 'ACCESS_BATCH_SIZE', 2):
+            mock_time.return_value = 1003
+            cache.get('GitHub', 'https://github.com', 'user2')
+            self.assertDictEqual(read_access_times(), {'user1': 1001, 'user2': 1000, 'user3': 1002})
+
+            mock_time.return_value = 1004
+            cache.get('GitHub', 'https://github.com', 'user3')
+            self.assertDictEqual(read_access_times(), {'user1': 1001, 'user2': 1003, 'user3': 1004})
+
+    def test_pickle(self):
+        """Test whether the cache can be sent to other processes"""
+
+        cache = UsersCache(self.cache_path, ttl=10, max_size=5)
+        cache.set('GitHub', 'https://github.com', 'jsmith', {'login': 'jsmith'})
+
+        cache = pickle.loads(pickle.dumps(cache))
+
+        self.assertEqual(cache.cache_path, self.cache_path)
+        self.assertEqual(cache.ttl, 10)
+        self.assertEqual(cache.max_size, 5)
+        self.assertDictEqual(cache.get('GitHub', 'https://github.com', 'jsmith'), {'login': 'jsmith'})
+
+    @unittest.mock.patch('perceval.cache.time.time')
+    def test_purge(self, mock_time):
+        """Test whether expired entries are purged"""
+
+        cache = UsersCache(self.cache_path, ttl=60)
+
+        mock_time.return_value = 1000
+        cache.set('GitHub', 'https://github.com', 'user1', 1)
+        cache.set('GitHub', 'https://github.com', 'user2', 2)
+
+        mock_time.return_value = 1030
+        cache.set('GitHub', 'https://github.com', 'user3', 3)
+
+        mock_time.return_value = 1080
+        nremoved = cache.purge()
+
+        self.assertEqual(nremoved, 2)
+        self.assertEqual(count_number_rows(self.cache_path, UsersCache.USERS_TABLE), 1)
+        self.assertEqual(cache.get('GitHub', 'https://github.com', 'user3'), 3)
+
+    def test_clear(self):
+        """Test whether every entry is removed"""
+
+        cache = UsersCache(self.cache_path)
+        cache.set('GitHub', 'https://github.com', 'user1', 1)
+        cache.set('Slack', 'https://slack.com', 'user2', 2)
+
+        cache.clear()
+
+        self.assertEqual(count_number_rows(self.cache_path, UsersCache.USERS_TABLE), 0)
+
+    def test_cache_error(self):
+        """Test whether an exception is thrown when the cache cannot be accessed"""
+
+        with open(self.cache_path.replace('cache/', ''), 'w') as fd:
+            fd.write("Invalid database file")
+
+        with self.assertRaisesRegex(CacheError, "users cache .+ error"):
+            UsersCache(self.cache_path.replace('cache/', ''))
+
+
+class TestCachedUsers(unittest.TestCase):
+    """CachedUsers tests"""
+
+    def setUp(self):
+        self.test_path = tempfile.mkdtemp(prefix='perceval_')
+        self.cache = UsersCache(os.path.join(self.test_path, 'users.db'))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_path)
+
+    def test_users(self):
+        """Test whether users are read and written to the persistent cache"""
+
+        users = self.cache.users('Slack', 'https://slack.com')
+        self.assertIsInstance(users, CachedUsers)
+        self.assertEqual(users.backend_name, 'Slack')
+        self.assertEqual(users.base_url, 'https://slack.com')
+
+        self.assertNotIn('U0001', users)
+
+        users['U0001'] = {'id': 'U0001'}
+        self.assertIn('U0001', users)
+        self.assertDictEqual(users['U0001'], {'id': 'U0001'})
+
+        # A new set of users reads them from the persistent cache
+        users = self.cache.users('Slack', 'https://slack.com')
+        self.assertEqual(len(users), 0)
+        self.assertIn('U0001', users)
+        self.assertDictEqual(users['U0001'], {'id': 'U0001'})
+
+        users = self.cache.users('Slack', 'https://example.com')
+        self.assertNotIn('U0001', users)
+
+    def test_cache_error(self):
+        """Test whether errors accessing the cache are ignored"""
+
+        users = self.cache.users('Slack', 'https://slack.com')
+
+        with unittest.mock.patch.object(UsersCache, '_execute',
+                                        side_effect=CacheError(cause='locked')):
+            with self.assertLogs('perceval.cache', level='WARNING') as cm:
+                users['U0001'] = {'id': 'U0001'}
+                self.assertIn('U0001', users)
+                self.assertNotIn('U0002', users)
+
+        self.assertEqual(len(cm.output), 2)
+        self.assertRegex(cm.output[0], "Unable to write user U0001 to cache; locked")
+        self.assertRegex(cm.output[1], "Unable to read user U0002 from cache; locked")
+
+
+class TestValidatorsCache(unittest.TestCase):
+    """ValidatorsCache tests"""
+
+    def setUp(self):
+        self.test_path = tempfile.mkdtemp(prefix='perceval_')
+        self.cache_path = os.path.join(self.test_path, 'http.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_path)
+
+    @staticmethod
+    def _make_response(content):
+        response = requests.Response()
+        response.status_code = 200
+        response.url = 'http://example.com/'
+        response.headers = requests.structures.CaseInsensitiveDict({'ETag': '"v1"'})
+        response._content = content
+        return response
+
+    def test_init(self):
+        """Test whether the cache is created"""
+
+        cache = ValidatorsCache(self.cache_path, max_size=5)
+
+        self.assertEqual(cache.cache_path, self.cache_path)
+        self.assertEqual(cache.max_size, 5)
+        self.assertEqual(cache.hits, 0)
+        self.assertEqual(cache.misses, 0)
+        self.assertEqual(count_number_rows(self.cache_path, ValidatorsCache.VALIDATORS_TABLE), 0)
+
+    def test_get_set(self):
+        """Test whether entries are kept between instances"""
+
+        cache = ValidatorsCache(self.cache_path)
+        self.assertIsNone(cache.get('http://example.com/'))
+
+        entry = ValidatorEntry('"v1"', 'Wed, 21 Oct 2015 07:28:00 GMT',
+                               self._make_response(b'data'))
+        cache.set('http://example.com/', entry)
+
+        cache = ValidatorsCache(self.cache_path)
+        entry = cache.get('http://example.com/')
+
+        self.assertEqual(entry.etag, '"v1"')
+        self.assertEqual(entry.last_modified, 'Wed, 21 Oct 2015 07:28:00 GMT')
+        self.assertEqual(entry.response.status_code, 200)
+        self.assertEqual(entry.response.url, 'http://example.com/')
+        self.assertEqual(entry.response.headers['etag'], '"v1"')
+        self.assertEqual(entry.response.content, b'data')
+
+    def test_max_size(self):
+        """Test whether the least recently used entries are removed"""
+
+        cache = ValidatorsCache(self.cache_path, max_size=2)
+
+        with unittest.mock.patch('perceval.cache.time.time') as mock_time:
+            mock_time.return_value = 1000
+            cache.set('key1', ValidatorEntry('"v1"', None, self._make_response(b'1')))
+
+            mock_time.return_value = 1001
+            cache.set('key2', ValidatorEntry('"v2"', None, self._make_response(b'2')))
+
+            mock_time.return_value = 1002
+            cache.get('key1')
+
+            mock_time.return_value = 1003
+            cache.set('key3', ValidatorEntry('"v3"', None, self._make_response(b'3')))
+
+        self.assertEqual(count_number_rows(self.cache_path, ValidatorsCache.VALIDATORS_TABLE), 2)
+        self.assertIsNotNone(cache.get('key1'))
+        self.assertIsNone(cache.get('key2'))
+        self.assertIsNotNone(cache.get('key3'))
+
+    def test_max_size_batches(self):
+        """Test whether entries are evicted in batches"""
+
+        cache = ValidatorsCache(self.cache_path, max_size=20)
+
+        def set_entry(key, ts):
+            mock_time.return_value = ts
+            cache.set(key, ValidatorEntry('"v"', None, self._make_response(b'1')))
+
+        with unittest.mock.patch('perceval.cache.time.time') as mock_time:
+            for i in range(20):
+                set_entry('key%s' % i, 1000 + i)
+
+            # Reading 'key0' makes 'key1' the least recently used
+            mock_time.return_value = 2000
+            self.assertIsNotNone(cache.get('key0'))
+
+            # The size is checked every two insertions
+            set_entry('key20', 2001)
+            self.assertEqual(count_number_rows(self.cache_path, ValidatorsCache.VALIDATORS_TABLE), 20)
+
+            set_entry('key21', 2002)
+            self.assertEqual(count_number_rows(self.cache_path, ValidatorsCache.VALIDATORS_TABLE), 21)
+
+            set_entry('key22', 2003)
+            self.assertEqual(count_number_rows(self.cache_path, ValidatorsCache.VALIDATORS_TABLE), 20)
+
+        self.assertIsNotNone(cache.get('key0'))
+        self.assertIsNone(cache.get('key1'))
+        self.assertIsNone(cache.get('key2'))
+        self.assertIsNone(cache.get('key3'))
+        self.assertIsNotNone(cache.get('key4'))
+
+    def test_cache_error(self):
+        """Test whether errors accessing the cache are ignored"""
+
+        cache = ValidatorsCache(self.cache_path)
+        entry = ValidatorEntry('"v1"', None, self._make_response(b'1'))
+
+        with unittest.mock.patch.object(ValidatorsCache, '_execute',
+                                        side_effect=CacheError(cause='locked')):
+            with self.assertLogs('perceval.cache', level='WARNING') as cm:
+                cache.set('key1', entry)
+                self.assertIsNone(cache.get('key1'))
+
+        self.assertEqual(len(cm.output), 2)
+        self.assertRegex(cm.output[0], "Unable to write validators of key1 to cache; locked")
+        self.assertRegex(cm.output[1], "Unable to read validators of key1 from cache; locked")
+
+    def test_pickle(self):
+        """Test whether the cache can be sent to other processes"""
+
+        cache = ValidatorsCache(self.cache_path)
+        cache.set('key1', ValidatorEntry('"v1"', None, self._make_response(b'1')))
+
+        cache = pickle.loads(pickle.dumps(cache))
+
+        self.assertEqual(cache.cache_path, self.cache_path)
+        self.assertEqual(cache.get('key1').response.content, b'1')
+
+
+class TestMBoxIndex(unittest.TestCase):
+    """MBoxIndex tests"""
+
+    def setUp(self):
+        self.test_path = tempfile.mkdtemp(prefix='perceval_')
+        self.cache_path = os.path.join(self.test_path, 'cache', 'index.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_path)
+
+    def test_init(self):
+        """Test whether the index is created"""
+
+        index = MBoxIndex(self.cache_path)
+
+        self.assertEqual(index.cache_path, self.cache_path)
+        self.assertTrue(os.path.exists(self.cache_path))
+        self.assertEqual(count_number_rows(self.cache_path, MBoxIndex.MBOXES_TABLE), 0)
+        self.assertEqual(count_number_rows(self.cache_path, MBoxIndex.MESSAGES_TABLE), 0)
+
+    def test_update(self):
+        """Test whether mbox files and their messages are indexed"""
+
+        messages = [(0, 100, '<a@example.com>', 1000.0),
+                    (100, 50, '<b@example.com>', 3000.0),
+                    (150, 200, '<c@example.com>', 2000.0)]
+
+        index = MBoxIndex(self.cache_path)
+        self.assertIsNone(index.mbox('/tmp/mbox'))
+
+        index.update('/tmp/mbox', 350, 123456789, 150, messages)
+        index.update('/tmp/other', 10, 1, 0, [(0, 10, '<d@example.com>', 1000.0)])
+
+        self.assertTupleEqual(index.mbox('/tmp/mbox'), (350, 123456789, 150))
+        self.assertListEqual(index.messages('/tmp/mbox'), messages)
+        self.assertListEqual(index.messages('/tmp/mbox', from_date=2000.0),
+                             [messages[1], messages[2]])
+        self.assertListEqual(index.messages('/tmp/mbox', from_date=2000.0, to_offset=150),
+                             [messages[1]])
+
+        # Messages from the given offset are replaced
+        index.update('/tmp/mbox', 500, 123456790, 400,
+                     [(150, 250, '<c@example.com>', 2000.0),
+                      (400, 100, '<e@example.com>', 4000.0)],
+                     from_offset=150)
+
+        self.assertTupleEqual(index.mbox('/tmp/mbox'), (500, 123456790, 400))
+        self.assertListEqual(index.messages('/tmp/mbox'),
+                             [messages[0], messages[1],
+                              (150, 250, '<c@example.com>', 2000.0),
+                              (400, 100, '<e@example.com>', 4000.0)])
+        self.assertEqual(len(index.messages('/tmp/other')), 1)
+
+    def test_remove(self):
+        """Test whether a mbox file is removed from the index"""
+
+        index = MBoxIndex(self.cache_path)
+        index.update('/tmp/mbox', 10, 1, 0, [(0, 10, '<a@example.com>', 1000.0)])
+        index.update('/tmp/other', 10, 1, 0, [(0, 10, '<b@example.com>', 1000.0)])
+
+        index.remove('/tmp/mbox')
+
+        self.assertIsNone(index.mbox('/tmp/mbox'))
+        self.assertListEqual(index.messages('/tmp/mbox'), [])
+        self.assertEqual(len(index.messages('/tmp/other')), 1)
+
+    def test_error(self):
+        """Test whether an exception is raised when the index cannot be created"""
+
+        with self.assertRaises(CacheError):
+            MBoxIndex(self.test_path)
+
+
+class TestCommitsCache(unittest.TestCase):
+    """CommitsCache tests"""
+
+    def setUp(self):
+        self.test_path = tempfile.mkdtemp(prefix='perceval_')
+        self.cache_path = os.path.join(self.test_path, 'cache', 'commits.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_path)
+
+    def test_init(self):
+        """Test whether the cache is created"""
+
+        cache = CommitsCache(self.cache_path)
+
+        self.assertEqual(cache.cache_path, self.cache_path)
+        self.assertTrue(os.path.exists(self.cache_path))
+        self.assertEqual(count_number_rows(self.cache_path, CommitsCache.COMMITS_TABLE), 0)
+
+    def test_get_set(self):
+        """Test whether commits are stored and retrieved"""
+
+        commits = [{'commit': 'a' * 40, 'message': 'first', 'files': []},
+                   {'commit': 'b' * 40, 'message': 'second', 'files': [{'file': 'README'}]}]
+
+        cache = CommitsCache(self.cache_path)
+        cache.set('http://example.com/repo.git', commits)
+        cache.set('http://example.com/repo.git', [])
+
+        self.assertEqual(count_number_rows(self.cache_path, CommitsCache.COMMITS_TABLE), 2)
+
+        found = cache.get('http://example.com/repo.git', ['b' * 40, 'c' * 40, 'a' * 40])
+        self.assertDictEqual(found, {'a' * 40: commits[0], 'b' * 40: commits[1]})
+
+        # Commits are stored by origin
+        found = cache.get('http://example.com/other.git', ['a' * 40])
+        self.assertDictEqual(found, {})
+
+        # Data is kept when the cache is opened again
+        cache = CommitsCache(self.cache_path)
+        found = cache.get('http://example.com/repo.git', ['a' * 40])
+        self.assertDictEqual(found, {'a' * 40: commits[0]})
+
+    def test_get_many(self):
+        """Test whether large sets of commits are retrieved"""
+
+        commits = [{'commit': '%040x' % x} for x in range(1200)]
+
+        cache = CommitsCache(self.cache_path)
+        cache.set('http://example.com/repo.git', commits)
+
+        found = cache.get('http://example.com/repo.git', [commit['commit'] for commit in commits])
+        self.assertEqual(len(found), 1200)
+        self.assertDictEqual(found['%040x' % 1000], {'commit': '%040x' % 1000})
+
+    def test_clear(self):
+        """Test whether every entry is removed"""
+
+        cache = CommitsCache(self.cache_path)
+        cache.set('http://example.com/repo.git', [{'commit': 'a' * 40}])
+        cache.clear()
+
+        self.assertEqual(count_number_rows(self.cache_path, CommitsCache.COMMITS_TABLE), 0)
+
+    def test_cache_error(self):
+        """Test whether an exception is raised when the cache cannot be read"""
+
+        cache = CommitsCache(self.cache_path)
+
+        with open(self.cache_path, 'w') as f:
+            f.write('not a database' * 100)
+
+        with self.assertRaises(CacheError):
+            cache.get('http://example.com/repo.git', ['a' * 40])
+
+
+class TestInitUsersCache(unittest.TestCase):
+    """init_users_cache tests"""
+
+    def setUp(self):
+        self.test_path = tempfile.mkdtemp(prefix='perceval_')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_path)
+
+    def test_init_users_cache(self):
+        """Test whether the persistent cache is only used without archives"""
+
+        cache = UsersCache(os.path.join(self.test_path, 'users.db'))
+
+        users = init_users_cache(cache, MockedBackend(), 'https://example.com')
+        self.assertIsInstance(users, CachedUsers)
+        self.assertEqual(users.backend_name, 'MockedBackend')
+        self.assertEqual(users.base_url, 'https://example.com')
+
+        users = init_users_cache(None, MockedBackend(), 'https://example.com')
+        self.assertNotIsInstance(users, CachedUsers)
+        self.assertDictEqual(users, {})
+
+        archive = Archive.create(os.path.join(self.test_path, 'myarchive'))
+        users = init_users_cache(cache, MockedBackend(archive=archive), 'https://example.com')
+        self.assertNotIsInstance(users, CachedUsers)
+        self.assertDictEqual(users, {})
+
+
+if __name__ == "__main__":
+    unittest.main(warnings='ignore')
@@ -24,6 +24,7 @@ import os
 import shutil
 import time
 import tempfile
+import threading
 import unittest
 
 import httpretty
@@ -35,7 +36,12 @@ pkg_resources.declare_namespace('perceval.backends')
 from grimoirelab_toolkit.datetime import datetime_utcnow
 
 from perceval.archive import Archive
-from perceval.client import HttpClient, RateLimitHandler
+from perceval.client import (HttpClient,
+                             RateLimitHandler,
+                             ValidatorEntry,
+                             ValidatorStore,
+                             read_ahead)
+from perceval.errors import ArchiveError
 
 
 CLIENT_API_URL = "https://gateway.marvel.com/v1/"
@@ -106,6 +112,7 @@ class TestHttpClient(unittest.TestCase):
         self.assertEqual(client.raise_on_status, HttpClient.DEFAULT_RAISE_ON_STATUS)
         self.assertEqual(client.respect_retry_after_header, HttpClient.DEFAULT_RESPECT_RETRY_AFTER_HEADER)
         self.assertEqual(client.sleep_time, HttpClient.DEFAULT_SLEEP_TIME)
+        self.assertIsNone(client.validators)
 
         self.assertIsNotNone(client.session)
         self.assertEqual(client.session.headers['User-Agent'], HttpClient.DEFAULT_HEADERS.get('User-Agent'))
@@ -336,6 +343,40 @@ class TestHttpClient(unittest.TestCase):
         with self.assertRaises(requests.exceptions.HTTPError):
             _ = client.fetch(CLIENT_SPIDERMAN_URL)
 
+    @httpretty.activate
+    def test_fetch_not_archived(self):
+        """Test whether responses are not archived when it is disabled"""
+
+        archive_path = os.path.join(self.test_path, 'myarchive')
+        archive = Archive.create(archive_path)
+
+        httpretty.register_uri(httpretty.GET,
+                               CLIENT_SUPERMAN_URL,
+                               body="good",
+                               status=200)
+        httpretty.register_uri(httpretty.GET,
+                               CLIENT_SPIDERMAN_URL,
+                               body="bad",
+                               status=404)
+
+        client = MockedClient(CLIENT_API_URL, sleep_time=0.1, max_retries=1, archive=archive)
+        response = client.fetch(CLIENT_SUPERMAN_URL, archived=False)
+        self.assertEqual(response.text, "good")
+
+        with self.assertRaises(requests.exceptions.HTTPError):
+            _ = client.fetch(CLIENT_SPIDERMAN_URL, archived=False)
+
+        with self.assertRaises(ArchiveError):
+            archive.retrieve(CLIENT_SUPERMAN_URL, None, None)
+        with self.assertRaises(ArchiveError):
+            archive.retrieve(CLIENT_SPIDERMAN_URL, None, None)
+
+        # The response is fetched from the remote server
+        client = MockedClient(CLIENT_API_URL, sleep_time=0.1, max_retries=1, archive=archive, from_archive=True)
+        response = client.fetch(CLIENT_SUPERMAN_URL, archived=False)
+        self.assertEqual(response.text, "good")
+        self.assertEqual(len(httpretty.latest_requests()), 3)
+
     def test_sanitize_for_archive(self):
         """Test whether the default sanitize method works properly"""
 
@@ -346,6 +387,289 @@ class TestHttpClient(unittest.TestCase):
         self.assertEqual(payload, "payload")
 
 
+def setup_conditional_http_server(body, etag='"v1"', last_modified=None):
+    """Setup a mock HTTP server that supports conditional requests"""
+
+    http_requests = []
+
+    def request_callback(request, uri, response_headers):
+        http_requests.append(request)
+
+        headers = {'X-RateLimit-Remaining': str(100 - len(http_requests))}
+        if etag:
+            headers['ETag'] = etag
+        if last_modified:
+            headers['Last-Modified'] = last_modified
+
+        if etag and request.headers.get('If-None-Match') == etag:
+            return 304, headers, ''
+        elif last_modified and request.headers.get('If-Modified-Since') == last_modified:
+            return 304, headers, ''
+        else:
+            return 200, headers, body
+
+    httpretty.register_uri(httpretty.GET,
+                           CLIENT_SPIDERMAN_URL,
+                           responses=[httpretty.Response(body=request_callback)])
+
+    return http_requests
+
+
+class TestHttpClientConditionalRequests(unittest.TestCase):
+    """Http client conditional requests tests"""
+
+    def setUp(self):
+        self.test_path = tempfile.mkdtemp(prefix='perceval_')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_path)
+
+    @httpretty.activate
+    def test_fetch_etag(self):
+        """Test whether stored responses are returned when they were not modified"""
+
+        http_requests = setup_conditional_http_server('{"name": "spiderman"}')
+
+        validators = ValidatorStore()
+        client = MockedClient(CLIENT_API_URL)
+        client.validators = validators
+
+        response = client.fetch(CLIENT_SPIDERMAN_URL, payload={'a': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.text, '{"name": "spiderman"}')
+        self.assertEqual(validators.hits, 0)
+        self.assertEqual(validators.misses, 1)
+        self.assertNotIn('If-None-Match', http_requests[0].headers)
+
+        response = client.fetch(CLIENT_SPIDERMAN_URL, payload={'a': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.text, '{"name": "spiderman"}')
+        self.assertEqual(response.headers['ETag'], '"v1"')
+        self.assertEqual(validators.hits, 1)
+        self.assertEqual(validators.misses, 1)
+        self.assertEqual(http_requests[1].headers['If-None-Match'], '"v1"')
+
+        # Headers are updated with those of the new response
+        self.assertEqual(response.headers['X-RateLimit-Remaining'], '98')
+
+        # A different payload is a different resource
+        response = client.fetch(CLIENT_SPIDERMAN_URL, payload={'a': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(validators.hits, 1)
+        self.assertEqual(validators.misses, 2)
+        self.assertNotIn('If-None-Match', http_requests[2].headers)
+
+    @httpretty.activate
+    def test_fetch_credentials(self):
+        """Test whether stored responses are not shared by different credentials"""
+
+        http_requests = setup_conditional_http_server('{"name": "spiderman"}')
+
+        validators = ValidatorStore()
+        client = MockedClient(CLIENT_API_URL)
+        client.validators = validators
+
+        client.session.headers.update({'Authorization': 'token aaaa'})
+        client.fetch(CLIENT_SPIDERMAN_URL)
+        client.fetch(CLIENT_SPIDERMAN_URL)
+        self.assertEqual(validators.hits, 1)
+        self.assertEqual(validators.misses, 1)
+
+        # A different token is a different request
+        client.session.headers.update({'Authorization': 'token bbbb'})
+        client.fetch(CLIENT_SPIDERMAN_URL)
+        self.assertEqual(validators.hits, 1)
+        self.assertEqual(validators.misses, 2)
+        self.assertNotIn('If-None-Match', http_requests[2].headers)
+
+        client.fetch(CLIENT_SPIDERMAN_URL, auth=('user', 'pass'))
+        self.assertEqual(validators.hits, 1)
+        self.assertEqual(validators.misses, 3)
+        self.assertNotIn('If-None-Match', http_requests[3].headers)
+
+        client.fetch(CLIENT_SPIDERMAN_URL, headers={'Accept': 'text/plain'})
+        self.assertEqual(validators.hits, 1)
+        self.assertEqual(validators.misses, 4)
+        self.assertNotIn('If-None-Match', http_requests[4].headers)
+
+    @httpretty.activate
+    def test_fetch_last_modified(self):
+        """Test whether Last-Modified validator is used"""
+
+        last_modified = 'Wed, 21 Oct 2015 07:28:00 GMT'
+        http_requests = setup_conditional_http_server('spiderman', etag=None,
+                                                      last_modified=last_modified)
+
+        validators = ValidatorStore()
+        client = MockedClient(CLIENT_API_URL)
+        client.validators = validators
+
+        client.fetch(CLIENT_SPIDERMAN_URL)
+        response = client.fetch(CLIENT_SPIDERMAN_URL)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.text, 'spiderman')
+        self.assertEqual(validators.hits, 1)
+        self.assertEqual(validators.misses, 1)
+        self.assertEqual(http_requests[1].headers['If-Modified-Since'], last_modified)
+
+    @httpretty.activate
+    def test_fetch_no_validators(self):
+        """Test whether responses without validators are not stored"""
+
+        http_requests = setup_conditional_http_server('spiderman', etag=None)
+
+        validators = ValidatorStore()
+        client = MockedClient(CLIENT_API_URL)
+        client.validators = validators
+
+        client.fetch(CLIENT_SPIDERMAN_URL)
+        client.fetch(CLIENT_SPIDERMAN_URL)
+
+        self.assertEqual(validators.hits, 0)
+        self.assertEqual(validators.misses, 2)
+        self.assertNotIn('If-None-Match', http_requests[1].headers)
+        self.assertNotIn('If-Modified-Since', http_requests[1].headers)
+
+    @httpretty.activate
+    def test_fetch_archive(self):
+        """Test whether the stored responses are archived when they were not modified"""
+
+        setup_conditional_http_server('spiderman')
+
+        validators = ValidatorStore()
+
+        client = MockedClient(CLIENT_API_URL)
+        client.validators = validators
+        client.fetch(CLIENT_SPIDERMAN_URL)
+
+        archive_path = os.path.join(self.test_path, 'myarchive')
+        archive = Archive.create(archive_path)
+
+        client = MockedClient(CLIENT_API_URL, archive=archive)
+        client.validators = validators
+        client.fetch(CLIENT_SPIDERMAN_URL)
+
+        self.assertEqual(validators.hits, 1)
+
+        client = MockedClient(CLIENT_API_URL, archive=archive, from_archive=True)
+        response = client.fetch(CLIENT_SPIDERMAN_URL)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.text, 'spiderman')
+
+
+class TestValidatorStore(unittest.TestCase):
+    """ValidatorStore tests"""
+
+    def test_initialization(self):
+        """Test whether attributes are initializated"""
+
+        validators = ValidatorStore()
+        self.assertEqual(validators.max_size, ValidatorStore.DEFAULT_MAX_SIZE)
+        self.assertEqual(validators.hits, 0)
+        self.assertEqual(validators.misses, 0)
+
+        validators = ValidatorStore(max_size=5)
+        self.assertEqual(validators.max_size, 5)
+
+    def test_make_key(self):
+        """Test whether the key includes the URL and the payload"""
+
+        key = ValidatorStore.make_key(CLIENT_SPIDERMAN_URL, None)
+        self.assertEqual(key, CLIENT_SPIDERMAN_URL)
+
+        key = ValidatorStore.make_key(CLIENT_SPIDERMAN_URL, {'page': 2, 'since': 'now'})
+        self.assertEqual(key, CLIENT_SPIDERMAN_URL + '?page=2&since=now')
+
+        # Headers that do not change the response are not included
+        key = ValidatorStore.make_key(CLIENT_SPIDERMAN_URL, None,
+                                      headers={'User-Agent': 'Perceval', 'Connection': 'close'})
+        self.assertEqual(key, CLIENT_SPIDERMAN_URL)
+
+    def test_make_key_headers(self):
+        """Test whether the key depends on the headers and the credentials"""
+
+        url = CLIENT_SPIDERMAN_URL + '?page=2'
+
+        key = ValidatorStore.make_key(CLIENT_SPIDERMAN_URL, {'page': 2},
+                                      headers={'Authorization': 'token aaaa'})
+        self.assertTrue(key.startswith(url + ' '))
+
+        # The name of the headers is case insensitive
+        other = ValidatorStore.make_key(CLIENT_SPIDERMAN_URL, {'page': 2},
+                                        headers={'authorization': 'token aaaa',
+                                                 'User-Agent': 'Perceval'})
+        self.assertEqual(other, key)
+
+        other = ValidatorStore.make_key(CLIENT_SPIDERMAN_URL, {'page': 2},
+                                        headers={'Authorization': 'token bbbb'})
+        self.assertNotEqual(other, key)
+
+        other = ValidatorStore.make_key(CLIENT_SPIDERMAN_URL, {'page': 2},
+                                        headers={'Authorization': 'token aaaa',
+                                                 'Accept': 'application/json'})
+        self.assertNotEqual(other, key)
+
+        # Credentials are also included
+        key = ValidatorStore.make_key(CLIENT_SPIDERMAN_URL, {'page': 2}, auth=('user', 'pass'))
+        self.assertTrue(key.startswith(url + ' '))
+
+        other = ValidatorStore.make_key(CLIENT_SPIDERMAN_URL, {'page': 2}, auth=('user', 'other'))
+        self.assertNotEqual(other, key)
+
+    def test_get_set(self):
+        """Test whether entries are stored and retrieved"""
+
+        validators = ValidatorStore()
+        entry = ValidatorEntry('"v1"', None, requests.Response())
+
+        self.assertIsNone(validators.get('key'))
+
+        validators.set('key', entry)
+        self.assertEqual(validators.get('key'), entry)
+
+    def test_max_size(self):
+        """Test whether the least recently used entries are removed"""
+
+        validators = ValidatorStore(max_size=2)
+
+        validators.set('key1', ValidatorEntry('"v1"', None, None))
+        validators.set('key2', ValidatorEntry('"v2"', None, None))
+
+        # Accessing 'key1' makes 'key2' the least recently used
+        validators.get('key1')
+        validators.set('key3', ValidatorEntry('"v3"', None, None))
+
+        self.assertIsNotNone(validators.get('key1'))
+        self.assertIsNone(validators.get('key2'))
+        self.assertIsNotNone(validators.get('key3'))
+
+    def test_conditional_headers(self):
+        """Test whether conditional headers are added"""
+
+        validators = ValidatorStore()
+
+        headers = validators.conditional_headers(None, {'Accept': 'json'})
+        self.assertDictEqual(headers, {'Accept': 'json'})
+
+        headers = {'Accept': 'json'}
+        entry = ValidatorEntry('"v1"', 'Wed, 21 Oct 2015 07:28:00 GMT', None)
+        conditional_headers = validators.conditional_headers(entry, headers)
+
+        expected = {
+            'Accept': 'json',
+            'If-None-Match': '"v1"',
+            'If-Modified-Since': 'Wed, 21 Oct 2015 07:28:00 GMT'
+        }
+        self.assertDictEqual(conditional_headers, expected)
+        self.assertDictEqual(headers, {'Accept': 'json'})
+
+        entry = ValidatorEntry('"v1"', None, None)
+        headers = validators.conditional_headers(entry, None)
+        self.assertDictEqual(headers, {'If-None-Match': '"v1"'})
+
+
 class TestRateLimitHandler(unittest.TestCase):
     """RateLimit handler tests"""
 
@@ -454,5 +778,80 @@ class TestRateLimitHandler(unittest.TestCase):
         self.assertEqual(before, after)
 
 
+class TestReadAhead(unittest.TestCase):
+    """Unit tests for read_ahead"""
+
+    def test_read_ahead(self):
+        """Test whether items are returned in the same order"""
+
+        items = [item for item in read_ahead(range(10), size=3)]
+        self.assertListEqual(items, list(range(10)))
+
+        items = [item for item in read_ahead([], size=3)]
+        self.assertListEqual(items, [])
+
+    def test_read_ahead_disabled(self):
+        """Test whether items are not read in advance when size is lower than 1"""
+
+        read = []
+
+        def pages():
+            for x in range(5):
+                read.append(x)
+                yield x
+
+        items = read_ahead(pages(), size=0)
+        for x in items:
+            self.assertEqual(read[-1], x)
+
+        self.assertListEqual(read, list(range(5)))
+
+    def test_buffer_size(self):
+        """Test whether no more items than the size of the buffer are read in advance"""
+
+        read = []
+        completed = threading.Event()
+
+        def pages():
+            for x in range(10):
+                read.append(x)
+                yield x
+            completed.set()
+
+        items = read_ahead(pages(), size=2)
+        self.assertEqual(next(items), 0)
+
+        # The first item is consumed and two are stored;
+        # the fourth is not requested until there is room
+        time.sleep(0.5)
+        self.assertListEqual(read, [0, 1, 2])
+
+        self.assertEqual(next(items), 1)
+        time.sleep(0.5)
+        self.assertListEqual(read, [0, 1, 2, 3])
+
+        items.close()
+
+        # Once the generator is closed, no more items are read
+        time.sleep(0.2)
+        self.assertListEqual(read, [0, 1, 2, 3])
+        self.assertFalse(completed.is_set())
+
+    def test_read_ahead_error(self):
+        """Test whether errors are raised when the item that failed is requested"""
+
+        def pages():
+            yield 1
+            yield 2
+            raise requests.exceptions.HTTPError("error")
+
+        items = read_ahead(pages(), size=5)
+        self.assertEqual(next(items), 1)
+        self.assertEqual(next(items), 2)
+
+        with self.assertRaises(requests.exceptions.HTTPError):
+            next(items)
+
+
 if __name__ == "__main__":
     unittest.main(warnings='ignore')
@@ -20,6 +20,7 @@
 #     Santiago Dueñas <sduenas@bitergia.com>
 #
 
+import pickle
 import unittest
 
 import perceval.errors as errors
@@ -61,6 +62,24 @@ class TestBaseError(unittest.TestCase):
         kwargs = {'code': 1, 'error': 'Fatal error'}
         self.assertRaises(KeyError, MockErrorArgs, **kwargs)
 
+    def test_pickle(self):
+        """Check whether errors can be pickled and unpickled"""
+
+        e = MockErrorArgs(code=1, msg='Fatal error')
+        e = pickle.loads(pickle.dumps(e))
+
+        self.assertIsInstance(e, MockErrorArgs)
+        self.assertEqual(e.kwargs, {'code': 1, 'msg': 'Fatal error'})
+        self.assertEqual("Mock error with args. Error: 1 Fatal error",
+                         str(e))
+
+        e = errors.RateLimitError(cause='rate limit exceeded', seconds_to_reset=10)
+        e = pickle.loads(pickle.dumps(e))
+
+        self.assertIsInstance(e, errors.RateLimitError)
+        self.assertEqual(e.seconds_to_reset, 10)
+        self.assertEqual('rate limit exceeded; 10 seconds to rate reset', str(e))
+
 
 class TestArchiveError(unittest.TestCase):
 
@@ -20,27 +20,35 @@
 #     Santiago Dueñas <sduenas@bitergia.com>
 #
 
+import bz2
 import datetime
+import gzip
+import lzma
 import os
 import shutil
 import subprocess
 import tempfile
 import unittest
 import unittest.mock
+import zipfile
 
 import dateutil.tz
+import dulwich.pack
 import pkg_resources
 
 pkg_resources.declare_namespace('perceval.backends')
 
 from perceval.backend import BackendCommandArgumentParser, uuid
-from perceval.errors import RepositoryError
+from perceval.cache import CommitsCache
+from perceval.errors import ParseError, RepositoryError
 from perceval.utils import DEFAULT_DATETIME, DEFAULT_LAST_DATETIME
 from perceval.backends.core.git import (EmptyRepositoryError,
                                         Git,
                                         GitCommand,
+                                        GitParallelParser,
                                         GitParser,
-                                        GitRepository)
+                                        GitRepository,
+                                        update_repositories)
 
 
 class TestCaseGit(unittest.TestCase):
@@ -172,6 +180,172 @@ class TestGitBackend(TestCaseGit):
 
         shutil.rmtree(new_path)
 
+    def test_fetch_workers(self):
+        """Test whether commits are fetched using a pool of processes"""
+
+        new_path = os.path.join(self.tmp_path, 'newgit')
+
+        git = Git(self.git_path, new_path)
+        expected = [commit for commit in git.fetch()]
+        commits = [commit for commit in git.fetch(workers=2, no_update=True)]
+
+        self.assertEqual(len(commits), 9)
+        self.assertListEqual([commit['data'] for commit in commits],
+                             [commit['data'] for commit in expected])
+        self.assertListEqual([commit['uuid'] for commit in commits],
+                             [commit['uuid'] for commit in expected])
+
+        shutil.rmtree(new_path)
+
+    @unittest.mock.patch.object(GitRepository, 'LOG_BATCH_SIZE', 2)
+    def test_fetch_git_jobs(self):
+        """Test whether commits are fetched running several git processes"""
+
+        new_path = os.path.join(self.tmp_path, 'newgit')
+
+        git = Git(self.git_path, new_path)
+        expected = [commit for commit in git.fetch()]
+        commits = [commit for commit in git.fetch(git_jobs=2, no_update=True)]
+
+        self.assertEqual(len(commits), 9)
+        self.assertListEqual([commit['data'] for commit in commits],
+                             [commit['data'] for commit in expected])
+
+        shutil.rmtree(new_path)
+
+    def test_fetch_partial_clone(self):
+        """Test whether commits are fetched from a partial clone"""
+
+        new_path = os.path.join(self.tmp_path, 'newgit')
+        partial_path = os.path.join(self.tmp_path, 'partialgit')
+
+        subprocess.check_call(['git', 'config', 'uploadpack.allowFilter', 'true'],
+                              cwd=self.git_path)
+
+        git = Git(self.git_path, new_path)
+        expected = [commit['data'] for commit in git.fetch()]
+
+        git = Git('file://' + self.git_path, partial_path)
+        commits = [commit['data'] for commit in git.fetch(partial_clone=True)]
+
+        self.assertEqual(len(commits), 9)
+        self.assertListEqual(commits, expected)
+
+        promisor = subprocess.check_output(['git', 'config', 'remote.origin.promisor'],
+                                           cwd=partial_path)
+        self.assertEqual(promisor, b'true\n')
+
+        shutil.rmtree(new_path)
+        shutil.rmtree(partial_path)
+
+    def test_fetch_light(self):
+        """Test whether commits are fetched without the data of their files"""
+
+        new_path = os.path.join(self.tmp_path, 'newgit')
+
+        git = Git(self.git_path, new_path)
+        expected = [commit['data'] for commit in git.fetch()]
+
+        for workers, git_jobs in [(1, 1), (2, 3)]:
+            items = git.fetch(light=True, workers=workers, git_jobs=git_jobs)
+            commits = [commit['data'] for commit in items]
+            self.assertEqual(len(commits), 9)
+
+            for commit, full in zip(commits, expected):
+                self.assertListEqual(commit['files'], [])
+                full = dict(full)
+                full['files'] = []
+                self.assertDictEqual(commit, full)
+
+        # Light mode does not store commits in the cache
+        commits = [commit['data'] for commit in git.fetch(light=True, commits_cache=True)]
+        self.assertEqual(len(commits), 9)
+        self.assertFalse(os.path.exists(new_path + '.commits.db'))
+
+        shutil.rmtree(new_path)
+
+    def test_fetch_commits_cache(self):
+        """Test whether commits are fetched using the commits cache"""
+
+        new_path = os.path.join(self.tmp_path, 'newgit')
+        cache_path = new_path + '.commits.db'
+
+        git = Git(self.git_path, new_path)
+        expected = [commit['data'] for commit in git.fetch()]
+
+        commits = [commit['data'] for commit in git.fetch(commits_cache=True)]
+        self.assertListEqual(commits, expected)
+        self.assertTrue(os.path.exists(cache_path))
+
+        # Commits are read from the cache, but refs are updated
+        subprocess.check_call(['git', 'tag', 'cachetag', 'c0d66f92a95e31c77be08dc9d0f11a16715d1885'],
+                              cwd=new_path)
+
+        with unittest.mock.patch.object(GitRepository, 'log_commits') as mock_log:
+            commits = [commit['data'] for commit in git.fetch(commits_cache=True, no_update=True)]
+            mock_log.assert_not_called()
+
+        self.assertEqual(len(commits), 9)
+        self.assertEqual(commits[3]['commit'], 'c0d66f92a95e31c77be08dc9d0f11a16715d1885')
+        self.assertListEqual(commits[3]['refs'], ['tag: refs/tags/cachetag'])
+        self.assertListEqual(commits[8]['refs'], ['HEAD -> refs/heads/master'])
+
+        for x in [0, 1, 2, 4, 5, 6, 7, 8]:
+            self.assertDictEqual(commits[x], expected[x])
+
+        # Only commits newer than the given date are returned
+        from_date = datetime.datetime(2014, 2, 11, 22, 7, 49)
+        expected = [commit['data'] for commit in git.fetch(from_date=from_date, no_update=True)]
+        commits = [commit['data'] for commit in git.fetch(from_date=from_date, commits_cache=True,
+                                                          no_update=True)]
+        self.assertEqual(len(commits), 3)
+        self.assertListEqual(commits, expected)
+
+        shutil.rmtree(new_path)
+        os.remove(cache_path)
+
+    def test_fetch_commits_cache_missing(self):
+        """Test whether commits not found in the cache are parsed and stored"""
+
+        new_path = os.path.join(self.tmp_path, 'newgit')
+        cache_path = new_path + '.commits.db'
+
+        git = Git(self.git_path, new_path)
+        expected = [commit['data'] for commit in git.fetch()]
+
+        cache = CommitsCache(cache_path)
+        cache.set(self.git_path, expected[2:4])
+
+        with unittest.mock.patch.object(GitRepository, 'log_commits',
+                                        side_effect=GitRepository.log_commits,
+                                        autospec=True) as mock_log:
+            commits = [commit['data'] for commit in git.fetch(commits_cache=True, no_update=True)]
+
+        self.assertListEqual(commits, expected)
+
+        missing = mock_log.call_args[0][1]
+        self.assertEqual(len(missing), 7)
+        self.assertNotIn(expected[2]['commit'], missing)
+
+        found = cache.get(self.git_path, [commit['commit'] for commit in expected])
+        self.assertEqual(len(found), 9)
+
+        shutil.rmtree(new_path)
+        os.remove(cache_path)
+
+    def test_fetch_commits_cache_empty_repository(self):
+        """Test whether it returns an empty list when the repository is empty"""
+
+        new_path = os.path.join(self.tmp_path, 'newgit')
+
+        git = Git(self.git_empty_path, new_path)
+        commits = [commit for commit in git.fetch(commits_cache=True)]
+
+        self.assertListEqual(commits, [])
+
+        shutil.rmtree(new_path)
+        os.remove(new_path + '.commits.db')
+
     def test_search_fields(self):
         """Test whether the search_fields is properly set"""
 
@@ -720,6 +894,45 @@ class TestGitBackend(TestCaseGit):
 
         self.assertListEqual(result, expected)
 
+    def test_git_parser_workers(self):
+        """Test if the static method parses a git log file using a pool of processes"""
+
+        filepath = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "data/git/git_log.txt")
+
+        expected = [commit for commit in Git.parse_git_log_from_file(filepath)]
+        commits = [commit for commit in Git.parse_git_log_from_file(filepath, workers=2)]
+
+        self.assertEqual(len(commits), 10)
+        self.assertListEqual(commits, expected)
+
+    def test_git_parser_from_compressed_file(self):
+        """Test if the static method parses a compressed git log file"""
+
+        filepath = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "data/git/git_log.txt")
+        expected = [commit for commit in Git.parse_git_log_from_file(filepath)]
+
+        for ftype, mod in [('gz', gzip), ('bz2', bz2), ('xz', lzma)]:
+            compressed_path = os.path.join(self.tmp_path, 'git_log.txt.' + ftype)
+
+            with open(filepath, 'rb') as f_in:
+                with mod.open(compressed_path, 'wb') as f_out:
+                    shutil.copyfileobj(f_in, f_out)
+
+            commits = [commit for commit in Git.parse_git_log_from_file(compressed_path)]
+            self.assertListEqual(commits, expected)
+
+            commits = [commit for commit in Git.parse_git_log_from_file(compressed_path, workers=2)]
+            self.assertListEqual(commits, expected)
+
+        compressed_path = os.path.join(self.tmp_path, 'git_log.zip')
+        with zipfile.ZipFile(compressed_path, 'w') as f_out:
+            f_out.write(filepath, arcname='git_log.txt')
+
+        commits = [commit for commit in Git.parse_git_log_from_file(compressed_path)]
+        self.assertListEqual(commits, expected)
+
     def test_git_encoding_error(self):
         """Test if encoding errors are escaped when a git log is parsed"""
 
@@ -839,16 +1052,34 @@ class TestGitCommand(TestCaseGit):
         self.assertEqual(parsed_args.to_date, DEFAULT_LAST_DATETIME)
         self.assertEqual(parsed_args.branches, None)
         self.assertTrue(parsed_args.no_update)
+        self.assertEqual(parsed_args.workers, 1)
+        self.assertEqual(parsed_args.git_jobs, 1)
+        self.assertFalse(parsed_args.partial_clone)
+        self.assertFalse(parsed_args.commits_cache)
+        self.assertIsNone(parsed_args.reference_path)
+        self.assertFalse(parsed_args.light)
 
         args = ['http://example.com/',
                 '--git-path', '/tmp/gitpath',
-                '--branches', 'master', 'testing']
+                '--branches', 'master', 'testing',
+                '--workers', '4',
+                '--git-jobs', '8',
+                '--partial-clone',
+                '--commits-cache',
+                '--reference-path', '/tmp/refpath',
+                '--light']
 
         parsed_args = parser.parse(*args)
         self.assertEqual(parsed_args.git_path, '/tmp/gitpath')
         self.assertEqual(parsed_args.uri, 'http://example.com/')
         self.assertEqual(parsed_args.branches, ['master', 'testing'])
         self.assertFalse(parsed_args.no_update)
+        self.assertEqual(parsed_args.workers, 4)
+        self.assertEqual(parsed_args.git_jobs, 8)
+        self.assertTrue(parsed_args.partial_clone)
+        self.assertTrue(parsed_args.commits_cache)
+        self.assertEqual(parsed_args.reference_path, '/tmp/refpath')
+        self.assertTrue(parsed_args.light)
 
     def test_mutual_exclusive_update(self):
         """Test whether an exception is thrown when no-update and latest-items flags are set"""
@@ -1199,6 +1430,93 @@ class TestGitParser(TestCaseGit):
         self.assertIsNotNone(m)
 
 
+class TestGitParallelParser(TestCaseGit):
+    """Git parallel parser tests"""
+
+    def test_parser(self):
+        """Test if it parses a git log stream in chunks"""
+
+        for filename in ['git_log.txt', 'git_log_merge.txt', 'git_log_trailers.txt']:
+            filepath = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data/git', filename)
+
+            with open(filepath, 'r') as f:
+                expected = [commit for commit in GitParser(f).parse()]
+
+            for chunk_size in [1, 2, 3, 100]:
+                with open(filepath, 'r') as f:
+                    parser = GitParallelParser(f, workers=2, chunk_size=chunk_size)
+                    commits = [commit for commit in parser.parse()]
+
+                self.assertListEqual(commits, expected)
+
+    def test_parser_empty_log(self):
+        """Test if it parses an empty git log stream"""
+
+        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "data/git/git_log_empty.txt"), 'r') as f:
+            parser = GitParallelParser(f, workers=2)
+            commits = [commit for commit in parser.parse()]
+
+        self.assertListEqual(commits, [])
+
+    def test_split(self):
+        """Test if the stream is split at commit boundaries"""
+
+        stream = [
+            "\n",
+            "commit bc57a9209f096a130dcc5ba7089a8663f758a703\n",
+            "Author:     John Smith <jsmith@example.com>\n",
+            "\n",
+            "    commit 87783129c3f00d2c81a3a8e585eb86a47e39891a\n",
+            "\n",
+            "commit 87783129c3f00d2c81a3a8e585eb86a47e39891a\n",
+            "Author:     John Smith <jsmith@example.com>\n",
+            "\n",
+            "commit 7debcf8a2f57f86663809c58b5c07a398be7674c\n"
+        ]
+
+        parser = GitParallelParser(stream, chunk_size=1)
+        chunks = [chunk for chunk in parser._split()]
+
+        expected = [
+            (0, stream[0:6]),
+            (6, stream[6:9]),
+            (9, stream[9:])
+        ]
+        self.assertListEqual(chunks, expected)
+
+    def test_parse_error(self):
+        """Test if commits parsed before an invalid line are returned"""
+
+        stream = [
+            "commit bc57a9209f096a130dcc5ba7089a8663f758a703\n",
+            "Author:     John Smith <jsmith@example.com>\n",
+            "\n",
+            "    Message\n",
+            "\n",
+            "commit 87783129c3f00d2c81a3a8e585eb86a47e39891a\n",
+            "Author:     John Smith <jsmith@example.com>\n",
+            "\n",
+            "    Message\n",
+            "\n",
+            "\n",
+            "\n",
+            "commit 7debcf8a2f57f86663809c58b5c07a398be7674c\n"
+        ]
+
+        parser = GitParallelParser(stream, workers=2, chunk_size=1)
+        commits = []
+
+        with self.assertRaises(ParseError) as cm:
+            for commit in parser.parse():
+                commits.append(commit)
+
+        self.assertEqual(str(cm.exception), "commit expected on line 12")
+
+        self.assertListEqual([commit['commit'] for commit in commits],
+                             ['bc57a9209f096a130dcc5ba7089a8663f758a703',
+                              '87783129c3f00d2c81a3a8e585eb86a47e39891a'])
+
+
 class TestEmptyRepositoryError(TestCaseGit):
     """EmptyRepositoryError tests"""
 
@@ -1319,6 +1637,85 @@ class TestGitRepository(TestCaseGit):
 
         shutil.rmtree(new_path)
 
+    def test_clone_partial(self):
+        """Test if a git repository is cloned without the contents of the files"""
+
+        new_path = os.path.join(self.tmp_path, 'newgit')
+        full_path = os.path.join(self.tmp_path, 'fullgit')
+
+        subprocess.check_call(['git', 'config', 'uploadpack.allowFilter', 'true'],
+                              cwd=self.git_path)
+        uri = 'file://' + self.git_path
+
+        repo = GitRepository.clone(uri, new_path, partial=True)
+        full_repo = GitRepository.clone(self.git_path, full_path)
+
+        self.assertIsInstance(repo, GitRepository)
+        self.assertEqual(repo.uri, uri)
+        self.assertTrue(os.path.exists(os.path.join(new_path, 'objects/info/commit-graph')))
+
+        promisor = subprocess.check_output(['git', 'config', 'remote.origin.promisor'],
+                                           cwd=new_path)
+        self.assertEqual(promisor, b'true\n')
+
+        # Blobs are not cloned but they are downloaded when needed
+        self.assertLess(repo.count_objects(), full_repo.count_objects())
+
+        gitlog = [line for line in repo.log()]
+        expected = [line for line in full_repo.log()]
+        self.assertListEqual(gitlog, expected)
+
+        shutil.rmtree(new_path)
+        shutil.rmtree(full_path)
+
+    def test_clone_reference(self):
+        """Test if a git repository is cloned sharing the objects of a reference"""
+
+        ref_path = os.path.join(self.tmp_path, 'refgit')
+        new_path = os.path.join(self.tmp_path, 'newgit')
+
+        ref_repo = GitRepository.clone(self.git_path, ref_path)
+
+        # Local paths are cloned copying their objects
+        repo = GitRepository.clone('file://' + self.git_path, new_path,
+                                   reference=ref_path)
+
+        with open(os.path.join(new_path, 'objects/info/alternates'), 'r') as f:
+            alternates = f.read().strip()
+        self.assertEqual(os.path.realpath(alternates),
+                         os.path.realpath(os.path.join(ref_path, 'objects')))
+
+        # No object was copied
+        self.assertEqual(repo.count_objects(), 0)
+        self.assertEqual(count_commits(new_path), 9)
+
+        gitlog = [line for line in repo.log()]
+        expected = [line for line in ref_repo.log()]
+        self.assertListEqual(gitlog, expected)
+
+        shutil.rmtree(new_path)
+
+        # When the reference does not exist, objects are copied
+        repo = GitRepository.clone('file://' + self.git_path, new_path,
+                                   reference=os.path.join(self.tmp_path, 'notfound'))
+        self.assertFalse(os.path.exists(os.path.join(new_path, 'objects/info/alternates')))
+        self.assertGreater(repo.count_objects(), 0)
+
+        shutil.rmtree(new_path)
+        shutil.rmtree(ref_path)
+
+    def test_write_commit_graph(self):
+        """Test if the commit-graph file is written"""
+
+        new_path = os.path.join(self.tmp_path, 'newgit')
+
+        repo = GitRepository.clone(self.git_path, new_path)
+        repo.write_commit_graph()
+
+        self.assertTrue(os.path.exists(os.path.join(new_path, 'objects/info/commit-graph')))
+
+        shutil.rmtree(new_path)
+
     def test_not_git(self):
         """Test if a supposed git repo is not a git repo"""
 
@@ -1479,6 +1876,97 @@ class TestGitRepository(TestCaseGit):
 
         shutil.rmtree(new_path)
 
+    def test_update_repositories(self):
+        """Test if a set of repositories is updated at the same time"""
+
+        paths = [os.path.join(self.tmp_path, 'newgit' + str(x)) for x in range(3)]
+        repos = [GitRepository.clone(self.git_path, path) for path in paths]
+
+        for path in paths:
+            cmd = ['git', 'update-ref',
+                   'refs/heads/master',
+                   '589bb080f059834829a2a5955bebfd7c2baa110a']
+            subprocess.check_output(cmd, stderr=subprocess.STDOUT,
+                                    cwd=path, env={'LANG': 'C'})
+
+        # The origin of the second repository does not exist
+        cmd = ['git', 'remote', 'set-url', 'origin', os.path.join(self.tmp_path, 'notfound')]
+        subprocess.check_output(cmd, stderr=subprocess.STDOUT,
+                                cwd=paths[1], env={'LANG': 'C'})
+
+        errors = update_repositories(repos, workers=2)
+
+        self.assertEqual(len(errors), 3)
+        self.assertIsNone(errors[0])
+        self.assertIsInstance(errors[1], RepositoryError)
+        self.assertIsNone(errors[2])
+
+        expected = ['456a68ee1407a77f3e804a30dff245bb6c6b872f',
+                    '589bb080f059834829a2a5955bebfd7c2baa110a',
+                    '456a68ee1407a77f3e804a30dff245bb6c6b872f']
+
+        for path, commit in zip(paths, expected):
+            refs = discover_refs(path)
+            self.assertEqual(refs['refs/heads/master'], commit)
+
+        for path in paths:
+            shutil.rmtree(path)
+
+    def test_read_commits_from_pack(self):
+        """Test if the commits of a pack are read, including deltified ones"""
+
+        new_path = os.path.join(self.tmp_path, 'newgit')
+
+        repo = GitRepository.clone(self.git_path, new_path)
+
+        # Repack the objects to have commits stored as deltas
+        cmd = ['git', 'repack', '-q', '-a', '-d', '-f', '--window=250', '--depth=50']
+        subprocess.check_call(cmd, cwd=new_path)
+
+        pack_dir = os.path.join(new_path, 'objects', 'pack')
+        pack_file = [f for f in os.listdir(pack_dir) if f.endswith('.pack')][0]
+        pack_name = pack_file[len('pack-'):-len('.pack')]
+
+        outs = subprocess.check_output(['git', 'verify-pack', '-v', os.path.join(pack_dir, pack_file)],
+                                       cwd=new_path).decode('utf-8')
+        self.assertRegex(outs, r"[a-f0-9]{40} commit .+ [a-f0-9]{40}\n")
+
+        expected = [line.split(' ')[0] for line in outs.split('\n')
+                    if line.split(' ')[1:2] == ['commit']]
+        expected.reverse()
+
+        commits = repo._read_commits_from_pack(pack_name)
+        self.assertEqual(len(commits), 9)
+        self.assertListEqual(commits, expected)
+
+        shutil.rmtree(new_path)
+
+    def test_read_commits_from_pack_missing_base(self):
+        """Test if it fails when the base of a delta is not in the pack"""
+
+        new_path = os.path.join(self.tmp_path, 'newgit')
+
+        repo = GitRepository.clone(self.git_path, new_path)
+
+        subprocess.check_call(['git', 'repack', '-q', '-a', '-d'], cwd=new_path)
+
+        pack_dir = os.path.join(new_path, 'objects', 'pack')
+        pack_file = [f for f in os.listdir(pack_dir) if f.endswith('.pack')][0]
+        pack_name = pack_file[len('pack-'):-len('.pack')]
+
+        # Objects are read as deltas of an object not in the pack
+        header = (dulwich.pack.REF_DELTA, b'\x01' * 20)
+
+        with unittest.mock.patch('perceval.backends.core.git._read_pack_object_header',
+                                 return_value=header):
+            expected = "unable to read pack '%s'; reason: delta base object %s not found in the pack" \
+                % (pack_name, '01' * 20)
+
+            with self.assertRaisesRegex(RepositoryError, expected):
+                repo._read_commits_from_pack(pack_name)
+
+        shutil.rmtree(new_path)
+
     def test_sync(self):
         """Test if the repository is synchonized with its remote repo"""
 
@@ -1634,6 +2122,30 @@ class TestGitRepository(TestCaseGit):
 
         shutil.rmtree(new_path)
 
+    def test_rev_list_reverse_dates(self):
+        """Test whether the rev-list command returns the commits between dates in reverse order"""
+
+        new_path = os.path.join(self.tmp_path, 'newgit')
+
+        repo = GitRepository.clone(self.git_path, new_path)
+        gitrev = repo.rev_list(from_date=datetime.datetime(2014, 2, 11, 22, 7, 49),
+                               reverse=True)
+        gitrev = [line for line in gitrev]
+
+        expected = ['ce8e0b86a1e9877f42fe9453ede418519115f367',
+                    '51a3b654f252210572297f47597b31527c475fb8',
+                    '456a68ee1407a77f3e804a30dff245bb6c6b872f']
+
+        self.assertListEqual(gitrev, expected)
+
+        gitrev = repo.rev_list(to_date=datetime.datetime(2014, 2, 11, 22, 7, 49))
+        gitrev = [line for line in gitrev]
+
+        self.assertEqual(len(gitrev), 6)
+        self.assertEqual(gitrev[0], '589bb080f059834829a2a5955bebfd7c2baa110a')
+
+        shutil.rmtree(new_path)
+
     def test_rev_list_no_branch(self):
         """Test whether the rev-list command returns an empty list when no branch is given"""
 
@@ -1674,6 +2186,115 @@ class TestGitRepository(TestCaseGit):
 
         shutil.rmtree(new_path)
 
+    def test_log_jobs(self):
+        """Test whether the log is the same when it is read in batches"""
+
+        new_path = os.path.join(self.tmp_path, 'newgit')
+
+        repo = GitRepository.clone(self.git_path, new_path)
+
+        for kwargs in [{}, {'branches': ['lzp']},
+                       {'from_date': datetime.datetime(2014, 2, 11, 22, 7, 49)},
+                       {'to_date': datetime.datetime(2014, 2, 11, 22, 7, 49)}]:
+            expected = [line for line in repo.log(**kwargs)]
+
+            for batch_size in [1, 2, 1000]:
+                with unittest.mock.patch.object(GitRepository, 'LOG_BATCH_SIZE', batch_size):
+                    gitlog = [line for line in repo.log(jobs=3, **kwargs)]
+                self.assertListEqual(gitlog, expected)
+
+        gitlog = [line for line in repo.log(branches=[], jobs=3)]
+        self.assertListEqual(gitlog, [])
+
+        shutil.rmtree(new_path)
+
+    def test_log_light(self):
+        """Test whether the log is read without the data of the files"""
+
+        new_path = os.path.join(self.tmp_path, 'newgit')
+
+        repo = GitRepository.clone(self.git_path, new_path)
+
+        gitlog = [line for line in repo.log(light=True)]
+        commits = [line for line in gitlog if line.startswith('commit ')]
+
+        self.assertEqual(len(commits), 9)
+        self.assertEqual(commits[0][:14], "commit bc57a92")
+
+        for line in gitlog:
+            self.assertFalse(line.startswith(':'))
+            self.assertIsNone(GitParser.GIT_STATS_REGEXP.match(line))
+
+        with unittest.mock.patch.object(GitRepository, 'LOG_BATCH_SIZE', 2):
+            self.assertListEqual([line for line in repo.log(light=True, jobs=3)], gitlog)
+
+        gitshow = [line for line in repo.show(['bc57a9209f096a130dcc5ba7089a8663f758a703'],
+                                              light=True)]
+        self.assertFalse(any(line.startswith(':') for line in gitshow))
+
+        commits = [commit for commit in GitParser(iter(gitlog), light=True).parse()]
+        self.assertEqual(len(commits), 9)
+        self.assertTrue(all(commit['files'] == [] for commit in commits))
+
+        shutil.rmtree(new_path)
+
+    def test_log_commits(self):
+        """Test whether the log of a list of commits is read in the given order"""
+
+        new_path = os.path.join(self.tmp_path, 'newgit')
+
+        repo = GitRepository.clone(self.git_path, new_path)
+
+        commits = ['51a3b654f252210572297f47597b31527c475fb8',
+                   '87783129c3f00d2c81a3a8e585eb86a47e39891a']
+        gitlog = [line for line in repo.log_commits(commits)]
+
+        headers = [line[:14] for line in gitlog if line.startswith('commit ')]
+        self.assertListEqual(headers, ["commit 51a3b65", "commit 8778312"])
+        self.assertEqual(gitlog[0][:14], "commit 51a3b65")
+
+        gitlog = [line for line in repo.log_commits([])]
+        self.assertListEqual(gitlog, [])
+
+        shutil.rmtree(new_path)
+
+    def test_log_commits_from_empty_repository(self):
+        """Test if an exception is raised when the repository is empty"""
+
+        new_path = os.path.join(self.tmp_path, 'newgit')
+
+        repo = GitRepository.clone(self.git_empty_path, new_path)
+
+        with self.assertRaises(EmptyRepositoryError):
+            _ = [line for line in repo.log_commits(['51a3b654f252210572297f47597b31527c475fb8'])]
+
+        with self.assertRaises(EmptyRepositoryError):
+            _ = repo.decorations()
+
+        shutil.rmtree(new_path)
+
+    def test_decorations(self):
+        """Test whether the refs of the commits are returned"""
+
+        new_path = os.path.join(self.tmp_path, 'newgit')
+
+        repo = GitRepository.clone(self.git_path, new_path)
+
+        refs = repo.decorations()
+        expected = {
+            '456a68ee1407a77f3e804a30dff245bb6c6b872f': ['HEAD -> refs/heads/master'],
+            '51a3b654f252210572297f47597b31527c475fb8': ['refs/heads/lzp']
+        }
+        self.assertDictEqual(refs, expected)
+
+        refs = repo.decorations(branches=['lzp'])
+        self.assertDictEqual(refs, {'51a3b654f252210572297f47597b31527c475fb8': ['refs/heads/lzp']})
+
+        refs = repo.decorations(branches=[])
+        self.assertDictEqual(refs, {})
+
+        shutil.rmtree(new_path)
+
     def test_log_to_date(self):
         """Test if commits are returned before the given date"""
 
@@ -124,6 +124,8 @@ class TestGitHubBackend(unittest.TestCase):
         self.assertEqual(github.origin, 'https://github.com/zhquan_example/repo')
         self.assertEqual(github.tag, 'test')
         self.assertEqual(github.max_items, MAX_CATEGORY_ITEMS_PER_PAGE)
+        self.assertEqual(github.workers, 1)
+        self.assertEqual(github.read_ahead, 0)
         self.assertFalse(github.exclude_user_data)
         self.assertEqual(github.categories, [CATEGORY_ISSUE, CATEGORY_PULL_REQUEST, CATEGORY_REPO])
 
@@ -1112,6 +1114,20 @@ class TestGitHubBackend(unittest.TestCase):
         self.assertEqual(issue['data']['comments_data'][0]['reactions']['total_count'],
                          len(issue['data']['comments_data'][0]['reactions_data']))
 
+        # Fetching concurrently returns the same issues in the same order
+        github = GitHub("zhquan_example", "repo", ["aaa"], workers=4)
+        issues_workers = [issues for issues in github.fetch()]
+
+        self.assertListEqual([issue['data'] for issue in issues_workers],
+                             [issue['data'] for issue in issues])
+
+        # Reading pages ahead returns the same issues in the same order
+        github = GitHub("zhquan_example", "repo", ["aaa"], read_ahead=2)
+        issues_read_ahead = [issues for issues in github.fetch()]
+
+        self.assertListEqual([issue['data'] for issue in issues_read_ahead],
+                             [issue['data'] for issue in issues])
+
     @httpretty.activate
     def test_fetch_more_pulls(self):
         """Test when return two pulls"""
@@ -1315,6 +1331,13 @@ class TestGitHubBackend(unittest.TestCase):
                              'WARNING:perceval.backends.core.github:'
                              'Missing user info for https://api.github.com/repos/zhquan_example/repo/pulls/comments/2')
 
+        # Fetching concurrently returns the same pulls in the same order
+        github = GitHub("zhquan_example", "repo", ["aaa"], workers=4)
+        pulls_workers = [pulls for pulls in github.fetch(category=CATEGORY_PULL_REQUEST, from_date=None)]
+
+        self.assertListEqual([pull['data'] for pull in pulls_workers],
+                             [pull['data'] for pull in pulls])
+
     @httpretty.activate
     def test_fetch_more_issues_no_user_data(self):
         """Test whether a list of issues is returned without user data"""
@@ -2678,6 +2701,12 @@ class TestGitHubBackendArchive(TestCaseBackendArchive):
 
         self._test_fetch_from_archive(from_date=None)
 
+    def test_fetch_issues_from_archive_workers(self):
+        """Test whether a list of issues fetched concurrently is returned from archive"""
+
+        self.backend_write_archive.workers = 4
+        self.test_fetch_issues_from_archive()
+
     @httpretty.activate
     def test_fetch_pulls_from_archive(self):
         """Test whether a list of pull requests is returned from archive"""
@@ -2787,6 +2816,12 @@ class TestGitHubBackendArchive(TestCaseBackendArchive):
 
         self._test_fetch_from_archive(category=CATEGORY_PULL_REQUEST, from_date=None)
 
+    def test_fetch_pulls_from_archive_workers(self):
+        """Test whether a list of pull requests fetched concurrently is returned from archive"""
+
+        self.backend_write_archive.workers = 4
+        self.test_fetch_pulls_from_archive()
+
     @httpretty.activate
     def test_fetch_from_date_from_archive(self):
         """Test whether a list of issues is returned from archive after a given date"""
@@ -3761,6 +3796,39 @@ class TestGitHubClient(unittest.TestCase):
         self.assertEqual(client.current_token, 'bbb')
         self.assertEqual(client.rate_limit, 19)
 
+    @httpretty.activate
+    def test_rate_limit_not_archived(self):
+        """Test if the rate limit responses are not archived"""
+
+        rate_limit = read_file('data/github/rate_limit')
+        httpretty.register_uri(httpretty.GET,
+                               GITHUB_RATE_LIMIT,
+                               body=rate_limit,
+                               status=200,
+                               forcing_headers={
+                                   'X-RateLimit-Remaining': '20',
+                                   'X-RateLimit-Reset': '15'
+                               })
+
+        archive = unittest.mock.Mock()
+
+        client = GitHubClient("zhquan_example", "repo", ["aaa", "bbb"],
+                              sleep_for_rate=True, archive=archive)
+        self.assertEqual(client.rate_limit, 20)
+        self.assertEqual(len(httpretty.latest_requests()), 3)
+        archive.store.assert_not_called()
+
+        client._update_current_rate_limit()
+        self.assertEqual(len(httpretty.latest_requests()), 4)
+        archive.store.assert_not_called()
+
+        # Responses are fetched from the server even when
+        # the client reads from the archive
+        client.from_archive = True
+        client._update_current_rate_limit()
+        self.assertEqual(len(httpretty.latest_requests()), 5)
+        archive.retrieve.assert_not_called()
+
     @httpretty.activate
     def test_choose_best_token_when_approaching_limit(self):
         """Test if the client chooses the best token when the current one approaches the limit"""
@@ -3989,6 +4057,9 @@ class TestGitHubCommand(unittest.TestCase):
                 '--from-date', '1970-01-01',
                 '--to-date', '2100-01-01',
                 '--enterprise-url', 'https://example.com',
+                '--workers', '4',
+                '--read-ahead', '2',
+                '--users-cache-path', '/tmp/users.db',
                 'zhquan_example', 'repo']
 
         parsed_args = parser.parse(*args)
@@ -4004,6 +4075,9 @@ class TestGitHubCommand(unittest.TestCase):
         self.assertEqual(parsed_args.to_date, DEFAULT_LAST_DATETIME)
         self.assertEqual(parsed_args.no_archive, True)
         self.assertEqual(parsed_args.api_token, ['abcdefgh', 'ijklmnop'])
+        self.assertEqual(parsed_args.workers, 4)
+        self.assertEqual(parsed_args.read_ahead, 2)
+        self.assertEqual(parsed_args.users_cache_path, '/tmp/users.db')
 
 
 if __name__ == "__main__":
@@ -456,6 +456,7 @@ class TestGitLabBackend(unittest.TestCase):
         self.assertEqual(gitlab.max_retries, MAX_RETRIES)
         self.assertEqual(gitlab.sleep_time, DEFAULT_SLEEP_TIME)
         self.assertListEqual(gitlab.extra_retry_after_status, DEFAULT_RETRY_AFTER_STATUS_CODES)
+        self.assertEqual(gitlab.read_ahead, 0)
 
         # When tag is empty or None it will be set to
         # the value in originTestGitLabBackend
@@ -1864,6 +1865,7 @@ class TestGitLabCommand(unittest.TestCase):
         self.assertEqual(parsed_args.sleep_time, DEFAULT_SLEEP_TIME)
         self.assertEqual(parsed_args.is_oauth_token, False)
         self.assertListEqual(parsed_args.extra_retry_after_status, DEFAULT_RETRY_AFTER_STATUS_CODES)
+        self.assertEqual(parsed_args.read_ahead, 0)
 
         args = ['--sleep-for-rate',
                 '--min-rate-to-sleep', '1',
@@ -1877,6 +1879,7 @@ class TestGitLabCommand(unittest.TestCase):
                 '--category', CATEGORY_MERGE_REQUEST,
                 '--extra-retry-status', '404', '410',
                 '--is-oauth-token',
+                '--read-ahead', '2',
                 'zhquan_example', 'repo']
 
         parsed_args = parser.parse(*args)
@@ -1895,6 +1898,7 @@ class TestGitLabCommand(unittest.TestCase):
         self.assertEqual(parsed_args.sleep_time, 10)
         self.assertEqual(parsed_args.is_oauth_token, True)
         self.assertListEqual(parsed_args.extra_retry_after_status, [404, 410])
+        self.assertEqual(parsed_args.read_ahead, 2)
 
 
 if __name__ == "__main__":
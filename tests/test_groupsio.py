@@ -453,7 +453,8 @@ class TestGroupsioCommand(unittest.TestCase):
                 '--from-date', '1970-01-01',
                 '--no-verify',
                 '--email', 'jsmith@example.com',
-                '--password', 'aaaaa']
+                '--password', 'aaaaa',
+                '--workers', '4']
 
         parsed_args = parser.parse(*args)
         self.assertEqual(parsed_args.group_name, 'acme_group')
@@ -463,6 +464,7 @@ class TestGroupsioCommand(unittest.TestCase):
         self.assertFalse(parsed_args.verify)
         self.assertEqual(parsed_args.email, 'jsmith@example.com')
         self.assertEqual(parsed_args.password, 'aaaaa')
+        self.assertEqual(parsed_args.workers, 4)
 
 
 if __name__ == "__main__":
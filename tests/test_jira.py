@@ -143,6 +143,7 @@ class TestJiraBackend(unittest.TestCase):
         self.assertEqual(jira.origin, JIRA_SERVER_URL)
         self.assertEqual(jira.tag, 'test')
         self.assertEqual(jira.max_results, 5)
+        self.assertEqual(jira.read_ahead, 0)
         self.assertIsNone(jira.client)
 
         # When tag is empty or None it will be set to
@@ -863,6 +864,7 @@ class TestJiraCommand(unittest.TestCase):
                 '--verify', False,
                 '--cert', 'aaaa',
                 '--max-results', '1',
+                '--read-ahead', '2',
                 '--tag', 'test',
                 '--no-archive',
                 '--from-date', '1970-01-01',
@@ -875,6 +877,7 @@ class TestJiraCommand(unittest.TestCase):
         self.assertEqual(parsed_args.verify, False)
         self.assertEqual(parsed_args.cert, 'aaaa')
         self.assertEqual(parsed_args.max_results, 1)
+        self.assertEqual(parsed_args.read_ahead, 2)
         self.assertEqual(parsed_args.tag, 'test')
         self.assertEqual(parsed_args.no_archive, True)
         self.assertEqual(parsed_args.from_date, DEFAULT_DATETIME)
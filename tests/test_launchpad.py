@@ -63,6 +63,7 @@ class TestLaunchpadBackend(unittest.TestCase):
         self.assertEqual(launchpad.package, None)
         self.assertEqual(launchpad.origin, 'https://launchpad.net/mydistribution')
         self.assertEqual(launchpad.tag, 'test')
+        self.assertEqual(launchpad.read_ahead, 0)
         self.assertIsNone(launchpad.client)
 
         launchpad = Launchpad('mydistribution', tag='test', package="mypackage")
@@ -982,6 +983,7 @@ class TestLaunchpadCommand(unittest.TestCase):
                 '--from-date', '1970-01-01',
                 '--items-per-page', '75',
                 '--sleep-time', '600',
+                '--read-ahead', '2',
                 'mydistribution']
 
         parsed_args = parser.parse(*args)
@@ -991,6 +993,7 @@ class TestLaunchpadCommand(unittest.TestCase):
         self.assertEqual(parsed_args.no_archive, True)
         self.assertEqual(parsed_args.items_per_page, '75')
         self.assertEqual(parsed_args.sleep_time, '600')
+        self.assertEqual(parsed_args.read_ahead, 2)
 
 
 if __name__ == "__main__":
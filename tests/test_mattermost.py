@@ -22,6 +22,7 @@
 import datetime
 import os
 import unittest
+import urllib.parse
 
 import httpretty
 import pkg_resources
@@ -70,7 +71,7 @@ def setup_http_server():
 
     def request_callback(method, uri, headers):
         last_request = httpretty.last_request()
-        params = last_request.querystring
+        params = urllib.parse.parse_qs(urllib.parse.urlparse(uri).query)
 
         status = 200
 
@@ -137,6 +138,7 @@ class TestMattermostBackend(unittest.TestCase):
         self.assertEqual(mattermost.sleep_for_rate, True)
         self.assertEqual(mattermost.min_rate_to_sleep, 10)
         self.assertEqual(mattermost.sleep_time, 60)
+        self.assertEqual(mattermost.read_ahead, 0)
         self.assertIsNone(mattermost.client)
 
         # When tag is empty or None it will be set to
@@ -223,6 +225,26 @@ class TestMattermostBackend(unittest.TestCase):
         for i in range(len(expected)):
             self.assertDictEqual(http_requests[i].querystring, expected[i])
 
+    @httpretty.activate
+    def test_fetch_read_ahead(self):
+        """Test whether the same posts are fetched when pages are read ahead"""
+
+        setup_http_server()
+
+        mattermost = Mattermost('https://mattermost.example.com/', 'abcdefghijkl', 'aaaa',
+                                max_items=5)
+        posts = [post for post in mattermost.fetch(from_date=None)]
+
+        mattermost = Mattermost('https://mattermost.example.com/', 'abcdefghijkl', 'aaaa',
+                                max_items=5, read_ahead=2)
+        posts_read_ahead = [post for post in mattermost.fetch(from_date=None)]
+
+        self.assertEqual(len(posts_read_ahead), 9)
+        self.assertListEqual([post['uuid'] for post in posts_read_ahead],
+                             [post['uuid'] for post in posts])
+        self.assertListEqual([post['data'] for post in posts_read_ahead],
+                             [post['data'] for post in posts])
+
     @httpretty.activate
     def test_search_fields(self):
         """Test whether the search_fields is properly set"""
@@ -415,7 +437,8 @@ class TestMattermostCommand(unittest.TestCase):
                 '--from-date', '1970-01-01',
                 '--sleep-for-rate',
                 '--min-rate-to-sleep', '10',
-                '--sleep-time', '10']
+                '--sleep-time', '10',
+                '--read-ahead', '2']
 
         parsed_args = parser.parse(*args)
         self.assertEqual(parsed_args.url, 'https://mattermost.example.com/')
@@ -428,6 +451,7 @@ class TestMattermostCommand(unittest.TestCase):
         self.assertEqual(parsed_args.sleep_for_rate, True)
         self.assertEqual(parsed_args.min_rate_to_sleep, 10)
         self.assertEqual(parsed_args.sleep_time, 10)
+        self.assertEqual(parsed_args.read_ahead, 2)
 
 
 class TestMattermostClient(unittest.TestCase):
@@ -23,6 +23,7 @@
 import bz2
 import datetime
 import gzip
+import mailbox
 import os
 import pkg_resources
 import shutil
@@ -34,12 +35,14 @@ import zipfile
 pkg_resources.declare_namespace('perceval.backends')
 
 from perceval.backend import BackendCommandArgumentParser
-from perceval.utils import DEFAULT_DATETIME
+from perceval.cache import MBoxIndex
+from perceval.utils import DEFAULT_DATETIME, message_to_dict
 from perceval.backends.core.mbox import (logger,
                                          MBox,
                                          MBoxCommand,
                                          MBoxArchive,
-                                         MailingList)
+                                         MailingList,
+                                         _RawMessage)
 
 
 class TestBaseMBox(unittest.TestCase):
@@ -158,6 +161,60 @@ class TestMBoxArchive(TestBaseMBox):
         self.assertIsInstance(container, gzip.GzipFile)
         container.close()
 
+    def test_messages(self):
+        """Check whether messages are read like in mailbox.mbox"""
+
+        for name in ['single', 'complex', 'multipart']:
+            mbox = MBoxArchive(self.files[name])
+            messages = [(msg.get_from(), msg.as_bytes()) for msg in mbox.messages()]
+
+            expected = [(msg.get_from(), msg.as_bytes())
+                        for msg in mailbox.mbox(self.files[name], create=False)]
+
+            self.assertGreater(len(messages), 0)
+            self.assertListEqual(messages, expected)
+
+    def test_messages_compressed(self):
+        """Check whether messages are read from compressed archives"""
+
+        mbox = MBoxArchive(self.files['single'])
+        expected = [msg.as_bytes() for msg in mbox.messages()]
+
+        for ftype in ['bz2', 'gz']:
+            mbox = MBoxArchive(self.cfiles[ftype])
+            messages = [msg.as_bytes() for msg in mbox.messages()]
+            self.assertListEqual(messages, expected)
+
+    def test_raw_messages(self):
+        """Check whether raw messages are parsed on demand"""
+
+        for name in ['complex', 'multipart', 'unixfrom', 'iso8859']:
+            mbox = MBoxArchive(self.files[name])
+
+            for raw, msg in zip(mbox.raw_messages(), mbox.messages()):
+                message = message_to_dict(msg)
+                self.assertEqual(raw.message().as_bytes(), msg.as_bytes())
+                self.assertDictEqual(dict(raw.to_dict()), dict(message))
+
+                del message['body']
+                self.assertDictEqual(dict(raw.headers()), dict(message))
+
+                fields = raw.headers(['Message-ID', 'Date'])
+                self.assertListEqual(sorted(fields.keys()), ['Date', 'Message-ID', 'unixfrom'])
+                self.assertEqual(fields['unixfrom'], message['unixfrom'])
+
+    def test_messages_empty(self):
+        """Check whether no messages are read from an empty archive"""
+
+        empty_path = os.path.join(self.tmp_path, 'empty')
+        open(empty_path, 'w').close()
+
+        mbox = MBoxArchive(empty_path)
+        messages = [msg for msg in mbox.messages()]
+        self.assertListEqual(messages, [])
+
+        os.remove(empty_path)
+
     def test_container_zip(self):
         """Check the type zip of the container of an archive"""
 
@@ -371,38 +428,170 @@ class TestMBoxBackend(TestBaseMBox):
         message = messages[1]['data']
         self.assertDictEqual(message, expected)
 
+    def test_fetch_messages_index(self):
+        """Test whether messages are fetched using the messages index"""
+
+        tmp_path_idx = tempfile.mkdtemp(prefix='perceval_')
+        mbox_path = os.path.join(tmp_path_idx, 'mboxes')
+        index_path = mbox_path + '.index.db'
+        filepath = os.path.join(mbox_path, 'mbox_complex.mbox')
+
+        os.mkdir(mbox_path)
+        shutil.copy(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data/mbox/mbox_complex.mbox'),
+                    mbox_path)
+        from_date = datetime.datetime(2008, 1, 1)
+
+        def fetch(**kwargs):
+            backend = MBox('http://example.com/', mbox_path)
+            return [m['data'] for m in backend.fetch(**kwargs)]
+
+        # The index is created on the first execution
+        expected = fetch()
+        messages = fetch(messages_index=True)
+        self.assertEqual(len(messages), 2)
+        self.assertListEqual(messages, expected)
+        self.assertTrue(os.path.exists(index_path))
+
+        # Files which did not change are not scanned
+        expected = fetch(from_date=from_date)
+
+        with unittest.mock.patch.object(MBoxArchive, 'scan') as mock_scan:
+            messages = fetch(from_date=from_date, messages_index=True)
+            mock_scan.assert_not_called()
+
+        self.assertEqual(len(messages), 1)
+        self.assertListEqual(messages, expected)
+
+        # Files which grew are scanned from their last message
+        last_offset = MBoxIndex(index_path).mbox(filepath)[2]
+        self.assertGreater(last_offset, 0)
+
+        with open(filepath, 'ab') as f_out:
+            with open(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                   'data/mbox/mbox_multipart.mbox'), 'rb') as f_in:
+                f_out.write(b'\n' + f_in.read())
+
+        expected = fetch(from_date=from_date)
+
+        scan = MBoxArchive.scan
+        with unittest.mock.patch.object(MBoxArchive, 'scan', autospec=True) as mock_scan:
+            mock_scan.side_effect = scan
+            messages = fetch(from_date=from_date, messages_index=True)
+            self.assertEqual(mock_scan.call_args[1], {'offset': last_offset})
+
+        self.assertEqual(len(messages), 2)
+        self.assertListEqual(messages, expected)
+        self.assertEqual(len(MBoxIndex(index_path).messages(filepath)), 4)
+
+        # Files which changed are indexed again
+        shutil.copy(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data/mbox/mbox_single.mbox'),
+                    filepath)
+
+        expected = fetch()
+        messages = fetch(messages_index=True)
+        self.assertEqual(len(messages), 1)
+        self.assertListEqual(messages, expected)
+        self.assertEqual(len(MBoxIndex(index_path).messages(filepath)), 1)
+
+        shutil.rmtree(tmp_path_idx)
+
+    def test_fetch_workers(self):
+        """Test whether messages are fetched using a pool of processes"""
+
+        backend = MBox('http://example.com/', self.tmp_path)
+        expected = [m['data'] for m in backend.fetch()]
+
+        messages = [m['data'] for m in backend.fetch(workers=2)]
+        self.assertGreater(len(messages), 0)
+        self.assertListEqual(messages, expected)
+
+        # Archives read using the index are parsed by the backend
+        tmp_path_idx = tempfile.mkdtemp(prefix='perceval_')
+        mbox_path = os.path.join(tmp_path_idx, 'mboxes')
+        shutil.copytree(self.tmp_path, mbox_path)
+
+        backend = MBox('http://example.com/', mbox_path)
+        for _ in range(2):
+            messages = [m['data'] for m in backend.fetch(workers=2, messages_index=True)]
+            self.assertListEqual(messages, expected)
+
+        shutil.rmtree(tmp_path_idx)
+
+    def test_fetch_workers_file_errors(self):
+        """Test whether archives with errors are ignored when a pool of processes is used"""
+
+        tmp_path_ign = tempfile.mkdtemp(prefix='perceval_')
+
+        shutil.copy(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data/mbox/mbox_single.mbox'),
+                    tmp_path_ign)
+
+        # Truncated archive
+        with open(self.cfiles['gz'], 'rb') as f_in:
+            data = f_in.read()
+        with open(os.path.join(tmp_path_ign, 'mbox_error.gz'), 'wb') as f_out:
+            f_out.write(data[:len(data) // 2])
+
+        backend = MBox('http://example.com/', tmp_path_ign)
+
+        with self.assertLogs(logger, level='WARNING') as cm:
+            messages = [m for m in backend.fetch(workers=2)]
+            self.assertRegex(cm.output[0], 'Ignoring .+mbox_error.gz mbox')
+
+        self.assertEqual(len(messages), 1)
+        self.assertEqual(messages[0]['data']['Message-ID'], '<4CF64D10.9020206@domain.com>')
+
+        shutil.rmtree(tmp_path_ign)
+
+    def test_fetch_parse_only_returned(self):
+        """Test whether only the messages returned are fully parsed"""
+
+        from_date = datetime.datetime(2008, 1, 1)
+        backend = MBox('http://example.com/', self.tmp_path)
+        expected = [m['data'] for m in backend.fetch(from_date=from_date)]
+
+        to_dict = _RawMessage.to_dict
+        with unittest.mock.patch.object(_RawMessage, 'to_dict', autospec=True) as mock_to_dict:
+            mock_to_dict.side_effect = to_dict
+            messages = [m['data'] for m in backend.fetch(from_date=from_date)]
+            self.assertEqual(mock_to_dict.call_count, len(expected))
+
+        self.assertLess(len(expected), len([m for m in backend.fetch()]))
+        self.assertListEqual(messages, expected)
+
+        # Invalid messages are not parsed
+        backend = MBox('http://example.com/', self.tmp_error_path)
+
+        with unittest.mock.patch.object(_RawMessage, 'to_dict', autospec=True) as mock_to_dict:
+            mock_to_dict.side_effect = to_dict
+            messages = [m for m in backend.fetch()]
+            self.assertEqual(mock_to_dict.call_count, len(messages))
+
     def test_ignore_file_errors(self):
         """Files with IO errors should be ignored"""
 
         tmp_path_ign = tempfile.mkdtemp(prefix='perceval_')
+        read_messages = MBoxArchive.raw_messages
 
-        def copy_mbox_side_effect(*args, **kwargs):
-            """Copy a mbox archive or raise IO error for 'mbox_multipart.mbox' archive"""
+        def messages_side_effect(mbox):
+            """Read a mbox archive or raise IO error for 'mbox_multipart.mbox' archive"""
 
             error_file = os.path.join(tmp_path_ign, 'mbox_multipart.mbox')
-            mbox = args[0]
 
             if mbox.filepath == error_file:
                 raise OSError('Mock error')
 
-            tmp_path = tempfile.mktemp(prefix='perceval_')
-
-            with mbox.container as f_in:
-                with open(tmp_path, mode='wb') as f_out:
-                    for l in f_in:
-                        f_out.write(l)
-            return tmp_path
+            return read_messages(mbox)
 
         shutil.copy(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data/mbox/mbox_single.mbox'),
                     tmp_path_ign)
         shutil.copy(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data/mbox/mbox_multipart.mbox'),
                     tmp_path_ign)
 
-        # Mock 'copy_mbox' method for forcing to raise an OSError
+        # Mock 'raw_messages' method for forcing to raise an OSError
         # with file 'data/mbox/mbox_multipart.mbox' to check if
         # the code ignores this file
-        with unittest.mock.patch('perceval.backends.core.mbox.MBox._copy_mbox') as mock_copy_mbox:
-            mock_copy_mbox.side_effect = copy_mbox_side_effect
+        with unittest.mock.patch.object(MBoxArchive, 'raw_messages', autospec=True) as mock_messages:
+            mock_messages.side_effect = messages_side_effect
 
             backend = MBox('http://example.com/', tmp_path_ign)
             messages = [m for m in backend.fetch()]
@@ -575,6 +764,16 @@ class TestMBoxCommand(unittest.TestCase):
         self.assertEqual(parsed_args.dirpath, '/tmp/perceval/')
         self.assertEqual(parsed_args.tag, 'test')
         self.assertEqual(parsed_args.from_date, DEFAULT_DATETIME)
+        self.assertFalse(parsed_args.messages_index)
+        self.assertEqual(parsed_args.workers, 1)
+
+        args = ['http://example.com/', '/tmp/perceval/',
+                '--messages-index',
+                '--workers', '4']
+
+        parsed_args = parser.parse(*args)
+        self.assertTrue(parsed_args.messages_index)
+        self.assertEqual(parsed_args.workers, 4)
 
 
 if __name__ == "__main__":
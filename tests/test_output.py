@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2019 Bitergia
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import io
+import json
+import unittest
+import unittest.mock
+
+import perceval.output
+from perceval.output import ItemsWriter, logger
+
+
+ITEMS = [
+    {'uuid': str(x), 'data': {'number': x, 'name': 'item ñ %s' % x, 'tags': ['a', 'b']}}
+    for x in range(5)
+]
+
+
+class FailingOutput(io.StringIO):
+    """Output that fails when data is written"""
+
+    def write(self, s):
+        raise IOError("disk full")
+
+
+class TestItemsWriter(unittest.TestCase):
+    """ItemsWriter tests"""
+
+    def test_init(self):
+        """Test whether the attributes are initialized"""
+
+        outfile = io.StringIO()
+        writer = ItemsWriter(outfile)
+
+        self.assertEqual(writer.outfile, outfile)
+        self.assertFalse(writer.json_line)
+        self.assertTrue(writer.sort_keys)
+        self.assertEqual(writer.buffer_size, ItemsWriter.DEFAULT_BUFFER_SIZE)
+        self.assertFalse(writer.threaded)
+        self.assertEqual(writer.queue_size, ItemsWriter.DEFAULT_QUEUE_SIZE)
+
+    def test_write(self):
+        """Test whether indented items are written"""
+
+        outfile = io.StringIO()
+        writer = ItemsWriter(outfile)
+
+        for item in ITEMS:
+            writer.write(item)
+        writer.flush()
+
+        expected = ''.join([json.dumps(item, indent=4, sort_keys=True) + '\n' for item in ITEMS])
+        self.assertEqual(outfile.getvalue(), expected)
+
+    def test_write_json_line(self):
+        """Test whether items are written in a single line"""
+
+        outfile = io.StringIO()
+        writer = ItemsWriter(outfile, json_line=True)
+
+        for item in ITEMS:
+            writer.write(item)
+        writer.flush()
+
+        lines = outfile.getvalue().split('\n')
+        self.assertEqual(len(lines), 6)
+        self.assertEqual(lines[-1], '')
+        self.assertListEqual([json.loads(line) for line in lines[:-1]], ITEMS)
+
+        # Keys are sorted
+        self.assertTrue(lines[0].startswith('{"data":{"name":'))
+
+    @unittest.mock.patch('perceval.output.orjson', None)
+    def test_write_json_line_stdlib(self):
+        """Test whether JSON lines are encoded with json when orjson is not available"""
+
+        outfile = io.StringIO()
+
+        with self.assertLogs(logger, level='WARNING') as cm:
+            writer = ItemsWriter(outfile, json_line=True, fast_json=True)
+        self.assertEqual(cm.output[0],
+                         'WARNING:perceval.output:orjson package is not installed; '
+                         'items will be encoded with json')
+
+        for item in ITEMS:
+            writer.write(item)
+        writer.flush()
+
+        expected = ''.join([json.dumps(item, separators=(',', ':'), sort_keys=True) + '\n'
+                            for item in ITEMS])
+        self.assertEqual(outfile.getvalue(), expected)
+
+    @unittest.skipIf(perceval.output.orjson is None, "orjson is not installed")
+    def test_write_orjson(self):
+        """Test whether orjson is only used when it is requested"""
+
+        writer = ItemsWriter(io.StringIO(), json_line=True)
+        self.assertIsNone(writer._orjson_opts)
+
+        writer = ItemsWriter(io.StringIO(), fast_json=True)
+        self.assertIsNone(writer._orjson_opts)
+
+        writer = ItemsWriter(io.StringIO(), json_line=True, fast_json=True)
+        self.assertIsNotNone(writer._orjson_opts)
+
+    @unittest.skipIf(perceval.output.orjson is None, "orjson is not installed")
+    def test_write_orjson_non_ascii(self):
+        """Test whether orjson escapes non-ASCII characters like json"""
+
+        items = [
+            {'name': 'Pi\u00f1\u00e9iro \u4e2d\u6587', 'text': 'emoji \U0001f600\x7f\x00\n'},
+            {'\u00e7\u00e0': ['\U00010000', '\U0010ffff', '\uffff'], 'number': 1}
+        ]
+
+        outfile = io.StringIO()
+        writer = ItemsWriter(outfile, json_line=True, fast_json=True)
+
+        for item in items:
+            writer.write(item)
+        writer.flush()
+
+        expected = ''.join([json.dumps(item, separators=(',', ':'), sort_keys=True) + '\n'
+                            for item in items])
+        self.assertEqual(outfile.getvalue(), expected)
+
+    @unittest.skipIf(perceval.output.orjson is None, "orjson is not installed")
+    def test_write_orjson_fallback(self):
+        """Test whether items orjson cannot encode are encoded with json"""
+
+        outfile = io.StringIO()
+        writer = ItemsWriter(outfile, json_line=True, fast_json=True)
+
+        item = {'number': 2 ** 70, 'name': 'a'}
+        writer.write(item)
+        writer.flush()
+
+        self.assertEqual(outfile.getvalue(), '{"name":"a","number":1180591620717411303424}\n')
+
+    def test_write_unsorted_keys(self):
+        """Test whether keys are not sorted when it is disabled"""
+
+        item = {'z': 1, 'a': {'y': 2, 'b': 3}}
+
+        for json_line in [True, False]:
+            outfile = io.StringIO()
+            writer = ItemsWriter(outfile, json_line=json_line, sort_keys=False)
+            writer.write(item)
+            writer.flush()
+
+            obj = outfile.getvalue()
+            self.assertLess(obj.index('"z"'), obj.index('"a"'))
+            self.assertLess(obj.index('"y"'), obj.index('"b"'))
+            self.assertDictEqual(json.loads(obj), item)
+
+    def test_buffer(self):
+        """Test whether items are buffered before writing them"""
+
+        outfile = io.StringIO()
+        writer = ItemsWriter(outfile, json_line=True, buffer_size=100)
+
+        writer.write({'a': 1})
+        self.assertEqual(outfile.getvalue(), '')
+
+        writer.write({'b': 'x' * 100})
+        self.assertEqual(outfile.getvalue(), '{"a":1}\n{"b":"' + 'x' * 100 + '"}\n')
+
+        writer.write({'c': 3})
+        self.assertNotIn('"c"', outfile.getvalue())
+
+        writer.flush()
+        self.assertTrue(outfile.getvalue().endswith('{"c":3}\n'))
+
+    def test_threaded(self):
+        """Test whether items are written in the same order by a background thread"""
+
+        outfile = io.StringIO()
+        writer = ItemsWriter(outfile, json_line=True, threaded=True, queue_size=2)
+
+        for item in ITEMS:
+            writer.write(item)
+        writer.flush()
+
+        self.assertIsNone(writer._worker)
+
+        lines = outfile.getvalue().splitlines()
+        self.assertListEqual([json.loads(line) for line in lines], ITEMS)
+
+        # The thread is started again after flushing the writer
+        writer.write(ITEMS[0])
+        writer.flush()
+
+        lines = outfile.getvalue().splitlines()
+        self.assertEqual(len(lines), 6)
+        self.assertDictEqual(json.loads(lines[-1]), ITEMS[0])
+
+    def test_write_error(self):
+        """Test whether errors are raised when the output cannot be written"""
+
+        writer = ItemsWriter(FailingOutput(), json_line=True, buffer_size=1)
+
+        with self.assertRaises(IOError):
+            writer.write(ITEMS[0])
+
+    def test_threaded_write_error(self):
+        """Test whether errors found in the background thread are raised"""
+
+        writer = ItemsWriter(FailingOutput(), json_line=True, buffer_size=1,
+                             threaded=True)
+        writer.write(ITEMS[0])
+
+        with self.assertRaises(IOError):
+            writer.flush()
+
+        self.assertIsNone(writer._worker)
+
+        # The error is raised only once
+        writer.flush()
+
+
+if __name__ == "__main__":
+    unittest.main(warnings='ignore')
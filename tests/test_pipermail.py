@@ -394,6 +394,36 @@ class TestPipermailBackend(unittest.TestCase):
             self.assertEqual(message['category'], 'message')
             self.assertEqual(message['tag'], 'http://example.com/')
 
+    @httpretty.activate
+    def test_fetch_workers(self):
+        """Test whether it parses messages using a pool of processes"""
+
+        pipermail_index = read_file('data/pipermail/pipermail_index.html')
+        mbox_nov = read_file('data/pipermail/pipermail_2015_november.mbox')
+        mbox_march = read_file('data/pipermail/pipermail_2016_march.mbox')
+        mbox_april = read_file('data/pipermail/pipermail_2016_april.mbox')
+
+        httpretty.register_uri(httpretty.GET,
+                               PIPERMAIL_URL,
+                               body=pipermail_index)
+        httpretty.register_uri(httpretty.GET,
+                               PIPERMAIL_URL + '2015-November.txt.gz',
+                               body=mbox_nov)
+        httpretty.register_uri(httpretty.GET,
+                               PIPERMAIL_URL + '2016-March.txt',
+                               body=mbox_march)
+        httpretty.register_uri(httpretty.GET,
+                               PIPERMAIL_URL + '2016-April.txt',
+                               body=mbox_april)
+
+        backend = Pipermail('http://example.com/', self.tmp_path)
+        expected = [m['data'] for m in backend.fetch()]
+
+        messages = [m['data'] for m in backend.fetch(workers=2)]
+
+        self.assertEqual(len(messages), 8)
+        self.assertListEqual(messages, expected)
+
     @httpretty.activate
     def test_fetch_apache(self):
         """Test whether it fetches and parses apache's messages"""
@@ -579,7 +609,8 @@ class TestPipermailCommand(unittest.TestCase):
                 '--mboxes-path', '/tmp/perceval/',
                 '--tag', 'test',
                 '--from-date', '1970-01-01',
-                '--no-verify']
+                '--no-verify',
+                '--workers', '4']
 
         parsed_args = parser.parse(*args)
         self.assertEqual(parsed_args.url, 'http://example.com/')
@@ -587,6 +618,7 @@ class TestPipermailCommand(unittest.TestCase):
         self.assertEqual(parsed_args.tag, 'test')
         self.assertEqual(parsed_args.from_date, DEFAULT_DATETIME)
         self.assertFalse(parsed_args.verify)
+        self.assertEqual(parsed_args.workers, 4)
 
 
 if __name__ == "__main__":
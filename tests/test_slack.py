@@ -25,12 +25,16 @@ import dateutil
 import httpretty
 import os
 import pkg_resources
+import shutil
+import tempfile
 import unittest
 import unittest.mock
+import urllib.parse
 
 pkg_resources.declare_namespace('perceval.backends')
 
 from perceval.backend import BackendCommandArgumentParser
+from perceval.cache import UsersCache
 from perceval.utils import DEFAULT_DATETIME
 from perceval.backends.core.slack import (logger,
                                           Slack,
@@ -77,7 +81,7 @@ def setup_http_server(archived_channel=False):
 
     def request_callback(method, uri, headers):
         last_request = httpretty.last_request()
-        params = last_request.querystring
+        params = urllib.parse.parse_qs(urllib.parse.urlparse(uri).query)
 
         status = 200
 
@@ -164,6 +168,7 @@ class TestSlackBackend(unittest.TestCase):
         self.assertEqual(slack.tag, 'test')
         self.assertEqual(slack.channel, 'C011DUKE8')
         self.assertEqual(slack.max_items, 5)
+        self.assertEqual(slack.read_ahead, 0)
         self.assertIsNone(slack.client)
 
         # When tag is empty or None it will be set to
@@ -291,6 +296,65 @@ class TestSlackBackend(unittest.TestCase):
             self.assertIn((SlackClient.AUTHORIZATION_HEADER, 'Bearer aaaa'), http_requests[i].headers._headers)
             self.assertDictEqual(http_requests[i].querystring, expected[i])
 
+    @httpretty.activate
+    @unittest.mock.patch('perceval.backends.core.slack.datetime_utcnow')
+    def test_fetch_read_ahead(self, mock_utcnow):
+        """Test if the same messages are fetched when pages are read ahead"""
+
+        mock_utcnow.return_value = datetime.datetime(2017, 1, 1,
+                                                     tzinfo=dateutil.tz.tzutc())
+
+        setup_http_server()
+
+        slack = Slack('C011DUKE8', 'aaaa', max_items=5)
+        messages = [msg for msg in slack.fetch(from_date=None)]
+
+        slack = Slack('C011DUKE8', 'aaaa', max_items=5, read_ahead=2)
+        messages_read_ahead = [msg for msg in slack.fetch(from_date=None)]
+
+        self.assertEqual(len(messages_read_ahead), 9)
+        self.assertListEqual([msg['uuid'] for msg in messages_read_ahead],
+                             [msg['uuid'] for msg in messages])
+        self.assertListEqual([msg['data'] for msg in messages_read_ahead],
+                             [msg['data'] for msg in messages])
+
+    @httpretty.activate
+    @unittest.mock.patch('perceval.backends.core.slack.datetime_utcnow')
+    def test_fetch_users_cache(self, mock_utcnow):
+        """Test if users are read from the persistent cache"""
+
+        mock_utcnow.return_value = datetime.datetime(2017, 1, 1,
+                                                     tzinfo=dateutil.tz.tzutc())
+
+        test_path = tempfile.mkdtemp(prefix='perceval_')
+        self.addCleanup(shutil.rmtree, test_path)
+
+        users_cache = UsersCache(os.path.join(test_path, 'users.db'))
+
+        http_requests = setup_http_server()
+
+        slack = Slack('C011DUKE8', 'aaaa', max_items=5, users_cache=users_cache)
+        messages = [msg for msg in slack.fetch(from_date=None)]
+
+        self.assertEqual(len(messages), 9)
+        self.assertEqual(len(http_requests), 8)
+
+        user = users_cache.get('Slack', 'https://slack.com/', 'U0003')
+        self.assertEqual(user['profile']['email'], 'dizquierdo@example.com')
+
+        # Users are not requested again
+        slack = Slack('C011DUKE8', 'aaaa', max_items=5, users_cache=users_cache)
+        cached_messages = [msg for msg in slack.fetch(from_date=None)]
+
+        self.assertEqual(len(http_requests), 13)
+
+        for request in http_requests[8:]:
+            self.assertNotIn('user', request.querystring)
+
+        for x in range(len(messages)):
+            self.assertEqual(cached_messages[x]['uuid'], messages[x]['uuid'])
+            self.assertEqual(cached_messages[x]['data'], messages[x]['data'])
+
     @httpretty.activate
     @unittest.mock.patch('perceval.backends.core.slack.datetime_utcnow')
     def test_search_fields(self, mock_utcnow):
@@ -845,6 +909,8 @@ class TestSlackCommand(unittest.TestCase):
                 '--api-token', 'abcdefgh',
                 '--from-date', '1970-01-01',
                 '--max-items', '10',
+                '--read-ahead', '2',
+                '--users-cache-path', '/tmp/users.db',
                 'C001']
 
         parsed_args = parser.parse(*args)
@@ -854,6 +920,8 @@ class TestSlackCommand(unittest.TestCase):
         self.assertEqual(parsed_args.no_archive, True)
         self.assertEqual(parsed_args.api_token, 'abcdefgh')
         self.assertEqual(parsed_args.max_items, 10)
+        self.assertEqual(parsed_args.read_ahead, 2)
+        self.assertEqual(parsed_args.users_cache_path, '/tmp/users.db')
 
 
 if __name__ == "__main__":
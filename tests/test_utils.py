@@ -21,21 +21,32 @@
 #
 
 import bz2
+import concurrent.futures
 import datetime
 import email
 import gzip
+import lzma
 import os
 import shutil
 import tempfile
+import threading
+import time
 import unittest
+import unittest.mock
 import zipfile
 
-from perceval.errors import ParseError
-from perceval.utils import (check_compressed_file_type,
+from perceval.errors import CacheError, ParseError
+from perceval.utils import (bounded_map,
+                            check_compressed_file_type,
+                            message_headers_to_dict,
                             message_to_dict,
                             months_range,
+                            partial_result_items,
                             remove_invalid_xml_chars,
-                            xml_to_dict)
+                            sqlite_execute,
+                            workers_mapper,
+                            xml_to_dict,
+                            xml_to_dicts)
 
 
 def read_file(filename, mode='r'):
@@ -54,6 +65,7 @@ class TestCheckCompressedFileType(unittest.TestCase):
         cls.files = {
             'bz2': os.path.join(cls.tmp_path, 'bz2'),
             'gz': os.path.join(cls.tmp_path, 'gz'),
+            'xz': os.path.join(cls.tmp_path, 'xz'),
             'zip': os.path.join(cls.tmp_path, 'zip')
         }
 
@@ -63,6 +75,8 @@ class TestCheckCompressedFileType(unittest.TestCase):
                 mod = bz2
             elif ftype == 'gz':
                 mod = gzip
+            elif ftype == 'xz':
+                mod = lzma
             else:
                 mod = zipfile
 
@@ -140,6 +154,187 @@ class TestMonthsRange(unittest.TestCase):
         self.assertListEqual(result, [])
 
 
+class TestWorkersMapper(unittest.TestCase):
+    """Unit tests for workers_mapper function"""
+
+    def test_one_worker(self):
+        """Test whether items are mapped by the calling thread when there is one worker"""
+
+        threads = set()
+
+        def square(x):
+            threads.add(threading.get_ident())
+            return x * x
+
+        with workers_mapper(1) as mapper:
+            self.assertIs(mapper, map)
+            result = list(mapper(square, range(5)))
+
+        self.assertListEqual(result, [0, 1, 4, 9, 16])
+        self.assertSetEqual(threads, {threading.get_ident()})
+
+    def test_workers(self):
+        """Test whether items are mapped concurrently keeping their order"""
+
+        lock = threading.Lock()
+        running = [0, 0]
+
+        def square(x):
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            time.sleep(0.05 * (5 - x))
+            with lock:
+                running[0] -= 1
+            return x * x
+
+        with workers_mapper(3) as mapper:
+            result = list(mapper(square, range(5)))
+
+        self.assertListEqual(result, [0, 1, 4, 9, 16])
+        self.assertEqual(running[1], 3)
+
+
+class TestBoundedMap(unittest.TestCase):
+    """Unit tests for bounded_map function"""
+
+    def test_bounded_map(self):
+        """Test whether results are returned in order with a bounded number of pending calls"""
+
+        submitted = []
+
+        def items():
+            for x in range(10):
+                submitted.append(x)
+                yield x
+
+        def square(x):
+            time.sleep(0.01 * (x % 3))
+            return x * x
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            results = bounded_map(executor, square, items(), 3)
+
+            self.assertEqual(next(results), 0)
+            self.assertListEqual(submitted, [0, 1, 2])
+
+            self.assertEqual(next(results), 1)
+            self.assertListEqual(submitted, [0, 1, 2, 3])
+
+            self.assertListEqual(list(results), [4, 9, 16, 25, 36, 49, 64, 81])
+
+    def test_close(self):
+        """Test whether pending calls are cancelled when the generator is closed"""
+
+        started = threading.Event()
+        release = threading.Event()
+        called = []
+
+        def wait(x):
+            called.append(x)
+            if x > 0:
+                started.set()
+                release.wait()
+            return x
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+            results = bounded_map(executor, wait, range(10), 4)
+
+            self.assertEqual(next(results), 0)
+            started.wait()
+            results.close()
+            release.set()
+
+        self.assertListEqual(called, [0, 1])
+
+    def test_error(self):
+        """Test whether errors are raised when their result is requested"""
+
+        def check(x):
+            if x == 2:
+                raise ValueError(x)
+            return x
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            results = bounded_map(executor, check, range(5), 2)
+
+            self.assertEqual(next(results), 0)
+            self.assertEqual(next(results), 1)
+
+            with self.assertRaises(ValueError):
+                next(results)
+
+
+class TestPartialResultItems(unittest.TestCase):
+    """Unit tests for partial_result_items function"""
+
+    def test_items(self):
+        """Test whether the items of a result are returned"""
+
+        items = list(partial_result_items(([1, 2, 3], None)))
+        self.assertListEqual(items, [1, 2, 3])
+
+    def test_error(self):
+        """Test whether the error is raised after returning the items"""
+
+        items = []
+
+        with self.assertRaises(ParseError):
+            for item in partial_result_items(([1, 2], ParseError(cause="error"))):
+                items.append(item)
+
+        self.assertListEqual(items, [1, 2])
+
+
+class TestSQLiteExecute(unittest.TestCase):
+    """Unit tests for sqlite_execute function"""
+
+    def setUp(self):
+        self.tmp_path = tempfile.mkdtemp(prefix='perceval_')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_path)
+
+    def test_execute(self):
+        """Test whether statements are run in a transaction and the last rows are returned"""
+
+        db_path = os.path.join(self.tmp_path, 'test.db')
+
+        rows = sqlite_execute(db_path,
+                              [("CREATE TABLE test (id INTEGER, name TEXT)", ()),
+                               ("INSERT INTO test VALUES (?, ?)", (1, 'a')),
+                               ("INSERT INTO test VALUES (?, ?)", (2, 'b'))],
+                              10, "test db", CacheError)
+        self.assertListEqual(rows, [])
+
+        rows = sqlite_execute(db_path,
+                              [("SELECT id, name FROM test ORDER BY id", ())],
+                              10, "test db", CacheError)
+        self.assertListEqual(rows, [(1, 'a'), (2, 'b')])
+
+        # Statements are not committed when one of them fails
+        with self.assertRaises(CacheError):
+            sqlite_execute(db_path,
+                           [("INSERT INTO test VALUES (?, ?)", (3, 'c')),
+                            ("INSERT INTO unknown VALUES (?)", (4,))],
+                           10, "test db", CacheError)
+
+        rows = sqlite_execute(db_path, [("SELECT COUNT(*) FROM test", ())],
+                              10, "test db", CacheError)
+        self.assertListEqual(rows, [(2,)])
+
+    def test_error(self):
+        """Test whether database errors are raised using the given class"""
+
+        db_path = os.path.join(self.tmp_path, 'invalid.db')
+
+        with open(db_path, 'w') as fd:
+            fd.write("Invalid database file")
+
+        with self.assertRaisesRegex(ParseError, "test db .+invalid.db error; cause: "):
+            sqlite_execute(db_path, [("SELECT * FROM sqlite_master", ())], 10, "test db", ParseError)
+
+
 class TestMessagetoDict(unittest.TestCase):
     """Unit tests for message_to_dict"""
 
@@ -216,6 +411,46 @@ class TestMessagetoDict(unittest.TestCase):
         self.assertEqual(len(html_body), 1557)
 
 
+class TestMessageHeadersToDict(unittest.TestCase):
+    """Unit tests for message_headers_to_dict"""
+
+    def test_convert_headers(self):
+        """Test whether it converts the headers of an email message"""
+
+        raw_email = read_file('data/utils/email_single.txt')
+        msg = email.message_from_string(raw_email)
+
+        message = message_headers_to_dict(msg)
+        message = {k: v for k, v in message.items()}
+
+        expected = {
+            'From': 'goran at domain.com ( Göran Lastname )',
+            'Date': 'Wed, 01 Dec 2010 14:26:40 +0100',
+            'Subject': '[List-name] Protocol Buffers anyone?',
+            'Message-ID': '<4CF64D10.9020206@domain.com>',
+            'unixfrom': None
+        }
+
+        self.assertDictEqual(message, expected)
+
+    def test_convert_some_headers(self):
+        """Test whether it only converts the given headers"""
+
+        raw_email = read_file('data/utils/email_single.txt')
+        msg = email.message_from_string(raw_email)
+
+        message = message_headers_to_dict(msg, headers=['message-id', 'Date', 'Reply-To'])
+        message = {k: v for k, v in message.items()}
+
+        expected = {
+            'Date': 'Wed, 01 Dec 2010 14:26:40 +0100',
+            'Message-ID': '<4CF64D10.9020206@domain.com>',
+            'unixfrom': None
+        }
+
+        self.assertDictEqual(message, expected)
+
+
 class TestRemoveInvalidXMLChars(unittest.TestCase):
     """Unit tests for remove_invalid_xml_characters"""
 
@@ -274,5 +509,49 @@ class TestXMLtoDict(unittest.TestCase):
         self.assertRaises(ParseError, xml_to_dict, raw_xml)
 
 
+class TestXMLtoDicts(unittest.TestCase):
+    """Unit tests for xml_to_dicts"""
+
+    def test_xml_to_dicts(self):
+        """Check whether it converts the elements of a XML file to dicts"""
+
+        raw_xml = read_file('data/bugzilla/bugzilla_bugs_details.xml')
+        bugs = [bug for bug in xml_to_dicts(raw_xml, 'bug')]
+
+        self.assertEqual(len(bugs), 5)
+        self.assertListEqual(bugs, xml_to_dict(raw_xml)['bug'])
+
+    @unittest.mock.patch('perceval.utils.XML_CHUNK_SIZE', 16)
+    def test_xml_to_dicts_chunks(self):
+        """Check whether it converts the elements when the stream is fed in chunks"""
+
+        raw_xml = read_file('data/utils/bugzilla_bugs_invalid_chars.xml')
+        bugs = [bug for bug in xml_to_dicts(raw_xml, 'bug')]
+
+        self.assertEqual(len(bugs), 1)
+        self.assertListEqual(bugs, xml_to_dict(raw_xml)['bug'])
+
+        bug = bugs[0]
+        self.assertEqual(bug['bug_id'][0]['__text__'], '25299')
+        self.assertEqual(len(bug['cc']), 2)
+        self.assertEqual(len(bug['long_desc']), 11)
+
+    def test_no_elements(self):
+        """Check whether it does not return anything when the tag is not found"""
+
+        raw_xml = read_file('data/utils/bugzilla_bug.xml')
+        elements = [element for element in xml_to_dicts(raw_xml, 'long_desc')]
+
+        self.assertListEqual(elements, [])
+
+    def test_invalid_xml(self):
+        """Check whether it raises an exception when the XML is invalid"""
+
+        raw_xml = read_file('data/utils/xml_invalid.xml')
+
+        with self.assertRaises(ParseError):
+            _ = [bug for bug in xml_to_dicts(raw_xml, 'bug')]
+
+
 if __name__ == "__main__":
     unittest.main()